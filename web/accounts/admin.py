@@ -178,6 +178,7 @@ class TrustedDeviceAdmin(admin.ModelAdmin):
 
 @admin.register(KycDocument)
 class KycDocumentAdmin(admin.ModelAdmin):
-    list_display = ("user", "document_type", "status", "created_at", "reviewed_at", "reviewed_by")
+    list_display = ("user", "document_type", "status", "processing_status", "created_at", "reviewed_at", "reviewed_by")
     search_fields = ("user__email", "reference_code")
-    list_filter = ("status", "document_type")
+    list_filter = ("status", "processing_status", "document_type")
+    readonly_fields = ("processing_status", "processing_attempts", "processing_error", "thumbnail")
@@ -0,0 +1,24 @@
+# accounts/management/commands/process_kyc_documents.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from accounts.services.kyc_documents import process_pending_documents
+
+
+class Command(BaseCommand):
+    help = "Procesează documentele KYC rămase PENDING (sau blocate în PROCESSING): scanare, format, thumbnail."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Număr maxim de documente.")
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=30,
+            help="Documentele PROCESSING neatinse de atât sunt reluate (proces oprit la jumătate).",
+        )
+
+    def handle(self, *args, **options):
+        processed = process_pending_documents(limit=options["limit"], stale_minutes=options["stale_minutes"])
+        self.stdout.write(self.style.SUCCESS(f"Documente KYC: {processed} preluate pentru procesare."))
@@ -0,0 +1,46 @@
+# accounts/management/commands/recompute_seller_tiers.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from accounts.services.seller_tiers import get_tier_table, invalidate_tier_table, recompute_all_seller_tiers
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculează lifetime_sales_net, nivelul și comisionul pentru toți sellerii "
+        "din comenzile plătite (un singur GROUP BY)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Doar raportează, nu scrie.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--max-changes", type=int, default=50, help="Câte schimbări se afișează.")
+
+    def handle(self, *args, **options):
+        invalidate_tier_table()
+        table = get_tier_table()
+        self.stdout.write(
+            self.style.WARNING(
+                f"== Seller tiers (v{table.version}) "
+                + ", ".join(f"{k}>={v}" for k, v in table.thresholds.items())
+                + " =="
+            )
+        )
+
+        report = recompute_all_seller_tiers(
+            dry_run=options["dry_run"],
+            batch_size=options["batch_size"],
+            max_changes=options["max_changes"],
+        )
+
+        for user_id, old, new in report.changes:
+            self.stdout.write(f"  user={user_id}: {old} -> {new}")
+        if report.changed > len(report.changes):
+            self.stdout.write(f"  ... încă {report.changed - len(report.changes)} schimbări")
+
+        mode = "dry-run" if report.dry_run else "scrise"
+        self.stdout.write(
+            self.style.SUCCESS(f"Selleri: {report.sellers_seen} | schimbări: {report.changed} ({mode})")
+        )
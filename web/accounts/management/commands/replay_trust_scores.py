@@ -0,0 +1,71 @@
+# accounts/management/commands/replay_trust_scores.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import TrustScoreEvent
+from accounts.services.trust_replay import replay_trust_scores, replay_trust_scores_parallel
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculează buyer/seller trust score din jurnalul TrustScoreEvent cu ponderile curente. "
+        "Implicit dry-run (doar raport de diferențe); --commit scrie scorurile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--commit", action="store_true", help="Scrie scorurile recalculate (implicit: dry-run).")
+        parser.add_argument(
+            "--subject",
+            choices=[TrustScoreEvent.SUBJECT_BUYER, TrustScoreEvent.SUBJECT_SELLER],
+            default=None,
+            help="Doar BUYER sau doar SELLER.",
+        )
+        parser.add_argument("--user-min", type=int, default=None, help="user_id minim (inclusiv).")
+        parser.add_argument("--user-max", type=int, default=None, help="user_id maxim (inclusiv).")
+        parser.add_argument("--workers", type=int, default=1, help="Procese paralele (partiționare pe user_id). Pe SQLite folosește 1.")
+        parser.add_argument("--partitions", type=int, default=None, help="Număr intervale user_id (implicit = workers).")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--max-diffs", type=int, default=50, help="Câte diferențe se afișează în raport.")
+
+    def handle(self, *args, **options):
+        dry_run = not options["commit"]
+        common = dict(
+            subject=options["subject"],
+            dry_run=dry_run,
+            chunk_size=options["chunk_size"],
+            batch_size=options["batch_size"],
+            max_diffs=options["max_diffs"],
+        )
+
+        if options["workers"] > 1:
+            if options["user_min"] is not None or options["user_max"] is not None:
+                self.stdout.write(self.style.WARNING("--user-min/--user-max sunt ignorate în modul paralel."))
+            report = replay_trust_scores_parallel(
+                workers=options["workers"],
+                partitions=options["partitions"],
+                **common,
+            )
+        else:
+            report = replay_trust_scores(
+                user_id_min=options["user_min"],
+                user_id_max=options["user_max"],
+                **common,
+            )
+
+        mode = "DRY-RUN" if dry_run else "COMMIT"
+        self.stdout.write(self.style.WARNING(f"== Trust score replay ({mode}) =="))
+        for d in report.diffs:
+            current = "-" if d.current is None else d.current
+            self.stdout.write(f"  user={d.user_id} {d.subject}: {current} -> {d.replayed}")
+        if report.changed > len(report.diffs):
+            self.stdout.write(f"  ... încă {report.changed - len(report.diffs)} diferențe")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Users: {report.users_seen} | events: {report.events_seen} | "
+                f"diferențe: {report.changed} | scrise: {report.written}"
+            )
+        )
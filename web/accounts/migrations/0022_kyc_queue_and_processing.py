@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:50
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Case, F, Value, When
+
+
+def backfill_kyc_queue(apps, schema_editor):
+    KycRequest = apps.get_model("accounts", "KycRequest")
+    KycRequest.objects.update(
+        submitted_at=F("created_at"),
+        priority_rank=Case(
+            When(status="NEEDS_MORE_INFO", then=Value(0)),
+            When(status="IN_REVIEW", then=Value(1)),
+            When(status="NOT_STARTED", then=Value(2)),
+            When(status="REJECTED", then=Value(3)),
+            When(status="APPROVED", then=Value(4)),
+            default=Value(9),
+            output_field=models.PositiveSmallIntegerField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_remove_address_addr_non_billing_cannot_be_default_billing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kycdocument',
+            name='processing_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='kycdocument',
+            name='processing_error',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='eroare procesare'),
+        ),
+        migrations.AddField(
+            model_name='kycdocument',
+            name='processing_status',
+            field=models.CharField(choices=[('PENDING', 'În așteptare'), ('PROCESSING', 'În procesare'), ('READY', 'Procesat'), ('FAILED', 'Respins automat')], default='READY', editable=False, max_length=10, verbose_name='procesare fișier'),
+        ),
+        migrations.AddField(
+            model_name='kycdocument',
+            name='thumbnail',
+            field=models.FileField(blank=True, default='', editable=False, max_length=255, upload_to='kyc_documents/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='kycrequest',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2, editable=False),
+        ),
+        migrations.AddField(
+            model_name='kycrequest',
+            name='submitted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Ultima intrare în verificare (ordinea FIFO din coada staff).'),
+        ),
+        migrations.RunPython(backfill_kyc_queue, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='kycdocument',
+            index=models.Index(fields=['processing_status', 'updated_at'], name='kyc_doc_processing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kycrequest',
+            index=models.Index(fields=['priority_rank', 'submitted_at', 'id'], name='kyc_request_queue_idx'),
+        ),
+    ]
@@ -522,18 +522,16 @@ class SellerProfile(models.Model):
 
     @staticmethod
     def _tier_for_sales(sales_net: Decimal) -> str:
-        sales_net = Decimal(sales_net or "0")
-        if sales_net >= SELLER_TIER_THRESHOLDS_NET_RON["VIP"]:
-            return "VIP"
-        if sales_net >= SELLER_TIER_THRESHOLDS_NET_RON["TOP"]:
-            return "TOP"
-        if sales_net >= SELLER_TIER_THRESHOLDS_NET_RON["RISING"]:
-            return "RISING"
-        return "AMATOR"
+        from .services.seller_tiers import get_tier_table
+
+        return get_tier_table().tier_for(sales_net)
 
     def recompute_tier(self, *, commit: bool = True) -> bool:
-        target_level = self._tier_for_sales(self.lifetime_sales_net)
-        target_commission = SELLER_COMMISSION_BY_TIER.get(target_level, Decimal("9.00"))
+        from .services.seller_tiers import get_tier_table
+
+        tiers = get_tier_table()
+        target_level = tiers.tier_for(self.lifetime_sales_net)
+        target_commission = tiers.commission_for(target_level)
 
         changed = False
         if self.seller_level != target_level:
@@ -811,8 +809,24 @@ class KycRequest(models.Model):
         (STATUS_REJECTED, "Respins"),
     )
 
+    # cheia de ordonare a cozii staff = (priority_rank, submitted_at, id); mic = mai urgent
+    PRIORITY_RANK = {
+        STATUS_NEEDS_MORE_INFO: 0,
+        STATUS_IN_REVIEW: 1,
+        STATUS_NOT_STARTED: 2,
+        STATUS_REJECTED: 3,
+        STATUS_APPROVED: 4,
+    }
+    PRIORITY_RANK_DEFAULT = 9
+
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name="kyc_request")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_NOT_STARTED)
+    # derivat din status (save())
+    priority_rank = models.PositiveSmallIntegerField(default=2, editable=False)
+    submitted_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Ultima intrare în verificare (ordinea FIFO din coada staff).",
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -834,6 +848,11 @@ class KycRequest(models.Model):
     )
     rejection_reason = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["priority_rank", "submitted_at", "id"], name="kyc_request_queue_idx"),
+        ]
+
     def __str__(self):
         return f"KYC Request {self.user.email} ({self.status})"
 
@@ -894,14 +913,20 @@ class KycRequest(models.Model):
     def ensure_in_review_from_documents(self, *, commit: bool = True) -> None:
         if self.status in (self.STATUS_NOT_STARTED, self.STATUS_NEEDS_MORE_INFO):
             self.status = self.STATUS_IN_REVIEW
+            self.submitted_at = timezone.now()
             if commit:
-                self.save(update_fields=["status", "updated_at"])
+                self.save(update_fields=["status", "submitted_at", "updated_at"])
 
     def save(self, *args, **kwargs):
         old_status = None
         if self.pk:
             old_status = type(self).objects.filter(pk=self.pk).values_list("status", flat=True).first()
 
+        self.priority_rank = self.PRIORITY_RANK.get(self.status, self.PRIORITY_RANK_DEFAULT)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "status" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "priority_rank"}
+
         super().save(*args, **kwargs)
 
         if old_status != self.status:
@@ -942,6 +967,19 @@ class KycDocument(models.Model):
         (STATUS_REJECTED, "Respins"),
     )
 
+    # procesarea fișierului în fundal (accounts.services.kyc_documents)
+    PROCESSING_PENDING = "PENDING"
+    PROCESSING_RUNNING = "PROCESSING"
+    PROCESSING_READY = "READY"
+    PROCESSING_FAILED = "FAILED"
+
+    PROCESSING_CHOICES = (
+        (PROCESSING_PENDING, "În așteptare"),
+        (PROCESSING_RUNNING, "În procesare"),
+        (PROCESSING_READY, "Procesat"),
+        (PROCESSING_FAILED, "Respins automat"),
+    )
+
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="kyc_documents", verbose_name="utilizator")
     request = models.ForeignKey(KycRequest, null=True, blank=True, on_delete=models.SET_NULL, related_name="documents")
 
@@ -949,6 +987,13 @@ class KycDocument(models.Model):
     file = models.FileField("fișier", upload_to="kyc_documents/")
     status = models.CharField("status", max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
 
+    processing_status = models.CharField(
+        "procesare fișier", max_length=10, choices=PROCESSING_CHOICES, default=PROCESSING_READY, editable=False
+    )
+    processing_attempts = models.PositiveSmallIntegerField(default=0, editable=False)
+    processing_error = models.CharField("eroare procesare", max_length=255, blank=True, editable=False)
+    thumbnail = models.FileField(upload_to="kyc_documents/thumbs/", max_length=255, blank=True, default="", editable=False)
+
     is_primary = models.BooleanField(
         "document principal",
         default=False,
@@ -984,6 +1029,9 @@ class KycDocument(models.Model):
                 name="uniq_primary_kyc_doc_per_user",
             )
         ]
+        indexes = [
+            models.Index(fields=["processing_status", "updated_at"], name="kyc_doc_processing_idx"),
+        ]
 
     def __str__(self):
         return f"KYC {self.user.email} – {self.document_type} ({self.status})"
@@ -1000,10 +1048,26 @@ class KycDocument(models.Model):
         except Exception:
             pass
 
+    @property
+    def is_processed(self) -> bool:
+        return self.processing_status == self.PROCESSING_READY
+
     def save(self, *args, **kwargs):
         # make clean() effective even outside ModelForms
         self.full_clean()
 
+        # fișier nou: verificările + normalizarea rulează în fundal, după commit;
+        # acolo se mută și cazul KYC în verificare (accounts.services.kyc_documents)
+        new_file = bool(self.file) and not getattr(self.file, "_committed", True)
+        if new_file:
+            self.processing_status = self.PROCESSING_PENDING
+            self.processing_attempts = 0
+            self.processing_error = ""
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {
+                    *kwargs["update_fields"], "processing_status", "processing_attempts", "processing_error",
+                }
+
         req = None
         with transaction.atomic():
             # If request is missing, attach the canonical one for this user BEFORE saving
@@ -1026,7 +1090,11 @@ class KycDocument(models.Model):
                 type(self).objects.filter(pk=self.pk).update(reviewed_at=now)
                 self.reviewed_at = now
 
-        if req:
+        if new_file:
+            from accounts.services.kyc_documents import queue_document
+
+            queue_document(self)
+        elif req:
             self._touch_case_workflow_state(req)
 
 
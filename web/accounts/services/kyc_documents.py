@@ -0,0 +1,277 @@
+# accounts/services/kyc_documents.py
+from __future__ import annotations
+
+import io
+import logging
+import os
+import uuid
+from concurrent.futures import Future
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from catalog.photo_ingest import InvalidPhoto, normalize_photo
+from core.background import submit_after_commit
+from core.images import submit_to_pool
+
+from ..models import KycDocument
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Procesare documente KYC (în fundal)
+# =============================================================================
+# - KycDocument.save() cu fișier nou doar stochează upload-ul și marchează
+#   processing_status=PENDING; după commit, un job din core.background:
+#     1) scanare: semnături periculoase (EICAR, executabile / scripturi, PDF cu
+#        JavaScript / acțiuni de lansare) + scanerul extern opțional
+#     2) format: doar JPEG / PNG / WEBP / PDF, după conținut (magic bytes)
+#     3) imagini: orientare EXIF, eliminare metadate, redimensionare
+#        (catalog.photo_ingest.normalize_photo) + thumbnail pentru coada staff
+#   pașii 1-3 rulează în pool-ul de procese din core.images (doar bytes)
+# - document valid -> READY, iar cazul KYC trece în verificare
+#   (KycRequest.ensure_in_review_from_documents, sincronizează și profilul)
+# - document invalid -> FAILED + document REJECTED cu motivul; fișierele
+#   semnalate de scaner sunt șterse
+# - erori tranzitorii: reîncercare de MAX_ATTEMPTS ori; process_pending_documents
+#   (comanda process_kyc_documents) reia ce a rămas (worker oprit, restart)
+#
+# Settings:
+#   SNOBISTIC_KYC_MAX_SIDE        default 2400 px (latura lungă după resize)
+#   SNOBISTIC_KYC_MAX_PIXELS      default 40 MP
+#   SNOBISTIC_KYC_THUMB_SIDE      default 320 px
+#   SNOBISTIC_KYC_VIRUS_SCANNER   cale "modul.funcție": fn(bytes) -> motiv (str) dacă e infectat, altfel None
+
+MAX_ATTEMPTS = 3
+THUMB_QUALITY = 80
+
+EICAR = b"EICAR-STANDARD-ANTIVIRUS-TEST-FILE"
+EXECUTABLE_MAGIC = (b"MZ", b"\x7fELF", b"#!", b"\xca\xfe\xba\xbe", b"\xcf\xfa\xed\xfe")
+PDF_ACTIVE_MARKERS = (b"/JavaScript", b"/JS", b"/Launch", b"/EmbeddedFile")
+
+
+class InvalidDocument(ValueError):
+    def __init__(self, message: str, *, infected: bool = False):
+        super().__init__(message)
+        self.infected = infected
+
+
+def _max_side() -> int:
+    return int(getattr(settings, "SNOBISTIC_KYC_MAX_SIDE", 2400))
+
+
+def _max_pixels() -> int:
+    return int(getattr(settings, "SNOBISTIC_KYC_MAX_PIXELS", 40_000_000))
+
+
+def _thumb_side() -> int:
+    return int(getattr(settings, "SNOBISTIC_KYC_THUMB_SIDE", 320))
+
+
+# -----------------------------------------------------------------------------
+# Verificări + normalizare (rulează în procesele din pool)
+# -----------------------------------------------------------------------------
+def sniff_format(data: bytes) -> Optional[str]:
+    if data.startswith(b"\xff\xd8\xff"):
+        return "JPEG"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "PNG"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "WEBP"
+    if data.lstrip()[:5] == b"%PDF-":
+        return "PDF"
+    return None
+
+
+def scan_bytes(data: bytes) -> Optional[str]:
+    """
+    Motivul respingerii dacă fișierul conține o semnătură periculoasă, altfel None.
+    """
+    if EICAR in data:
+        return "Fișierul conține o semnătură de virus (EICAR)."
+    if data.startswith(EXECUTABLE_MAGIC):
+        return "Fișierele executabile nu sunt acceptate."
+    if data.lstrip()[:5] == b"%PDF-" and any(marker in data for marker in PDF_ACTIVE_MARKERS):
+        return "PDF-ul conține conținut activ (JavaScript / fișiere atașate)."
+    return None
+
+
+def _thumbnail(data: bytes, side: int) -> bytes:
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        img.thumbnail((side, side), Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        img.convert("RGB").save(out, "JPEG", quality=THUMB_QUALITY, optimize=True)
+        return out.getvalue()
+
+
+def inspect_document(
+    data: bytes, max_side: int, max_pixels: int, thumb_side: int
+) -> tuple[str, Optional[bytes], Optional[str], Optional[bytes]]:
+    """
+    (format, bytes normalizați, extensie, thumbnail). PDF-urile rămân neschimbate
+    (None pentru ultimele trei). Ridică InvalidDocument.
+    """
+    reason = scan_bytes(data)
+    if reason:
+        raise InvalidDocument(reason, infected=True)
+    fmt = sniff_format(data)
+    if fmt is None:
+        raise InvalidDocument("Format neacceptat. Încarcă JPG, PNG, WEBP sau PDF.")
+    if fmt == "PDF":
+        return fmt, None, None, None
+    try:
+        normalized, ext = normalize_photo(data, max_side, max_pixels)
+    except InvalidPhoto as exc:
+        raise InvalidDocument(str(exc)) from exc
+    return fmt, normalized, ext, _thumbnail(normalized, thumb_side)
+
+
+# -----------------------------------------------------------------------------
+# Worker
+# -----------------------------------------------------------------------------
+def queue_document(doc: KycDocument) -> None:
+    """
+    Programează procesarea după commit (apelat din KycDocument.save()).
+    """
+    submit_after_commit(process_document, doc.pk)
+
+
+def _claim(doc_id: int) -> bool:
+    return bool(
+        KycDocument.objects.filter(pk=doc_id, processing_status=KycDocument.PROCESSING_PENDING).update(
+            processing_status=KycDocument.PROCESSING_RUNNING, updated_at=timezone.now()
+        )
+    )
+
+
+def _external_scan(data: bytes) -> Optional[str]:
+    path = getattr(settings, "SNOBISTIC_KYC_VIRUS_SCANNER", "")
+    if not path:
+        return None
+    return import_string(path)(data)
+
+
+def _reject(doc: KycDocument, exc: InvalidDocument) -> None:
+    reason = str(exc)[:255]
+    changes = {
+        "processing_status": KycDocument.PROCESSING_FAILED,
+        "processing_error": reason,
+        "status": KycDocument.STATUS_REJECTED,
+        "rejection_reason": f"Fișier respins automat: {reason}",
+        "reviewed_at": timezone.now(),
+        "updated_at": timezone.now(),
+    }
+    if exc.infected:
+        doc.file.storage.delete(doc.file.name)
+        changes["file"] = ""
+    KycDocument.objects.filter(pk=doc.pk).update(**changes)
+
+
+def _retry_or_fail(doc: KycDocument, error: str) -> None:
+    attempts = doc.processing_attempts + 1
+    status = KycDocument.PROCESSING_FAILED if attempts >= MAX_ATTEMPTS else KycDocument.PROCESSING_PENDING
+    KycDocument.objects.filter(pk=doc.pk).update(
+        processing_status=status,
+        processing_attempts=attempts,
+        processing_error=error[:255],
+        updated_at=timezone.now(),
+    )
+
+
+def _store(doc: KycDocument, normalized: Optional[bytes], ext: Optional[str], thumb: Optional[bytes]) -> None:
+    changes = {
+        "processing_status": KycDocument.PROCESSING_READY,
+        "processing_error": "",
+        "updated_at": timezone.now(),
+    }
+    if normalized is not None:
+        storage = doc.file.storage
+        old_name = doc.file.name
+        # nume aleator: numele original al fișierului nu ajunge în storage
+        stem = f"{os.path.dirname(old_name) or 'kyc_documents'}/{uuid.uuid4().hex}"
+        changes["file"] = storage.save(f"{stem}.{ext}", ContentFile(normalized))
+        changes["thumbnail"] = doc.thumbnail.storage.save(
+            f"kyc_documents/thumbs/{uuid.uuid4().hex}.jpg", ContentFile(thumb)
+        )
+        storage.delete(old_name)
+    KycDocument.objects.filter(pk=doc.pk).update(**changes)
+
+    if doc.request_id:
+        try:
+            doc.request.ensure_in_review_from_documents(commit=True)
+        except Exception:
+            logger.exception("KYC workflow update failed for document %s", doc.pk)
+
+
+def _start(doc_id: int) -> Optional[tuple[KycDocument, Future]]:
+    """
+    Claim + citire + scaner extern (în thread-ul curent); inspecția pleacă în pool.
+    None dacă documentul nu mai e de procesat sau a fost deja respins.
+    """
+    if not _claim(doc_id):
+        return None
+    doc = KycDocument.objects.select_related("request").get(pk=doc_id)
+    try:
+        try:
+            with doc.file.open("rb") as fh:
+                data = fh.read()
+        except (FileNotFoundError, ValueError):
+            raise InvalidDocument("Fișierul lipsește.")
+        reason = _external_scan(data)
+        if reason:
+            raise InvalidDocument(reason, infected=True)
+    except InvalidDocument as exc:
+        _reject(doc, exc)
+        return None
+    except Exception as exc:
+        logger.exception("KYC document scan failed (document_id=%s)", doc_id)
+        _retry_or_fail(doc, str(exc) or exc.__class__.__name__)
+        return None
+    return doc, submit_to_pool(inspect_document, data, _max_side(), _max_pixels(), _thumb_side())
+
+
+def _finish(doc: KycDocument, future: Future) -> None:
+    try:
+        _fmt, normalized, ext, thumb = future.result()
+        _store(doc, normalized, ext, thumb)
+    except InvalidDocument as exc:
+        _reject(doc, exc)
+    except Exception as exc:
+        logger.exception("KYC document processing failed (document_id=%s)", doc.pk)
+        _retry_or_fail(doc, str(exc) or exc.__class__.__name__)
+
+
+def process_document(doc_id: int) -> None:
+    """
+    Procesează un document PENDING. Idempotent (claim pe rând).
+    """
+    started = _start(doc_id)
+    if started is not None:
+        _finish(*started)
+
+
+def process_pending_documents(*, limit: int = 100, stale_minutes: int = 30) -> int:
+    """
+    Reia documentele PENDING (și PROCESSING blocate); fișierele pleacă în paralel
+    în pool. Returnează numărul de documente preluate.
+    """
+    stale_before = timezone.now() - timedelta(minutes=stale_minutes)
+    KycDocument.objects.filter(
+        processing_status=KycDocument.PROCESSING_RUNNING, updated_at__lt=stale_before
+    ).update(processing_status=KycDocument.PROCESSING_PENDING)
+
+    ids = list(
+        KycDocument.objects.filter(processing_status=KycDocument.PROCESSING_PENDING)
+        .order_by("updated_at", "id")
+        .values_list("pk", flat=True)[:limit]
+    )
+    jobs = [started for started in map(_start, ids) if started is not None]
+    for doc, future in jobs:
+        _finish(doc, future)
+    return len(ids)
@@ -0,0 +1,92 @@
+# accounts/services/kyc_queue.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional
+
+from django.db.models import Count, Q
+
+from ..models import KycDocument, KycRequest
+
+# =============================================================================
+# Coada staff KYC
+# =============================================================================
+# - ordinea: (priority_rank, submitted_at, id) crescător; priority_rank e derivat
+#   din status în KycRequest.save() (NEEDS_MORE_INFO, IN_REVIEW, NOT_STARTED,
+#   REJECTED, APPROVED), submitted_at = ultima intrare în verificare (FIFO)
+# - paginare keyset pe aceeași cheie, servită de indexul kyc_request_queue_idx:
+#   fiecare pagină e un range scan de PAGE_SIZE + 1 rânduri, indiferent câte cereri
+#   aprobate / respinse s-au strâns în arhivă (fără OFFSET, fără COUNT(*))
+# - filtrul pe status = un singur priority_rank, deci rămâne pe același index
+# - numărul de documente (total / de procesat) doar pentru cererile din pagină
+
+PAGE_SIZE = 25
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICRO = timedelta(microseconds=1)
+
+
+@dataclass
+class KycQueuePage:
+    items: list = field(default_factory=list)
+    next_cursor: str = ""
+
+    @property
+    def has_next(self) -> bool:
+        return bool(self.next_cursor)
+
+
+def encode_cursor(req: KycRequest) -> str:
+    return f"{req.priority_rank}.{(req.submitted_at - _EPOCH) // _MICRO}.{req.pk}"
+
+
+def decode_cursor(raw: str) -> Optional[tuple[int, datetime, int]]:
+    try:
+        rank, micros, pk = (int(part) for part in (raw or "").split("."))
+    except ValueError:
+        return None
+    return rank, _EPOCH + micros * _MICRO, pk
+
+
+def review_queue(
+    *, status: Optional[str] = None, after: str = "", page_size: int = PAGE_SIZE
+) -> KycQueuePage:
+    """
+    O pagină din coada de verificare; `after` = next_cursor-ul paginii anterioare.
+    """
+    qs = KycRequest.objects.select_related("user").order_by("priority_rank", "submitted_at", "id")
+    if status:
+        qs = qs.filter(priority_rank=KycRequest.PRIORITY_RANK.get(status, KycRequest.PRIORITY_RANK_DEFAULT))
+
+    cursor = decode_cursor(after)
+    if cursor is not None:
+        rank, submitted_at, pk = cursor
+        qs = qs.filter(
+            Q(priority_rank__gt=rank)
+            | Q(priority_rank=rank, submitted_at__gt=submitted_at)
+            | Q(priority_rank=rank, submitted_at=submitted_at, id__gt=pk)
+        )
+
+    rows = list(qs[: page_size + 1])
+    page = KycQueuePage(items=rows[:page_size])
+    if len(rows) > page_size:
+        page.next_cursor = encode_cursor(page.items[-1])
+
+    counts = {
+        row["request_id"]: row
+        for row in KycDocument.objects.filter(request_id__in=[r.pk for r in page.items])
+        .values("request_id")
+        .annotate(
+            total=Count("pk"),
+            processing=Count(
+                "pk",
+                filter=Q(processing_status__in=[KycDocument.PROCESSING_PENDING, KycDocument.PROCESSING_RUNNING]),
+            ),
+        )
+    }
+    for req in page.items:
+        row = counts.get(req.pk) or {}
+        req.documents_total = row.get("total", 0)
+        req.documents_processing = row.get("processing", 0)
+    return page
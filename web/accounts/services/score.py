@@ -12,8 +12,6 @@ from django.db import transaction
 from ..models import (
     SCORE_MAX as MODEL_SCORE_MAX,
     SCORE_MIN as MODEL_SCORE_MIN,
-    SELLER_COMMISSION_BY_TIER as MODEL_SELLER_COMMISSION_BY_TIER,
-    SELLER_TIER_THRESHOLDS_NET_RON as MODEL_SELLER_THRESHOLDS_NET_RON,
     TRUST_A_MIN as MODEL_TRUST_A_MIN,
     TRUST_B_MIN as MODEL_TRUST_B_MIN,
     TRUST_C_MIN as MODEL_TRUST_C_MIN,
@@ -21,6 +19,7 @@ from ..models import (
     SellerProfile,
     TrustScoreEvent,
 )
+from .seller_tiers import get_tier_table
 from .trust_engine import buyer_trust_event, seller_trust_event
 
 # =============================================================================
@@ -670,59 +669,14 @@ def sync_seller_identity_bonuses(
 
 
 # =============================================================================
-# Seller level/commission progression (settings-driven, fallback to models)
+# Seller level/commission progression (cached tier table; see seller_tiers.py)
 # =============================================================================
 def _get_seller_thresholds() -> Dict[str, Decimal]:
-    default = {
-        "AMATOR": Decimal(MODEL_SELLER_THRESHOLDS_NET_RON.get("AMATOR", Decimal("0"))),
-        "RISING": Decimal(MODEL_SELLER_THRESHOLDS_NET_RON.get("RISING", Decimal("3000"))),
-        "TOP": Decimal(MODEL_SELLER_THRESHOLDS_NET_RON.get("TOP", Decimal("15000"))),
-        "VIP": Decimal(MODEL_SELLER_THRESHOLDS_NET_RON.get("VIP", Decimal("50000"))),
-    }
-    raw = getattr(settings, "SNOBISTIC_SELLER_THRESHOLDS", None)
-    if not isinstance(raw, dict):
-        return default
-
-    out: Dict[str, Decimal] = {}
-    for k, v in raw.items():
-        try:
-            out[str(k).upper()] = Decimal(v)
-        except Exception:
-            pass
-
-    return {**default, **out}
+    return dict(get_tier_table().thresholds)
 
 
 def _get_commission_rates() -> Dict[str, Decimal]:
-    default = {
-        "AMATOR": Decimal(MODEL_SELLER_COMMISSION_BY_TIER.get("AMATOR", Decimal("9.00"))),
-        "RISING": Decimal(MODEL_SELLER_COMMISSION_BY_TIER.get("RISING", Decimal("8.00"))),
-        "TOP": Decimal(MODEL_SELLER_COMMISSION_BY_TIER.get("TOP", Decimal("7.00"))),
-        "VIP": Decimal(MODEL_SELLER_COMMISSION_BY_TIER.get("VIP", Decimal("6.00"))),
-    }
-    raw = getattr(settings, "SNOBISTIC_COMMISSION_RATES", None)
-    if not isinstance(raw, dict):
-        return default
-
-    out: Dict[str, Decimal] = {}
-    for k, v in raw.items():
-        try:
-            out[str(k).upper()] = Decimal(v)
-        except Exception:
-            pass
-
-    return {**default, **out}
-
-
-def _tier_for_sales(volume: Decimal, thresholds: Dict[str, Decimal]) -> str:
-    volume = Decimal(volume or "0")
-    if volume >= thresholds["VIP"]:
-        return "VIP"
-    if volume >= thresholds["TOP"]:
-        return "TOP"
-    if volume >= thresholds["RISING"]:
-        return "RISING"
-    return "AMATOR"
+    return dict(get_tier_table().commissions)
 
 
 @transaction.atomic
@@ -748,12 +702,10 @@ def register_seller_sale(
     locked = SellerProfile.objects.select_for_update().get(pk=seller.pk)
     locked.lifetime_sales_net = (locked.lifetime_sales_net or Decimal("0")) + net_amount
 
-    thresholds = _get_seller_thresholds()
-    commissions = _get_commission_rates()
-
-    tier = _tier_for_sales(locked.lifetime_sales_net, thresholds)
+    table = get_tier_table()
+    tier = table.tier_for(locked.lifetime_sales_net)
     locked.seller_level = tier
-    locked.seller_commission_rate = commissions.get(tier, Decimal("9.00"))
+    locked.seller_commission_rate = table.commission_for(tier)
 
     if commit:
         _save_with_fields(locked, ["lifetime_sales_net", "seller_level", "seller_commission_rate"])
@@ -765,12 +717,22 @@ def register_seller_sale(
 
 
 # =============================================================================
-# Public constants for other apps (e.g., dashboard/views.py imports)
+# Public constants for other apps (resolved lazily from the cached tier table)
 # =============================================================================
-SELLER_THRESHOLDS: Dict[str, Decimal] = _get_seller_thresholds()
-SELLER_COMMISSIONS: Dict[str, Decimal] = _get_commission_rates()
-
-AMATOR_THRESHOLD: Decimal = SELLER_THRESHOLDS["AMATOR"]
-RISING_THRESHOLD: Decimal = SELLER_THRESHOLDS["RISING"]
-TOP_THRESHOLD: Decimal = SELLER_THRESHOLDS["TOP"]
-VIP_THRESHOLD: Decimal = SELLER_THRESHOLDS["VIP"]
+_LAZY_THRESHOLD_NAMES = {
+    "AMATOR_THRESHOLD": "AMATOR",
+    "RISING_THRESHOLD": "RISING",
+    "TOP_THRESHOLD": "TOP",
+    "VIP_THRESHOLD": "VIP",
+}
+
+
+def __getattr__(name: str):
+    # Back-compat: SELLER_THRESHOLDS / *_THRESHOLD were import-time constants.
+    if name == "SELLER_THRESHOLDS":
+        return _get_seller_thresholds()
+    if name == "SELLER_COMMISSIONS":
+        return _get_commission_rates()
+    if name in _LAZY_THRESHOLD_NAMES:
+        return get_tier_table().threshold(_LAZY_THRESHOLD_NAMES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,205 @@
+# accounts/services/seller_tiers.py
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.dispatch import receiver
+
+from ..models import (
+    SELLER_COMMISSION_BY_TIER as MODEL_SELLER_COMMISSION_BY_TIER,
+    SELLER_TIER_THRESHOLDS_NET_RON as MODEL_SELLER_THRESHOLDS_NET_RON,
+    SellerProfile,
+)
+
+# =============================================================================
+# Seller tier table (settings-driven; fallback to models), cached per process
+# =============================================================================
+# Ordinea contează: de la nivelul cel mai mare la cel mai mic.
+TIER_ORDER: Tuple[str, ...] = ("VIP", "TOP", "RISING", "AMATOR")
+
+SETTINGS_KEYS = ("SNOBISTIC_SELLER_THRESHOLDS", "SNOBISTIC_COMMISSION_RATES")
+
+DEFAULT_COMMISSION = Decimal("9.00")
+
+
+def _merge_decimal_map(default: Dict[str, Decimal], raw) -> Dict[str, Decimal]:
+    out = {k: Decimal(v) for k, v in default.items()}
+    if not isinstance(raw, dict):
+        return out
+    for k, v in raw.items():
+        try:
+            out[str(k).upper()] = Decimal(v)
+        except Exception:
+            pass
+    return out
+
+
+@dataclass(frozen=True)
+class TierTable:
+    version: int
+    thresholds: Dict[str, Decimal] = field(default_factory=dict)
+    commissions: Dict[str, Decimal] = field(default_factory=dict)
+
+    def threshold(self, tier: str) -> Decimal:
+        return self.thresholds.get(tier, Decimal("0"))
+
+    def commission_for(self, tier: str) -> Decimal:
+        return self.commissions.get(tier, DEFAULT_COMMISSION)
+
+    def tier_for(self, volume) -> str:
+        volume = Decimal(volume or "0")
+        for tier in TIER_ORDER[:-1]:
+            if volume >= self.thresholds[tier]:
+                return tier
+        return TIER_ORDER[-1]
+
+    def next_tier(self, tier: str) -> Optional[str]:
+        try:
+            idx = TIER_ORDER.index(tier)
+        except ValueError:
+            return None
+        return TIER_ORDER[idx - 1] if idx > 0 else None
+
+
+_lock = threading.Lock()
+_version = 0
+_table: Optional[TierTable] = None
+
+
+def _build_table(version: int) -> TierTable:
+    return TierTable(
+        version=version,
+        thresholds=_merge_decimal_map(
+            MODEL_SELLER_THRESHOLDS_NET_RON, getattr(settings, "SNOBISTIC_SELLER_THRESHOLDS", None)
+        ),
+        commissions=_merge_decimal_map(
+            MODEL_SELLER_COMMISSION_BY_TIER, getattr(settings, "SNOBISTIC_COMMISSION_RATES", None)
+        ),
+    )
+
+
+def get_tier_table() -> TierTable:
+    """
+    Tabela curentă (construită o singură dată per versiune, per proces).
+    """
+    table = _table
+    if table is not None:
+        return table
+    return _rebuild()
+
+
+def _rebuild() -> TierTable:
+    global _table
+    with _lock:
+        if _table is None:
+            _table = _build_table(_version)
+        return _table
+
+
+def invalidate_tier_table() -> int:
+    """
+    Invalidează cache-ul; următorul get_tier_table() reconstruiește tabela cu versiune nouă.
+    """
+    global _table, _version
+    with _lock:
+        _version += 1
+        _table = None
+        return _version
+
+
+@receiver(setting_changed)
+def _on_setting_changed(sender, setting, **kwargs):
+    # override_settings / settings modificate la runtime
+    if setting in SETTINGS_KEYS:
+        invalidate_tier_table()
+
+
+# =============================================================================
+# Bulk recompute (one GROUP BY over paid orders)
+# =============================================================================
+@dataclass
+class TierRecomputeReport:
+    sellers_seen: int = 0
+    changed: int = 0
+    dry_run: bool = False
+    changes: List[Tuple[int, str, str]] = field(default_factory=list)  # (user_id, old_level, new_level)
+
+
+def paid_sales_by_seller() -> Dict[int, Decimal]:
+    """
+    {seller_user_id: sum(price * quantity)} pentru comenzile plătite, într-un singur GROUP BY.
+    Aceeași bază ca orders.services.trust_hooks.on_order_paid (gross pe liniile sellerului).
+    """
+    from orders.models import Order, OrderItem
+
+    line_total = ExpressionWrapper(
+        F("price") * F("quantity"),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    rows = (
+        OrderItem.objects.filter(order__payment_status=Order.PAYMENT_PAID, product__owner_id__isnull=False)
+        .values("product__owner_id")
+        .annotate(total=Sum(line_total))
+        .values_list("product__owner_id", "total")
+    )
+    return {owner_id: Decimal(total or "0") for owner_id, total in rows}
+
+
+def recompute_all_seller_tiers(
+    *,
+    dry_run: bool = False,
+    batch_size: int = 1000,
+    max_changes: int = 1000,
+) -> TierRecomputeReport:
+    """
+    Recalculează lifetime_sales_net + seller_level + seller_commission_rate pentru toți sellerii.
+    Vânzările vin dintr-un singur GROUP BY; scrierile sunt bulk_update pe loturi.
+    """
+    table = get_tier_table()
+    totals = paid_sales_by_seller()
+    report = TierRecomputeReport(dry_run=dry_run)
+    fields = ["lifetime_sales_net", "seller_level", "seller_commission_rate"]
+
+    qs = SellerProfile.objects.only("pk", "user_id", *fields).order_by("pk")
+    last_pk = 0
+    while True:
+        batch = list(qs.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        to_update = []
+        for sp in batch:
+            report.sellers_seen += 1
+            volume = totals.get(sp.user_id, Decimal("0.00")).quantize(Decimal("0.01"))
+            level = table.tier_for(volume)
+            commission = table.commission_for(level)
+
+            if (
+                Decimal(sp.lifetime_sales_net or "0") == volume
+                and sp.seller_level == level
+                and Decimal(sp.seller_commission_rate or "0") == commission
+            ):
+                continue
+
+            report.changed += 1
+            if len(report.changes) < max_changes:
+                report.changes.append((sp.user_id, sp.seller_level, level))
+
+            sp.lifetime_sales_net = volume
+            sp.seller_level = level
+            sp.seller_commission_rate = commission
+            to_update.append(sp)
+
+        if to_update and not dry_run:
+            with transaction.atomic():
+                SellerProfile.objects.bulk_update(to_update, fields)
+
+    return report
@@ -0,0 +1,303 @@
+# accounts/services/trust_replay.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+from django.db import connections, transaction
+from django.db.models import Max, Min
+
+from core.background import django_process_pool
+
+from ..models import Profile, SellerProfile, TrustScoreEvent
+from .score import (
+    DEFAULT_BUYER_WEIGHTS,
+    DEFAULT_SELLER_WEIGHTS,
+    BuyerEventWeights,
+    SellerEventWeights,
+)
+from .trust_engine import _clamp, _default_field_value
+
+# =============================================================================
+# Replay engine: rebuild buyer/seller trust scores from the TrustScoreEvent log
+# =============================================================================
+# - events are streamed ordered by (user, subject, created_at) via .iterator()
+#   (server-side cursor on PostgreSQL, chunked fetch elsewhere)
+# - each event delta is re-derived from the CURRENT weights (metadata "event"/"bonus"),
+#   unknown events keep their stored delta
+# - clamping is re-applied step by step, exactly like trust_engine.apply_trust_event
+# - scores are written with bulk_update in batches; the ledger itself is never rewritten
+
+# metadata["event"] -> weight attribute
+BUYER_EVENT_WEIGHT_FIELDS = {
+    "order_paid": "order_paid",
+    "order_completed_ok": "order_completed",
+    "cancel_buyer_fault": "cancel_buyer_fault",
+    "return_buyer_fault": "return_buyer_fault",
+    "dispute_lost": "dispute_lost",
+    "chargeback": "chargeback",
+}
+
+SELLER_EVENT_WEIGHT_FIELDS = {
+    "order_paid": "order_paid",
+    "shipped_on_time": "order_shipped_on_time",
+    "order_completed_ok": "order_completed_ok",
+    "late_shipment": "late_shipment",
+    "cancel_seller_fault": "cancel_seller_fault",
+    "return_seller_fault": "return_seller_fault",
+    "dispute_lost": "dispute_lost",
+    "severe_incident": "severe_incident",
+}
+
+# metadata["bonus"] -> weight attribute (same name on both weight classes)
+BONUS_WEIGHT_FIELDS = {
+    "kyc": "kyc_approved_bonus",
+    "2fa": "twofa_enabled_bonus",
+}
+
+SCORE_FIELD_BY_SUBJECT = {
+    TrustScoreEvent.SUBJECT_BUYER: (Profile, "buyer_trust_score"),
+    TrustScoreEvent.SUBJECT_SELLER: (SellerProfile, "seller_trust_score"),
+}
+
+
+@dataclass(frozen=True)
+class ScoreDiff:
+    user_id: int
+    subject: str
+    current: Optional[int]
+    replayed: int
+
+
+@dataclass
+class ReplayReport:
+    users_seen: int = 0
+    events_seen: int = 0
+    changed: int = 0
+    written: int = 0
+    dry_run: bool = True
+    diffs: List[ScoreDiff] = field(default_factory=list)
+
+    def merge(self, other: "ReplayReport", *, max_diffs: int) -> None:
+        self.users_seen += other.users_seen
+        self.events_seen += other.events_seen
+        self.changed += other.changed
+        self.written += other.written
+        room = max(0, max_diffs - len(self.diffs))
+        self.diffs.extend(other.diffs[:room])
+
+
+def replay_delta(
+    subject: str,
+    stored_delta: int,
+    metadata: Optional[dict],
+    *,
+    buyer_weights: BuyerEventWeights = DEFAULT_BUYER_WEIGHTS,
+    seller_weights: SellerEventWeights = DEFAULT_SELLER_WEIGHTS,
+) -> int:
+    """
+    Delta-ul unui eveniment recalculat cu ponderile curente.
+    Evenimentele necunoscute (manual adjust, sync, hooks vechi) își păstrează delta stocat.
+    """
+    meta = metadata if isinstance(metadata, dict) else {}
+    weights = buyer_weights if subject == TrustScoreEvent.SUBJECT_BUYER else seller_weights
+
+    if meta.get("kind") == "bonus":
+        attr = BONUS_WEIGHT_FIELDS.get(str(meta.get("bonus") or ""))
+        if attr is None:
+            return int(stored_delta or 0)
+        weight = int(getattr(weights, attr))
+        return -weight if meta.get("state") == "off" else weight
+
+    mapping = BUYER_EVENT_WEIGHT_FIELDS if subject == TrustScoreEvent.SUBJECT_BUYER else SELLER_EVENT_WEIGHT_FIELDS
+    attr = mapping.get(str(meta.get("event") or ""))
+    if attr is None:
+        return int(stored_delta or 0)
+    return int(getattr(weights, attr))
+
+
+def _iter_replayed_scores(
+    qs,
+    *,
+    chunk_size: int,
+    buyer_weights: BuyerEventWeights,
+    seller_weights: SellerEventWeights,
+    report: ReplayReport,
+) -> Iterator[Tuple[int, str, int]]:
+    """
+    Yield (user_id, subject, replayed_score) per (user, subject) group.
+    Only one group is held in memory at a time.
+    """
+    rows = (
+        qs.order_by("user_id", "subject", "created_at", "id")
+        .values_list("user_id", "subject", "delta", "metadata")
+        .iterator(chunk_size=chunk_size)
+    )
+
+    current_key: Optional[Tuple[int, str]] = None
+    score = 0
+    for user_id, subject, delta, metadata in rows:
+        key = (user_id, subject)
+        if key != current_key:
+            if current_key is not None:
+                yield current_key[0], current_key[1], score
+            current_key = key
+            model_cls, score_field = SCORE_FIELD_BY_SUBJECT[subject]
+            score = _clamp(_default_field_value(model_cls, score_field, 0))
+            report.users_seen += 1
+
+        report.events_seen += 1
+        score = _clamp(
+            score
+            + replay_delta(
+                subject,
+                delta,
+                metadata,
+                buyer_weights=buyer_weights,
+                seller_weights=seller_weights,
+            )
+        )
+
+    if current_key is not None:
+        yield current_key[0], current_key[1], score
+
+
+def _flush(subject: str, batch: dict, *, dry_run: bool, report: ReplayReport, max_diffs: int) -> None:
+    """
+    batch: {user_id: replayed_score} for one subject.
+    Reads current scores with one query; writes changed rows with one bulk_update.
+    """
+    if not batch:
+        return
+    model_cls, score_field = SCORE_FIELD_BY_SUBJECT[subject]
+
+    with transaction.atomic():
+        qs = model_cls.objects.filter(user_id__in=list(batch.keys())).only("pk", "user_id", score_field)
+        if not dry_run:
+            qs = qs.select_for_update()
+        targets = {obj.user_id: obj for obj in qs}
+
+        to_update = []
+        for user_id, replayed in batch.items():
+            obj = targets.get(user_id)
+            current = int(getattr(obj, score_field)) if obj is not None else None
+            if current == replayed:
+                continue
+            report.changed += 1
+            if len(report.diffs) < max_diffs:
+                report.diffs.append(ScoreDiff(user_id=user_id, subject=subject, current=current, replayed=replayed))
+            if obj is not None and not dry_run:
+                setattr(obj, score_field, replayed)
+                to_update.append(obj)
+
+        if to_update:
+            model_cls.objects.bulk_update(to_update, [score_field])
+            report.written += len(to_update)
+
+    batch.clear()
+
+
+def replay_trust_scores(
+    *,
+    user_id_min: Optional[int] = None,
+    user_id_max: Optional[int] = None,
+    subject: Optional[str] = None,
+    dry_run: bool = True,
+    chunk_size: int = 2000,
+    batch_size: int = 500,
+    max_diffs: int = 1000,
+    buyer_weights: BuyerEventWeights = DEFAULT_BUYER_WEIGHTS,
+    seller_weights: SellerEventWeights = DEFAULT_SELLER_WEIGHTS,
+) -> ReplayReport:
+    """
+    Recalculează scorurile din jurnalul TrustScoreEvent pentru intervalul [user_id_min, user_id_max].
+
+    dry_run=True: nu scrie nimic, doar raportează diferențele (primele max_diffs).
+    Utilizatorii fără evenimente nu sunt atinși. Profile/SellerProfile lipsă nu sunt create.
+    """
+    report = ReplayReport(dry_run=dry_run)
+
+    qs = TrustScoreEvent.objects.all()
+    if user_id_min is not None:
+        qs = qs.filter(user_id__gte=user_id_min)
+    if user_id_max is not None:
+        qs = qs.filter(user_id__lte=user_id_max)
+    if subject:
+        qs = qs.filter(subject=subject.upper().strip())
+
+    batches = {s: {} for s in SCORE_FIELD_BY_SUBJECT}
+    for user_id, subj, score in _iter_replayed_scores(
+        qs,
+        chunk_size=chunk_size,
+        buyer_weights=buyer_weights,
+        seller_weights=seller_weights,
+        report=report,
+    ):
+        batches[subj][user_id] = score
+        if len(batches[subj]) >= batch_size:
+            _flush(subj, batches[subj], dry_run=dry_run, report=report, max_diffs=max_diffs)
+
+    for subj, batch in batches.items():
+        _flush(subj, batch, dry_run=dry_run, report=report, max_diffs=max_diffs)
+
+    return report
+
+
+# =============================================================================
+# Parallel partitioning by user id ranges
+# =============================================================================
+def partition_user_ids(partitions: int, *, subject: Optional[str] = None) -> List[Tuple[int, int]]:
+    """
+    Împarte intervalul [min(user_id), max(user_id)] din jurnal în `partitions` intervale contigue.
+    """
+    qs = TrustScoreEvent.objects.all()
+    if subject:
+        qs = qs.filter(subject=subject.upper().strip())
+    bounds = qs.aggregate(lo=Min("user_id"), hi=Max("user_id"))
+    lo, hi = bounds["lo"], bounds["hi"]
+    if lo is None or hi is None:
+        return []
+
+    partitions = max(1, int(partitions or 1))
+    span = hi - lo + 1
+    step = max(1, -(-span // partitions))  # ceil
+    return [(start, min(hi, start + step - 1)) for start in range(lo, hi + 1, step)]
+
+
+def _replay_partition(bounds: Tuple[int, int], kwargs: dict) -> ReplayReport:
+    try:
+        return replay_trust_scores(user_id_min=bounds[0], user_id_max=bounds[1], **kwargs)
+    finally:
+        connections.close_all()
+
+
+def replay_trust_scores_parallel(
+    *,
+    workers: int = 4,
+    partitions: Optional[int] = None,
+    subject: Optional[str] = None,
+    dry_run: bool = True,
+    max_diffs: int = 1000,
+    **kwargs,
+) -> ReplayReport:
+    """
+    Rulează replay_trust_scores pe intervale disjuncte de user_id în procese separate.
+    Un user aparține unui singur interval, deci scrierile nu se suprapun.
+    """
+    ranges = partition_user_ids(partitions or workers, subject=subject)
+    report = ReplayReport(dry_run=dry_run)
+    if not ranges:
+        return report
+
+    job_kwargs = dict(kwargs, subject=subject, dry_run=dry_run, max_diffs=max_diffs)
+
+    if workers <= 1 or len(ranges) == 1:
+        for lo, hi in ranges:
+            part = replay_trust_scores(user_id_min=lo, user_id_max=hi, **job_kwargs)
+            report.merge(part, max_diffs=max_diffs)
+        return report
+
+    with django_process_pool(workers) as pool:
+        for part in pool.map(_replay_partition, ranges, [job_kwargs] * len(ranges)):
+            report.merge(part, max_diffs=max_diffs)
+    return report
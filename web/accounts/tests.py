@@ -1,3 +1,384 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from catalog.models import Category, Product
+from core.background import init_django_worker
+from orders.models import Order, OrderItem
+
+from .models import Address, KycDocument, KycRequest, Profile, SellerProfile, TrustScoreEvent
+from .services import kyc_documents, seller_tiers, trust_replay
+from .services.kyc_queue import review_queue
+from .services.score import BuyerEventWeights
+
+User = get_user_model()
+
+
+def _jpeg(size=(3000, 2000)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, (10, 120, 200)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+class InspectDocumentTests(TestCase):
+    def test_accepts_images_and_plain_pdfs(self):
+        fmt, data, ext, thumb = kyc_documents.inspect_document(_jpeg(), 1200, 40_000_000, 200)
+        self.assertEqual((fmt, ext), ("JPEG", "jpg"))
+        with Image.open(io.BytesIO(data)) as img:
+            self.assertEqual(img.size, (1200, 800))
+        with Image.open(io.BytesIO(thumb)) as img:
+            self.assertEqual(img.size, (200, 133))
+
+        pdf = b"%PDF-1.4\n1 0 obj << /Type /Catalog >> endobj\n%%EOF"
+        self.assertEqual(kyc_documents.inspect_document(pdf, 1200, 40_000_000, 200), ("PDF", None, None, None))
+
+    def test_rejects_signatures_active_pdfs_and_unknown_formats(self):
+        cases = [
+            (b"X5O!P%@AP[4\\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*", True),
+            (b"MZ\x90\x00rest-of-an-exe", True),
+            (b"%PDF-1.4\n<< /OpenAction << /S /JavaScript /JS (app.alert(1)) >> >>", True),
+            (b"GIF89a....", False),
+        ]
+        for data, infected in cases:
+            with self.assertRaises(kyc_documents.InvalidDocument) as ctx:
+                kyc_documents.inspect_document(data, 1200, 40_000_000, 200)
+            self.assertEqual(ctx.exception.infected, infected)
+
+
+@override_settings(SNOBISTIC_BACKGROUND_SYNC=True, SNOBISTIC_IMAGE_WORKERS=0)
+class KycDocumentPipelineTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = User.objects.create_user(
+            email="seller@example.com", password="x", first_name="S", last_name="V", is_active=True
+        )
+        self.client.force_login(self.user)
+
+    def _upload(self, name, data, content_type="image/jpeg"):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                reverse("accounts:kyc_center"),
+                {"document_type": KycDocument.DOC_TYPE_ID_CARD, "file": SimpleUploadedFile(name, data, content_type)},
+            )
+        self.assertEqual(response.status_code, 302)
+        return callbacks
+
+    def test_upload_returns_before_processing_then_moves_case_to_review(self):
+        callbacks = self._upload("buletin scan.jpg", _jpeg())
+        doc = KycDocument.objects.get()
+        original = doc.file.name
+        self.assertEqual(doc.processing_status, KycDocument.PROCESSING_PENDING)
+        self.assertEqual(KycRequest.objects.get().status, KycRequest.STATUS_NOT_STARTED)
+
+        for callback in callbacks:
+            callback()
+
+        doc.refresh_from_db()
+        self.assertEqual(doc.processing_status, KycDocument.PROCESSING_READY)
+        self.assertNotEqual(doc.file.name, original)
+        self.assertNotIn("buletin", doc.file.name)
+        self.assertFalse(doc.file.storage.exists(original))
+        self.assertTrue(doc.thumbnail.storage.exists(doc.thumbnail.name))
+
+        req = KycRequest.objects.get()
+        self.assertEqual(req.status, KycRequest.STATUS_IN_REVIEW)
+        self.assertEqual(req.priority_rank, KycRequest.PRIORITY_RANK[KycRequest.STATUS_IN_REVIEW])
+        self.assertEqual(Profile.objects.get(user=self.user).kyc_status, KycRequest.STATUS_IN_REVIEW)
+
+    def test_infected_upload_is_rejected_and_deleted(self):
+        callbacks = self._upload("doc.pdf", b"%PDF-1.4 EICAR-STANDARD-ANTIVIRUS-TEST-FILE", "application/pdf")
+        stored = KycDocument.objects.get().file.name
+        for callback in callbacks:
+            callback()
+
+        doc = KycDocument.objects.get()
+        self.assertEqual(doc.processing_status, KycDocument.PROCESSING_FAILED)
+        self.assertEqual(doc.status, KycDocument.STATUS_REJECTED)
+        self.assertIn("EICAR", doc.rejection_reason)
+        self.assertFalse(doc.file)
+        self.assertFalse(doc.file.storage.exists(stored))
+        self.assertEqual(KycRequest.objects.get().status, KycRequest.STATUS_NOT_STARTED)
+
+    def test_command_picks_up_documents_left_pending(self):
+        self._upload("a.jpg", _jpeg((400, 300)))  # callback-ul nu rulează (proces oprit)
+        call_command("process_kyc_documents", stdout=io.StringIO())
+        self.assertEqual(KycDocument.objects.get().processing_status, KycDocument.PROCESSING_READY)
+
+
+class KycReviewQueueTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        statuses = [
+            KycRequest.STATUS_APPROVED,
+            KycRequest.STATUS_IN_REVIEW,
+            KycRequest.STATUS_NEEDS_MORE_INFO,
+            KycRequest.STATUS_IN_REVIEW,
+            KycRequest.STATUS_REJECTED,
+            KycRequest.STATUS_IN_REVIEW,
+            KycRequest.STATUS_NOT_STARTED,
+        ]
+        for i, status in enumerate(statuses):
+            user = User.objects.create_user(
+                email=f"u{i}@example.com", password="x", first_name="U", last_name=str(i), is_active=True
+            )
+            # aceeași oră pentru două cereri: ordinea se decide pe id
+            KycRequest.objects.create(user=user, status=status, submitted_at=now - timedelta(hours=i // 2))
+
+    def test_keyset_pages_follow_priority_then_fifo(self):
+        expected = list(
+            KycRequest.objects.order_by("priority_rank", "submitted_at", "id").values_list("pk", flat=True)
+        )
+        seen, after = [], ""
+        while True:
+            with self.assertNumQueries(2):
+                page = review_queue(after=after, page_size=3)
+            seen += [r.pk for r in page.items]
+            if not page.has_next:
+                break
+            after = page.next_cursor
+        self.assertEqual(seen, expected)
+        self.assertEqual(KycRequest.objects.get(pk=seen[0]).status, KycRequest.STATUS_NEEDS_MORE_INFO)
+
+        in_review = review_queue(status=KycRequest.STATUS_IN_REVIEW, page_size=2)
+        rest = review_queue(status=KycRequest.STATUS_IN_REVIEW, after=in_review.next_cursor, page_size=2)
+        submitted = [r.submitted_at for r in in_review.items + rest.items]
+        self.assertEqual(len(submitted), 3)
+        self.assertEqual(submitted, sorted(submitted))
+
+    def test_staff_queue_view(self):
+        staff = User.objects.create_user(
+            email="staff@example.com", password="x", first_name="S", last_name="T", is_active=True
+        )
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+
+        response = self.client.get(reverse("accounts:staff_kyc_queue"), {"status": KycRequest.STATUS_IN_REVIEW})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["requests"]), 3)
+
+        req = response.context["requests"][0]
+        response = self.client.get(reverse("accounts:staff_kyc_review", args=[req.pk]))
+        self.assertContains(response, req.user.email)
+
+
+# TransactionTestCase: varianta paralelă rulează pe thread-uri cu conexiuni proprii
+class TrustReplayTests(TransactionTestCase):
+    def setUp(self):
+        self.buyer = self._user("replay-buyer@example.com")
+        self.clamped = self._user("replay-clamped@example.com")
+        self.seller = self._user("replay-seller@example.com")
+        SellerProfile.objects.get_or_create(user=self.seller)
+
+        # delta stocat = ponderi vechi; replay-ul le recalculează cu cele curente
+        self._log(self.buyer, "BUYER", [("order_paid", 1)] * 3 + [("chargeback", -10), (None, 4)])
+        # 4 x chargeback (-15) se opresc la 0, apoi bonusul KYC: 5 (nu max(0, -60 + 5))
+        self._log(self.clamped, "BUYER", [("chargeback", -15)] * 4 + [("bonus:kyc", 5)])
+        # 30 x livrare la timp (+2) se opresc la 100, apoi incident grav (-20): 80
+        self._log(self.seller, "SELLER", [("shipped_on_time", 1)] * 30 + [("severe_incident", -20)])
+
+        self.expected = {
+            ("BUYER", self.buyer.pk): 50 + 3 * 2 - 15 + 4,
+            ("BUYER", self.clamped.pk): 5,
+            ("SELLER", self.seller.pk): 80,
+        }
+
+    def _user(self, email):
+        return get_user_model().objects.create_user(
+            email=email, password="x", first_name="R", last_name="P", is_active=True
+        )
+
+    def _log(self, user, subject, events):
+        rows = []
+        for event, delta in events:
+            if event is None:
+                meta = {"note": "ajustare manuală"}
+            elif event.startswith("bonus:"):
+                meta = {"kind": "bonus", "bonus": event.split(":", 1)[1], "state": "on"}
+            else:
+                meta = {"event": event}
+            rows.append(
+                TrustScoreEvent(
+                    user=user, subject=subject, delta=delta, score_after=50,
+                    reason=TrustScoreEvent.REASON_MANUAL_ADJUST, metadata=meta,
+                )
+            )
+        TrustScoreEvent.objects.bulk_create(rows)
+
+    def _scores(self):
+        return {
+            ("BUYER", self.buyer.pk): Profile.objects.get(user=self.buyer).buyer_trust_score,
+            ("BUYER", self.clamped.pk): Profile.objects.get(user=self.clamped).buyer_trust_score,
+            ("SELLER", self.seller.pk): SellerProfile.objects.get(user=self.seller).seller_trust_score,
+        }
+
+    def _diffs(self, report):
+        return {(d.subject, d.user_id): (d.current, d.replayed) for d in report.diffs}
+
+    def test_dry_run_reports_without_writing(self):
+        before = self._scores()
+        report = trust_replay.replay_trust_scores(dry_run=True, chunk_size=4, batch_size=1)
+
+        self.assertEqual(self._scores(), before)
+        self.assertEqual((report.users_seen, report.events_seen, report.written), (3, 41, 0))
+        self.assertEqual(
+            self._diffs(report), {key: (before[key], score) for key, score in self.expected.items()}
+        )
+
+        out = io.StringIO()
+        call_command("replay_trust_scores", stdout=out)
+        self.assertIn("scrise: 0", out.getvalue())
+        self.assertEqual(self._scores(), before)
+
+    def test_commit_applies_current_weights_with_stepwise_clamp(self):
+        report = trust_replay.replay_trust_scores(dry_run=False)
+        self.assertEqual(report.written, 3)
+        self.assertEqual(self._scores(), self.expected)
+
+        # a doua rulare: nimic de schimbat
+        self.assertEqual(trust_replay.replay_trust_scores(dry_run=False).changed, 0)
+
+        # ponderi noi -> doar cumpărătorul cu order_paid se schimbă
+        report = trust_replay.replay_trust_scores(
+            dry_run=False, buyer_weights=BuyerEventWeights(order_paid=3)
+        )
+        self.assertEqual(self._diffs(report), {("BUYER", self.buyer.pk): (45, 48)})
+
+    def test_partitioned_and_parallel_runs_match_serial(self):
+        serial = trust_replay.replay_trust_scores(dry_run=True)
+        self.assertEqual(len(trust_replay.partition_user_ids(3)), 3)
+
+        partitioned = trust_replay.replay_trust_scores_parallel(workers=1, partitions=3, dry_run=True)
+        # trei intervale de user_id, câte unul per worker; rapoartele unite trebuie să
+        # dea aceleași diferențe ca replay-ul serial. Workerii sunt thread-uri (același
+        # initializer) ca să vadă DB-ul de test din memorie
+        thread_pool = lambda workers: ThreadPoolExecutor(workers, initializer=init_django_worker)  # noqa: E731
+        with mock.patch.object(trust_replay, "django_process_pool", thread_pool):
+            parallel = trust_replay.replay_trust_scores_parallel(workers=3, dry_run=True)
+            for report in (partitioned, parallel):
+                self.assertEqual(self._diffs(report), self._diffs(serial))
+                self.assertEqual(
+                    (report.users_seen, report.events_seen, report.changed),
+                    (serial.users_seen, serial.events_seen, serial.changed),
+                )
+
+        # scrierea pe partiții, serial: thread-urile pe SQLite-ul partajat din memorie
+        # se blochează reciproc la scriere (table lock, fără busy timeout)
+        written = trust_replay.replay_trust_scores_parallel(workers=1, partitions=3, dry_run=False)
+        self.assertEqual(written.written, 3)
+        self.assertEqual(self._scores(), self.expected)
+
+
+class SellerTierTests(TestCase):
+    def setUp(self):
+        seller_tiers.invalidate_tier_table()
+        self.addCleanup(seller_tiers.invalidate_tier_table)
+
+    def _seller(self, email):
+        user = User.objects.create_user(email=email, password="x", first_name="S", last_name="T", is_active=True)
+        return SellerProfile.objects.get_or_create(user=user)[0]
+
+    def test_boundaries_and_commissions(self):
+        table = seller_tiers.get_tier_table()
+        cases = [
+            (None, "AMATOR"), ("2999.99", "AMATOR"), ("3000", "RISING"), ("14999.99", "RISING"),
+            ("15000", "TOP"), ("49999.99", "TOP"), ("50000", "VIP"), ("1000000", "VIP"),
+        ]
+        for volume, tier in cases:
+            self.assertEqual(table.tier_for(volume), tier, volume)
+        self.assertEqual(
+            [table.commission_for(t) for t in seller_tiers.TIER_ORDER],
+            [Decimal("6.00"), Decimal("7.00"), Decimal("8.00"), Decimal("9.00")],
+        )
+        self.assertEqual(table.commission_for("NECUNOSCUT"), seller_tiers.DEFAULT_COMMISSION)
+        self.assertEqual((table.next_tier("AMATOR"), table.next_tier("VIP")), ("RISING", None))
+
+    def test_settings_override_invalidates_cached_table(self):
+        table = seller_tiers.get_tier_table()
+        self.assertIs(seller_tiers.get_tier_table(), table)
+        self.assertEqual(SellerProfile._tier_for_sales(Decimal("1000")), "AMATOR")
+
+        with override_settings(
+            SNOBISTIC_SELLER_THRESHOLDS={"rising": "1000"},
+            SNOBISTIC_COMMISSION_RATES={"RISING": "7.50", "TOP": "nu-e-număr"},
+        ):
+            overridden = seller_tiers.get_tier_table()
+            self.assertGreater(overridden.version, table.version)
+            # cheile lipsă / invalide rămân din tabela din models
+            self.assertEqual(overridden.threshold("RISING"), Decimal("1000"))
+            self.assertEqual(overridden.threshold("TOP"), Decimal("15000"))
+            self.assertEqual(overridden.commission_for("TOP"), Decimal("7.00"))
+            self.assertEqual(SellerProfile._tier_for_sales(Decimal("1000")), "RISING")
+
+            sp = self._seller("override@example.com")
+            sp.lifetime_sales_net = Decimal("1200.00")
+            sp.save()
+            sp.refresh_from_db()
+            self.assertEqual((sp.seller_level, sp.seller_commission_rate), ("RISING", Decimal("7.50")))
+
+        self.assertEqual(seller_tiers.get_tier_table().threshold("RISING"), Decimal("3000"))
+        self.assertEqual(SellerProfile._tier_for_sales(Decimal("1000")), "AMATOR")
+
+    def test_bulk_recompute_from_paid_orders(self):
+        rising, top, idle = (self._seller(f"{n}@example.com") for n in ("rising", "top", "idle"))
+        buyer = User.objects.create_user(email="b@example.com", password="x", first_name="B", last_name="C", is_active=True)
+        address = Address.objects.create(
+            user=buyer, street_address="Str. 1", city="Iași", region="Iași", postal_code="700000", country="RO"
+        )
+        category = Category.objects.create(name="Rochii", slug="rochii")
+
+        def sell(seller, price, quantity=1, paid=True):
+            product = Product.objects.create(
+                owner=seller.user, title=f"P{Product.objects.count()}", description="d", price=Decimal(price),
+                category=category, size="M",
+            )
+            order = Order.objects.create(
+                buyer=buyer, address=address, shipping_method="curier",
+                payment_status=Order.PAYMENT_PAID if paid else Order.PAYMENT_PENDING,
+            )
+            OrderItem.objects.create(order=order, product=product, price=Decimal(price), quantity=quantity)
+
+        sell(rising, "1500.00", quantity=2)
+        sell(top, "16000.00")
+        sell(top, "40000.00", paid=False)  # neplătită: nu contează
+
+        with self.assertNumQueries(1):
+            totals = seller_tiers.paid_sales_by_seller()
+        self.assertEqual(totals, {rising.user_id: Decimal("3000.00"), top.user_id: Decimal("16000.00")})
+
+        report = seller_tiers.recompute_all_seller_tiers(dry_run=True, batch_size=2)
+        self.assertEqual((report.sellers_seen, report.changed), (3, 2))
+        self.assertEqual(
+            sorted(report.changes), sorted([(rising.user_id, "AMATOR", "RISING"), (top.user_id, "AMATOR", "TOP")])
+        )
+        self.assertEqual(SellerProfile.objects.get(pk=top.pk).seller_level, "AMATOR")
+
+        out = io.StringIO()
+        call_command("recompute_seller_tiers", "--batch-size", "2", stdout=out)
+        self.assertIn("schimbări: 2 (scrise)", out.getvalue())
+        levels = {
+            sp.pk: (sp.seller_level, sp.seller_commission_rate, sp.lifetime_sales_net)
+            for sp in SellerProfile.objects.all()
+        }
+        self.assertEqual(levels[rising.pk], ("RISING", Decimal("8.00"), Decimal("3000.00")))
+        self.assertEqual(levels[top.pk], ("TOP", Decimal("7.00"), Decimal("16000.00")))
+        self.assertEqual(levels[idle.pk][0], "AMATOR")
+
+        self.assertEqual(seller_tiers.recompute_all_seller_tiers().changed, 0)
@@ -61,6 +61,7 @@ urlpatterns = [
     # KYC user
     path("kyc/", views.kyc_center, name="kyc_center"),
     path("kyc/documents/<int:pk>/delete/", views.kyc_document_delete, name="kyc_document_delete"),
+    path("kyc/documents/<int:pk>/download/", views.kyc_document_download, name="kyc_document_download"),
 
     # KYC staff
     path("staff/kyc/", views.staff_kyc_queue, name="staff_kyc_queue"),
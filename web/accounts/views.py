@@ -26,7 +26,7 @@ from django.contrib.auth.views import (
 )
 from django.core.cache import cache
 from django.db import IntegrityError, models, transaction
-from django.http import HttpRequest, HttpResponse
+from django.http import Http404, HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import NoReverseMatch, reverse, reverse_lazy
 from django.utils import timezone
@@ -39,8 +39,9 @@ from django.views import View
 from django.views.decorators.http import require_POST
 
 from catalog.models import Favorite
+from core.files import serve_file
 
-from .decorators import shop_manager_required
+from .decorators import is_shop_manager, shop_manager_required
 from .forms import (
     AddressForm,
     DeleteAccountConfirmForm,
@@ -71,6 +72,7 @@ from .notifications import (
     send_email_2fa_code,
     send_email_change_confirmation,
 )
+from .services.kyc_queue import review_queue
 from .services.score import (
     sync_buyer_identity_bonuses,
     sync_seller_identity_bonuses,
@@ -990,7 +992,7 @@ def profile_security(request: HttpRequest) -> HttpResponse:
 @login_required
 def kyc_center(request: HttpRequest) -> HttpResponse:
     prof = request.user.profile
-    kyc_req, _ = KycRequest.objects.get_or_create(user=request.user)
+    kyc_req, _created = KycRequest.objects.get_or_create(user=request.user)
     documents = KycDocument.objects.filter(user=request.user).order_by("-created_at")
 
     if request.method == "POST":
@@ -1036,6 +1038,21 @@ def kyc_document_delete(request: HttpRequest, pk: int) -> HttpResponse:
     return render(request, "accounts/profile/kyc_document_confirm_delete.html", {"document": doc})
 
 
+@login_required
+def kyc_document_download(request: HttpRequest, pk: int) -> HttpResponse:
+    doc = get_object_or_404(KycDocument, pk=pk)
+    if doc.user_id != request.user.pk and not is_shop_manager(request.user):
+        raise Http404()
+    if request.GET.get("thumb") == "1":
+        # thumbnail generat la procesare (accounts/services/kyc_documents.py)
+        if not doc.thumbnail:
+            raise Http404()
+        return serve_file(request, doc.thumbnail, as_attachment=False, content_type="image/jpeg")
+    if not doc.file:
+        raise Http404()
+    return serve_file(request, doc.file, as_attachment=request.GET.get("inline") != "1")
+
+
 # =============================================================================
 # Addresses
 # =============================================================================
@@ -1464,24 +1481,26 @@ def social_login_start(request: HttpRequest) -> HttpResponse:
 
 @shop_manager_required
 def staff_kyc_queue(request: HttpRequest) -> HttpResponse:
-    qs = KycRequest.objects.all().order_by(
-        models.Case(
-            models.When(status="NEEDS_MORE_INFO", then=models.Value(0)),
-            models.When(status="IN_REVIEW", then=models.Value(1)),
-            models.When(status="NOT_STARTED", then=models.Value(2)),
-            models.When(status="REJECTED", then=models.Value(3)),
-            models.When(status="APPROVED", then=models.Value(4)),
-            default=models.Value(9),
-            output_field=models.IntegerField(),
-        ),
-        "-updated_at",
+    # keyset pe (priority_rank, submitted_at, id), vezi accounts/services/kyc_queue.py
+    status = request.GET.get("status") or ""
+    if status not in KycRequest.PRIORITY_RANK:
+        status = ""
+    page = review_queue(status=status or None, after=request.GET.get("after", ""))
+    return render(
+        request,
+        "accounts/staff/kyc_queue.html",
+        {
+            "requests": page.items,
+            "page": page,
+            "status": status,
+            "status_choices": KycRequest.STATUS_CHOICES,
+        },
     )
-    return render(request, "accounts/staff/kyc_queue.html", {"requests": qs})
 
 
 @shop_manager_required
 def staff_kyc_review(request: HttpRequest, pk: int) -> HttpResponse:
-    kyc_req = get_object_or_404(KycRequest, pk=pk)
+    kyc_req = get_object_or_404(KycRequest.objects.select_related("user", "reviewed_by"), pk=pk)
     docs = KycDocument.objects.filter(user=kyc_req.user).order_by("-created_at")
     return render(
         request,
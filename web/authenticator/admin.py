@@ -23,20 +23,51 @@ class AuthRequestAdmin(admin.ModelAdmin):
         "user",
         "email",
         "product",
+        "submit_attempts",
     )
     list_filter = ("status", "verdict", "provider")
     search_fields = ("id", "provider_reference", "email", "user__email", "product__slug", "product__sku")
     inlines = [AuthImageInline]
-    readonly_fields = ("public_token", "submitted_at", "sent_at", "decided_at")
-    actions = ["mark_authentic", "mark_fake", "mark_inconclusive"]
+    readonly_fields = (
+        "public_token", "submitted_at", "sent_at", "decided_at",
+        "submit_attempts", "next_submit_at", "submit_error",
+        "certificate_sha256", "certificate_version", "certificate_rendered_at",
+    )
+    actions = ["retry_submission", "mark_authentic", "mark_fake", "mark_inconclusive"]
+
+    def save_model(self, request, obj, form, change):
+        if "certificate_file" in form.changed_data:
+            # fișier încărcat manual: nu mai e certificatul randat de noi
+            obj.certificate_sha256 = ""
+            obj.certificate_version = 0
+        super().save_model(request, obj, form, change)
 
     def _apply_manual(self, request, qs, verdict):
+        from authenticator.services.certificates import queue_certificate
         from authenticator.services.provider_client import apply_result_to_product
 
         for req in qs:
             req.finalize(verdict=verdict, payload=req.provider_payload or {"manual": True})
             req.save()
             apply_result_to_product(req)
+            queue_certificate(req)
+
+    @admin.action(description="Retrimite către provider")
+    def retry_submission(self, request, queryset):
+        from django.utils import timezone
+
+        from authenticator.services.submission import submit_one
+
+        ids = list(
+            queryset.filter(status__in=[AuthRequest.Status.PENDING, AuthRequest.Status.FAILED], sent_at__isnull=True)
+            .values_list("pk", flat=True)
+        )
+        AuthRequest.objects.filter(pk__in=ids).update(
+            status=AuthRequest.Status.PENDING, submit_attempts=0, next_submit_at=timezone.now(), failure_reason=""
+        )
+        for pk in ids:
+            submit_one(pk)
+        self.message_user(request, f"{len(ids)} cereri retrimise (vezi statusul / eroarea de trimitere).")
 
     @admin.action(description="Setează verdict: Autentic (manual)")
     def mark_authentic(self, request, queryset):
@@ -16,8 +16,20 @@ class MultiFileInput(forms.ClearableFileInput):
     allow_multiple_selected = True
 
 
+class MultiFileField(forms.FileField):
+    """
+    FileField care acceptă lista de fișiere întoarsă de MultiFileInput
+    (FileField simplu respinge lista: "Nici un fișier nu a fost trimis").
+    """
+
+    def clean(self, data, initial=None):
+        if isinstance(data, (list, tuple)):
+            return [super(MultiFileField, self).clean(d, initial) for d in data] or super().clean(None, initial)
+        return super().clean(data, initial)
+
+
 class AuthUploadForm(forms.ModelForm):
-    images = forms.FileField(
+    images = MultiFileField(
         widget=MultiFileInput(attrs={"class": "form-control"}),
         required=True,
         label="Imagini produs",
@@ -0,0 +1,26 @@
+# authenticator/management/commands/submit_auth_requests.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from authenticator.services.submission import submit_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Trimite către provider cererile de autentificare în așteptare (noi sau cu reîncercare "
+        "scadentă), cu imaginile lor. De rulat periodic (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, help="Număr maxim de cereri trimise în această rulare.")
+        parser.add_argument("--workers", type=int, help="Cereri concurente (default AUTH_PROVIDER_SUBMIT_WORKERS).")
+
+    def handle(self, *args, **options):
+        result = submit_pending(limit=options["limit"], workers=options["workers"])
+        if result.failed:
+            self.stderr.write(f"{result.failed} cereri au epuizat încercările și au fost marcate eșuate.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Trimise: {result.sent}, reprogramate: {result.retried}, eșuate: {result.failed}."
+        ))
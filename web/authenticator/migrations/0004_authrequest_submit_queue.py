@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:39
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authenticator', '0003_alter_authrequest_public_token'),
+        ('catalog', '0028_product_photo_ingest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authrequest',
+            name='next_submit_at',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, null=True),
+        ),
+        migrations.AddField(
+            model_name='authrequest',
+            name='submit_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='authrequest',
+            name='submit_error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='authrequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['next_submit_at'], name='authreq_submit_due_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authenticator', '0004_authrequest_submit_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authrequest',
+            name='certificate_rendered_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='authrequest',
+            name='certificate_sha256',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='authrequest',
+            name='certificate_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -71,15 +71,29 @@ class AuthRequest(models.Model):
     # Certificate (either file stored locally, or external link, or both)
     certificate_file = models.FileField(upload_to="certificates/", null=True, blank=True, max_length=255)
     certificate_url = models.URLField(blank=True)
+    # certificat randat de noi (services.certificates); gol = fișier încărcat manual / lipsă
+    certificate_sha256 = models.CharField(max_length=64, blank=True, default="", editable=False)
+    certificate_version = models.PositiveSmallIntegerField(default=0, editable=False)
+    certificate_rendered_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     failure_reason = models.TextField(blank=True)
     provider_payload = models.JSONField(null=True, blank=True)
 
+    # Coada de trimitere către provider (services.submission)
+    submit_attempts = models.PositiveSmallIntegerField(default=0)
+    next_submit_at = models.DateTimeField(null=True, blank=True, default=timezone.now)
+    submit_error = models.CharField(max_length=255, blank=True)
+
     class Meta:
         ordering = ["-submitted_at"]
         indexes = [
             models.Index(fields=["status", "submitted_at"]),
             models.Index(fields=["provider", "provider_reference"]),
+            models.Index(
+                fields=["next_submit_at"],
+                name="authreq_submit_due_idx",
+                condition=models.Q(status="pending"),
+            ),
         ]
 
     def __str__(self) -> str:
@@ -99,6 +113,10 @@ class AuthRequest(models.Model):
     def is_success(self) -> bool:
         return self.status == self.Status.SUCCESS and self.is_decided
 
+    @property
+    def has_certificate(self) -> bool:
+        return self.is_success and bool(self.certificate_file or self.certificate_url)
+
     def mark_sent(self, *, provider: str, provider_reference: str, payload: Optional[dict] = None) -> None:
         self.status = self.Status.SENT
         self.provider = provider or self.provider
@@ -0,0 +1,149 @@
+# authenticator/services/certificates.py
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.background import submit_after_commit
+from core.images import submit_to_pool
+from invoices import pdf as pdf_engine
+
+from ..models import AuthRequest
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Cache certificate de autentificare (PDF)
+# =============================================================================
+# - o cerere finalizată nu se mai schimbă, deci certificatul se randează o singură
+#   dată: după finalize() (webhook / verdict manual din admin), în fundal, după commit
+# - WeasyPrint rulează în pool-ul de procese din core.images (invoices.pdf.html_to_pdf)
+# - content-addressed, ca PDF-urile facturilor: cheia = sha256(versiune template +
+#   HTML randat), fișierul e certificates/pdf/<kk>/<cheie>.pdf
+# - un certificate_file încărcat manual (certificate_sha256 gol) nu se suprascrie;
+#   un verdict re-trimis prin webhook schimbă HTML-ul, deci și fișierul
+# - descărcarea servește fișierul stocat cu ETag (core.files.serve_file); linkul
+#   public (token) e cacheabil și de proxy-uri, deci un link distribuit nu mai
+#   ajunge la Django la fiecare accesare
+#
+# Settings:
+#   SNOBISTIC_CERTIFICATE_MAX_AGE   max-age (secunde) pentru linkul public (default 3600)
+
+CERT_TEMPLATE = "authenticator/certificate_pdf.html"
+CERT_TEMPLATE_VERSION = 1
+CERT_PREFIX = "certificates/pdf"
+
+
+def can_render() -> bool:
+    return pdf_engine.HTML is not None
+
+
+def public_cache_control() -> str:
+    return f"public, max-age={int(getattr(settings, 'SNOBISTIC_CERTIFICATE_MAX_AGE', 3600))}"
+
+
+def certificate_filename(req: AuthRequest) -> str:
+    return f"Certificat-Snobistic-{req.pk}.pdf"
+
+
+def is_rendered(req: AuthRequest) -> bool:
+    return bool(req.certificate_file) and bool(req.certificate_sha256)
+
+
+def is_current(req: AuthRequest) -> bool:
+    if not req.certificate_file:
+        return False
+    # fișier manual: nu e al nostru, e mereu "la zi"
+    return not req.certificate_sha256 or req.certificate_version >= CERT_TEMPLATE_VERSION
+
+
+def render_certificate_html(req: AuthRequest) -> str:
+    return render_to_string(
+        CERT_TEMPLATE,
+        {
+            "req": req,
+            "product": req.product,
+            "platform_name": "Snobistic",
+        },
+    )
+
+
+def content_key(html: str, version: Optional[int] = None) -> str:
+    version = CERT_TEMPLATE_VERSION if version is None else version
+    return hashlib.sha256(f"v{version}\n{html}".encode("utf-8")).hexdigest()
+
+
+def content_name(key: str) -> str:
+    return f"{CERT_PREFIX}/{key[:2]}/{key}.pdf"
+
+
+def _store(req: AuthRequest, key: str, data: Optional[bytes]) -> None:
+    name = content_name(key)
+    if data is not None and not default_storage.exists(name):
+        saved = default_storage.save(name, ContentFile(data))
+        if saved != name:
+            # scriere concurentă a aceluiași conținut
+            default_storage.delete(saved)
+    now = timezone.now()
+    AuthRequest.objects.filter(pk=req.pk).update(
+        certificate_file=name,
+        certificate_sha256=key,
+        certificate_version=CERT_TEMPLATE_VERSION,
+        certificate_rendered_at=now,
+    )
+    req.certificate_file.name = name
+    req.certificate_sha256 = key
+    req.certificate_version = CERT_TEMPLATE_VERSION
+    req.certificate_rendered_at = now
+
+
+def generate_certificate(req: AuthRequest) -> AuthRequest:
+    """
+    Randează și stochează certificatul unei cereri finalizate cu succes. Idempotent.
+    """
+    if not req.is_success:
+        raise ValueError("Doar cererile finalizate au certificat.")
+    if req.certificate_file and not req.certificate_sha256:
+        return req  # fișier încărcat manual
+    html = render_certificate_html(req)
+    key = content_key(html)
+    if req.certificate_sha256 == key and req.certificate_file and req.certificate_version >= CERT_TEMPLATE_VERSION:
+        return req
+    if default_storage.exists(content_name(key)):
+        _store(req, key, None)
+    else:
+        base_url = getattr(settings, "SNOBISTIC_SITE_URL", "") or None
+        _store(req, key, submit_to_pool(pdf_engine.html_to_pdf, html, base_url).result())
+    return req
+
+
+def _generate_logged(auth_request_id: int) -> None:
+    req = (
+        AuthRequest.objects.select_related("product")
+        .filter(pk=auth_request_id, status=AuthRequest.Status.SUCCESS)
+        .first()
+    )
+    if req is None:
+        return
+    try:
+        generate_certificate(req)
+    except pdf_engine.PdfUnavailable:
+        pass
+    except Exception:
+        logger.exception("Certificate PDF failed for AuthRequest %s", auth_request_id)
+
+
+def queue_certificate(req: AuthRequest) -> None:
+    """
+    Programează randarea după commit (apelat după finalize()).
+    """
+    if not can_render() or not req.is_success:
+        return
+    submit_after_commit(_generate_logged, req.pk)
@@ -1,41 +1,137 @@
 # authenticator/services/provider_client.py
 from __future__ import annotations
 
+import os
+import threading
 import uuid
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 
+import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from authenticator.models import AuthRequest
 
+# =============================================================================
+# Client provider de autentificare
+# =============================================================================
+# - o singură requests.Session per proces (keep-alive, pool de conexiuni),
+#   folosită din worker-ul de trimitere (services.submission) și din thread-urile
+#   de upload; retry scurt pe erori de conexiune și 429/502/503/504
+# - trimiterea = build_job() (DB, în thread-ul apelantului) + send_job() (doar HTTP):
+#     POST /auth/requests (JSON, Idempotency-Key = public_token), apoi imaginile
+#     în paralel, multipart, POST /auth/requests/<ref>/images (câte o cerere per
+#     imagine, Idempotency-Key per imagine)
+# - o referință deja primită (încercare anterioară eșuată la imagini) nu se mai
+#   recreează: se reîncarcă doar imaginile
+#
+# Settings:
+#   AUTH_PROVIDER_BASE_URL, AUTH_PROVIDER_API_KEY
+#   AUTH_PROVIDER_TIMEOUT          secunde per cerere (default 25)
+#   AUTH_PROVIDER_RETRIES          reîncercări HTTP imediate (default 2)
+#   AUTH_PROVIDER_UPLOAD_WORKERS   imagini încărcate concurent per cerere (default 4)
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
 
 class ProviderError(Exception):
     pass
 
 
+@dataclass(frozen=True)
+class ImageUpload:
+    pk: int
+    position: int
+    name: str
+    storage: Any
+
+
+@dataclass
+class SubmissionJob:
+    auth_request_id: int
+    idempotency_key: str
+    payload: Dict[str, Any]
+    provider_reference: str = ""
+    images: List[ImageUpload] = field(default_factory=list)
+
+
+@dataclass
+class SubmissionResult:
+    provider_reference: str = ""
+    data: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
 def is_configured() -> bool:
     return bool(getattr(settings, "AUTH_PROVIDER_BASE_URL", "") and getattr(settings, "AUTH_PROVIDER_API_KEY", ""))
 
 
-def submit_auth_request(req: AuthRequest) -> str:
-    """
-    Trimite cererea către provider.
-    Returnează provider_reference.
+def upload_workers() -> int:
+    return max(1, int(getattr(settings, "AUTH_PROVIDER_UPLOAD_WORKERS", 4)))
 
-    - dacă nu e configurat provider-ul, facem fallback: simulăm "sent" (ca să ruleze flow-ul),
-      iar tu poți procesa manual din Admin sau prin webhook test.
-    """
-    if not is_configured():
-        # fallback safe: "pretend sent" so the rest of the system works end-to-end
-        provider_reference = f"LOCAL-{uuid.uuid4().hex[:16]}"
-        req.mark_sent(provider="local_stub", provider_reference=provider_reference, payload={"stub": True})
-        req.save(update_fields=["status", "provider", "provider_reference", "sent_at", "provider_payload"])
-        return provider_reference
 
-    base_url = settings.AUTH_PROVIDER_BASE_URL.rstrip("/")
-    api_key = settings.AUTH_PROVIDER_API_KEY
-    endpoint = f"{base_url}/auth/requests"
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=int(getattr(settings, "AUTH_PROVIDER_RETRIES", 2)),
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    # worker-ul de trimitere poate rula mai multe cereri, fiecare cu upload-urile ei
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=upload_workers() * 2, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def reset_session() -> None:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def _timeout() -> float:
+    return float(getattr(settings, "AUTH_PROVIDER_TIMEOUT", 25))
+
+
+def _endpoint(path: str) -> str:
+    return f"{settings.AUTH_PROVIDER_BASE_URL.rstrip('/')}{path}"
+
+
+def _headers(idempotency_key: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {settings.AUTH_PROVIDER_API_KEY}", "Idempotency-Key": idempotency_key}
+
 
+def build_job(req: AuthRequest) -> SubmissionJob:
+    """
+    Payload + lista de imagini pentru cererea dată. Citește DB-ul: se construiește
+    în thread-ul apelantului, nu în worker-ii HTTP.
+    """
     # Build payload. Adjust to real provider contract.
     payload: Dict[str, Any] = {
         "brand": req.brand_text,
@@ -49,34 +145,108 @@ def submit_auth_request(req: AuthRequest) -> str:
             "product_id": req.product_id,
         },
     }
+    images = [
+        ImageUpload(pk=img.pk, position=img.position, name=img.image.name, storage=img.image.storage)
+        for img in req.images.all()
+        if img.image
+    ]
+    payload["image_count"] = len(images)
+    return SubmissionJob(
+        auth_request_id=req.pk,
+        idempotency_key=f"snobistic-auth-{req.public_token}",
+        payload=payload,
+        provider_reference=req.provider_reference,
+        images=images,
+    )
 
-    # For image upload: depends on provider (multipart, presigned URLs, etc.)
-    # Here we send just metadata and assume images are handled separately, OR provider accepts URLs.
-    # If provider requires images in this call, adapt to multipart with requests.
 
+def _create(job: SubmissionJob) -> tuple[str, Dict[str, Any]]:
     try:
-        import requests  # type: ignore
-    except Exception as e:  # pragma: no cover
-        raise ProviderError("Lipsește pachetul 'requests' pentru integrarea provider-ului.") from e
-
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-
-    try:
-        r = requests.post(endpoint, json=payload, headers=headers, timeout=25)
+        r = get_session().post(
+            _endpoint("/auth/requests"),
+            json=job.payload,
+            headers=_headers(job.idempotency_key),
+            timeout=_timeout(),
+        )
         r.raise_for_status()
         data = r.json() if r.content else {}
-    except Exception as e:
+    except (requests.RequestException, ValueError) as e:
         raise ProviderError(f"Eroare la trimiterea către provider: {e}") from e
 
     provider_reference = str(data.get("id") or data.get("reference") or "").strip()
     if not provider_reference:
         raise ProviderError("Provider-ul nu a returnat un provider_reference valid.")
+    return provider_reference, data
+
+
+def _upload_image(provider_reference: str, job: SubmissionJob, image: ImageUpload) -> None:
+    try:
+        with image.storage.open(image.name, "rb") as fh:
+            r = get_session().post(
+                _endpoint(f"/auth/requests/{provider_reference}/images"),
+                files={"image": (os.path.basename(image.name), fh)},
+                data={"position": str(image.position)},
+                headers=_headers(f"{job.idempotency_key}-img-{image.pk}"),
+                timeout=_timeout(),
+            )
+        r.raise_for_status()
+    except (requests.RequestException, OSError) as e:
+        raise ProviderError(f"Eroare la încărcarea imaginii {image.position + 1}: {e}") from e
+
+
+def send_job(job: SubmissionJob) -> SubmissionResult:
+    """
+    Trimite cererea și imaginile. Fără acces la DB (sigur de apelat din thread-uri).
+    Un eșec după crearea cererii păstrează provider_reference în rezultat.
+    """
+    result = SubmissionResult(provider_reference=job.provider_reference)
+    try:
+        if not result.provider_reference:
+            result.provider_reference, result.data = _create(job)
+        if job.images:
+            workers = min(upload_workers(), len(job.images))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snobistic-auth-upload") as pool:
+                futures = [pool.submit(_upload_image, result.provider_reference, job, img) for img in job.images]
+                for future in futures:
+                    future.result()
+    except ProviderError as e:
+        result.error = str(e)
+    return result
 
-    req.mark_sent(provider="external_provider", provider_reference=provider_reference, payload=data)
+
+def mark_local_stub(req: AuthRequest) -> str:
+    # fallback safe: "pretend sent" so the rest of the system works end-to-end
+    provider_reference = f"LOCAL-{uuid.uuid4().hex[:16]}"
+    req.mark_sent(provider="local_stub", provider_reference=provider_reference, payload={"stub": True})
     req.save(update_fields=["status", "provider", "provider_reference", "sent_at", "provider_payload"])
     return provider_reference
 
 
+def submit_auth_request(req: AuthRequest) -> str:
+    """
+    Trimite sincron cererea (cu imagini) către provider.
+    Returnează provider_reference.
+
+    - dacă nu e configurat provider-ul, facem fallback: simulăm "sent" (ca să ruleze flow-ul),
+      iar tu poți procesa manual din Admin sau prin webhook test.
+    - fluxul normal din view trece prin coada din services.submission
+    """
+    if not is_configured():
+        return mark_local_stub(req)
+
+    result = send_job(build_job(req))
+    if not result.ok:
+        if result.provider_reference and not req.provider_reference:
+            req.provider_reference = result.provider_reference
+            req.save(update_fields=["provider_reference"])
+        raise ProviderError(result.error)
+
+    req.mark_sent(provider="external_provider", provider_reference=result.provider_reference,
+                  payload=result.data or req.provider_payload)
+    req.save(update_fields=["status", "provider", "provider_reference", "sent_at", "provider_payload"])
+    return result.provider_reference
+
+
 def apply_result_to_product(req: AuthRequest) -> None:
     """
     Dacă cererea este legată de un produs, sincronizează ProductAuthentication.
@@ -0,0 +1,174 @@
+# authenticator/services/submission.py
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.background import submit_after_commit
+
+from ..models import AuthRequest
+from . import provider_client
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Coada de trimitere către provider
+# =============================================================================
+# - view-ul doar salvează cererea (PENDING, next_submit_at = acum) și programează
+#   submit_one după commit (core.background); userul primește răspuns imediat,
+#   rezultatul vine ulterior prin webhook
+# - claim: UPDATE condiționat care mută next_submit_at la acum + LEASE; un worker
+#   oprit la jumătate lasă cererea să redevină scadentă după lease
+# - eșec: submit_attempts += 1, submit_error, next_submit_at = acum + backoff
+#   exponențial (BASE * 2^(încercări-1), plafonat la MAX); după MAX_ATTEMPTS
+#   cererea devine FAILED cu failure_reason
+# - submit_pending() (comanda submit_auth_requests, cron) drenează cererile
+#   scadente: payload-urile în thread-ul apelantului, HTTP-ul în paralel
+#   (provider_client.send_job), rezultatele scrise înapoi tot aici
+#
+# Settings:
+#   AUTH_PROVIDER_SUBMIT_MAX_ATTEMPTS      încercări până la FAILED (default 6)
+#   AUTH_PROVIDER_RETRY_BASE_SECONDS       primul interval de reîncercare (default 60)
+#   AUTH_PROVIDER_RETRY_MAX_SECONDS        plafonul intervalului (default 6 ore)
+#   AUTH_PROVIDER_SUBMIT_LEASE_SECONDS     cât ține un claim (default 300)
+#   AUTH_PROVIDER_SUBMIT_WORKERS           cereri trimise concurent la drenare (default 4)
+
+SENT = "sent"
+RETRY = "retry"
+FAILED = "failed"
+
+
+@dataclass
+class SubmitPendingResult:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+
+def max_attempts() -> int:
+    return max(1, int(getattr(settings, "AUTH_PROVIDER_SUBMIT_MAX_ATTEMPTS", 6)))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Intervalul până la următoarea încercare, după numărul de încercări eșuate.
+    """
+    base = float(getattr(settings, "AUTH_PROVIDER_RETRY_BASE_SECONDS", 60))
+    cap = float(getattr(settings, "AUTH_PROVIDER_RETRY_MAX_SECONDS", 6 * 3600))
+    return timedelta(seconds=min(cap, base * 2 ** max(0, attempts - 1)))
+
+
+def _lease() -> timedelta:
+    return timedelta(seconds=int(getattr(settings, "AUTH_PROVIDER_SUBMIT_LEASE_SECONDS", 300)))
+
+
+def _due(now: datetime):
+    return AuthRequest.objects.filter(status=AuthRequest.Status.PENDING, next_submit_at__lte=now).order_by(
+        "next_submit_at", "id"
+    )
+
+
+def _claim(ids: list[int], now: datetime) -> list[int]:
+    claimed = []
+    for pk in ids:
+        if _due(now).filter(pk=pk).update(next_submit_at=now + _lease()):
+            claimed.append(pk)
+    return claimed
+
+
+def enqueue(req: AuthRequest) -> None:
+    """
+    Trimite în fundal, după commit, o cerere salvată PENDING (next_submit_at are
+    default acum, deci e deja scadentă și pentru submit_pending).
+    """
+    submit_after_commit(submit_one, req.pk)
+
+
+def _record(req: AuthRequest, result: provider_client.SubmissionResult, now: datetime) -> str:
+    if result.ok:
+        req.mark_sent(provider="external_provider", provider_reference=result.provider_reference,
+                      payload=result.data or req.provider_payload)
+        req.submit_error = ""
+        req.next_submit_at = None
+        req.save(update_fields=[
+            "status", "provider", "provider_reference", "sent_at", "provider_payload",
+            "submit_error", "next_submit_at",
+        ])
+        return SENT
+
+    req.submit_attempts += 1
+    req.submit_error = (result.error or "Eroare necunoscută.")[:255]
+    # referința primită înaintea eșecului se păstrează: reîncercarea urcă doar imaginile
+    req.provider_reference = result.provider_reference or req.provider_reference
+    fields = ["submit_attempts", "submit_error", "provider_reference", "next_submit_at"]
+    if req.submit_attempts >= max_attempts():
+        logger.warning("AuthRequest %s: provider submission failed permanently: %s", req.pk, req.submit_error)
+        req.status = AuthRequest.Status.FAILED
+        req.failure_reason = f"Nu s-a putut trimite către provider: {req.submit_error}"
+        req.next_submit_at = None
+        fields += ["status", "failure_reason"]
+        outcome = FAILED
+    else:
+        req.next_submit_at = now + retry_delay(req.submit_attempts)
+        outcome = RETRY
+    req.save(update_fields=fields)
+    return outcome
+
+
+def submit_one(auth_request_id: int, *, now: Optional[datetime] = None) -> Optional[str]:
+    """
+    Trimite o cerere scadentă. None dacă nu mai e de trimis (deja preluată / trimisă).
+    """
+    now = now or timezone.now()
+    if not _claim([auth_request_id], now):
+        return None
+    req = AuthRequest.objects.get(pk=auth_request_id)
+    if not provider_client.is_configured():
+        provider_client.mark_local_stub(req)
+        return SENT
+    result = provider_client.send_job(provider_client.build_job(req))
+    return _record(req, result, now)
+
+
+def submit_pending(
+    *,
+    now: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    workers: Optional[int] = None,
+    batch_size: int = 20,
+) -> SubmitPendingResult:
+    """
+    Drenează cererile PENDING scadente (cele noi și reîncercările).
+    """
+    now = now or timezone.now()
+    workers = max(1, workers or int(getattr(settings, "AUTH_PROVIDER_SUBMIT_WORKERS", 4)))
+    result = SubmitPendingResult()
+    counters = {SENT: "sent", RETRY: "retried", FAILED: "failed"}
+    processed = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snobistic-auth-submit") as pool:
+        while limit is None or processed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - processed)
+            ids = _claim(list(_due(now).values_list("pk", flat=True)[:size]), now)
+            if not ids:
+                break
+            processed += len(ids)
+            reqs = list(AuthRequest.objects.filter(pk__in=ids).prefetch_related("images").order_by("pk"))
+
+            if not provider_client.is_configured():
+                for req in reqs:
+                    provider_client.mark_local_stub(req)
+                result.sent += len(reqs)
+                continue
+
+            jobs = [provider_client.build_job(req) for req in reqs]
+            for req, response in zip(reqs, pool.map(provider_client.send_job, jobs)):
+                outcome = _record(req, response, now)
+                setattr(result, counters[outcome], getattr(result, counters[outcome]) + 1)
+    return result
@@ -1,3 +1,310 @@
-from django.test import TestCase
+import io
+import json
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from invoices import pdf as pdf_engine
+
+from .models import AuthImage, AuthRequest
+from .services import certificates, provider_client, submission
+
+
+def _png():
+    buf = io.BytesIO()
+    Image.new("RGB", (20, 20), (200, 10, 10)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+class StubProvider:
+    """
+    Server HTTP local care imită POST /auth/requests (JSON) și
+    POST /auth/requests/<ref>/images (multipart), cu latență la upload.
+    down=True -> 503 la creare; fail_uploads = câte upload-uri răspund 500.
+    """
+
+    def __init__(self, latency=0.15):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.created = {}  # Idempotency-Key -> referință
+        self.uploads = []  # (referință, poziție)
+        self.down = False
+        self.fail_uploads = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                key = self.headers.get("Idempotency-Key")
+                if self.path == "/auth/requests":
+                    if stub.down:
+                        return self._send(503, {"error": "down"})
+                    json.loads(body)
+                    with stub.lock:
+                        ref = stub.created.setdefault(key, f"PRV-{len(stub.created) + 1}")
+                    return self._send(201, {"id": ref})
+
+                ref = self.path.split("/")[3]
+                with stub.lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(stub.latency)
+                with stub.lock:
+                    stub.in_flight -= 1
+                    if stub.fail_uploads:
+                        stub.fail_uploads -= 1
+                        return self._send(500, {"error": "storage"})
+                    position = int(re.search(rb'name="position"\r\n\r\n(\d+)', body).group(1))
+                    stub.uploads.append((ref, position))
+                self._send(201, {"ok": True})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(AUTH_PROVIDER_RETRIES=0, AUTH_PROVIDER_RETRY_BASE_SECONDS=60, AUTH_PROVIDER_SUBMIT_MAX_ATTEMPTS=3)
+class SubmissionQueueTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.stub = StubProvider().__enter__()
+        self.addCleanup(self.stub.__exit__)
+        provider = override_settings(AUTH_PROVIDER_BASE_URL=self.stub.url, AUTH_PROVIDER_API_KEY="k")
+        provider.enable()
+        self.addCleanup(provider.disable)
+        provider_client.reset_session()
+        self.addCleanup(provider_client.reset_session)
+
+        self.user = get_user_model().objects.create_user(
+            email="buyer@example.com", password="x", first_name="B", last_name="C", is_active=True
+        )
+
+    def _request(self, images=3):
+        req = AuthRequest.objects.create(user=self.user, brand_text="Gucci", model_text="Ace")
+        for i in range(images):
+            img = AuthImage(auth_request=req, position=i)
+            img.image.save(f"poza{i}.png", ContentFile(_png()), save=True)
+        return req
+
+    def test_drain_sends_request_and_uploads_images_concurrently(self):
+        req = self._request(images=4)
+
+        result = submission.submit_pending()
+
+        self.assertEqual((result.sent, result.retried, result.failed), (1, 0, 0))
+        req.refresh_from_db()
+        self.assertEqual(req.status, AuthRequest.Status.SENT)
+        self.assertEqual(req.provider_reference, "PRV-1")
+        self.assertIsNone(req.next_submit_at)
+        self.assertEqual(sorted(self.stub.uploads), [("PRV-1", i) for i in range(4)])
+        self.assertGreater(self.stub.max_in_flight, 1)
+        # nimic scadent la a doua trecere
+        self.assertEqual(submission.submit_pending().sent, 0)
+
+    def test_failures_back_off_exponentially_then_fail(self):
+        req = self._request(images=1)
+        self.stub.down = True
+        now = timezone.now()
+
+        self.assertEqual(submission.submit_pending(now=now).retried, 1)
+        req.refresh_from_db()
+        self.assertEqual(req.status, AuthRequest.Status.PENDING)
+        self.assertEqual(req.submit_attempts, 1)
+        self.assertEqual(req.next_submit_at, now + timedelta(seconds=60))
+        self.assertIn("503", req.submit_error)
+
+        # încă neprogramată: nu se reîncearcă
+        self.assertEqual(submission.submit_pending(now=now + timedelta(seconds=30)).retried, 0)
+
+        now += timedelta(seconds=60)
+        submission.submit_pending(now=now)
+        req.refresh_from_db()
+        self.assertEqual(req.next_submit_at, now + timedelta(seconds=120))
+
+        result = submission.submit_pending(now=now + timedelta(seconds=120))
+        self.assertEqual(result.failed, 1)
+        req.refresh_from_db()
+        self.assertEqual(req.status, AuthRequest.Status.FAILED)
+        self.assertEqual(req.submit_attempts, 3)
+        self.assertIn("provider", req.failure_reason)
+
+    def test_retry_after_upload_failure_reuses_reference(self):
+        req = self._request(images=2)
+        self.stub.fail_uploads = 1
+        now = timezone.now()
+
+        self.assertEqual(submission.submit_one(req.pk, now=now), submission.RETRY)
+        req.refresh_from_db()
+        self.assertEqual(req.provider_reference, "PRV-1")
+        self.assertEqual(req.status, AuthRequest.Status.PENDING)
+
+        self.assertEqual(submission.submit_one(req.pk, now=now + timedelta(minutes=1)), submission.SENT)
+        self.assertEqual(len(self.stub.created), 1)
+        self.assertIn(("PRV-1", 0), self.stub.uploads)
+        self.assertIn(("PRV-1", 1), self.stub.uploads)
+
+    @override_settings(SNOBISTIC_BACKGROUND_SYNC=True)
+    def test_view_responds_before_submission_and_queues_it(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile("a.png", _png(), content_type="image/png")
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                reverse("authenticator:authenticate_product"),
+                {"brand_text": "Gucci", "model_text": "Ace", "images": [upload]},
+            )
+        self.assertRedirects(response, reverse("authenticator:authenticate_history"), fetch_redirect_response=False)
+        req = AuthRequest.objects.get()
+        self.assertEqual(req.status, AuthRequest.Status.PENDING)
+        self.assertEqual(self.stub.created, {})
+
+        for callback in callbacks:
+            callback()
+        req.refresh_from_db()
+        self.assertEqual(req.status, AuthRequest.Status.SENT)
+        self.assertEqual(self.stub.uploads, [(req.provider_reference, 0)])
+
+    def test_command_uses_local_stub_without_provider(self):
+        req = self._request(images=1)
+        with override_settings(AUTH_PROVIDER_BASE_URL=""):
+            call_command("submit_auth_requests", stdout=io.StringIO())
+        req.refresh_from_db()
+        self.assertEqual(req.status, AuthRequest.Status.SENT)
+        self.assertTrue(req.provider_reference.startswith("LOCAL-"))
+
+
+class FakeHTML:
+    """Înlocuiește WeasyPrint în teste; numără randările."""
+
+    calls = 0
+
+    def __init__(self, string, base_url=None):
+        self.string = string
+
+    def write_pdf(self):
+        FakeHTML.calls += 1
+        return b"%PDF-1.7 " + self.string[-60:].encode("utf-8")
+
+
+@override_settings(SNOBISTIC_BACKGROUND_SYNC=True, SNOBISTIC_IMAGE_WORKERS=0, AUTH_PROVIDER_WEBHOOK_SECRET="")
+class CertificateCacheTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        FakeHTML.calls = 0
+        patcher = mock.patch.object(pdf_engine, "HTML", FakeHTML)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = get_user_model().objects.create_user(
+            email="buyer@example.com", password="x", first_name="B", last_name="C", is_active=True
+        )
+        self.req = AuthRequest.objects.create(
+            user=self.user, brand_text="Gucci", model_text="Ace", provider_reference="PRV-9",
+            status=AuthRequest.Status.SENT,
+        )
+
+    def _webhook(self, verdict="authentic", **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("authenticator:webhook", args=["external_provider"]),
+                data=json.dumps({"provider_reference": "PRV-9", "verdict": verdict, **extra}),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.req.refresh_from_db()
+
+    def test_finalize_renders_once_and_token_link_serves_cached_file(self):
+        self._webhook()
+        self.assertEqual(FakeHTML.calls, 1)
+        self.assertTrue(self.req.certificate_file.name.startswith("certificates/pdf/"))
+        self.assertIn(self.req.certificate_sha256, self.req.certificate_file.name)
+
+        url = reverse("authenticator:download_certificate_token", args=[self.req.public_token])
+        for _ in range(3):
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "application/pdf")
+            self.assertTrue(response["Cache-Control"].startswith("public"))
+            self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+        self.assertEqual(FakeHTML.calls, 1)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        # re-livrarea aceluiași webhook nu re-randează
+        self._webhook()
+        self.assertEqual(FakeHTML.calls, 1)
+
+    def test_owner_download_renders_inline_when_background_job_missed(self):
+        self.req.finalize(verdict=AuthRequest.Verdict.FAKE)
+        self.req.save()
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("authenticator:download_certificate", args=[self.req.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Cache-Control"].startswith("private"))
+        self.assertEqual(FakeHTML.calls, 1)
+
+    def test_manual_file_is_kept_and_provider_link_is_fallback(self):
+        self.req.finalize(verdict=AuthRequest.Verdict.AUTHENTIC, certificate_url="https://provider.example/c/9")
+        self.req.save()
+        url = reverse("authenticator:download_certificate_token", args=[self.req.public_token])
+
+        with mock.patch.object(pdf_engine, "HTML", None):
+            response = self.client.get(url)
+        self.assertRedirects(response, "https://provider.example/c/9", fetch_redirect_response=False)
+
+        self.req.certificate_file.save("manual.pdf", ContentFile(b"%PDF manual"), save=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            certificates.queue_certificate(self.req)
+        self.req.refresh_from_db()
+        self.assertEqual(FakeHTML.calls, 0)
+        self.assertEqual(b"".join(self.client.get(url).streaming_content), b"%PDF manual")
@@ -12,9 +12,10 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 
 from catalog.models import Product
+from core.files import CACHE_CONTROL, serve_file
 from .forms import AuthUploadForm
 from .models import AuthRequest
-from .services import provider_client
+from .services import certificates, provider_client, submission
 from .services.webhook_security import verify_hmac_signature
 
 
@@ -45,19 +46,13 @@ def authenticate_product_view(request, slug=None):
                 req.product = product
                 req.save(update_fields=["product"])
 
-            # trimite către provider (sync)
-            try:
-                provider_client.submit_auth_request(req)
-                messages.success(request, "Cererea a fost trimisă cu succes! O vei vedea în istoric.")
-            except Exception as e:
-                req.status = AuthRequest.Status.PENDING
-                req.failure_reason = str(e)
-                req.save(update_fields=["status", "failure_reason"])
-                messages.warning(
-                    request,
-                    "Cererea a fost înregistrată, dar nu s-a putut trimite către provider. "
-                    "Va fi procesată manual / reîncercată.",
-                )
+            # trimiterea către provider (cu imaginile) rulează în fundal, după commit;
+            # reîncercările sunt persistate pe cerere (services.submission)
+            submission.enqueue(req)
+            messages.success(
+                request,
+                "Cererea a fost înregistrată și este trimisă spre verificare. O vei vedea în istoric.",
+            )
 
             if request.user.is_authenticated:
                 return redirect("authenticator:authenticate_history")
@@ -98,33 +93,52 @@ def authenticate_status_view(request, token):
     return render(request, "authenticator/authenticate_status.html", {"req": req})
 
 
-def _redirect_to_certificate(req: AuthRequest):
+def _certificate_response(request, req: AuthRequest, *, cache_control: str = CACHE_CONTROL):
     """
-    Prefer file if present; fallback to url.
+    Fișierul stocat (randat o singură dată, vezi services/certificates.py), servit cu ETag;
+    fallback: linkul provider-ului. None dacă nu există niciunul.
     """
+    if not certificates.is_current(req) and certificates.can_render():
+        # încă nerandat (job-ul din fundal n-a rulat sau a eșuat) -> inline, o dată
+        certificates.generate_certificate(req)
     if req.certificate_file:
-        return redirect(req.certificate_file.url)
+        if certificates.is_rendered(req):
+            return serve_file(
+                request,
+                req.certificate_file,
+                filename=certificates.certificate_filename(req),
+                content_type="application/pdf",
+                as_attachment=False,
+                cache_control=cache_control,
+            )
+        return serve_file(request, req.certificate_file, as_attachment=False, cache_control=cache_control)
     if req.certificate_url:
         return redirect(req.certificate_url)
-    messages.error(req_request := None, "Certificatul nu este disponibil încă.")  # no-op guard
-    return redirect("authenticator:authenticate_product")
+    return None
 
 
 @login_required
 def download_certificate_view(request, pk):
-    req = get_object_or_404(AuthRequest, pk=pk, user=request.user, status=AuthRequest.Status.SUCCESS)
-    if not (req.certificate_file or req.certificate_url):
+    req = get_object_or_404(
+        AuthRequest.objects.select_related("product"), pk=pk, user=request.user, status=AuthRequest.Status.SUCCESS
+    )
+    response = _certificate_response(request, req)
+    if response is None:
         messages.error(request, "Certificatul nu este disponibil încă.")
         return redirect("authenticator:authenticate_history")
-    return _redirect_to_certificate(req)
+    return response
 
 
 def download_certificate_by_token_view(request, token):
-    req = get_object_or_404(AuthRequest, public_token=token, status=AuthRequest.Status.SUCCESS)
-    if not (req.certificate_file or req.certificate_url):
+    # public_token e unic (index): un singur lookup pe index per accesare
+    req = get_object_or_404(
+        AuthRequest.objects.select_related("product"), public_token=token, status=AuthRequest.Status.SUCCESS
+    )
+    response = _certificate_response(request, req, cache_control=certificates.public_cache_control())
+    if response is None:
         messages.error(request, "Certificatul nu este disponibil încă.")
         return redirect("authenticator:authenticate_status", token=token)
-    return _redirect_to_certificate(req)
+    return response
 
 
 @csrf_exempt
@@ -187,5 +201,6 @@ def webhook_view(request, provider: str):
 
     # sync to product badge if linked
     provider_client.apply_result_to_product(req)
+    certificates.queue_certificate(req)
 
     return HttpResponse("OK")
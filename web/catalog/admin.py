@@ -1,5 +1,5 @@
 # catalog/admin.py
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html
 
 from . import models
@@ -140,6 +140,7 @@ class ProductAdmin(admin.ModelAdmin):
         "fit",
         "sale_type",
         "moderation_status",
+        "photos_status",
         "sustainability_tags",
         "sustainability_none",
         "created_at",
@@ -339,6 +340,7 @@ class ProductAdmin(admin.ModelAdmin):
             {
                 "fields": (
                     "moderation_status",
+                    "photos_status",
                     "moderation_notes",
                     "moderated_by",
                     "moderated_at",
@@ -381,10 +383,17 @@ class ProductAdmin(admin.ModelAdmin):
 
     @admin.action(description="Aprobă (moderare) produsele selectate")
     def approve_products(self, request, queryset):
-        updated = queryset.update(
+        # fără fotografii procesate (PROCESSING / FAILED) nu există main_image
+        ready = queryset.filter(photos_status=models.Product.PhotosStatus.READY).exclude(main_image="")
+        skipped = queryset.count() - ready.count()
+        updated = ready.update(
             moderation_status="APPROVED", moderated_by=request.user
         )
         self.message_user(request, f"{updated} produse aprobate.")
+        if skipped:
+            self.message_user(
+                request, f"{skipped} produse sărite: fotografiile nu sunt gata.", level=messages.WARNING
+            )
 
     @admin.action(description="Respinge (moderare) produsele selectate")
     def reject_products(self, request, queryset):
@@ -394,6 +403,17 @@ class ProductAdmin(admin.ModelAdmin):
         self.message_user(request, f"{updated} produse respinse.")
 
 
+@admin.register(models.ProductPhotoUpload)
+class ProductPhotoUploadAdmin(admin.ModelAdmin):
+    list_display = ("product", "original_name", "is_main", "position", "status", "attempts", "error", "updated_at")
+    list_filter = ("status", "is_main")
+    list_select_related = ("product",)
+    search_fields = ("product__title", "product__sku", "original_name")
+    raw_id_fields = ("product",)
+    readonly_fields = ("tmp_name", "created_at", "updated_at")
+    ordering = ("-created_at",)
+
+
 @admin.register(models.Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ("user", "product", "created_at")
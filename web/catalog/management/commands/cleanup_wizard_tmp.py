@@ -0,0 +1,20 @@
+# catalog/management/commands/cleanup_wizard_tmp.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from catalog.photo_ingest import cleanup_wizard_tmp
+
+
+class Command(BaseCommand):
+    help = "Șterge fișierele orfane din product_wizard_tmp (wizard-uri abandonate) mai vechi de --max-age-hours."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-age-hours", type=float, default=24)
+        parser.add_argument("--dry-run", action="store_true", help="Doar raportează, nu șterge.")
+
+    def handle(self, *args, **options):
+        files, size = cleanup_wizard_tmp(max_age_hours=options["max_age_hours"], dry_run=options["dry_run"])
+        verb = "de șters" if options["dry_run"] else "șterse"
+        self.stdout.write(self.style.SUCCESS(f"product_wizard_tmp: {files} fișiere {verb} ({size / 1024 / 1024:.1f} MiB)."))
@@ -0,0 +1,27 @@
+# catalog/management/commands/process_product_photos.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from catalog.photo_ingest import process_pending_photos
+
+
+class Command(BaseCommand):
+    help = "Procesează fotografiile din wizard rămase PENDING (sau blocate în PROCESSING)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Număr maxim de produse.")
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=30,
+            help="Pozele PROCESSING neatinse de atât sunt reluate (proces oprit la jumătate).",
+        )
+
+    def handle(self, *args, **options):
+        products, remaining = process_pending_photos(
+            limit=options["limit"],
+            stale_minutes=options["stale_minutes"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Fotografii: {products} produse procesate, {remaining} poze rămase."))
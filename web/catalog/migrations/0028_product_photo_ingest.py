@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0027_delete_productmaterial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='photos_status',
+            field=models.CharField(choices=[('READY', 'Gata'), ('PROCESSING', 'Se procesează fotografiile'), ('FAILED', 'Fotografii respinse')], db_index=True, default='READY', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='ProductPhotoUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tmp_name', models.CharField(max_length=255)),
+                ('original_name', models.CharField(blank=True, max_length=255)),
+                ('is_main', models.BooleanField(default=False)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('PENDING', 'În așteptare'), ('PROCESSING', 'În procesare'), ('FAILED', 'Eșuat')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='photo_uploads', to='catalog.product')),
+            ],
+            options={
+                'ordering': ['-is_main', 'position', 'id'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='photo_upload_status_idx')],
+            },
+        ),
+    ]
@@ -688,6 +688,19 @@ class Product(models.Model):
         max_length=255,
     )
 
+    class PhotosStatus(models.TextChoices):
+        READY = "READY", _("Gata")
+        PROCESSING = "PROCESSING", _("Se procesează fotografiile")
+        FAILED = "FAILED", _("Fotografii respinse")
+
+    # fotografiile din wizard sunt procesate în fundal (catalog/photo_ingest.py)
+    photos_status = models.CharField(
+        max_length=10,
+        choices=PhotosStatus.choices,
+        default=PhotosStatus.READY,
+        db_index=True,
+    )
+
     # ✅ SINGLE MATERIAL (no composition, no percents)
     material = models.ForeignKey(
         "Material",
@@ -1012,11 +1025,24 @@ class Product(models.Model):
     def is_sold(self) -> bool:
         return self.moderation_status == self.ModerationStatus.SOLD
 
+    @property
+    def photos_ready(self) -> bool:
+        # produsele din wizard n-au main_image până termină catalog/photo_ingest.py
+        return self.photos_status == self.PhotosStatus.READY and bool(self.main_image)
+
+    def _require_photos_ready(self) -> None:
+        if not self.photos_ready:
+            raise ValidationError(
+                {"photos_status": _("Fotografiile produsului nu sunt gata (în procesare sau respinse).")}
+            )
+
     def can_be_published(self) -> bool:
         if self.is_archived or not self.is_active:
             return False
         if self.moderation_status != self.ModerationStatus.APPROVED:
             return False
+        if not self.photos_ready:
+            return False
         return self.has_minimum_images()
 
     def mark_pending(self, *, by=None, notes: str = "") -> None:
@@ -1027,6 +1053,7 @@ class Product(models.Model):
         self.published_at = None
 
     def approve(self, *, by=None, notes: str = "") -> None:
+        self._require_photos_ready()
         self.moderation_status = self.ModerationStatus.APPROVED
         self.moderation_notes = notes or ""
         self.moderated_by = by
@@ -1048,6 +1075,7 @@ class Product(models.Model):
             raise ValidationError({"moderation_status": _("Poți publica doar produse APPROVED.")})
         if self.is_archived or not self.is_active:
             raise ValidationError({"is_active": _("Nu poți publica un produs inactiv sau arhivat.")})
+        self._require_photos_ready()
         self.moderation_status = self.ModerationStatus.PUBLISHED
         self.moderation_notes = notes or self.moderation_notes
         self.moderated_by = by
@@ -1103,15 +1131,10 @@ class Product(models.Model):
         return (Decimal(grams) / Decimal("1000")).quantize(Decimal("0.01"))
 
     def get_shipping_rate_for_display(self):
-        from logistics.models import Courier, ShippingRate
-
-        try:
-            curiera = Courier.objects.get(slug="curiera")
-            qs = ShippingRate.objects.filter(courier=curiera, is_active=True)
-        except Courier.DoesNotExist:
-            qs = ShippingRate.objects.filter(is_active=True)
+        # cel mai ieftin tarif activ, din tabela în memorie (fără query-uri)
+        from logistics.rates import cheapest_rate
 
-        return qs.order_by("base_price").first()
+        return cheapest_rate()
 
     def get_shipping_price_estimate(self):
         rate = self.get_shipping_rate_for_display()
@@ -1158,6 +1181,14 @@ class Product(models.Model):
         if self.base_color and not self.real_color_name:
             self.real_color_name = self.base_color.name
 
+        if (
+            self.moderation_status in {self.ModerationStatus.APPROVED, self.ModerationStatus.PUBLISHED}
+            and self.photos_status != self.PhotosStatus.READY
+        ):
+            raise ValidationError(
+                {"moderation_status": _("Nu poți aproba / publica un produs cu fotografiile neprocesate sau respinse.")}
+            )
+
         if not self.pk:
             return
 
@@ -1294,6 +1325,39 @@ class ProductImage(models.Model):
         return f"Image for {self.product.title}"
 
 
+class ProductPhotoUpload(models.Model):
+    """
+    Fotografie din wizard, încă în WIZ_TMP_STORAGE (subdir "ingest/"), care așteaptă
+    validare + normalizare în fundal. După procesare devine main_image / ProductImage
+    și rândul e șters; rândurile FAILED rămân ca motiv pentru vânzător.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", _("În așteptare")
+        PROCESSING = "PROCESSING", _("În procesare")
+        FAILED = "FAILED", _("Eșuat")
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="photo_uploads")
+    tmp_name = models.CharField(max_length=255)
+    original_name = models.CharField(max_length=255, blank=True)
+    is_main = models.BooleanField(default=False)
+    position = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-is_main", "position", "id"]
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="photo_upload_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"PhotoUpload(product={self.product_id}, {self.original_name or self.tmp_name}, {self.status})"
+
+
 class SustainabilityTag(models.Model):
     class Key(models.TextChoices):
         DEADSTOCK = "DEADSTOCK", _("Deadstock / stoc nevândut")
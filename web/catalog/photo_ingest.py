@@ -0,0 +1,321 @@
+# catalog/photo_ingest.py
+from __future__ import annotations
+
+import io
+import logging
+import os
+import time
+import uuid
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+
+from core.background import submit_after_commit
+from core.images import submit_to_pool
+
+from .models import Product, ProductImage, ProductPhotoUpload
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Ingest fotografii din wizard (în fundal)
+# =============================================================================
+# - done() nu mai creează ProductImage sincron: mută fișierele temporare din
+#   product_wizard_tmp/ în product_wizard_tmp/ingest/ (rename, fără copiere),
+#   creează rânduri ProductPhotoUpload și marchează produsul PROCESSING
+# - după commit, un job din core.background trimite fișierele în pool-ul Pillow
+#   (core.images): validare, orientare EXIF, eliminare metadate, redimensionare
+# - rezultatul e salvat ca main_image / ProductImage (upload_to normal), fișierul
+#   temporar e șters; produsul revine READY (sau FAILED dacă o poză e invalidă)
+# - process_product_photos reia rândurile rămase (worker oprit, erori tranzitorii),
+#   cleanup_wizard_tmp șterge fișierele temporare orfane după vârstă
+#
+# Settings:
+#   SNOBISTIC_PRODUCT_PHOTO_MAX_SIDE     default 2400 px (latura lungă după resize)
+#   SNOBISTIC_PRODUCT_PHOTO_MAX_PIXELS   default 40 MP (refuză imagini mai mari)
+
+# ✅ important: base_url corect pentru preview (altfel url() pointează greșit)
+WIZ_TMP_SUBDIR = "product_wizard_tmp"
+WIZ_TMP_STORAGE = FileSystemStorage(
+    location=os.path.join(settings.MEDIA_ROOT, WIZ_TMP_SUBDIR),
+    base_url=(settings.MEDIA_URL.rstrip("/") + f"/{WIZ_TMP_SUBDIR}/"),
+)
+INGEST_SUBDIR = "ingest"
+
+MAX_ATTEMPTS = 3
+JPEG_QUALITY = 88
+
+ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "MPO"}
+
+
+class InvalidPhoto(ValueError):
+    pass
+
+
+def _max_side() -> int:
+    return int(getattr(settings, "SNOBISTIC_PRODUCT_PHOTO_MAX_SIDE", 2400))
+
+
+def _max_pixels() -> int:
+    return int(getattr(settings, "SNOBISTIC_PRODUCT_PHOTO_MAX_PIXELS", 40_000_000))
+
+
+# -----------------------------------------------------------------------------
+# Pillow (rulează în procesele din pool)
+# -----------------------------------------------------------------------------
+def normalize_photo(data: bytes, max_side: int, max_pixels: int) -> tuple[bytes, str]:
+    """
+    Validează și normalizează o fotografie. Returnează (bytes, extensie).
+    PNG-urile cu transparență rămân PNG, restul devin JPEG; fără EXIF/GPS.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as probe:
+            if probe.format not in ALLOWED_FORMATS:
+                raise InvalidPhoto(f"Format neacceptat: {probe.format}")
+            if probe.width * probe.height > max_pixels:
+                raise InvalidPhoto("Imagine prea mare.")
+            probe.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError) as exc:
+        raise InvalidPhoto("Fișierul nu este o imagine validă.") from exc
+
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+        out = io.BytesIO()
+        if has_alpha:
+            img.convert("RGBA").save(out, "PNG", optimize=True)
+            return out.getvalue(), "png"
+        img.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        return out.getvalue(), "jpg"
+
+
+# -----------------------------------------------------------------------------
+# Enqueue (din wizard)
+# -----------------------------------------------------------------------------
+def _stage(uploaded) -> str:
+    """
+    Mută fișierul temporar al wizard-ului în ingest/ și întoarce numele relativ.
+    formtools șterge fișierele pasului la finalul request-ului; cele mutate nu mai
+    sunt găsite (FileSystemStorage.delete ignoră lipsa), deci rămân pentru worker.
+    """
+    ext = os.path.splitext(getattr(uploaded, "name", "") or "")[1].lower()[:10] or ".jpg"
+    target = f"{INGEST_SUBDIR}/{uuid.uuid4().hex}{ext}"
+
+    src = getattr(getattr(uploaded, "file", None), "name", None)
+    if isinstance(src, str) and os.path.isabs(src) and os.path.exists(src):
+        dst = WIZ_TMP_STORAGE.path(target)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        uploaded.close()
+        os.replace(src, dst)
+        return target
+
+    # upload ținut în memorie (nu a trecut prin WIZ_TMP_STORAGE)
+    uploaded.seek(0)
+    return WIZ_TMP_STORAGE.save(target, uploaded)
+
+
+def enqueue_wizard_photos(
+    product: Product,
+    *,
+    main_image=None,
+    extra_images: Iterable = (),
+    start_position: int = 0,
+) -> int:
+    """
+    Programează procesarea pozelor din wizard. Apelată în tranzacția din done().
+    """
+    rows = []
+    if main_image:
+        rows.append(ProductPhotoUpload(
+            product=product,
+            tmp_name=_stage(main_image),
+            original_name=(main_image.name or "")[:255],
+            is_main=True,
+        ))
+    for idx, img in enumerate([f for f in extra_images if f], start=start_position):
+        rows.append(ProductPhotoUpload(
+            product=product,
+            tmp_name=_stage(img),
+            original_name=(img.name or "")[:255],
+            position=idx,
+        ))
+    if not rows:
+        return 0
+
+    # erorile vechi nu mai sunt relevante după o încărcare nouă
+    ProductPhotoUpload.objects.filter(product=product, status=ProductPhotoUpload.Status.FAILED).delete()
+    ProductPhotoUpload.objects.bulk_create(rows)
+    Product.objects.filter(pk=product.pk).update(photos_status=Product.PhotosStatus.PROCESSING)
+    product.photos_status = Product.PhotosStatus.PROCESSING
+
+    submit_after_commit(process_product_photos, product.pk)
+    return len(rows)
+
+
+def pending_photos_count(product: Product) -> int:
+    return ProductPhotoUpload.objects.filter(
+        product=product,
+        status__in=[ProductPhotoUpload.Status.PENDING, ProductPhotoUpload.Status.PROCESSING],
+    ).count()
+
+
+# -----------------------------------------------------------------------------
+# Worker
+# -----------------------------------------------------------------------------
+def _claim(product_id: int) -> list[ProductPhotoUpload]:
+    rows = list(ProductPhotoUpload.objects.filter(product_id=product_id, status=ProductPhotoUpload.Status.PENDING))
+    claimed = []
+    for row in rows:
+        if ProductPhotoUpload.objects.filter(pk=row.pk, status=ProductPhotoUpload.Status.PENDING).update(
+            status=ProductPhotoUpload.Status.PROCESSING, updated_at=timezone.now()
+        ):
+            claimed.append(row)
+    return claimed
+
+
+def _fail(row: ProductPhotoUpload, error: str, *, permanent: bool) -> None:
+    row.attempts += 1
+    row.error = error[:255]
+    if permanent or row.attempts >= MAX_ATTEMPTS:
+        row.status = ProductPhotoUpload.Status.FAILED
+        WIZ_TMP_STORAGE.delete(row.tmp_name)
+    else:
+        row.status = ProductPhotoUpload.Status.PENDING
+    row.save(update_fields=["attempts", "error", "status", "updated_at"])
+
+
+def _store(product: Product, row: ProductPhotoUpload, data: bytes, ext: str) -> None:
+    filename = f"{os.path.splitext(os.path.basename(row.original_name or row.tmp_name))[0] or 'foto'}.{ext}"
+    with transaction.atomic():
+        if row.is_main:
+            product.main_image.save(filename, ContentFile(data), save=False)
+            product.save(update_fields=["main_image", "updated_at"])
+        else:
+            pi = ProductImage(product=product, position=row.position)
+            pi.image.save(filename, ContentFile(data), save=True)
+        row.delete()
+    WIZ_TMP_STORAGE.delete(row.tmp_name)
+
+
+def _finish(product: Product) -> None:
+    statuses = set(ProductPhotoUpload.objects.filter(product=product).values_list("status", flat=True))
+    if statuses & {ProductPhotoUpload.Status.PENDING, ProductPhotoUpload.Status.PROCESSING}:
+        return
+    final = Product.PhotosStatus.FAILED if ProductPhotoUpload.Status.FAILED in statuses else Product.PhotosStatus.READY
+    Product.objects.filter(pk=product.pk).update(photos_status=final)
+    product.photos_status = final
+
+
+def process_product_photos(product_id: int) -> Optional[Product]:
+    """
+    Procesează pozele PENDING ale unui produs. Idempotent (claim pe rând).
+    """
+    rows = _claim(product_id)
+    if not rows:
+        return None
+    product = Product.objects.get(pk=product_id)
+
+    max_side, max_pixels = _max_side(), _max_pixels()
+    jobs = []
+    for row in rows:
+        try:
+            with WIZ_TMP_STORAGE.open(row.tmp_name, "rb") as fh:
+                data = fh.read()
+        except FileNotFoundError:
+            _fail(row, "Fișierul temporar lipsește.", permanent=True)
+            continue
+        # toate pozele produsului pleacă în paralel în pool
+        jobs.append((row, submit_to_pool(normalize_photo, data, max_side, max_pixels)))
+
+    for row, future in jobs:
+        try:
+            data, ext = future.result()
+            _store(product, row, data, ext)
+        except InvalidPhoto as exc:
+            _fail(row, str(exc), permanent=True)
+        except Exception as exc:
+            logger.exception("Product photo ingest failed (upload_id=%s)", row.pk)
+            _fail(row, str(exc) or exc.__class__.__name__, permanent=False)
+
+    _finish(product)
+    return product
+
+
+def process_pending_photos(*, limit: int = 100, stale_minutes: int = 30) -> tuple[int, int]:
+    """
+    Reia produsele cu poze PENDING (și PROCESSING blocate). Returnează (produse, poze rămase).
+    """
+    stale_before = timezone.now() - timedelta(minutes=stale_minutes)
+    ProductPhotoUpload.objects.filter(
+        status=ProductPhotoUpload.Status.PROCESSING,
+        updated_at__lt=stale_before,
+    ).update(status=ProductPhotoUpload.Status.PENDING)
+
+    product_ids = list(
+        ProductPhotoUpload.objects.filter(status=ProductPhotoUpload.Status.PENDING)
+        .order_by("product_id")
+        .values_list("product_id", flat=True)
+        .distinct()[:limit]
+    )
+    for pk in product_ids:
+        process_product_photos(pk)
+
+    remaining = ProductPhotoUpload.objects.filter(status=ProductPhotoUpload.Status.PENDING).count()
+    return len(product_ids), remaining
+
+
+# -----------------------------------------------------------------------------
+# Curățenie product_wizard_tmp
+# -----------------------------------------------------------------------------
+def cleanup_wizard_tmp(*, max_age_hours: float = 24, dry_run: bool = False) -> tuple[int, int]:
+    """
+    Șterge fișierele din product_wizard_tmp mai vechi de max_age_hours care nu
+    aparțin unui upload încă neprocesat (wizard-uri abandonate, ingest eșuat).
+    Returnează (fișiere, bytes).
+    """
+    root = WIZ_TMP_STORAGE.location
+    if not os.path.isdir(root):
+        return 0, 0
+
+    cutoff = time.time() - max_age_hours * 3600
+    keep = set(
+        ProductPhotoUpload.objects.filter(
+            status__in=[ProductPhotoUpload.Status.PENDING, ProductPhotoUpload.Status.PROCESSING]
+        ).values_list("tmp_name", flat=True)
+    )
+
+    files = size = 0
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        for fname in filenames:
+            path = os.path.join(dirpath, fname)
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            if rel in keep:
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if st.st_mtime >= cutoff:
+                continue
+            files += 1
+            size += st.st_size
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        if not dry_run and dirpath != root:
+            try:
+                os.rmdir(dirpath)  # doar dacă e gol
+            except OSError:
+                pass
+    return files, size
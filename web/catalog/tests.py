@@ -1,3 +1,161 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from . import photo_ingest
+from .models import Category, Product, ProductImage, ProductPhotoUpload
+
+
+def _jpeg(size=(3000, 2000), orientation=None):
+    img = Image.new("RGB", size, (10, 120, 200))
+    buf = io.BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        exif[0x010F] = "TestCam"
+        img.save(buf, "JPEG", exif=exif.tobytes())
+    else:
+        img.save(buf, "JPEG")
+    return buf.getvalue()
+
+
+class NormalizePhotoTests(TestCase):
+    def test_orients_resizes_and_strips_exif(self):
+        # orientare 6 = rotit 90° -> 2000x3000 după transpose
+        data, ext = photo_ingest.normalize_photo(_jpeg(orientation=6), 1500, 40_000_000)
+        self.assertEqual(ext, "jpg")
+        with Image.open(io.BytesIO(data)) as img:
+            self.assertEqual(img.size, (1000, 1500))
+            self.assertEqual(len(img.getexif()), 0)
+
+    def test_rejects_non_images_and_huge_images(self):
+        with self.assertRaises(photo_ingest.InvalidPhoto):
+            photo_ingest.normalize_photo(b"not an image", 1500, 40_000_000)
+        with self.assertRaises(photo_ingest.InvalidPhoto):
+            photo_ingest.normalize_photo(_jpeg(), 1500, 1_000_000)
+
+
+@override_settings(SNOBISTIC_BACKGROUND_SYNC=True, SNOBISTIC_IMAGE_WORKERS=0)
+class PhotoIngestTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.tmp_storage = FileSystemStorage(location=os.path.join(self.media, "product_wizard_tmp"))
+        patcher = mock.patch.object(photo_ingest, "WIZ_TMP_STORAGE", self.tmp_storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        owner = get_user_model().objects.create_user(
+            email="seller@example.com", password="x", first_name="S", last_name="V", is_active=True
+        )
+        category = Category.objects.create(name="Rochii", slug="rochii")
+        self.product = Product.objects.create(
+            owner=owner, title="Rochie", description="d", price=Decimal("50.00"), category=category, size="M"
+        )
+
+    def _upload(self, name, data):
+        return SimpleUploadedFile(name, data, content_type="image/jpeg")
+
+    def test_done_photos_are_processed_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            queued = photo_ingest.enqueue_wizard_photos(
+                self.product,
+                main_image=self._upload("main.jpg", _jpeg()),
+                extra_images=[self._upload("a.jpg", _jpeg()), self._upload("b.jpg", _jpeg())],
+            )
+        self.assertEqual(queued, 3)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.photos_status, Product.PhotosStatus.PROCESSING)
+        self.assertFalse(self.product.main_image)
+
+        for callback in callbacks:
+            callback()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.photos_status, Product.PhotosStatus.READY)
+        self.assertTrue(self.product.main_image.name.startswith("products/main/"))
+        self.assertEqual(
+            list(ProductImage.objects.filter(product=self.product).values_list("position", flat=True)), [0, 1]
+        )
+        self.assertFalse(ProductPhotoUpload.objects.exists())
+        self.assertEqual(os.listdir(self.tmp_storage.path("ingest")), [])
+
+    def test_invalid_photo_marks_product_failed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            photo_ingest.enqueue_wizard_photos(
+                self.product,
+                main_image=self._upload("main.jpg", _jpeg()),
+                extra_images=[self._upload("bad.jpg", b"garbage")],
+            )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.photos_status, Product.PhotosStatus.FAILED)
+        self.assertTrue(self.product.main_image)
+        failed = ProductPhotoUpload.objects.get()
+        self.assertEqual(failed.status, ProductPhotoUpload.Status.FAILED)
+        self.assertEqual(failed.original_name, "bad.jpg")
+
+    def test_moderation_requires_ready_photos(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            photo_ingest.enqueue_wizard_photos(self.product, main_image=self._upload("bad.jpg", b"garbage"))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.photos_status, Product.PhotosStatus.FAILED)
+        self.assertFalse(self.product.main_image)
+
+        with self.assertRaises(ValidationError):
+            self.product.approve()
+        self.assertEqual(self.product.moderation_status, Product.ModerationStatus.PENDING)
+
+        # aprobat înainte de o reîncărcare eșuată: nici publicarea nu trece
+        self.product.moderation_status = Product.ModerationStatus.APPROVED
+        self.assertFalse(self.product.can_be_published())
+        with self.assertRaises(ValidationError):
+            self.product.publish()
+        self.assertEqual(self.product.moderation_status, Product.ModerationStatus.APPROVED)
+
+        staff = get_user_model().objects.create_user(
+            email="staff@example.com", password="x", first_name="S", last_name="T", is_active=True,
+            is_staff=True, is_superuser=True,
+        )
+        self.client.force_login(staff)
+        Product.objects.filter(pk=self.product.pk).update(moderation_status=Product.ModerationStatus.PENDING)
+        resp = self.client.post(
+            reverse("admin:catalog_product_changelist"),
+            {"action": "approve_products", "_selected_action": [self.product.pk]},
+            follow=True,
+        )
+        self.assertContains(resp, "1 produse sărite")
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.moderation_status, Product.ModerationStatus.PENDING)
+
+    def test_cleanup_removes_only_old_orphans(self):
+        ProductPhotoUpload.objects.create(product=self.product, tmp_name="ingest/pending.jpg")
+        old = time.time() - 48 * 3600
+        for name in ("ingest/pending.jpg", "abandoned.jpg", "fresh.jpg"):
+            path = self.tmp_storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fh:
+                fh.write(b"x")
+            if name != "fresh.jpg":
+                os.utime(path, (old, old))
+
+        files, _size = photo_ingest.cleanup_wizard_tmp(max_age_hours=24)
+        self.assertEqual(files, 1)
+        self.assertTrue(self.tmp_storage.exists("ingest/pending.jpg"))
+        self.assertTrue(self.tmp_storage.exists("fresh.jpg"))
+        self.assertFalse(self.tmp_storage.exists("abandoned.jpg"))
@@ -15,6 +15,8 @@ from django.views.generic import (
     DeleteView,
 )
 
+from dashboard.rollups import record_product_view
+
 from .forms import SearchForm, ProductForm
 from .models import (
     Product,
@@ -451,6 +453,9 @@ class ProductDetailView(DetailView):
 
         ctx["related_products"] = list(related_qs.order_by("-published_at", "-created_at")[:12])
 
+        # statistici vânzător (SellerDailyStats.views), în fundal
+        record_product_view(product, user)
+
         # ✅ RECENTLY VIEWED: salvăm mereu, dar afișăm doar public
         _save_recently_viewed(request, product.pk, max_items=20)
         ids = [pid for pid in _get_recently_viewed(request) if pid != product.pk]
@@ -1,9 +1,7 @@
 # catalog/views_wizard.py
-import os
 from decimal import Decimal
 
 from django.conf import settings
-from django.core.files.storage import FileSystemStorage
 from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
@@ -21,6 +19,7 @@ from .forms_wizard import (
     ProductTitleDescriptionForm,
 )
 from .models import Category, Product, ProductImage
+from .photo_ingest import WIZ_TMP_STORAGE, enqueue_wizard_photos, pending_photos_count
 
 PRODUCT_WIZARD_FORMS = [
     ("photos", ProductPhotosForm),  # 1 – Imagini
@@ -42,13 +41,6 @@ PACKAGE_SIZE_DIMENSIONS = {
 SYNC_LEGACY_COLORS_M2M = getattr(settings, "SNOBISTIC_SYNC_LEGACY_COLORS_M2M", True)
 REMODERATE_ON_USER_EDIT = getattr(settings, "SNOBISTIC_REMODERATE_ON_USER_EDIT", True)
 
-# ✅ important: base_url corect pentru preview (altfel url() pointează greșit)
-WIZ_TMP_SUBDIR = "product_wizard_tmp"
-WIZ_TMP_STORAGE = FileSystemStorage(
-    location=os.path.join(settings.MEDIA_ROOT, WIZ_TMP_SUBDIR),
-    base_url=(settings.MEDIA_URL.rstrip("/") + f"/{WIZ_TMP_SUBDIR}/"),
-)
-
 
 def _resolve_category_for_size(category_brand_data, product=None):
     category = None
@@ -97,7 +89,8 @@ def _existing_photos_count(obj: Product) -> int:
         extras = obj.images.count()
     except Exception:
         extras = ProductImage.objects.filter(product=obj).count()
-    return int(main + extras)
+    # pozele încă în procesare (catalog/photo_ingest.py) contează ca existente
+    return int(main + extras + pending_photos_count(obj))
 
 
 class PhotosMultiFileWizardMixin:
@@ -397,7 +390,7 @@ class ProductCreateWizard(PhotosMultiFileWizardMixin, SessionWizardView):
             product.package_w_cm = w
             product.package_h_cm = h
 
-        product.main_image = photos.get("main_image")
+        # main_image e setat de worker după procesare (photos_status = PROCESSING până atunci)
         product.save()
 
         if SYNC_LEGACY_COLORS_M2M:
@@ -409,9 +402,11 @@ class ProductCreateWizard(PhotosMultiFileWizardMixin, SessionWizardView):
         tags = sustainability.get("sustainability_tags") or []
         product.sustainability_tags.set(tags)
 
-        extra_images = photos.get("extra_images") or []
-        for idx, img in enumerate(extra_images):
-            ProductImage.objects.create(product=product, image=img, position=idx)
+        enqueue_wizard_photos(
+            product,
+            main_image=photos.get("main_image"),
+            extra_images=photos.get("extra_images") or [],
+        )
 
         return redirect("dashboard:products_list")
 
@@ -794,10 +789,6 @@ class ProductEditWizard(PhotosMultiFileWizardMixin, SessionWizardView):
         obj.auction_reserve_price = None
         obj.auction_end_at = None
 
-        main_image = photos.get("main_image")
-        if main_image:
-            obj.main_image = main_image
-
         if _should_reset_moderation_on_edit(obj=obj, request=self.request):
             _reset_moderation_fields(obj)
 
@@ -812,9 +803,12 @@ class ProductEditWizard(PhotosMultiFileWizardMixin, SessionWizardView):
         tags = sustainability.get("sustainability_tags") or []
         obj.sustainability_tags.set(tags)
 
-        extra_images = photos.get("extra_images") or []
-        existing_count = obj.images.count()
-        for idx, img in enumerate(extra_images, start=existing_count):
-            ProductImage.objects.create(product=obj, image=img, position=idx)
+        # poziția continuă după pozele existente și cele încă în procesare
+        enqueue_wizard_photos(
+            obj,
+            main_image=photos.get("main_image"),
+            extra_images=photos.get("extra_images") or [],
+            start_position=obj.images.count() + pending_photos_count(obj),
+        )
 
         return redirect("dashboard:products_list")
@@ -0,0 +1,96 @@
+# core/background.py
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Joburi în fundal, in-process (fără broker)
+# =============================================================================
+# - submit_after_commit(fn, *args): fn rulează într-un thread pool DUPĂ commit-ul
+#   tranzacției curente (nu vede date necomise, nu rulează dacă se face rollback)
+# - joburile persistente (rânduri PENDING în DB) au mereu și o comandă de management
+#   care reia ce a rămas neprocesat (restart de proces, deploy etc.)
+#
+# Settings:
+#   SNOBISTIC_BACKGROUND_WORKERS (default 4)
+#   SNOBISTIC_BACKGROUND_SYNC (default False) -> rulează inline (teste / debug)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(getattr(settings, "SNOBISTIC_BACKGROUND_WORKERS", 4)),
+                    thread_name_prefix="snobistic-bg",
+                )
+    return _executor
+
+
+def _run(fn: Callable, args: tuple, kwargs: dict) -> None:
+    close_old_connections()
+    try:
+        fn(*args, **kwargs)
+    except Exception:
+        logger.exception("Background job failed: %s", getattr(fn, "__qualname__", fn))
+    finally:
+        connections.close_all()
+
+
+def submit(fn: Callable, *args, **kwargs) -> None:
+    if getattr(settings, "SNOBISTIC_BACKGROUND_SYNC", False):
+        fn(*args, **kwargs)
+        return
+    _get_executor().submit(_run, fn, args, kwargs)
+
+
+def submit_after_commit(fn: Callable, *args, **kwargs) -> None:
+    transaction.on_commit(lambda: submit(fn, *args, **kwargs))
+
+
+# =============================================================================
+# Procese (CPU-bound)
+# =============================================================================
+def process_context():
+    """
+    Context multiprocessing pentru ProcessPoolExecutor. Procesul web are mai multe
+    thread-uri (mod_wsgi): fork ar copia în copil lock-uri ținute de alte thread-uri
+    (logging, conexiuni DB), deci copiii pornesc prin forkserver (sau spawn).
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def init_django_worker() -> None:
+    # forkserver/spawn: procesul copil pornește fără Django configurat
+    import django
+
+    django.setup()
+
+
+def django_process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Pool de procese care folosesc ORM-ul (joburi batch pe partiții): copiii pornesc
+    prin process_context() și configurează Django o dată, în initializer.
+    Joburile trebuie să închidă conexiunile la final (connections.close_all()).
+    """
+    # copiii nu trebuie să moștenească conexiuni DB deschise
+    connections.close_all()
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=process_context(),
+        initializer=init_django_worker,
+    )
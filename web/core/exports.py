@@ -0,0 +1,269 @@
+# core/exports.py
+from __future__ import annotations
+
+import csv
+import io
+import re
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Union
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+# =============================================================================
+# Export tabelar în streaming (CSV / XLSX)
+# =============================================================================
+# - rândurile vin din queryset.values(...).iterator(chunk_size=...) cu join-urile
+#   deja în proiecție (fără instanțe de model, fără N+1)
+# - CSV: câte o linie pe rând, prin StreamingHttpResponse
+# - XLSX: zip scris incremental (zipfile pe un stream ne-seekable), foaie cu
+#   inline strings -> fără shared strings table ținut în memorie; fără dependențe
+# - memoria rămâne constantă indiferent de numărul de rânduri
+#
+# Settings:
+#   SNOBISTIC_EXPORT_CHUNK_SIZE   rânduri citite per fetch din DB (default 2000)
+
+FORMAT_CSV = "csv"
+FORMAT_XLSX = "xlsx"
+FORMATS = (FORMAT_CSV, FORMAT_XLSX)
+
+CONTENT_TYPES = {
+    FORMAT_CSV: "text/csv; charset=utf-8",
+    FORMAT_XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+
+# rânduri XLSX acumulate înainte de a goli buffer-ul zip către client
+XLSX_FLUSH_ROWS = 500
+
+
+@dataclass(frozen=True)
+class Column:
+    """
+    header + valoare: numele unei chei din rândul .values() sau o funcție (row) -> valoare.
+    """
+
+    header: str
+    value: Union[str, Callable[[dict], Any]]
+
+    def get(self, row: dict) -> Any:
+        if callable(self.value):
+            return self.value(row)
+        return row.get(self.value)
+
+
+def chunk_size() -> int:
+    return int(getattr(settings, "SNOBISTIC_EXPORT_CHUNK_SIZE", 2000))
+
+
+def requested_format(request, param: str = "export") -> Optional[str]:
+    fmt = (request.GET.get(param) or "").lower()
+    return fmt if fmt in FORMATS else None
+
+
+def iter_values(queryset, *fields: str) -> Iterator[dict]:
+    """
+    Proiecție .values() citită pe bucăți (server-side cursor unde DB-ul permite).
+    """
+    return queryset.values(*fields).iterator(chunk_size=chunk_size())
+
+
+def format_datetime(value: Optional[datetime]) -> str:
+    if not value:
+        return ""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.strftime(DATETIME_FORMAT)
+
+
+def media_url_builder(request, storage=None) -> Callable[[Optional[str]], str]:
+    """
+    fn(name) -> URL absolut pentru un fișier din storage. Schema și host-ul se
+    calculează o singură dată, nu build_absolute_uri per rând.
+    """
+    storage = storage or default_storage
+    origin = f"{request.scheme}://{request.get_host()}"
+
+    def build(name: Optional[str]) -> str:
+        if not name:
+            return ""
+        url = storage.url(name)
+        return origin + url if url.startswith("/") else url
+
+    return build
+
+
+# -----------------------------------------------------------------------------
+# CSV
+# -----------------------------------------------------------------------------
+class _Echo:
+    """Pseudo-buffer pentru csv.writer: întoarce linia în loc s-o scrie."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return format_datetime(value)
+    return value
+
+
+def iter_csv(columns: Sequence[Column], rows: Iterable[dict]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield "\ufeff"  # BOM pentru Excel
+    yield writer.writerow([c.header for c in columns])
+    for row in rows:
+        yield writer.writerow([_csv_cell(c.get(row)) for c in columns])
+
+
+# -----------------------------------------------------------------------------
+# XLSX (SpreadsheetML minimal)
+# -----------------------------------------------------------------------------
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+
+_ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    "</Relationships>"
+)
+
+_WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Destinație ne-seekable pentru zipfile: adună bytes scriși până la drain().
+    zipfile folosește atunci data descriptors, deci nu are nevoie de seek.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def _xlsx_cell(value: Any) -> str:
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, Decimal):
+        return f"<c><v>{value:f}</v></c>"
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value}</v></c>"
+    if isinstance(value, datetime):
+        value = format_datetime(value)
+    elif isinstance(value, date):
+        value = value.isoformat()
+    text = escape(_XML_ILLEGAL.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values: Iterable[Any]) -> str:
+    return "<row>" + "".join(_xlsx_cell(v) for v in values) + "</row>"
+
+
+def iter_xlsx(columns: Sequence[Column], rows: Iterable[dict], *, sheet_name: str = "Export") -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES_XML)
+        zf.writestr("_rels/.rels", _ROOT_RELS_XML)
+        zf.writestr("xl/workbook.xml", _WORKBOOK_XML.format(name=escape(sheet_name[:31], {'"': "&quot;"})))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS_XML)
+        yield sink.drain()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEAD.encode("utf-8"))
+            sheet.write(_xlsx_row(c.header for c in columns).encode("utf-8"))
+            for i, row in enumerate(rows, start=1):
+                sheet.write(_xlsx_row(c.get(row) for c in columns).encode("utf-8"))
+                if i % XLSX_FLUSH_ROWS == 0:
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            sheet.write(_SHEET_TAIL.encode("utf-8"))
+    yield sink.drain()
+
+
+# -----------------------------------------------------------------------------
+# Răspuns HTTP
+# -----------------------------------------------------------------------------
+def stream_export(
+    rows: Iterable[dict],
+    columns: Sequence[Column],
+    *,
+    filename: str,
+    fmt: str = FORMAT_CSV,
+    sheet_name: str = "Export",
+) -> StreamingHttpResponse:
+    """
+    StreamingHttpResponse cu atașament `<filename>.<fmt>`. rows e consumat lazy.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == FORMAT_XLSX:
+        content = iter_xlsx(columns, rows, sheet_name=sheet_name)
+    else:
+        content = iter_csv(columns, rows)
+
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = content_disposition_header(True, f"{filename}.{fmt}")
+    response["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,215 @@
+# core/files.py
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+# =============================================================================
+# Servire fișiere protejate (după permission check în view)
+# =============================================================================
+# serve_file(request, field_file, ...) alege, în ordine:
+#   1) 304 Not Modified dacă If-None-Match se potrivește cu ETag-ul fișierului
+#   2) offload către web server (X-Sendfile / X-Accel-Redirect), dacă e configurat
+#      și storage-ul are cale locală; serverul face Range, cache, sendfile
+#   3) răspuns din Django: 206 pentru un singur interval Range, altfel
+#      FileResponse chunked (Accept-Ranges: bytes)
+#
+# Settings:
+#   SNOBISTIC_FILE_OFFLOAD         "" (default) | "x-sendfile" | "x-accel-redirect"
+#   SNOBISTIC_FILE_OFFLOAD_PREFIX  prefixul intern nginx pentru X-Accel-Redirect
+#                                  (ex. "/protected-media/" -> alias MEDIA_ROOT)
+#   SNOBISTIC_FILE_CHUNK_SIZE      default 64 KiB
+
+OFFLOAD_SENDFILE = "x-sendfile"
+OFFLOAD_ACCEL = "x-accel-redirect"
+
+CACHE_CONTROL = "private, max-age=0, must-revalidate"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class StoredFile:
+    """
+    Adaptor minimal (name/storage/open/path) pentru fișiere din storage care nu
+    sunt într-un FileField, ex. derivatele de imagini.
+    """
+
+    def __init__(self, name: str, storage=None):
+        from django.core.files.storage import default_storage
+
+        self.name = name
+        self.storage = storage or default_storage
+
+    def open(self, mode: str = "rb"):
+        return self.storage.open(self.name, mode)
+
+    @property
+    def path(self) -> str:
+        return self.storage.path(self.name)
+
+
+def _chunk_size() -> int:
+    return int(getattr(settings, "SNOBISTIC_FILE_CHUNK_SIZE", 64 * 1024))
+
+
+def _local_path(field_file) -> Optional[str]:
+    try:
+        return field_file.path
+    except (NotImplementedError, AttributeError, ValueError):
+        return None
+
+
+def file_etag(field_file) -> str:
+    """
+    ETag din (nume, mărime, mtime): fără a citi conținutul.
+    """
+    storage, name = field_file.storage, field_file.name
+    size = storage.size(name)
+    try:
+        mtime = storage.get_modified_time(name).timestamp()
+    except (NotImplementedError, AttributeError):
+        mtime = 0
+    digest = hashlib.sha1(f"{name}:{size}:{mtime}".encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [t.strip() for t in header.split(",")]
+    # comparație slabă (W/ ignorat), cum cere RFC 9110 pentru If-None-Match
+    return any(t.removeprefix("W/") == etag for t in tags)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusiv pentru un singur interval; None dacă header-ul lipsește
+    sau are mai multe intervale (atunci se servește tot fișierul, conform RFC).
+    Ridică ValueError pentru un interval nesatisfiabil.
+    """
+    if not header or "," in header:
+        return None
+    m = _RANGE_RE.match(header.strip())
+    if not m:
+        return None
+    first, last = m.groups()
+    if first == "" and last == "":
+        return None
+    if first == "":
+        # sufix: ultimii N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+def _iter_range(fh, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+    try:
+        fh.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fh.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def _guess_type(filename: str, content_type: Optional[str]) -> str:
+    if content_type:
+        return content_type
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def _offload_response(field_file, mode: str, content_type: str) -> Optional[HttpResponse]:
+    path = _local_path(field_file)
+    if path is None:
+        return None
+
+    resp = HttpResponse(content_type=content_type)
+    if mode == OFFLOAD_SENDFILE:
+        resp["X-Sendfile"] = path
+    elif mode == OFFLOAD_ACCEL:
+        prefix = getattr(settings, "SNOBISTIC_FILE_OFFLOAD_PREFIX", "/protected-media/")
+        resp["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(field_file.name.lstrip("/"))
+    else:
+        return None
+    return resp
+
+
+def serve_file(
+    request,
+    field_file,
+    *,
+    filename: Optional[str] = None,
+    as_attachment: bool = True,
+    content_type: Optional[str] = None,
+    cache_control: str = CACHE_CONTROL,
+) -> HttpResponse:
+    """
+    Servește un FieldFile deja autorizat. Vezi comentariul de la începutul modulului.
+    cache_control: doar pentru fișiere imutabile publice (ex. certificate) se dă
+    o valoare "public, max-age=..."; implicit private + revalidare.
+    """
+    filename = filename or os.path.basename(field_file.name) or "file"
+    content_type = _guess_type(filename, content_type)
+    etag = file_etag(field_file)
+
+    if _etag_matches(request.headers.get("If-None-Match", ""), etag):
+        resp = HttpResponseNotModified()
+        resp["ETag"] = etag
+        resp["Cache-Control"] = cache_control
+        return resp
+
+    mode = (getattr(settings, "SNOBISTIC_FILE_OFFLOAD", "") or "").lower()
+    resp = _offload_response(field_file, mode, content_type) if mode else None
+
+    if resp is None:
+        size = field_file.storage.size(field_file.name)
+        range_header = request.headers.get("Range", "")
+        if_range = request.headers.get("If-Range", "")
+        if if_range and if_range != etag:
+            range_header = ""  # fișierul s-a schimbat -> tot conținutul
+
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            resp = HttpResponse(status=416)
+            resp["Content-Range"] = f"bytes */{size}"
+            return resp
+
+        if byte_range is not None:
+            start, end = byte_range
+            resp = StreamingHttpResponse(
+                _iter_range(field_file.open("rb"), start, end, _chunk_size()),
+                status=206,
+                content_type=content_type,
+            )
+            resp["Content-Range"] = f"bytes {start}-{end}/{size}"
+            resp["Content-Length"] = str(end - start + 1)
+        else:
+            resp = FileResponse(field_file.open("rb"), content_type=content_type)
+            resp.block_size = _chunk_size()
+        resp["Accept-Ranges"] = "bytes"
+
+    resp["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+    resp["ETag"] = etag
+    resp["Cache-Control"] = cache_control
+    return resp
@@ -0,0 +1,269 @@
+# core/images.py
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+import re
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from .background import process_context, submit_after_commit
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Derivate de imagini (card / detail / zoom) în WebP + JPEG
+# =============================================================================
+# - numele derivatei e determinist: derivatives/<kk>/<key>_<variant>.<ext>, unde
+#   key = sha1(numele sursei). Doar sursele cu nume uuid (upload_to care redenumește:
+#   produse, categorii, atașamente) sunt acceptate: un astfel de nume nu reapare
+#   după ștergere + re-upload, deci key identifică conținutul -> derivatele sunt
+#   imutabile și URL-ul se calculează fără I/O. Sursele cu numele original
+#   (has_stable_name() == False) sunt servite ca atare, fără derivate
+# - generare: după upload (semnale, în fundal) sau lazy, la primul request pe
+#   endpoint-ul semnat core:image_derivative
+# - Pillow rulează într-un ProcessPoolExecutor (CPU-bound, fără GIL); workerii primesc
+#   doar bytes și întorc bytes, nu ating Django/DB. Pool-ul e creat lazy dintr-un
+#   thread de request, deci workerii pornesc prin forkserver/spawn, nu fork
+#
+# Settings:
+#   SNOBISTIC_IMAGE_WORKERS   procese Pillow (default 2; 0 = inline, ex. în teste)
+
+VARIANTS = {
+    "card": 480,
+    "detail": 1200,
+    "zoom": 2000,
+}
+
+FORMATS = {
+    "webp": ("WEBP", "image/webp", 80),
+    "jpeg": ("JPEG", "image/jpeg", 82),
+}
+
+DERIVATIVE_PREFIX = "derivatives"
+EXISTS_CACHE_TTL = 60 * 60 * 24 * 30
+TOKEN_SALT = "core.images.derivative"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+_STABLE_STEM = re.compile(r"^[0-9a-f]{32}$")
+
+
+def has_stable_name(source_name: str) -> bool:
+    """
+    Numele e un uuid4.hex (catalog._path_and_rename, messaging._msg_attachment_upload_to)?
+    Un nume original (ex. auctions/images/poza.jpg) poate fi refolosit de alt conținut.
+    """
+    stem = os.path.splitext(os.path.basename(source_name or ""))[0]
+    return bool(_STABLE_STEM.match(stem))
+
+
+def derivative_key(source_name: str) -> str:
+    return hashlib.sha1(source_name.encode("utf-8")).hexdigest()[:24]
+
+
+def derivative_name(source_name: str, variant: str, fmt: str) -> str:
+    key = derivative_key(source_name)
+    return f"{DERIVATIVE_PREFIX}/{key[:2]}/{key}_{variant}.{fmt}"
+
+
+# -----------------------------------------------------------------------------
+# Pillow (rulează în procesele din pool)
+# -----------------------------------------------------------------------------
+def render_variant(data: bytes, max_side: int, fmt: str) -> bytes:
+    from PIL import Image, ImageOps
+
+    pil_format, _content_type, quality = FORMATS[fmt]
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        if pil_format == "JPEG":
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                bg = Image.new("RGB", img.size, (255, 255, 255))
+                bg.paste(img, mask=img.split()[-1])
+                img = bg
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if img.mode in ("LA", "P", "PA") else "RGB")
+
+        # thumbnail nu mărește imaginile mai mici decât varianta
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+        out = io.BytesIO()
+        save_kwargs = {"quality": quality}
+        if pil_format == "JPEG":
+            save_kwargs.update(optimize=True, progressive=True)
+        else:
+            save_kwargs.update(method=4)
+        # fără EXIF în derivate (nici GPS, nici orientare -> deja aplicată)
+        img.save(out, pil_format, **save_kwargs)
+        return out.getvalue()
+
+
+def render_variants(data: bytes, specs: list[tuple[str, str]]) -> dict[tuple[str, str], bytes]:
+    return {(variant, fmt): render_variant(data, VARIANTS[variant], fmt) for variant, fmt in specs}
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    workers = int(getattr(settings, "SNOBISTIC_IMAGE_WORKERS", 2))
+    if workers <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=process_context())
+    return _pool
+
+
+def submit_to_pool(fn, *args) -> Future:
+    """
+    Rulează fn(*args) în pool-ul Pillow (fn trebuie să fie picklable, la nivel de modul).
+    Cu SNOBISTIC_IMAGE_WORKERS=0 rulează inline și întoarce un Future deja rezolvat.
+    """
+    pool = _get_pool()
+    if pool is not None:
+        return pool.submit(fn, *args)
+    future: Future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+def _render(data: bytes, specs: list[tuple[str, str]]) -> dict[tuple[str, str], bytes]:
+    return submit_to_pool(render_variants, data, specs).result()
+
+
+# -----------------------------------------------------------------------------
+# Storage
+# -----------------------------------------------------------------------------
+def _exists_key(name: str) -> str:
+    return f"imgd:{name}"
+
+
+def derivative_exists(name: str, storage=None) -> bool:
+    if cache.get(_exists_key(name)):
+        return True
+    storage = storage or default_storage
+    if storage.exists(name):
+        cache.set(_exists_key(name), True, EXISTS_CACHE_TTL)
+        return True
+    return False
+
+
+def _save(name: str, data: bytes, storage) -> None:
+    if not storage.exists(name):
+        saved = storage.save(name, ContentFile(data))
+        if saved != name:
+            # scriere concurentă: altcineva a salvat deja aceeași derivată
+            storage.delete(saved)
+    cache.set(_exists_key(name), True, EXISTS_CACHE_TTL)
+
+
+def generate_derivatives(
+    source_name: str,
+    *,
+    variants: Optional[Iterable[str]] = None,
+    formats: Optional[Iterable[str]] = None,
+    storage=None,
+) -> list[str]:
+    """
+    Generează derivatele lipsă pentru o sursă. Returnează numele generate acum.
+    """
+    if not has_stable_name(source_name):
+        raise ValueError(f"Derivatele cer un nume de sursă uuid: {source_name}")
+    storage = storage or default_storage
+    variants = list(variants or VARIANTS)
+    formats = list(formats or FORMATS)
+
+    specs = [
+        (v, f) for v in variants for f in formats
+        if not derivative_exists(derivative_name(source_name, v, f), storage)
+    ]
+    if not specs:
+        return []
+
+    with storage.open(source_name, "rb") as fh:
+        data = fh.read()
+
+    rendered = _render(data, specs)
+    names = []
+    for (variant, fmt), payload in rendered.items():
+        name = derivative_name(source_name, variant, fmt)
+        _save(name, payload, storage)
+        names.append(name)
+    return names
+
+
+def ensure_derivative(source_name: str, variant: str, fmt: str, *, storage=None) -> str:
+    storage = storage or default_storage
+    name = derivative_name(source_name, variant, fmt)
+    if not derivative_exists(name, storage):
+        generate_derivatives(source_name, variants=[variant], formats=[fmt], storage=storage)
+    return name
+
+
+def queue_derivatives(field_file) -> None:
+    """
+    Programează generarea tuturor derivatelor după commit (no-op dacă există deja).
+    """
+    name = getattr(field_file, "name", "") or ""
+    if not name or not has_stable_name(name):
+        return
+    if derivative_exists(derivative_name(name, "card", "webp")):
+        return
+    submit_after_commit(_generate_logged, name)
+
+
+def _generate_logged(source_name: str) -> None:
+    try:
+        generate_derivatives(source_name)
+    except Exception:
+        logger.exception("Image derivatives failed for %s", source_name)
+
+
+# -----------------------------------------------------------------------------
+# URL-uri (template tags)
+# -----------------------------------------------------------------------------
+def sign_request(source_name: str, variant: str, fmt: str) -> str:
+    return signing.dumps({"n": source_name, "v": variant, "f": fmt}, salt=TOKEN_SALT, compress=True)
+
+
+def unsign_request(token: str) -> tuple[str, str, str]:
+    data = signing.loads(token, salt=TOKEN_SALT)
+    return data["n"], data["v"], data["f"]
+
+
+def derivative_url(field_file, variant: str = "card", fmt: str = "jpeg") -> str:
+    name = getattr(field_file, "name", "") or ""
+    if not name:
+        return ""
+    if variant not in VARIANTS or fmt not in FORMATS or not has_stable_name(name):
+        return field_file.url
+    deriv = derivative_name(name, variant, fmt)
+    if derivative_exists(deriv):
+        return default_storage.url(deriv)
+    return reverse("core:image_derivative", args=[sign_request(name, variant, fmt)])
+
+
+def derivative_srcset(field_file, fmt: str = "webp", variants: Optional[Iterable[str]] = None) -> str:
+    if not has_stable_name(getattr(field_file, "name", "")):
+        return ""
+    return ", ".join(
+        f"{derivative_url(field_file, v, fmt)} {VARIANTS[v]}w" for v in (variants or VARIANTS)
+    )
@@ -0,0 +1,58 @@
+# core/management/commands/generate_image_derivatives.py
+
+from __future__ import annotations
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.images import FORMATS, VARIANTS, generate_derivatives, has_stable_name
+from core.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Generează derivatele lipsă (card/detail/zoom, WebP + JPEG) pentru imaginile existente."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", action="append", dest="models",
+                            help="Doar modelul dat, ex. catalog.Product (repetabil).")
+        parser.add_argument("--variant", action="append", dest="variants", choices=sorted(VARIANTS))
+        parser.add_argument("--format", action="append", dest="formats", choices=sorted(FORMATS))
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        only = {m.lower() for m in (options["models"] or [])}
+        batch_size = options["batch_size"]
+        total_sources = total_generated = failed = 0
+
+        for label, field_name in IMAGE_FIELDS:
+            if only and label.lower() not in only:
+                continue
+            model = apps.get_model(label)
+            qs = model.objects.exclude(**{field_name: ""}).order_by("pk").only("pk", field_name)
+            if label == "messaging.MessageAttachment":
+                qs = qs.only("pk", field_name, "content_type", "original_name")
+
+            last_pk = 0
+            while True:
+                batch = list(qs.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                for obj in batch:
+                    if getattr(obj, "is_image", True) is False:
+                        continue
+                    name = getattr(obj, field_name).name
+                    if not has_stable_name(name):
+                        continue  # nume original (fișier vechi): servit fără derivate
+                    total_sources += 1
+                    try:
+                        total_generated += len(generate_derivatives(
+                            name, variants=options["variants"], formats=options["formats"],
+                        ))
+                    except Exception as exc:
+                        failed += 1
+                        self.stderr.write(f"{label} #{obj.pk} ({name}): {exc}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Derivate: {total_sources} surse, {total_generated} fișiere generate, {failed} erori."
+        ))
@@ -0,0 +1,40 @@
+# core/signals.py
+from django.db.models.signals import post_save
+
+from .images import queue_derivatives
+
+# (model, câmp imagine) pentru care se generează derivate card/detail/zoom după upload.
+# Doar câmpuri cu upload_to care redenumește în uuid (vezi core.images.has_stable_name);
+# auctions.AuctionImage păstrează numele original, deci nu are derivate.
+IMAGE_FIELDS = [
+    ("catalog.Product", "main_image"),
+    ("catalog.ProductImage", "image"),
+    ("catalog.Category", "cover_image"),
+    ("messaging.MessageAttachment", "file"),
+]
+
+
+def _make_handler(field_name):
+    def handler(sender, instance, created, update_fields=None, **kwargs):
+        if kwargs.get("raw"):
+            return
+        if update_fields is not None and field_name not in update_fields:
+            return
+        field_file = getattr(instance, field_name, None)
+        if not field_file:
+            return
+        is_image = getattr(instance, "is_image", None)
+        if is_image is not None and not (is_image() if callable(is_image) else is_image):
+            return
+        queue_derivatives(field_file)
+
+    return handler
+
+
+for _model, _field in IMAGE_FIELDS:
+    post_save.connect(
+        _make_handler(_field),
+        sender=_model,
+        weak=False,
+        dispatch_uid=f"core.images:{_model}.{_field}",
+    )
@@ -0,0 +1,31 @@
+# core/templatetags/image_tags.py
+from django import template
+
+from core.images import VARIANTS, derivative_srcset, derivative_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_url(field_file, variant="card", fmt="jpeg"):
+    """
+    URL-ul unei derivate:
+      <img src="{% image_url product.main_image 'card' %}">
+    """
+    if not field_file:
+        return ""
+    return derivative_url(field_file, variant, fmt)
+
+
+@register.simple_tag
+def image_srcset(field_file, fmt="webp", variants=""):
+    """
+    srcset cu lățimile variantelor (card 480w, detail 1200w, zoom 2000w):
+      <source type="image/webp" srcset="{% image_srcset product.main_image %}" sizes="...">
+    `variants` = listă separată prin virgulă, ex. "card,detail".
+    """
+    if not field_file:
+        return ""
+    chosen = [v.strip() for v in variants.split(",") if v.strip() in VARIANTS] if variants else None
+    return derivative_srcset(field_file, fmt, chosen)
+
@@ -1,3 +1,200 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import uuid
+import zipfile
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from . import exports, images
+
+from .files import StoredFile, parse_range, serve_file
+
+
+class ServeFileTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        storage = FileSystemStorage(location=self.root)
+        name = storage.save("docs/sample.pdf", ContentFile(b"0123456789" * 10))
+        self.file = StoredFile(name, storage)
+        self.rf = RequestFactory()
+
+    def _body(self, resp):
+        return b"".join(resp.streaming_content)
+
+    def test_full_response_advertises_ranges_and_etag(self):
+        resp = serve_file(self.rf.get("/"), self.file)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Accept-Ranges"], "bytes")
+        self.assertEqual(resp["Content-Type"], "application/pdf")
+        self.assertIn("attachment", resp["Content-Disposition"])
+        self.assertEqual(len(self._body(resp)), 100)
+        self.assertTrue(resp["ETag"])
+
+    def test_if_none_match_returns_304(self):
+        etag = serve_file(self.rf.get("/"), self.file)["ETag"]
+
+        resp = serve_file(self.rf.get("/", HTTP_IF_NONE_MATCH=etag), self.file)
+
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp["ETag"], etag)
+
+    def test_single_range_returns_partial_content(self):
+        resp = serve_file(self.rf.get("/", HTTP_RANGE="bytes=10-19"), self.file)
+
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp["Content-Range"], "bytes 10-19/100")
+        self.assertEqual(self._body(resp), b"0123456789")
+
+    def test_stale_if_range_serves_whole_file(self):
+        resp = serve_file(self.rf.get("/", HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"'), self.file)
+
+        self.assertEqual(resp.status_code, 200)
+
+    def test_unsatisfiable_range(self):
+        resp = serve_file(self.rf.get("/", HTTP_RANGE="bytes=500-"), self.file)
+
+        self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp["Content-Range"], "bytes */100")
+
+    @override_settings(SNOBISTIC_FILE_OFFLOAD="x-accel-redirect", SNOBISTIC_FILE_OFFLOAD_PREFIX="/protected/")
+    def test_accel_redirect_offload(self):
+        resp = serve_file(self.rf.get("/"), self.file, as_attachment=False)
+
+        self.assertEqual(resp["X-Accel-Redirect"], "/protected/docs/sample.pdf")
+        self.assertIn("inline", resp["Content-Disposition"])
+        self.assertEqual(resp.content, b"")
+
+    def test_parse_range_forms(self):
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=95-200", 100), (95, 99))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(parse_range("", 100))
+
+
+def _jpeg_bytes(size=(2400, 1600), color=(200, 30, 30)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+class ImageDerivativeTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        overrides = override_settings(MEDIA_ROOT=self.root, SNOBISTIC_IMAGE_WORKERS=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        cache.clear()
+        self.name = default_storage.save(f"products/main/{uuid.uuid4().hex}.jpg", ContentFile(_jpeg_bytes()))
+        self.field_file = StoredFile(self.name)
+
+    def test_render_variant_resizes_and_converts(self):
+        data = images.render_variant(_jpeg_bytes(), images.VARIANTS["card"], "webp")
+        with Image.open(io.BytesIO(data)) as img:
+            self.assertEqual(img.format, "WEBP")
+            self.assertEqual(img.size, (480, 320))
+
+    def test_render_variant_flattens_alpha_for_jpeg(self):
+        buf = io.BytesIO()
+        Image.new("RGBA", (100, 100), (0, 0, 0, 0)).save(buf, "PNG")
+        data = images.render_variant(buf.getvalue(), images.VARIANTS["card"], "jpeg")
+        with Image.open(io.BytesIO(data)) as img:
+            self.assertEqual(img.mode, "RGB")
+            self.assertEqual(img.size, (100, 100))  # nu mărește imaginile mici
+
+    def test_url_falls_back_to_signed_view_until_generated(self):
+        url = images.derivative_url(self.field_file, "card", "jpeg")
+        self.assertTrue(url.startswith("/"))
+        token = url.rstrip("/").rsplit("/", 1)[-1]
+        self.assertEqual(images.unsign_request(token), (self.name, "card", "jpeg"))
+
+        generated = images.generate_derivatives(self.name)
+        self.assertEqual(len(generated), len(images.VARIANTS) * len(images.FORMATS))
+        self.assertEqual(
+            images.derivative_url(self.field_file, "card", "jpeg"),
+            default_storage.url(images.derivative_name(self.name, "card", "jpeg")),
+        )
+        # a doua rulare nu regenerează nimic
+        self.assertEqual(images.generate_derivatives(self.name), [])
+
+    def test_original_filenames_get_no_derivatives(self):
+        # același nume după ștergere + re-upload ar servi derivata vechiului conținut
+        name = default_storage.save("auctions/images/photo.jpg", ContentFile(_jpeg_bytes()))
+        field_file = SimpleNamespace(name=name, url=default_storage.url(name))
+
+        self.assertTrue(images.has_stable_name(self.name))
+        self.assertFalse(images.has_stable_name(name))
+        self.assertEqual(images.derivative_url(field_file, "card", "jpeg"), field_file.url)
+        self.assertEqual(images.derivative_srcset(field_file), "")
+        with self.assertRaises(ValueError):
+            images.ensure_derivative(name, "card", "jpeg")
+        with mock.patch.object(images, "submit_after_commit") as submit:
+            images.queue_derivatives(field_file)
+        submit.assert_not_called()
+
+    def test_lazy_view_generates_and_redirects(self):
+        token = images.sign_request(self.name, "detail", "webp")
+        resp = self.client.get(reverse("core:image_derivative", args=[token]))
+        name = images.derivative_name(self.name, "detail", "webp")
+        self.assertRedirects(resp, default_storage.url(name), fetch_redirect_response=False)
+        with default_storage.open(name) as fh, Image.open(fh) as img:
+            self.assertEqual(img.size, (1200, 800))
+
+    def test_lazy_view_rejects_tampered_token(self):
+        token = images.sign_request(self.name, "card", "jpeg") + "x"
+        resp = self.client.get(reverse("core:image_derivative", args=[token]))
+        self.assertEqual(resp.status_code, 404)
+
+    def test_srcset_tag(self):
+        html = Template("{% load image_tags %}{% image_srcset f 'webp' 'card,detail' %}").render(
+            Context({"f": self.field_file})
+        )
+        self.assertIn(" 480w, ", html)
+        self.assertTrue(html.endswith(" 1200w"))
+
+
+class StreamingExportTests(SimpleTestCase):
+    columns = [
+        exports.Column("Titlu", "title"),
+        exports.Column("Preț", "price"),
+        exports.Column("Notă", lambda r: r["title"].upper()),
+    ]
+    rows = [{"title": "Rochie <roșie> & co", "price": Decimal("10.50")}, {"title": "Geacă", "price": None}]
+
+    def _body(self, response):
+        return b"".join(
+            chunk.encode("utf-8") if isinstance(chunk, str) else chunk for chunk in response.streaming_content
+        )
+
+    def test_csv_streams_rows(self):
+        response = exports.stream_export(iter(self.rows), self.columns, filename="produse")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="produse.csv"')
+        lines = self._body(response).decode("utf-8-sig").splitlines()
+        self.assertEqual(lines, ["Titlu,Preț,Notă", "Rochie <roșie> & co,10.50,ROCHIE <ROȘIE> & CO", "Geacă,,GEACĂ"])
+
+    def test_xlsx_is_a_valid_workbook(self):
+        response = exports.stream_export(iter(self.rows), self.columns, filename="produse", fmt="xlsx")
+        with zipfile.ZipFile(io.BytesIO(self._body(response))) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertIn("xl/workbook.xml", zf.namelist())
+            sheet = zf.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        self.assertEqual(sheet.count("<row>"), 3)
+        self.assertIn("Rochie &lt;roșie&gt; &amp; co", sheet)
+        self.assertIn("<c><v>10.50</v></c>", sheet)
+
+    def test_requested_format(self):
+        factory = RequestFactory()
+        self.assertEqual(exports.requested_format(factory.get("/", {"export": "XLSX"})), "xlsx")
+        self.assertIsNone(exports.requested_format(factory.get("/", {"export": "pdf"})))
@@ -23,6 +23,9 @@ urlpatterns = [
     # Contact
     path("contact/", views.contact, name="contact"),
 
+    # Derivate imagini (generare lazy, token semnat)
+    path("img/<str:token>/", views.image_derivative, name="image_derivative"),
+
     # SEO tehnic
     path("robots.txt", views.robots_txt, name="robots_txt"),
     path("sitemap.xml", views.sitemap_xml, name="sitemap_xml"),
@@ -1,19 +1,25 @@
 # core/views.py
 import datetime
+import logging
 
 from django.conf import settings
 from django.contrib import messages
+from django.core import signing
+from django.core.files.storage import default_storage
 from django.core.mail import BadHeaderError, EmailMultiAlternatives
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
 
 from catalog.models import Product, Category
+from . import images
 from .forms import ContactForm
 from .models import ContactMessage, SiteSetting, PageSEO
 
+logger = logging.getLogger(__name__)
+
 
 def _get_client_ip(request):
     # dacă ai reverse proxy, setează corect în settings: USE_X_FORWARDED_HOST, SECURE_PROXY_SSL_HEADER etc.
@@ -233,6 +239,29 @@ def sitemap_xml(request):
     return HttpResponse(xml, content_type="application/xml")
 
 
+# ===== Derivate imagini =====
+def image_derivative(request, token):
+    """
+    Derivată generată lazy (prima cerere), apoi redirect la fișierul din media.
+    Token-ul e semnat (core.images.sign_request), deci nu se pot procesa fișiere arbitrare.
+    """
+    try:
+        source_name, variant, fmt = images.unsign_request(token)
+    except signing.BadSignature:
+        raise Http404()
+    if variant not in images.VARIANTS or fmt not in images.FORMATS:
+        raise Http404()
+
+    try:
+        name = images.ensure_derivative(source_name, variant, fmt)
+    except FileNotFoundError:
+        raise Http404()
+    except Exception:
+        logger.exception("Lazy image derivative failed for %s", source_name)
+        return redirect(default_storage.url(source_name))
+    return redirect(default_storage.url(name))
+
+
 # ===== Error pages (handlers în root urls.py) =====
 def error_400(request, exception=None):
     return render(request, "errors/400.html", status=400)
@@ -0,0 +1,34 @@
+# dashboard/management/commands/rebuild_seller_stats.py
+
+from __future__ import annotations
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.rollups import rebuild_seller_stats
+
+
+class Command(BaseCommand):
+    help = "Reface rollup-ul zilnic al vânzătorilor (SellerDailyStats) din comenzi, produse și licitații."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seller", type=int, action="append", dest="seller_ids",
+                            help="Doar vânzătorii dați (repetabil).")
+        parser.add_argument("--since", help="Doar zilele începând cu această dată (YYYY-MM-DD).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since trebuie să fie o dată YYYY-MM-DD.")
+
+        rows = rebuild_seller_stats(
+            seller_ids=options["seller_ids"],
+            since=since,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rollup vânzători: {rows} rânduri scrise."))
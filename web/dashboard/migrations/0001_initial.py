@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:56
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('orders_paid', models.PositiveIntegerField(default=0)),
+                ('gross', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('net', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('listings_created', models.PositiveIntegerField(default=0)),
+                ('auctions_started', models.PositiveIntegerField(default=0)),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['seller', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('seller', 'day'), name='uniq_seller_daily_stats')],
+            },
+        ),
+    ]
@@ -1,8 +1,38 @@
 # dashboard/models.py
+from decimal import Decimal
+
+from django.conf import settings
 from django.db import models
 
-# Momentan nu avem modele specifice pentru dashboard.
-# Toate datele vin din alte aplicații (orders, catalog, auctions, payments).
-#
-# Dacă ulterior vei avea modele de config/statistici,
-# le poți defini aici.
+
+class SellerDailyStats(models.Model):
+    """
+    Rollup zilnic per vânzător pentru panoul de vânzări (dashboard/rollups.py).
+    Celula (seller, day) e recalculată din sursă la evenimente de comandă/produs/licitație;
+    views e doar incrementat (nu există sursă din care să fie recalculat).
+    """
+
+    seller = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+    )
+    day = models.DateField()
+
+    orders_paid = models.PositiveIntegerField(default=0)
+    gross = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    net = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    listings_created = models.PositiveIntegerField(default=0)
+    auctions_started = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["seller", "day"]
+        constraints = [
+            models.UniqueConstraint(fields=["seller", "day"], name="uniq_seller_daily_stats"),
+        ]
+
+    def __str__(self):
+        return f"SellerDailyStats(seller={self.seller_id}, day={self.day})"
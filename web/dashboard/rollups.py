@@ -0,0 +1,349 @@
+# dashboard/rollups.py
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time as monotonic_time
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from auctions.models import Auction
+from catalog.models import Product
+from core.background import submit, submit_after_commit
+from orders.models import Order, OrderItem
+
+from .models import SellerDailyStats
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Rollup zilnic per vânzător (SellerDailyStats)
+# =============================================================================
+# - o celulă (seller, day) e recalculată din sursă când o comandă își schimbă
+#   payment_status sau când se creează/șterge un produs / o licitație
+#   (dashboard/signals.py, după commit). Recalcularea unei singure zile e
+#   idempotentă: dublurile de semnal sau refund-urile nu strică totalurile
+# - ziua unei comenzi = data plății (paid_at, fallback created_at), în timezone-ul curent
+# - views: afișările produselor se adună în memorie, per proces, pe (seller, zi)
+#   (record_product_view) și se scriu în lot (flush_product_views): o singură
+#   tranzacție pentru toate celulele, la cel mult SNOBISTIC_VIEW_FLUSH_SECONDS
+#   sau la SNOBISTIC_VIEW_FLUSH_MAX afișări, nu un lock de scriere SQLite per
+#   pagină. Flush-ul pornește din următoarea afișare după interval și la ieșirea
+#   procesului (atexit); la o oprire bruscă se pierd cel mult afișările din buffer
+# - rebuild_seller_stats reface totul din istoric (backfill / reparații)
+#
+# Settings:
+#   SNOBISTIC_VIEW_FLUSH_SECONDS   default 60 (0 = scriere la fiecare afișare)
+#   SNOBISTIC_VIEW_FLUSH_MAX       default 500 afișări în buffer
+
+ZERO = Decimal("0.00")
+
+CELL_FIELDS = ("orders_paid", "gross", "net", "listings_created", "auctions_started")
+
+
+def _money(value: Decimal) -> Decimal:
+    return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _commission_percent() -> Decimal:
+    # același procent ca Order.seller_commission_percent (payout din escrow)
+    return Decimal(getattr(settings, "SNOBISTIC_SELLER_COMMISSION_PERCENT", "9.0"))
+
+
+def _net(gross: Decimal) -> Decimal:
+    return gross - _money(gross * _commission_percent() / Decimal("100"))
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tz)
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min), tz)
+
+
+def order_day(order) -> date:
+    return timezone.localdate(order.paid_at or order.created_at)
+
+
+def _empty_cell() -> dict:
+    return {"orders_paid": 0, "gross": ZERO, "net": ZERO, "listings_created": 0, "auctions_started": 0}
+
+
+def _order_totals(items: Iterable[tuple]) -> dict[tuple[int, int], Decimal]:
+    """
+    (seller_id, order_id) -> gross, din tuple (seller_id, order_id, price, quantity).
+    """
+    per_order: dict[tuple[int, int], Decimal] = defaultdict(lambda: ZERO)
+    for seller_id, order_id, price, quantity in items:
+        per_order[(seller_id, order_id)] += _money(price * quantity)
+    return per_order
+
+
+# -----------------------------------------------------------------------------
+# Recalculare incrementală (o celulă)
+# -----------------------------------------------------------------------------
+def compute_cell(seller_id: int, day: date) -> dict:
+    start, end = day_bounds(day)
+    cell = _empty_cell()
+
+    paid_that_day = Q(order__paid_at__gte=start, order__paid_at__lt=end) | Q(
+        order__paid_at__isnull=True, order__created_at__gte=start, order__created_at__lt=end
+    )
+    items = (
+        OrderItem.objects.filter(paid_that_day, product__owner_id=seller_id, order__payment_status=Order.PAYMENT_PAID)
+        .values_list("product__owner_id", "order_id", "price", "quantity")
+    )
+    for gross in _order_totals(items).values():
+        cell["orders_paid"] += 1
+        cell["gross"] += gross
+        cell["net"] += _net(gross)
+
+    cell["listings_created"] = Product.objects.filter(
+        owner_id=seller_id, created_at__gte=start, created_at__lt=end
+    ).count()
+    cell["auctions_started"] = Auction.objects.filter(
+        creator_id=seller_id, start_time__gte=start, start_time__lt=end
+    ).count()
+    return cell
+
+
+def refresh_cells(cells: Iterable[tuple[int, date]]) -> int:
+    cells = set(cells)
+    # vânzătorii șterși între timp (delete în cascadă) nu mai primesc rânduri
+    live = set(get_user_model().objects.filter(pk__in={s for s, _ in cells}).values_list("pk", flat=True))
+    n = 0
+    for seller_id, day in cells:
+        if seller_id not in live:
+            continue
+        SellerDailyStats.objects.update_or_create(seller_id=seller_id, day=day, defaults=compute_cell(seller_id, day))
+        n += 1
+    return n
+
+
+def schedule_refresh(cells: Iterable[tuple[int, date]]) -> None:
+    cells = [(s, d) for s, d in cells if s]
+    if cells:
+        submit_after_commit(refresh_cells, cells)
+
+
+def refresh_order(order_id: int) -> int:
+    order = Order.objects.filter(pk=order_id).only("pk", "paid_at", "created_at").first()
+    if order is None:
+        return 0
+    day = order_day(order)
+    seller_ids = OrderItem.objects.filter(order=order).values_list("product__owner_id", flat=True).distinct()
+    return refresh_cells((seller_id, day) for seller_id in seller_ids if seller_id)
+
+
+def _add_views(seller_id: int, day: date, n: int) -> None:
+    updated = SellerDailyStats.objects.filter(seller_id=seller_id, day=day).update(views=F("views") + n)
+    if not updated:
+        row, created = SellerDailyStats.objects.get_or_create(
+            seller_id=seller_id, day=day, defaults={**compute_cell(seller_id, day), "views": n}
+        )
+        if not created:
+            SellerDailyStats.objects.filter(pk=row.pk).update(views=F("views") + n)
+
+
+_views_lock = threading.Lock()
+_pending_views: Counter = Counter()  # (seller_id, day) -> afișări nescrise
+_pending_total = 0
+_last_flush = monotonic_time.monotonic()
+_flush_queued = False
+
+
+def _flush_due(now: float) -> bool:
+    interval = float(getattr(settings, "SNOBISTIC_VIEW_FLUSH_SECONDS", 60))
+    limit = int(getattr(settings, "SNOBISTIC_VIEW_FLUSH_MAX", 500))
+    return _pending_total >= limit or now - _last_flush >= interval
+
+
+def _take_pending_views() -> dict:
+    global _pending_total, _last_flush, _flush_queued
+    with _views_lock:
+        pending = dict(_pending_views)
+        _pending_views.clear()
+        _pending_total = 0
+        _last_flush = monotonic_time.monotonic()
+        _flush_queued = False
+    return pending
+
+
+def flush_product_views() -> int:
+    """
+    Scrie afișările din buffer într-o singură tranzacție. Returnează câte afișări s-au scris.
+    La eroare, afișările revin în buffer pentru următorul flush.
+    """
+    global _pending_total
+    pending = _take_pending_views()
+    if not pending:
+        return 0
+    try:
+        with transaction.atomic():
+            for (seller_id, day), n in sorted(pending.items()):
+                _add_views(seller_id, day, n)
+    except Exception:
+        with _views_lock:
+            _pending_views.update(pending)
+            _pending_total += sum(pending.values())
+        raise
+    return sum(pending.values())
+
+
+def record_product_view(product, user=None) -> None:
+    """
+    +1 views pentru vânzător, în buffer (nu scrie în DB la fiecare pagină). Vizitele proprii nu contează.
+    """
+    global _pending_total, _flush_queued
+    if user is not None and getattr(user, "pk", None) == product.owner_id:
+        return
+    with _views_lock:
+        _pending_views[(product.owner_id, timezone.localdate())] += 1
+        _pending_total += 1
+        flush = not _flush_queued and _flush_due(monotonic_time.monotonic())
+        if flush:
+            _flush_queued = True
+    if flush:
+        submit(flush_product_views)
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    try:
+        flush_product_views()
+    except Exception:
+        logger.exception("Product views flush failed at exit")
+
+
+# -----------------------------------------------------------------------------
+# Citire (dashboard)
+# -----------------------------------------------------------------------------
+def month_keys(today: date, months: int = 6) -> list[str]:
+    out = []
+    for i in range(months - 1, -1, -1):
+        m = (today.month - i - 1) % 12 + 1
+        y = today.year - ((today.month - i - 1) // 12)
+        out.append(f"{y}-{m:02d}")
+    return out
+
+
+def seller_summary(seller, *, months: int = 6) -> dict:
+    """
+    Totaluri + serii lunare pentru grafice, din rândurile de rollup (2 query-uri).
+    """
+    today = timezone.localdate()
+    keys = month_keys(today, months)
+    first_day = date(int(keys[0][:4]), int(keys[0][5:]), 1)
+
+    totals = SellerDailyStats.objects.filter(seller=seller).aggregate(
+        orders_paid=Sum("orders_paid"),
+        gross=Sum("gross"),
+        net=Sum("net"),
+        listings_created=Sum("listings_created"),
+        views=Sum("views"),
+    )
+
+    per_month = {k: _empty_cell() | {"views": 0} for k in keys}
+    rows = SellerDailyStats.objects.filter(seller=seller, day__gte=first_day).values_list(
+        "day", *CELL_FIELDS, "views"
+    )
+    for day, *values in rows:
+        bucket = per_month.get(f"{day.year}-{day.month:02d}")
+        if bucket is None:
+            continue
+        for field, value in zip((*CELL_FIELDS, "views"), values):
+            bucket[field] += value
+
+    return {
+        "orders_paid": totals["orders_paid"] or 0,
+        "gross": totals["gross"] or ZERO,
+        "net": totals["net"] or ZERO,
+        "listings_created": totals["listings_created"] or 0,
+        "views": totals["views"] or 0,
+        "months": keys,
+        "per_month": per_month,
+    }
+
+
+# -----------------------------------------------------------------------------
+# Backfill
+# -----------------------------------------------------------------------------
+def rebuild_seller_stats(
+    *,
+    seller_ids: Optional[Iterable[int]] = None,
+    since: Optional[date] = None,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Reface rollup-ul din istoric (group-by-uri în DB + agregare în memorie pe celule).
+    views existente sunt păstrate. Returnează numărul de rânduri scrise.
+    """
+    seller_ids = list(seller_ids) if seller_ids is not None else None
+    since_dt = day_bounds(since)[0] if since else None
+
+    cells: dict[tuple[int, date], dict] = defaultdict(_empty_cell)
+
+    # --- comenzi plătite ---
+    items = OrderItem.objects.filter(order__payment_status=Order.PAYMENT_PAID)
+    if seller_ids is not None:
+        items = items.filter(product__owner_id__in=seller_ids)
+    if since_dt:
+        items = items.filter(
+            Q(order__paid_at__gte=since_dt) | Q(order__paid_at__isnull=True, order__created_at__gte=since_dt)
+        )
+    order_days = {}
+    rows = []
+    for seller_id, order_id, price, quantity, paid_at, created_at in items.values_list(
+        "product__owner_id", "order_id", "price", "quantity", "order__paid_at", "order__created_at"
+    ).iterator(chunk_size=batch_size):
+        order_days[order_id] = timezone.localdate(paid_at or created_at)
+        rows.append((seller_id, order_id, price, quantity))
+    for (seller_id, order_id), gross in _order_totals(rows).items():
+        cell = cells[(seller_id, order_days[order_id])]
+        cell["orders_paid"] += 1
+        cell["gross"] += gross
+        cell["net"] += _net(gross)
+
+    # --- produse / licitații (group-by pe zi în DB) ---
+    products = Product.objects.all()
+    auctions = Auction.objects.all()
+    if seller_ids is not None:
+        products = products.filter(owner_id__in=seller_ids)
+        auctions = auctions.filter(creator_id__in=seller_ids)
+    if since_dt:
+        products = products.filter(created_at__gte=since_dt)
+        auctions = auctions.filter(start_time__gte=since_dt)
+
+    for row in products.annotate(day=TruncDate("created_at")).values("owner_id", "day").annotate(n=Count("pk")):
+        cells[(row["owner_id"], row["day"])]["listings_created"] += row["n"]
+    for row in auctions.annotate(day=TruncDate("start_time")).values("creator_id", "day").annotate(n=Count("pk")):
+        cells[(row["creator_id"], row["day"])]["auctions_started"] += row["n"]
+
+    # --- înlocuire rânduri existente (păstrând views) ---
+    existing = SellerDailyStats.objects.all()
+    if seller_ids is not None:
+        existing = existing.filter(seller_id__in=seller_ids)
+    if since:
+        existing = existing.filter(day__gte=since)
+    views = {(s, d): v for s, d, v in existing.filter(views__gt=0).values_list("seller_id", "day", "views")}
+    # zilele care au doar vizualizări rămân în tabel
+    for key in views.keys() - cells.keys():
+        cells[key] = _empty_cell()
+
+    objs = [
+        SellerDailyStats(seller_id=seller_id, day=day, views=views.get((seller_id, day), 0), **cell)
+        for (seller_id, day), cell in cells.items()
+    ]
+    with transaction.atomic():
+        existing.delete()
+        SellerDailyStats.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
@@ -0,0 +1,50 @@
+# dashboard/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from auctions.models import Auction
+from catalog.models import Product
+from core.background import submit_after_commit
+from orders.models import Order, OrderItem
+
+from .rollups import refresh_order, schedule_refresh
+
+
+@receiver(post_save, sender=Order, dispatch_uid="dashboard.rollup.order")
+def _order_payment_changed(sender, instance: Order, created, update_fields=None, **kwargs):
+    # o comandă nouă nu are încă items; contează doar schimbările de payment_status
+    if created or kwargs.get("raw"):
+        return
+    if update_fields is not None and "payment_status" not in update_fields:
+        return
+    submit_after_commit(refresh_order, instance.pk)
+
+
+@receiver(post_save, sender=OrderItem, dispatch_uid="dashboard.rollup.order_item")
+def _order_item_added(sender, instance: OrderItem, created, **kwargs):
+    # comenzi create direct ca plătite (items adăugate după save-ul comenzii)
+    if created and not kwargs.get("raw") and instance.order.payment_status == Order.PAYMENT_PAID:
+        submit_after_commit(refresh_order, instance.order_id)
+
+
+@receiver(post_save, sender=Product, dispatch_uid="dashboard.rollup.product_saved")
+@receiver(post_delete, sender=Product, dispatch_uid="dashboard.rollup.product_deleted")
+def _product_changed(sender, instance: Product, created=False, **kwargs):
+    if kwargs.get("raw"):
+        return
+    if kwargs.get("signal") is post_save and not created:
+        return
+    if instance.created_at:
+        schedule_refresh([(instance.owner_id, timezone.localdate(instance.created_at))])
+
+
+@receiver(post_save, sender=Auction, dispatch_uid="dashboard.rollup.auction_saved")
+@receiver(post_delete, sender=Auction, dispatch_uid="dashboard.rollup.auction_deleted")
+def _auction_changed(sender, instance: Auction, created=False, update_fields=None, **kwargs):
+    if kwargs.get("raw"):
+        return
+    if kwargs.get("signal") is post_save and not created and update_fields is not None and "start_time" not in update_fields:
+        return
+    if instance.start_time:
+        schedule_refresh([(instance.creator_id, timezone.localdate(instance.start_time))])
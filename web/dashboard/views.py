@@ -1,25 +1,25 @@
 # dashboard/views.py
-import csv
-from datetime import date
 from decimal import Decimal
 
-from accounts.services.score import RISING_THRESHOLD, TOP_THRESHOLD
+from accounts.services.seller_tiers import get_tier_table
 from accounts.models import SellerProfile
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Count, Prefetch
-from django.db.models.functions import TruncMonth
-from django.http import HttpResponse
+from django.db.models import Prefetch
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 
 from auctions.models import Auction
+from core.exports import Column, format_datetime, iter_values, media_url_builder, requested_format, stream_export
+from core.files import serve_file
 from catalog.models import Product
 from orders.models import Order, OrderItem
 from wallet.models import Wallet
 from logistics.models import Shipment
 from invoices.models import Invoice
 
+from .rollups import seller_summary
+
 
 def is_seller(user):
     """
@@ -84,15 +84,16 @@ def seller_dashboard(request):
     if seller:
         volume = lifetime_sales_net or Decimal("0.00")
         target = None
+        tiers = get_tier_table()
 
         if current_level == SellerProfile.SELLER_LEVEL_AMATOR:
-            target = RISING_THRESHOLD
+            target = tiers.threshold("RISING")
             next_level_label = "Rising Seller"
         elif current_level == SellerProfile.SELLER_LEVEL_RISING:
-            target = TOP_THRESHOLD
+            target = tiers.threshold("TOP")
             next_level_label = "Top Seller"
         elif current_level == SellerProfile.SELLER_LEVEL_TOP:
-            target = TOP_THRESHOLD
+            target = tiers.threshold("TOP")
             next_level_label = "Nivel maxim automat"
         elif current_level == SellerProfile.SELLER_LEVEL_VIP:
             target = None
@@ -115,8 +116,9 @@ def seller_dashboard(request):
     has_kyc_badge = profile.has_kyc_badge if profile else False
     two_factor_enabled = profile.two_factor_enabled if profile else False
 
-    # ---- Statistici de vânzător ----
-    total_products = Product.objects.filter(owner=user).count()
+    # ---- Statistici de vânzător (din rollup-ul zilnic, vezi dashboard/rollups.py) ----
+    summary = seller_summary(user, months=6)
+    months = summary["months"]
 
     active_auctions = (
         Auction.objects.filter(
@@ -127,54 +129,24 @@ def seller_dashboard(request):
         ).count()
     )
 
-    sold_products = (
-        Order.objects.filter(
-            items__product__owner=user,
-            payment_status="paid",
-        )
-        .distinct()
-        .count()
+    wallet_balance = (
+        Wallet.objects.filter(user=user).values_list("balance", flat=True).first() or Decimal("0.00")
     )
 
-    # Wallet: ensure exists
-    wallet_obj, _ = Wallet.objects.get_or_create(user=user)
-    wallet_balance = wallet_obj.balance
-
-    # Labels last 6 months
-    today = date.today()
-    months = []
-    for i in range(5, -1, -1):
-        m = (today.month - i - 1) % 12 + 1
-        y = today.year - ((today.month - i - 1) // 12)
-        months.append(f"{y}-{m:02d}")
-
-    orders_qs = (
-        Order.objects.filter(items__product__owner=user, payment_status="paid")
-        .annotate(month=TruncMonth("created_at"))
-        .values("month")
-        .annotate(count=Count("pk"))
-    )
-    orders_data = {o["month"].strftime("%Y-%m"): o["count"] for o in orders_qs}
-
-    prods_qs = (
-        Product.objects.filter(owner=user)
-        .annotate(month=TruncMonth("created_at"))
-        .values("month")
-        .annotate(count=Count("pk"))
-    )
-    prods_data = {p["month"].strftime("%Y-%m"): p["count"] for p in prods_qs}
-
     return render(
         request,
         "dashboard/seller/dashboard.html",
         {
-            "total_products": total_products,
+            "total_products": summary["listings_created"],
             "active_auctions": active_auctions,
-            "sold_products": sold_products,
+            "sold_products": summary["orders_paid"],
+            "sales_gross": summary["gross"],
+            "sales_net": summary["net"],
+            "product_views": summary["views"],
             "wallet_balance": wallet_balance,
             "chart_months": months,
-            "chart_orders": [orders_data.get(m, 0) for m in months],
-            "chart_products": [prods_data.get(m, 0) for m in months],
+            "chart_orders": [summary["per_month"][m]["orders_paid"] for m in months],
+            "chart_products": [summary["per_month"][m]["listings_created"] for m in months],
 
             # context profil vânzător
             "seller": seller,
@@ -196,30 +168,24 @@ def seller_dashboard(request):
 def products_list(request):
     qs = Product.objects.filter(owner=request.user)
 
-    if request.GET.get("export") == "csv":
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="produse_magazin.csv"'
-        writer = csv.writer(response)
-        writer.writerow(
-            [
-                "Titlu",
-                "SKU",
-                "Subcategorie",
-                "Status",
-                "Creat la",
-                "Validat la",
-                "Preț",
-                "URL imagine",
-            ]
+    fmt = requested_format(request)
+    if fmt:
+        image_url = media_url_builder(request, Product._meta.get_field("main_image").storage)
+        rows = iter_values(
+            qs.order_by("-created_at", "-pk"),
+            "title", "sku", "category__name", "is_active", "created_at", "updated_at", "price", "main_image",
         )
-        for p in qs:
-            subcat = p.category.name
-            status = "Validat" if p.is_active else "În Validare"
-            created = p.created_at.strftime("%Y-%m-%d %H:%M")
-            validated = p.updated_at.strftime("%Y-%m-%d %H:%M") if p.is_active else ""
-            img_url = request.build_absolute_uri(p.main_image.url) if p.main_image else ""
-            writer.writerow([p.title, p.sku, subcat, status, created, validated, p.price, img_url])
-        return response
+        columns = [
+            Column("Titlu", "title"),
+            Column("SKU", "sku"),
+            Column("Subcategorie", "category__name"),
+            Column("Status", lambda r: "Validat" if r["is_active"] else "În Validare"),
+            Column("Creat la", lambda r: format_datetime(r["created_at"])),
+            Column("Validat la", lambda r: format_datetime(r["updated_at"]) if r["is_active"] else ""),
+            Column("Preț", "price"),
+            Column("URL imagine", lambda r: image_url(r["main_image"])),
+        ]
+        return stream_export(rows, columns, filename="produse_magazin", fmt=fmt, sheet_name="Produse")
 
     return render(request, "dashboard/seller/products_list.html", {"products": qs})
 
@@ -236,65 +202,39 @@ def auctions_list(request):
         .order_by("-created_at")
     )
 
-    if request.GET.get("export") == "csv":
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="licitatii_postate.csv"'
-        writer = csv.writer(response)
-        writer.writerow(
-            [
-                "Titlu",
-                "SKU",
-                "Status produs (validare)",
-                "Status licitație",
-                "Creat la",
-                "Start licitație",
-                "Sfârșit licitație",
-                "Timp rămas",
-                "Preț curent",
-                "Preț pornire",
-                "Preț rezervă (minim)",
-                "URL imagine",
-            ]
-        )
+    fmt = requested_format(request)
+    if fmt:
+        image_url = media_url_builder(request, Product._meta.get_field("main_image").storage)
+        status_labels = dict(Auction.Status.choices)
 
-        for a in qs:
-            title = a.product.title
-            sku = a.product.sku
-
-            product_status = "Validat" if getattr(a.product, "is_active", False) else "În validare"
-            auction_status = a.get_status_display()
-
-            created = a.created_at.strftime("%Y-%m-%d %H:%M")
-            start_dt = a.start_time.strftime("%Y-%m-%d %H:%M") if a.start_time else ""
-            end_dt = a.end_time.strftime("%Y-%m-%d %H:%M") if a.end_time else ""
-
-            remaining = ""
-            if a.end_time:
-                remaining = str(max(a.end_time - now, timezone.timedelta())).split(".")[0]
-
-            current = a.current_price or ""
-            start_amt = a.start_price or ""
-            reserve = a.reserve_price if a.reserve_price is not None else a.start_price
-
-            img_url = request.build_absolute_uri(a.product.main_image.url) if a.product.main_image else ""
-
-            writer.writerow(
-                [
-                    title,
-                    sku,
-                    product_status,
-                    auction_status,
-                    created,
-                    start_dt,
-                    end_dt,
-                    remaining,
-                    current,
-                    start_amt,
-                    reserve,
-                    img_url,
-                ]
-            )
-        return response
+        def remaining(row):
+            if not row["end_time"]:
+                return ""
+            return str(max(row["end_time"] - now, timezone.timedelta())).split(".")[0]
+
+        rows = iter_values(
+            qs,
+            "product__title", "product__sku", "product__is_active", "product__main_image",
+            "status", "created_at", "start_time", "end_time", "current_price", "start_price", "reserve_price",
+        )
+        columns = [
+            Column("Titlu", "product__title"),
+            Column("SKU", "product__sku"),
+            Column("Status produs (validare)", lambda r: "Validat" if r["product__is_active"] else "În validare"),
+            Column("Status licitație", lambda r: status_labels.get(r["status"], r["status"])),
+            Column("Creat la", lambda r: format_datetime(r["created_at"])),
+            Column("Start licitație", lambda r: format_datetime(r["start_time"])),
+            Column("Sfârșit licitație", lambda r: format_datetime(r["end_time"])),
+            Column("Timp rămas", remaining),
+            Column("Preț curent", lambda r: r["current_price"] or ""),
+            Column("Preț pornire", lambda r: r["start_price"] or ""),
+            Column(
+                "Preț rezervă (minim)",
+                lambda r: r["reserve_price"] if r["reserve_price"] is not None else r["start_price"],
+            ),
+            Column("URL imagine", lambda r: image_url(r["product__main_image"])),
+        ]
+        return stream_export(rows, columns, filename="licitatii_postate", fmt=fmt, sheet_name="Licitatii")
 
     return render(request, "dashboard/seller/auctions_list.html", {"auctions": qs, "now": now})
 
@@ -358,7 +298,12 @@ def download_awb(request, order_id, item_id):
         return redirect("dashboard:sold_list")
 
     if shipment.label_pdf:
-        return redirect(shipment.label_pdf.url)
+        return serve_file(
+            request,
+            shipment.label_pdf,
+            filename=f"AWB-{shipment.tracking_number or order.pk}.pdf",
+            content_type="application/pdf",
+        )
 
     if shipment.label_url:
         return redirect(shipment.label_url)
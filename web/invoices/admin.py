@@ -1,7 +1,7 @@
 # invoices/admin.py
 from django.contrib import admin
 
-from .models import Invoice, InvoiceLine
+from .models import Invoice, InvoiceLine, InvoiceSequence
 
 
 class InvoiceLineInline(admin.TabularInline):
@@ -45,6 +45,9 @@ class InvoiceAdmin(admin.ModelAdmin):
 
     readonly_fields = (
         "invoice_number",
+        "number_series",
+        "number_year",
+        "number_seq",
         "created_at",
         "updated_at",
         # snapshot
@@ -65,6 +68,10 @@ class InvoiceAdmin(admin.ModelAdmin):
         "bill_to_address",
         "bill_to_city",
         "bill_to_country",
+        # PDF stocat
+        "pdf_file",
+        "pdf_version",
+        "pdf_rendered_at",
     )
 
 
@@ -74,3 +81,14 @@ class InvoiceLineAdmin(admin.ModelAdmin):
     list_filter = ("kind", "currency")
     search_fields = ("description", "sku", "invoice__invoice_number")
     ordering = ("-id",)
+
+
+@admin.register(InvoiceSequence)
+class InvoiceSequenceAdmin(admin.ModelAdmin):
+    list_display = ("series", "year", "last_number", "updated_at")
+    list_filter = ("series", "year")
+    # contorul se modifică doar prin invoices.numbering.allocate
+    readonly_fields = ("series", "year", "last_number", "updated_at")
+
+    def has_add_permission(self, request):
+        return False
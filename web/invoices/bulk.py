@@ -0,0 +1,255 @@
+# invoices/bulk.py
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+
+from .models import Invoice, InvoiceLine, money
+from .numbering import allocate, assign_number, series_for
+from .pdf import queue_invoice_pdfs
+from .queries import invalidate_totals_on_commit
+
+# =============================================================================
+# Emitere în masă (ex. facturile de comision la final de lună)
+# =============================================================================
+# - create_drafts(): câte un DRAFT + o linie pentru fiecare comandă eligibilă fără
+#   factură de tipul respectiv (aceleași sume ca orders.views.invoice_view),
+#   bulk_create pe batch
+# - issue_drafts(): pe batch-uri de DRAFT-uri (keyset pe pk), într-o tranzacție:
+#     1 SELECT facturi + părți (select_related), 1 GROUP BY pe linii pentru totaluri,
+#     snapshot în memorie, un bloc de numere per serie (numbering.allocate),
+#     1 bulk_update. PDF-urile se randează în fundal după commit
+# - reluare: fiecare batch e commit separat și se lucrează doar pe DRAFT-uri, deci
+#   o rulare întreruptă se reia de unde a rămas (sau explicit cu after_id)
+
+LINE_KIND = {
+    Invoice.Type.PRODUCT: InvoiceLine.Kind.PRODUCT,
+    Invoice.Type.SHIPPING: InvoiceLine.Kind.SHIPPING,
+    Invoice.Type.COMMISSION: InvoiceLine.Kind.COMMISSION,
+}
+
+LINE_LABEL = {
+    Invoice.Type.PRODUCT: "Produse comanda #{}",
+    Invoice.Type.SHIPPING: "Transport comanda #{}",
+    Invoice.Type.COMMISSION: "Comision platformă comanda #{}",
+}
+
+# câmpul din Order care dă baza netă (ca în orders.views.invoice_view)
+BASE_FIELD = {
+    Invoice.Type.PRODUCT: "subtotal",
+    Invoice.Type.SHIPPING: "shipping_cost",
+    Invoice.Type.COMMISSION: "seller_commission_amount",
+}
+
+SNAPSHOT_FIELDS = [
+    f.name for f in Invoice._meta.concrete_fields if f.name.startswith(("issuer_", "bill_to_"))
+]
+
+ISSUE_FIELDS = [
+    "status",
+    "issued_at",
+    "invoice_number",
+    "number_series",
+    "number_year",
+    "number_seq",
+    "net_amount",
+    "vat_amount",
+    "total_amount",
+    "updated_at",
+    *SNAPSHOT_FIELDS,
+]
+
+Progress = Callable[[int, int], None]
+
+
+@dataclass
+class BulkIssueResult:
+    issued: int = 0
+    skipped: int = 0
+    last_id: int = 0
+
+
+def _eligible_orders(invoice_type: str):
+    if invoice_type == Invoice.Type.COMMISSION:
+        return Order.objects.filter(escrow_status=Order.ESCROW_RELEASED)
+    if invoice_type in (Invoice.Type.PRODUCT, Invoice.Type.SHIPPING):
+        return Order.objects.filter(payment_status=Order.PAYMENT_PAID)
+    raise ValueError(f"Emiterea în masă nu e suportată pentru tipul {invoice_type!r}.")
+
+
+def create_drafts(
+    invoice_type: str,
+    *,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: int = 500,
+    progress: Optional[Progress] = None,
+) -> int:
+    """
+    Creează DRAFT-uri (cu linia lor) pentru comenzile eligibile care nu au încă
+    o factură de tipul dat. Returnează numărul de facturi create.
+    """
+    first_seller = (
+        OrderItem.objects.filter(order=OuterRef("pk")).order_by("pk").values("product__owner_id")[:1]
+    )
+    orders = (
+        _eligible_orders(invoice_type)
+        .filter(~Exists(Invoice.objects.filter(order=OuterRef("pk"), invoice_type=invoice_type)))
+        .annotate(first_seller_id=Subquery(first_seller))
+        .select_related("buyer")
+    )
+    if since:
+        orders = orders.filter(paid_at__gte=since)
+    if until:
+        orders = orders.filter(paid_at__lt=until)
+
+    vat_percent = Decimal(getattr(settings, "SNOBISTIC_VAT_PERCENT", "19.00"))
+    currency = getattr(settings, "SNOBISTIC_CURRENCY", "RON")
+    base_field = BASE_FIELD[invoice_type]
+
+    created = 0
+    last_pk = 0
+    while True:
+        batch = list(orders.filter(pk__gt=last_pk).order_by("pk")[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        sellers = get_user_model().objects.in_bulk({o.first_seller_id for o in batch if o.first_seller_id})
+        drafts, lines = [], []
+        for order in batch:
+            invoice = Invoice(
+                order=order,
+                invoice_type=invoice_type,
+                buyer=order.buyer,
+                seller=sellers.get(order.first_seller_id),
+                currency=currency,
+                vat_percent=vat_percent,
+                status=Invoice.Status.DRAFT,
+            )
+            line = InvoiceLine(
+                position=1,
+                kind=LINE_KIND[invoice_type],
+                description=LINE_LABEL[invoice_type].format(order.pk),
+                quantity=Decimal("1.00"),
+                currency=currency,
+                unit_net_amount=money(getattr(order, base_field)),
+                vat_percent=vat_percent,
+            )
+            # bulk_create nu trece prin save(): aplicăm manual ce face save()
+            line.recalc_amounts()
+            invoice.net_amount, invoice.vat_amount, invoice.total_amount = (
+                line.net_amount, line.vat_amount, line.total_amount,
+            )
+            invoice.ensure_snapshot()
+            drafts.append(invoice)
+            lines.append(line)
+
+        with transaction.atomic():
+            Invoice.objects.bulk_create(drafts)
+            for invoice, line in zip(drafts, lines):
+                line.invoice = invoice
+            InvoiceLine.objects.bulk_create(lines)
+
+        created += len(drafts)
+        if progress:
+            progress(created, last_pk)
+    return created
+
+
+def _issue_batch(ids: list[int], now: datetime) -> tuple[list[int], int]:
+    with transaction.atomic():
+        invoices = list(
+            Invoice.objects.select_for_update(of=("self",))
+            .filter(pk__in=ids, status=Invoice.Status.DRAFT)
+            .select_related("buyer", "seller")
+            .order_by("pk")
+        )
+        totals = {
+            row["invoice_id"]: row
+            for row in InvoiceLine.objects.filter(invoice_id__in=[i.pk for i in invoices])
+            .values("invoice_id")
+            .annotate(n=Count("pk"), net=Sum("net_amount"), vat=Sum("vat_amount"), total=Sum("total_amount"))
+        }
+
+        ready = []
+        for invoice in invoices:
+            row = totals.get(invoice.pk)
+            if not row or not row["n"]:
+                # fără linii nu se emite (ca Invoice.issue)
+                continue
+            invoice.ensure_snapshot()
+            invoice.net_amount = money(row["net"])
+            invoice.vat_amount = money(row["vat"])
+            invoice.total_amount = money(row["total"])
+            invoice.status = Invoice.Status.ISSUED
+            invoice.issued_at = now
+            invoice.updated_at = now
+            ready.append(invoice)
+
+        # un bloc de numere per serie, în ordinea pk
+        year = timezone.localtime(now).year
+        by_series: dict[str, list[Invoice]] = defaultdict(list)
+        for invoice in ready:
+            if invoice.invoice_number:
+                continue  # număr existent (import): îl păstrăm
+            by_series[series_for(invoice.document_type, invoice.invoice_type)].append(invoice)
+        for series, group in by_series.items():
+            for invoice, seq in zip(group, allocate(series, year, count=len(group))):
+                assign_number(invoice, seq)
+
+        Invoice.objects.bulk_update(ready, ISSUE_FIELDS)
+
+        issued_ids = [i.pk for i in ready]
+        if issued_ids:
+            queue_invoice_pdfs(issued_ids)
+            invalidate_totals_on_commit(ready)
+    return issued_ids, len(invoices) - len(ready)
+
+
+def issue_drafts(
+    *,
+    invoice_type: Optional[str] = None,
+    document_type: Optional[str] = None,
+    after_id: int = 0,
+    batch_size: int = 500,
+    progress: Optional[Progress] = None,
+) -> BulkIssueResult:
+    """
+    Emite toate DRAFT-urile (filtrate) în batch-uri. progress(emise, ultimul_pk)
+    e apelat după fiecare batch; ultimul pk poate fi folosit ca after_id la reluare.
+    """
+    drafts = Invoice.objects.filter(status=Invoice.Status.DRAFT)
+    if invoice_type:
+        drafts = drafts.filter(invoice_type=invoice_type)
+    if document_type:
+        drafts = drafts.filter(document_type=document_type)
+    if document_type != Invoice.Document.INVOICE:
+        # storno fără factura inițială nu e valid (Invoice.clean)
+        drafts = drafts.filter(Q(document_type=Invoice.Document.INVOICE) | Q(original_invoice__isnull=False))
+
+    result = BulkIssueResult(last_id=after_id)
+    while True:
+        ids = list(
+            drafts.filter(pk__gt=result.last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        issued, skipped = _issue_batch(ids, timezone.now())
+        result.issued += len(issued)
+        result.skipped += skipped
+        result.last_id = ids[-1]
+        if progress:
+            progress(result.issued, result.last_id)
+    return result
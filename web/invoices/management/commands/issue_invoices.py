@@ -0,0 +1,71 @@
+# invoices/management/commands/issue_invoices.py
+
+from __future__ import annotations
+
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from invoices.bulk import BASE_FIELD, create_drafts, issue_drafts
+from invoices.models import Invoice
+
+
+def _aware(value: str, option: str) -> datetime:
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"{option} trebuie să fie o dată YYYY-MM-DD.")
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Command(BaseCommand):
+    help = (
+        "Emite în masă facturile DRAFT (opțional creează întâi draft-urile pentru comenzile eligibile). "
+        "Fiecare batch e commit separat; o rulare întreruptă se reia la următoarea rulare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--type", dest="invoice_type", choices=[c for c, _ in Invoice.Type.choices])
+        parser.add_argument(
+            "--create", action="store_true",
+            help="Creează întâi draft-uri pentru comenzile eligibile fără factură de acest tip (necesită --type).",
+        )
+        parser.add_argument("--since", help="Cu --create: comenzi plătite începând cu data (YYYY-MM-DD).")
+        parser.add_argument("--until", help="Cu --create: comenzi plătite înainte de data (YYYY-MM-DD, exclusiv).")
+        parser.add_argument("--after-id", type=int, default=0, help="Reia emiterea după acest pk de factură.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def _progress(self, label):
+        def report(done, last_id):
+            self.stdout.write(f"  {label}: {done} (ultimul pk {last_id})")
+
+        return report
+
+    def handle(self, *args, **options):
+        invoice_type = options["invoice_type"]
+        batch_size = options["batch_size"]
+
+        if options["create"]:
+            if invoice_type not in BASE_FIELD:
+                raise CommandError(f"--create suportă doar --type {', '.join(BASE_FIELD)}.")
+            created = create_drafts(
+                invoice_type,
+                since=_aware(options["since"], "--since") if options["since"] else None,
+                until=_aware(options["until"], "--until") if options["until"] else None,
+                batch_size=batch_size,
+                progress=self._progress("draft-uri create"),
+            )
+            self.stdout.write(f"Draft-uri create: {created}")
+
+        result = issue_drafts(
+            invoice_type=invoice_type,
+            after_id=options["after_id"],
+            batch_size=batch_size,
+            progress=self._progress("emise"),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Facturi emise: {result.issued}, sărite (fără linii): {result.skipped}, ultimul pk: {result.last_id}."
+            )
+        )
@@ -0,0 +1,29 @@
+# invoices/management/commands/rerender_invoice_pdfs.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from invoices import pdf as invoice_pdf
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-randează PDF-urile stocate ale facturilor emise/anulate cu versiune veche de template "
+        "(după creșterea invoices.pdf.PDF_TEMPLATE_VERSION)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Re-randează toate facturile, nu doar cele vechi.")
+        parser.add_argument("--batch-size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            rendered = invoice_pdf.rerender_invoice_pdfs(
+                force=options["force"],
+                batch_size=options["batch_size"],
+                stdout=self.stdout if options["verbosity"] > 1 else None,
+            )
+        except invoice_pdf.PdfUnavailable as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"PDF facturi (v{invoice_pdf.PDF_TEMPLATE_VERSION}): {rendered} randate."))
@@ -0,0 +1,36 @@
+# invoices/management/commands/verify_invoice_numbers.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from invoices.numbering import verify_series
+
+
+class Command(BaseCommand):
+    help = "Verifică seriile de facturi emise: numere lipsă, dubluri, diferențe față de contor."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--series", help="Doar seria dată (ex. SNBP).")
+        parser.add_argument("--year", type=int, help="Doar anul dat.")
+
+    def handle(self, *args, **options):
+        reports = verify_series(options["series"], options["year"])
+        failed = 0
+        for r in reports:
+            line = f"{r.series}-{r.year}: {r.issued} emise, contor {r.counter}"
+            if r.ok:
+                self.stdout.write(f"{line} — OK")
+                continue
+            failed += 1
+            if r.missing:
+                shown = ", ".join(str(n) for n in r.missing[:20])
+                more = f" (+{len(r.missing) - 20})" if len(r.missing) > 20 else ""
+                line += f"; lipsă: {shown}{more}"
+            if r.duplicates:
+                line += f"; dubluri: {', '.join(str(n) for n in r.duplicates)}"
+            self.stdout.write(self.style.ERROR(line))
+
+        if failed:
+            raise CommandError(f"{failed} serii cu goluri sau dubluri.")
+        self.stdout.write(self.style.SUCCESS(f"Serii verificate: {len(reports)}, fără goluri."))
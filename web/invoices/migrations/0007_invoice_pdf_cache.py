@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0006_alter_invoice_options_invoice_cancel_reason_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_file',
+            field=models.FileField(blank=True, default='', editable=False, max_length=255, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_rendered_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_sha256',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
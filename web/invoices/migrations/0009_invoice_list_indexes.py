@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:15
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0008_invoice_number_series'),
+        ('orders', '0005_order_cancelled_at_order_completed_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(models.F('buyer'), models.OrderBy(django.db.models.functions.comparison.Coalesce('issued_at', 'created_at'), descending=True), models.OrderBy(models.F('id'), descending=True), name='invoice_buyer_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(models.F('seller'), models.F('invoice_type'), models.OrderBy(django.db.models.functions.comparison.Coalesce('issued_at', 'created_at'), descending=True), models.OrderBy(models.F('id'), descending=True), name='invoice_seller_type_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(models.OrderBy(django.db.models.functions.comparison.Coalesce('issued_at', 'created_at'), descending=True), models.OrderBy(models.F('id'), descending=True), name='invoice_list_date_idx'),
+        ),
+    ]
@@ -6,7 +6,8 @@ from decimal import Decimal, ROUND_HALF_UP
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
-from django.db.models import Sum
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
@@ -66,9 +67,15 @@ class Invoice(models.Model):
         unique=True,
         null=True,
         blank=True,
-        help_text="Număr document (ex: SNB-20250111-000123). Se generează la emitere.",
+        help_text="Număr document (ex: SNBP-2025-000123). Se generează la emitere.",
     )
 
+    # seria + anul + poziția în serie (invoices/numbering.py); NULL pentru draft
+    # și pentru numerele vechi (SNB-YYYYMMDD-<pk>), dinaintea seriilor
+    number_series = models.CharField(max_length=20, blank=True, default="", editable=False)
+    number_year = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    number_seq = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
     document_type = models.CharField(
         max_length=20,
         choices=Document.choices,
@@ -163,6 +170,14 @@ class Invoice(models.Model):
     bill_to_city = models.CharField(max_length=120, null=True, blank=True)
     bill_to_country = models.CharField(max_length=120, null=True, blank=True, default="RO")
 
+    # =========================
+    # PDF stocat (invoices/pdf.py)
+    # =========================
+    pdf_file = models.FileField(max_length=255, blank=True, default="", editable=False)
+    pdf_sha256 = models.CharField(max_length=64, blank=True, default="", editable=False)
+    pdf_version = models.PositiveSmallIntegerField(default=0, editable=False)
+    pdf_rendered_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -173,6 +188,26 @@ class Invoice(models.Model):
             models.Index(fields=["invoice_type"]),
             models.Index(fields=["document_type"]),
             models.Index(fields=["status"]),
+            # listări (invoices/queries.py): list_date = COALESCE(issued_at, created_at)
+            models.Index(
+                F("buyer"), Coalesce("issued_at", "created_at").desc(), F("id").desc(),
+                name="invoice_buyer_list_idx",
+            ),
+            models.Index(
+                F("seller"), F("invoice_type"), Coalesce("issued_at", "created_at").desc(), F("id").desc(),
+                name="invoice_seller_type_list_idx",
+            ),
+            models.Index(
+                Coalesce("issued_at", "created_at").desc(), F("id").desc(),
+                name="invoice_list_date_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["number_series", "number_year", "number_seq"],
+                condition=models.Q(number_seq__isnull=False),
+                name="uniq_invoice_series_seq",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -276,10 +311,6 @@ class Invoice(models.Model):
     def can_cancel(self) -> bool:
         return self.status == self.Status.ISSUED
 
-    def _generate_number(self) -> str:
-        stamp = (self.issued_at or timezone.now()).strftime("%Y%m%d")
-        return f"SNB-{stamp}-{self.pk:06d}"
-
     def clean(self):
         # CREDIT_NOTE trebuie să aibă original_invoice
         if self.document_type == self.Document.CREDIT_NOTE and not self.original_invoice_id:
@@ -298,28 +329,37 @@ class Invoice(models.Model):
         DRAFT -> ISSUED:
           - issued_at = now
           - status = ISSUED
-          - generează invoice_number dacă lipsește
+          - generează invoice_number dacă lipsește (următorul număr din serie)
           - blochează implicit editarea liniilor (prin InvoiceLine.save/delete)
         """
+        from .numbering import assign_number
+
         if not self.can_issue():
             raise ValidationError("Doar facturile DRAFT pot fi emise.")
 
         if not self.has_lines:
             raise ValidationError("Nu poți emite o factură fără linii (InvoiceLine).")
 
+        # recalc totals (safe)
+        self.recalculate_totals_from_lines(save=False)
+
         self.ensure_snapshot()
         self.issued_at = timezone.now()
         self.status = self.Status.ISSUED
 
-        # persist issued_at/status înainte de număr (ca să avem pk)
-        self.save(update_fields=["issued_at", "status", "updated_at"])
-
+        # numărul se alocă ultimul: rândul contorului stă blocat cât mai puțin
+        update_fields = ["issued_at", "status", "net_amount", "vat_amount", "total_amount", "updated_at"]
         if not self.invoice_number:
-            self.invoice_number = self._generate_number()
-            self.save(update_fields=["invoice_number", "updated_at"])
+            assign_number(self)
+            update_fields += ["invoice_number", "number_series", "number_year", "number_seq"]
+        self.save(update_fields=update_fields)
 
-        # recalc totals (safe)
-        self.recalculate_totals_from_lines(save=True)
+        # PDF-ul se randează o singură dată, în fundal, după commit
+        from .pdf import queue_invoice_pdf
+        from .queries import invalidate_totals_on_commit
+
+        queue_invoice_pdf(self)
+        invalidate_totals_on_commit([self])
 
     @transaction.atomic
     def cancel(self, by_user=None, reason: str = "") -> None:
@@ -337,6 +377,13 @@ class Invoice(models.Model):
 
         self.save(update_fields=["status", "cancelled_at", "cancelled_by", "cancel_reason", "updated_at"])
 
+        # statusul apare în PDF -> document nou; factura iese din totaluri
+        from .pdf import queue_invoice_pdf
+        from .queries import invalidate_totals_on_commit
+
+        queue_invoice_pdf(self)
+        invalidate_totals_on_commit([self])
+
     @transaction.atomic
     def create_credit_note(self, by_user=None, reason: str = "") -> "Invoice":
         """
@@ -498,3 +545,25 @@ class InvoiceLine(models.Model):
             inv = self.invoice
             super().delete(*args, **kwargs)
             inv.recalculate_totals_from_lines(save=True)
+
+
+class InvoiceSequence(models.Model):
+    """
+    Contor per serie și an (invoices/numbering.py). last_number = ultimul număr
+    alocat; incrementul se face în tranzacția emiterii, deci un rollback nu lasă goluri.
+    """
+
+    series = models.CharField(max_length=20)
+    year = models.PositiveSmallIntegerField()
+    last_number = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["series", "-year"]
+        constraints = [
+            models.UniqueConstraint(fields=["series", "year"], name="uniq_invoice_sequence"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.series}-{self.year}: {self.last_number}"
@@ -0,0 +1,166 @@
+# invoices/numbering.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min
+from django.utils import timezone
+
+from .models import Invoice, InvoiceSequence
+
+# =============================================================================
+# Numerotare facturi: serii consecutive, fără goluri
+# =============================================================================
+# - seria depinde de (document_type, invoice_type); numărul = <serie>-<an>-<seq:06d>
+# - contorul e un rând InvoiceSequence(series, year): alocarea e un singur
+#   UPDATE last_number = last_number + n în tranzacția emiterii. Se blochează doar
+#   rândul contorului (nu tabela de facturi), până la commit; un rollback anulează
+#   și incrementul -> fără goluri
+# - blocuri: allocate(series, year, count=n) rezervă n numere dintr-un singur
+#   UPDATE, pentru emiteri în masă în aceeași tranzacție. Blocuri pre-alocate per
+#   worker, în afara tranzacției, ar lăsa goluri la un crash -> nu le folosim
+# - verify_series() caută goluri / dubluri în setul emis (emise + anulate; o
+#   factură anulată își păstrează numărul)
+#
+# Settings:
+#   SNOBISTIC_INVOICE_SERIES   override-uri {"<document_type>:<invoice_type>": "SERIE"}
+
+DEFAULT_SERIES = {
+    f"{Invoice.Document.INVOICE}:{Invoice.Type.PRODUCT}": "SNBP",
+    f"{Invoice.Document.INVOICE}:{Invoice.Type.SHIPPING}": "SNBT",
+    f"{Invoice.Document.INVOICE}:{Invoice.Type.COMMISSION}": "SNBC",
+    f"{Invoice.Document.INVOICE}:{Invoice.Type.RETURN}": "SNBR",
+    f"{Invoice.Document.CREDIT_NOTE}:{Invoice.Type.PRODUCT}": "SNBSP",
+    f"{Invoice.Document.CREDIT_NOTE}:{Invoice.Type.SHIPPING}": "SNBST",
+    f"{Invoice.Document.CREDIT_NOTE}:{Invoice.Type.COMMISSION}": "SNBSC",
+    f"{Invoice.Document.CREDIT_NOTE}:{Invoice.Type.RETURN}": "SNBSR",
+}
+
+NUMBERED_STATUSES = (Invoice.Status.ISSUED, Invoice.Status.CANCELLED)
+
+
+def series_for(document_type: str, invoice_type: str) -> str:
+    key = f"{document_type}:{invoice_type}"
+    overrides = getattr(settings, "SNOBISTIC_INVOICE_SERIES", None) or {}
+    return overrides.get(key) or DEFAULT_SERIES.get(key) or "SNB"
+
+
+def format_number(series: str, year: int, seq: int) -> str:
+    return f"{series}-{year}-{seq:06d}"
+
+
+def allocate(series: str, year: int, count: int = 1) -> range:
+    """
+    Rezervă `count` numere consecutive din serie. Trebuie apelat într-o tranzacție
+    care le și folosește (altfel un rollback ulterior ar lăsa goluri).
+    """
+    if count < 1:
+        raise ValueError("count trebuie să fie >= 1")
+    if not transaction.get_connection().in_atomic_block:
+        raise RuntimeError("allocate() trebuie apelat într-o tranzacție (transaction.atomic).")
+
+    counter = InvoiceSequence.objects.filter(series=series, year=year)
+    if not counter.update(last_number=F("last_number") + count):
+        try:
+            with transaction.atomic():
+                InvoiceSequence.objects.create(series=series, year=year, last_number=count)
+        except IntegrityError:
+            # creat concurent între timp
+            counter.update(last_number=F("last_number") + count)
+        else:
+            return range(1, count + 1)
+
+    last = counter.values_list("last_number", flat=True).get()
+    return range(last - count + 1, last + 1)
+
+
+def assign_number(invoice: Invoice, seq: Optional[int] = None) -> str:
+    """
+    Setează seria/anul/numărul pe instanță (fără save). Fără `seq`, alocă următorul număr.
+    """
+    year = timezone.localtime(invoice.issued_at or timezone.now()).year
+    series = series_for(invoice.document_type, invoice.invoice_type)
+    if seq is None:
+        seq = allocate(series, year)[0]
+    invoice.number_series = series
+    invoice.number_year = year
+    invoice.number_seq = seq
+    invoice.invoice_number = format_number(series, year, seq)
+    return invoice.invoice_number
+
+
+# -----------------------------------------------------------------------------
+# Verificare
+# -----------------------------------------------------------------------------
+@dataclass
+class SeriesReport:
+    series: str
+    year: int
+    issued: int = 0
+    first: int = 0
+    last: int = 0
+    counter: int = 0
+    missing: list[int] = field(default_factory=list)
+    duplicates: list[int] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        # numerele alocate dar nefolosite (counter > last) apar tot în missing
+        return not self.missing and not self.duplicates
+
+
+def _missing(seqs: Iterable[int], last: int) -> list[int]:
+    # seqs vin sortate; memoria e O(goluri), nu O(facturi)
+    out = []
+    expected = 1
+    for seq in seqs:
+        if seq > expected:
+            out.extend(range(expected, seq))
+        expected = max(expected, seq + 1)
+    if last >= expected:
+        out.extend(range(expected, last + 1))
+    return out
+
+
+def verify_series(series: Optional[str] = None, year: Optional[int] = None) -> list[SeriesReport]:
+    """
+    Un raport per (serie, an): numerele lipsă între 1 și contor, dublurile și
+    diferența față de contor (numere alocate dar nefolosite).
+    """
+    numbered = Invoice.objects.filter(status__in=NUMBERED_STATUSES, number_seq__isnull=False)
+    counters = InvoiceSequence.objects.all()
+    if series:
+        numbered = numbered.filter(number_series=series)
+        counters = counters.filter(series=series)
+    if year:
+        numbered = numbered.filter(number_year=year)
+        counters = counters.filter(year=year)
+
+    reports: dict[tuple[str, int], SeriesReport] = {}
+    for row in numbered.values("number_series", "number_year").annotate(
+        n=Count("pk"), first=Min("number_seq"), last=Max("number_seq")
+    ):
+        key = (row["number_series"], row["number_year"])
+        reports[key] = SeriesReport(*key, issued=row["n"], first=row["first"], last=row["last"])
+    for s, y, last_number in counters.values_list("series", "year", "last_number"):
+        reports.setdefault((s, y), SeriesReport(s, y)).counter = last_number
+
+    for (s, y), report in reports.items():
+        seqs = (
+            numbered.filter(number_series=s, number_year=y)
+            .order_by("number_seq")
+            .values_list("number_seq", flat=True)
+            .iterator(chunk_size=5000)
+        )
+        report.missing = _missing(seqs, max(report.last, report.counter))
+        report.duplicates = list(
+            numbered.filter(number_series=s, number_year=y)
+            .values("number_seq")
+            .annotate(n=Count("pk"))
+            .filter(n__gt=1)
+            .values_list("number_seq", flat=True)
+        )
+    return sorted(reports.values(), key=lambda r: (r.series, r.year))
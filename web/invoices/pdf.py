@@ -0,0 +1,226 @@
+# invoices/pdf.py
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.background import submit_after_commit
+from core.images import submit_to_pool
+
+from .models import Invoice
+
+logger = logging.getLogger(__name__)
+
+try:
+    from weasyprint import HTML
+except ImportError:
+    HTML = None
+
+# =============================================================================
+# Cache PDF facturi
+# =============================================================================
+# - facturile emise sunt imutabile (InvoiceLine._assert_editable), deci PDF-ul se
+#   randează o singură dată: după issue() / cancel() (statusul apare în PDF),
+#   în fundal, după commit
+# - WeasyPrint (CPU-bound) rulează în pool-ul de procese din core.images
+# - content-addressed: cheia = sha256(versiune template + HTML randat), fișierul e
+#   invoices/pdf/<kk>/<cheie>.pdf. Același HTML -> același fișier, fără re-randare
+#   (output-ul WeasyPrint nu e determinist la nivel de bytes, HTML-ul este)
+# - descărcarea servește fișierul stocat (core.files.serve_file)
+# - la modificarea template-ului: se crește PDF_TEMPLATE_VERSION și se rulează
+#   `manage.py rerender_invoice_pdfs`
+#
+# Settings:
+#   SNOBISTIC_SITE_URL   base_url pentru resurse relative din template (opțional)
+
+PDF_TEMPLATE = "invoices/invoice_pdf.html"
+PDF_TEMPLATE_VERSION = 1
+PDF_PREFIX = "invoices/pdf"
+
+CACHEABLE_STATUSES = (Invoice.Status.ISSUED, Invoice.Status.CANCELLED)
+
+
+class PdfUnavailable(RuntimeError):
+    pass
+
+
+def pdf_filename(invoice: Invoice) -> str:
+    return f"Document-{invoice.invoice_number or invoice.pk}.pdf"
+
+
+def render_invoice_html(invoice: Invoice) -> str:
+    return render_to_string(
+        PDF_TEMPLATE,
+        {
+            "invoice": invoice,
+            "order": invoice.order,
+            "lines": invoice.lines.all(),
+            "platform_name": "Snobistic",
+            "company_vat": getattr(settings, "SNOBISTIC_COMPANY_VAT", "RO00000000"),
+        },
+    )
+
+
+def content_key(html: str, version: Optional[int] = None) -> str:
+    version = PDF_TEMPLATE_VERSION if version is None else version
+    return hashlib.sha256(f"v{version}\n{html}".encode("utf-8")).hexdigest()
+
+
+def content_name(key: str) -> str:
+    return f"{PDF_PREFIX}/{key[:2]}/{key}.pdf"
+
+
+def html_to_pdf(html: str, base_url: Optional[str] = None) -> bytes:
+    # rulează în procesele din pool: primește/întoarce doar str/bytes
+    if HTML is None:
+        raise PdfUnavailable("Generarea de PDF nu este configurată (weasyprint lipsește).")
+    return HTML(string=html, base_url=base_url).write_pdf()
+
+
+def _base_url() -> Optional[str]:
+    return getattr(settings, "SNOBISTIC_SITE_URL", "") or None
+
+
+def is_current(invoice: Invoice) -> bool:
+    return bool(invoice.pdf_file) and invoice.pdf_version >= PDF_TEMPLATE_VERSION
+
+
+def _store(invoice: Invoice, key: str, data: Optional[bytes], *, replace: bool = False) -> None:
+    name = content_name(key)
+    if data is not None and replace and default_storage.exists(name):
+        default_storage.delete(name)
+    if data is not None and not default_storage.exists(name):
+        saved = default_storage.save(name, ContentFile(data))
+        if saved != name:
+            # scriere concurentă a aceluiași conținut
+            default_storage.delete(saved)
+    Invoice.objects.filter(pk=invoice.pk).update(
+        pdf_file=name, pdf_sha256=key, pdf_version=PDF_TEMPLATE_VERSION, pdf_rendered_at=timezone.now()
+    )
+    invoice.pdf_file.name = name
+    invoice.pdf_sha256 = key
+    invoice.pdf_version = PDF_TEMPLATE_VERSION
+
+
+def _prepare(invoice: Invoice, force: bool) -> Optional[tuple[str, str]]:
+    """
+    (cheie, html) dacă trebuie randat; None dacă fișierul e deja la zi
+    (inclusiv când alt document are exact același conținut).
+    """
+    html = render_invoice_html(invoice)
+    key = content_key(html)
+    if force:
+        return key, html
+    if invoice.pdf_sha256 == key and invoice.pdf_file and invoice.pdf_version >= PDF_TEMPLATE_VERSION:
+        return None
+    if default_storage.exists(content_name(key)):
+        _store(invoice, key, None)
+        return None
+    return key, html
+
+
+def generate_invoice_pdf(invoice: Invoice, *, force: bool = False) -> Invoice:
+    """
+    Randează și stochează PDF-ul unei facturi emise/anulate. Idempotent.
+    """
+    if invoice.status not in CACHEABLE_STATUSES:
+        raise ValueError("Doar facturile emise sau anulate au PDF stocat.")
+    prepared = _prepare(invoice, force)
+    if prepared is not None:
+        key, html = prepared
+        _store(invoice, key, submit_to_pool(html_to_pdf, html, _base_url()).result(), replace=force)
+    return invoice
+
+
+def _load(invoice_id: int) -> Optional[Invoice]:
+    return (
+        Invoice.objects.select_related("order", "buyer", "seller", "original_invoice")
+        .prefetch_related("lines")
+        .filter(pk=invoice_id, status__in=CACHEABLE_STATUSES)
+        .first()
+    )
+
+
+def _generate_logged(invoice_id: int) -> None:
+    invoice = _load(invoice_id)
+    if invoice is None:
+        return
+    try:
+        generate_invoice_pdf(invoice)
+    except PdfUnavailable:
+        pass
+    except Exception:
+        logger.exception("Invoice PDF failed for %s", invoice_id)
+
+
+def queue_invoice_pdf(invoice: Invoice) -> None:
+    """
+    Programează randarea după commit (apelat din Invoice.issue / cancel).
+    """
+    if HTML is None:
+        return
+    submit_after_commit(_generate_logged, invoice.pk)
+
+
+def _generate_many_logged(invoice_ids: list[int]) -> None:
+    for invoice_id in invoice_ids:
+        _generate_logged(invoice_id)
+
+
+def queue_invoice_pdfs(invoice_ids: list[int]) -> None:
+    """
+    Un singur job de fundal pentru un batch emis în masă (invoices/bulk.py).
+    """
+    if HTML is None or not invoice_ids:
+        return
+    submit_after_commit(_generate_many_logged, list(invoice_ids))
+
+
+def rerender_invoice_pdfs(*, force: bool = False, batch_size: int = 50, stdout=None) -> int:
+    """
+    Re-randare în masă (după creșterea PDF_TEMPLATE_VERSION): keyset pe pk, câte un
+    batch de HTML-uri trimise în paralel în pool. Returnează numărul de PDF-uri randate.
+    """
+    qs = Invoice.objects.filter(status__in=CACHEABLE_STATUSES)
+    if not force:
+        qs = qs.filter(Q(pdf_version__lt=PDF_TEMPLATE_VERSION) | Q(pdf_file=""))
+
+    rendered = 0
+    last_pk = 0
+    base_url = _base_url()
+    while True:
+        batch = list(
+            qs.filter(pk__gt=last_pk)
+            .select_related("order", "buyer", "seller", "original_invoice")
+            .prefetch_related("lines")
+            .order_by("pk")[:batch_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        jobs = []
+        for invoice in batch:
+            prepared = _prepare(invoice, force)
+            if prepared is not None:
+                key, html = prepared
+                jobs.append((invoice, key, submit_to_pool(html_to_pdf, html, base_url)))
+        for invoice, key, future in jobs:
+            try:
+                _store(invoice, key, future.result(), replace=force)
+                rendered += 1
+            except PdfUnavailable:
+                raise
+            except Exception:
+                logger.exception("Invoice PDF failed for %s", invoice.pk)
+        if stdout is not None:
+            stdout.write(f"  ... până la #{last_pk}: {rendered} randate")
+    return rendered
@@ -0,0 +1,211 @@
+# invoices/queries.py
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, ExtractMonth
+from django.utils import timezone
+
+from .models import Invoice
+
+# =============================================================================
+# Listări facturi (Facturile mele / Facturi comision) + totaluri pe perioade
+# =============================================================================
+# - data de listare = COALESCE(issued_at, created_at) (draft-urile n-au issued_at);
+#   filtrul de perioadă și ordonarea folosesc aceeași expresie, acoperită de
+#   indexurile pe expresie din Invoice.Meta:
+#     invoice_buyer_list_idx         (buyer, list_date DESC, id DESC)     -> my_invoices
+#     invoice_seller_type_list_idx   (seller, invoice_type, list_date DESC, id DESC)
+#                                                                         -> commission_invoices
+#     invoice_list_date_idx          (list_date DESC, id DESC)            -> staff
+# - period_totals(): sume net/TVA/total pe lunile unui an (doar ISSUED; stornările
+#   au deja valori negative), din cache. Intervalul și luna vin din aceeași
+#   list_date ca listarea de lângă ele (facturile ISSUED create direct, fără
+#   issued_at, intră pe created_at). Cheile se invalidează la emitere/anulare
+#   (invalidate_totals), pentru anul și părțile facturii
+
+LIST_DATE = Coalesce("issued_at", "created_at")
+LIST_ORDER = ("-list_date", "-id")
+
+SCOPE_ALL = "all"
+SCOPE_BUYER = "buyer"
+SCOPE_COMMISSION = "commission"
+
+TOTALS_TTL = 60 * 60 * 24
+ZERO = Decimal("0.00")
+
+
+@dataclass(frozen=True)
+class InvoiceFilters:
+    q: str = ""
+    invoice_type: str = ""
+    document_type: str = ""
+    status: str = ""
+    date_from: Optional[datetime.date] = None
+    date_to: Optional[datetime.date] = None
+
+    @classmethod
+    def from_request(cls, request) -> "InvoiceFilters":
+        get = request.GET
+        return cls(
+            q=(get.get("q") or "").strip(),
+            invoice_type=(get.get("type") or "").strip(),
+            document_type=(get.get("doc") or "").strip(),
+            status=(get.get("status") or "").strip(),
+            date_from=_parse_date(get.get("from")),
+            date_to=_parse_date(get.get("to")),
+        )
+
+    @property
+    def year(self) -> int:
+        day = self.date_from or self.date_to or timezone.localdate()
+        return day.year
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime.date]:
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value.strip())
+    except ValueError:
+        return None
+
+
+def _bounds(day: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+# -----------------------------------------------------------------------------
+# Querysets pentru listări
+# -----------------------------------------------------------------------------
+def _listing(qs):
+    return qs.select_related("order", "buyer", "seller", "original_invoice").annotate(list_date=LIST_DATE)
+
+
+def my_invoices(user):
+    qs = Invoice.objects.all()
+    if not user.is_staff:
+        qs = qs.filter(buyer=user)
+    return _listing(qs)
+
+
+def commission_invoices(user):
+    qs = Invoice.objects.filter(invoice_type=Invoice.Type.COMMISSION)
+    if not user.is_staff:
+        qs = qs.filter(seller=user)
+    return _listing(qs)
+
+
+def apply_filters(qs, filters: InvoiceFilters):
+    """
+    Filtrele comune din listări; perioada e pe list_date (range pe index).
+    """
+    if filters.q:
+        qs = qs.filter(invoice_number__icontains=filters.q)
+    if filters.invoice_type:
+        qs = qs.filter(invoice_type=filters.invoice_type)
+    if filters.document_type:
+        qs = qs.filter(document_type=filters.document_type)
+    if filters.status:
+        qs = qs.filter(status=filters.status)
+    if filters.date_from:
+        qs = qs.filter(list_date__gte=_bounds(filters.date_from))
+    if filters.date_to:
+        # inclusiv: < ziua următoare 00:00
+        qs = qs.filter(list_date__lt=_bounds(filters.date_to + datetime.timedelta(days=1)))
+    return qs.order_by(*LIST_ORDER)
+
+
+# -----------------------------------------------------------------------------
+# Totaluri pe perioade (cache)
+# -----------------------------------------------------------------------------
+def _scope_for(user, kind: str) -> tuple[str, Q]:
+    if kind == SCOPE_COMMISSION:
+        base = Q(invoice_type=Invoice.Type.COMMISSION)
+        if user.is_staff:
+            return f"{SCOPE_COMMISSION}:{SCOPE_ALL}", base
+        return f"{SCOPE_COMMISSION}:{user.pk}", base & Q(seller_id=user.pk)
+    if user.is_staff:
+        return SCOPE_ALL, Q()
+    return f"{SCOPE_BUYER}:{user.pk}", Q(buyer_id=user.pk)
+
+
+def _totals_key(scope: str, year: int) -> str:
+    return f"invoices:totals:{scope}:{year}"
+
+
+def _compute_totals(where: Q, year: int) -> dict:
+    start = _bounds(datetime.date(year, 1, 1))
+    end = _bounds(datetime.date(year + 1, 1, 1))
+    rows = (
+        Invoice.objects.annotate(list_date=LIST_DATE)
+        .filter(where, status=Invoice.Status.ISSUED, list_date__gte=start, list_date__lt=end)
+        .annotate(month=ExtractMonth("list_date"))
+        .values("month", "currency")
+        .annotate(n=Count("pk"), net=Sum("net_amount"), vat=Sum("vat_amount"), total=Sum("total_amount"))
+        .order_by("month", "currency")
+    )
+    months = []
+    year_total = {}
+    for row in rows:
+        months.append(
+            {
+                "month": row["month"],
+                "currency": row["currency"],
+                "count": row["n"],
+                "net": row["net"] or ZERO,
+                "vat": row["vat"] or ZERO,
+                "total": row["total"] or ZERO,
+            }
+        )
+        acc = year_total.setdefault(row["currency"], {"count": 0, "net": ZERO, "vat": ZERO, "total": ZERO})
+        acc["count"] += row["n"]
+        acc["net"] += row["net"] or ZERO
+        acc["vat"] += row["vat"] or ZERO
+        acc["total"] += row["total"] or ZERO
+    return {
+        "year": year,
+        "months": months,
+        "year_total": [{"currency": c, **v} for c, v in sorted(year_total.items())],
+    }
+
+
+def period_totals(user, kind: str, year: int) -> dict:
+    scope, where = _scope_for(user, kind)
+    key = _totals_key(scope, year)
+    data = cache.get(key)
+    if data is None:
+        data = _compute_totals(where, year)
+        cache.set(key, data, TOTALS_TTL)
+    return data
+
+
+def invalidate_totals(invoices) -> None:
+    """
+    Șterge totalurile (an + părți) afectate de facturile date.
+    """
+    keys = set()
+    for inv in invoices:
+        list_date = inv.issued_at or inv.created_at
+        if not list_date:
+            continue
+        year = timezone.localtime(list_date).year
+        keys.add(_totals_key(SCOPE_ALL, year))
+        keys.add(_totals_key(f"{SCOPE_BUYER}:{inv.buyer_id}", year))
+        if inv.invoice_type == Invoice.Type.COMMISSION:
+            keys.add(_totals_key(f"{SCOPE_COMMISSION}:{SCOPE_ALL}", year))
+            if inv.seller_id:
+                keys.add(_totals_key(f"{SCOPE_COMMISSION}:{inv.seller_id}", year))
+    if keys:
+        cache.delete_many(list(keys))
+
+
+def invalidate_totals_on_commit(invoices) -> None:
+    invoices = list(invoices)
+    transaction.on_commit(lambda: invalidate_totals(invoices))
@@ -1,3 +1,294 @@
-from django.test import TestCase
+import datetime
+import io
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Address
+from orders.models import Order
+
+from . import bulk, numbering, queries
+from . import pdf as invoice_pdf
+from .models import Invoice, InvoiceSequence
+
+User = get_user_model()
+
+
+class FakeHTML:
+    """Înlocuiește WeasyPrint în teste; numără randările."""
+
+    calls = 0
+
+    def __init__(self, string, base_url=None):
+        self.string = string
+
+    def write_pdf(self):
+        FakeHTML.calls += 1
+        return b"%PDF-1.7 " + self.string[:40].encode("utf-8")
+
+
+@override_settings(SNOBISTIC_BACKGROUND_SYNC=True, SNOBISTIC_IMAGE_WORKERS=0)
+class InvoicePdfCacheTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        FakeHTML.calls = 0
+        patcher = mock.patch.object(invoice_pdf, "HTML", FakeHTML)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="x", first_name="B", last_name="C", is_active=True
+        )
+        address = Address.objects.create(
+            user=self.buyer, street_address="Str. 1", city="Iași", region="Iași", postal_code="700000", country="RO"
+        )
+        order = Order.objects.create(buyer=self.buyer, address=address, shipping_method="curier")
+        self.invoice = Invoice.objects.create(order=order, invoice_type=Invoice.Type.PRODUCT, buyer=self.buyer)
+        self.invoice.lines.create(description="Rochie", unit_net_amount=Decimal("100.00"))
+
+    def _issue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.invoice.issue()
+        self.invoice.refresh_from_db()
+
+    def test_issue_renders_once_and_download_serves_stored_file(self):
+        self._issue()
+        self.assertEqual(FakeHTML.calls, 1)
+        self.assertTrue(self.invoice.pdf_file.name.startswith("invoices/pdf/"))
+        self.assertIn(self.invoice.pdf_sha256, self.invoice.pdf_file.name)
+        self.assertEqual(self.invoice.pdf_version, invoice_pdf.PDF_TEMPLATE_VERSION)
+
+        self.client.force_login(self.buyer)
+        url = reverse("invoices:invoice_download", args=[self.invoice.pk])
+        for _ in range(2):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "application/pdf")
+            self.assertIn(self.invoice.invoice_number, response["Content-Disposition"])
+            self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+        self.assertEqual(FakeHTML.calls, 1)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_cancel_and_credit_note_get_their_own_documents(self):
+        self._issue()
+        issued_name = self.invoice.pdf_file.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cn = self.invoice.create_credit_note(reason="retur")
+        cn.refresh_from_db()
+        self.assertTrue(cn.pdf_file)
+        self.assertNotEqual(cn.pdf_file.name, issued_name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.invoice.cancel()
+        self.invoice.refresh_from_db()
+        self.assertNotEqual(self.invoice.pdf_file.name, issued_name)
+        self.assertEqual(FakeHTML.calls, 3)
+
+    def test_rerender_only_after_version_bump(self):
+        self._issue()
+        call_command("rerender_invoice_pdfs", stdout=io.StringIO())
+        self.assertEqual(FakeHTML.calls, 1)
+
+        with mock.patch.object(invoice_pdf, "PDF_TEMPLATE_VERSION", 2):
+            call_command("rerender_invoice_pdfs", stdout=io.StringIO())
+            self.assertEqual(FakeHTML.calls, 2)
+            call_command("rerender_invoice_pdfs", stdout=io.StringIO())
+            self.assertEqual(FakeHTML.calls, 2)
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.pdf_version, 2)
+
+
+class InvoiceNumberingTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="x", first_name="B", last_name="C", is_active=True
+        )
+        address = Address.objects.create(
+            user=self.buyer, street_address="Str. 1", city="Iași", region="Iași", postal_code="700000", country="RO"
+        )
+        self.order = Order.objects.create(buyer=self.buyer, address=address, shipping_method="curier")
+
+    def _draft(self, invoice_type=Invoice.Type.PRODUCT):
+        invoice = Invoice.objects.create(order=self.order, invoice_type=invoice_type, buyer=self.buyer)
+        invoice.lines.create(description="Linie", unit_net_amount=Decimal("10.00"))
+        return invoice
+
+    def test_series_are_consecutive_per_type(self):
+        a, b = self._draft(), self._draft()
+        c = self._draft(Invoice.Type.COMMISSION)
+        for invoice in (a, b, c):
+            invoice.issue()
+        year = a.number_year
+        self.assertEqual(a.invoice_number, f"SNBP-{year}-000001")
+        self.assertEqual(b.invoice_number, f"SNBP-{year}-000002")
+        self.assertEqual(c.invoice_number, f"SNBC-{year}-000001")
+        self.assertEqual(b.total_amount, Decimal("11.90"))
+
+        cn = a.create_credit_note()
+        self.assertEqual(cn.invoice_number, f"SNBSP-{year}-000001")
+        self.assertTrue(all(r.ok for r in numbering.verify_series()))
+
+    def test_rolled_back_issue_does_not_consume_a_number(self):
+        a = self._draft()
+        try:
+            with transaction.atomic():
+                a.issue()
+                raise RuntimeError("rollback")
+        except RuntimeError:
+            pass
+        b = self._draft()
+        b.issue()
+        self.assertEqual(b.number_seq, 1)
+        self.assertEqual(InvoiceSequence.objects.get(series="SNBP").last_number, 1)
+
+    def test_block_allocation_and_gap_detection(self):
+        with transaction.atomic():
+            block = numbering.allocate("SNBP", 2030, count=3)
+        self.assertEqual(list(block), [1, 2, 3])
+
+        invoices = [self._draft() for _ in range(3)]
+        for invoice in invoices:
+            invoice.issue()
+        Invoice.objects.filter(pk=invoices[1].pk).delete()
+
+        [report] = numbering.verify_series("SNBP", invoices[0].number_year)
+        self.assertFalse(report.ok)
+        self.assertEqual(report.missing, [2])
+        self.assertEqual(report.counter, 3)
+
+
+class BulkIssueTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="x", first_name="B", last_name="C", is_active=True
+        )
+        address = Address.objects.create(
+            user=self.buyer, street_address="Str. 1", city="Iași", region="Iași", postal_code="700000", country="RO"
+        )
+        self.orders = [
+            Order.objects.create(buyer=self.buyer, address=address, shipping_method="curier") for _ in range(5)
+        ]
+        Order.objects.filter(pk__in=[o.pk for o in self.orders[:4]]).update(
+            escrow_status=Order.ESCROW_RELEASED, seller_commission_amount=Decimal("9.00")
+        )
+
+    def test_create_and_issue_commission_batch(self):
+        created = bulk.create_drafts(Invoice.Type.COMMISSION, batch_size=3)
+        self.assertEqual(created, 4)
+        # deja create -> nu se dublează
+        self.assertEqual(bulk.create_drafts(Invoice.Type.COMMISSION), 0)
+
+        # număr constant de query-uri per batch, indiferent de mărimea lui: facturi,
+        # GROUP BY linii, contor (update + insert la prima folosire), bulk_update, savepoint-uri
+        ids = list(Invoice.objects.values_list("pk", flat=True))
+        with self.assertNumQueries(9):
+            bulk._issue_batch(ids, timezone.now())
+
+        invoices = list(Invoice.objects.order_by("pk"))
+        self.assertTrue(all(i.status == Invoice.Status.ISSUED for i in invoices))
+        self.assertEqual([i.number_seq for i in invoices], [1, 2, 3, 4])
+        self.assertEqual(invoices[0].total_amount, Decimal("10.71"))
+        self.assertEqual(invoices[0].bill_to_email, "buyer@example.com")
+        self.assertTrue(all(r.ok for r in numbering.verify_series()))
+
+    def test_command_resumes_and_skips_drafts_without_lines(self):
+        Invoice.objects.create(order=self.orders[4], invoice_type=Invoice.Type.COMMISSION, buyer=self.buyer)
+        out = io.StringIO()
+        call_command("issue_invoices", "--type", "commission", "--create", "--batch-size", "2", stdout=out)
+        self.assertIn("Facturi emise: 4, sărite (fără linii): 1", out.getvalue())
+
+        out = io.StringIO()
+        call_command("issue_invoices", "--type", "commission", stdout=out)
+        self.assertIn("Facturi emise: 0", out.getvalue())
+
+
+class InvoiceListQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="x", first_name="B", last_name="C", is_active=True
+        )
+        address = Address.objects.create(
+            user=self.buyer, street_address="Str. 1", city="Iași", region="Iași", postal_code="700000", country="RO"
+        )
+        self.order = Order.objects.create(buyer=self.buyer, address=address, shipping_method="curier")
+
+    def _issued(self):
+        invoice = Invoice.objects.create(order=self.order, invoice_type=Invoice.Type.PRODUCT, buyer=self.buyer)
+        invoice.lines.create(description="Linie", unit_net_amount=Decimal("100.00"))
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.issue()
+        return invoice
+
+    def test_period_filter_uses_issue_or_creation_date(self):
+        issued = self._issued()
+        draft = Invoice.objects.create(order=self.order, invoice_type=Invoice.Type.SHIPPING, buyer=self.buyer)
+        today = timezone.localdate()
+
+        filters = queries.InvoiceFilters(date_from=today, date_to=today)
+        listed = list(queries.apply_filters(queries.my_invoices(self.buyer), filters))
+        self.assertEqual([i.pk for i in listed], [draft.pk, issued.pk])
+
+        filters = queries.InvoiceFilters(date_to=today - datetime.timedelta(days=1))
+        self.assertFalse(queries.apply_filters(queries.my_invoices(self.buyer), filters).exists())
+
+    def test_period_totals_are_cached_and_invalidated_on_issue(self):
+        self._issued()
+        year = timezone.localdate().year
+        totals = queries.period_totals(self.buyer, queries.SCOPE_BUYER, year)
+        self.assertEqual(totals["year_total"][0]["total"], Decimal("119.00"))
+
+        with self.assertNumQueries(0):
+            queries.period_totals(self.buyer, queries.SCOPE_BUYER, year)
+
+        self._issued()
+        totals = queries.period_totals(self.buyer, queries.SCOPE_BUYER, year)
+        self.assertEqual(totals["year_total"][0]["count"], 2)
+        self.assertEqual(totals["months"][0]["total"], Decimal("238.00"))
+
+    def test_totals_count_issued_invoices_without_issue_date(self):
+        # ca orders.views.invoice_view: creată direct ISSUED, issued_at gol
+        year = timezone.localdate().year
+        self.assertEqual(queries.period_totals(self.buyer, queries.SCOPE_BUYER, year)["months"], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice = Invoice.objects.create(
+                order=self.order, invoice_type=Invoice.Type.SHIPPING, buyer=self.buyer, status=Invoice.Status.ISSUED,
+                net_amount=Decimal("20.00"), vat_amount=Decimal("3.80"), total_amount=Decimal("23.80"),
+            )
+            queries.invalidate_totals_on_commit([invoice])
+        self.assertIsNone(invoice.issued_at)
+
+        today = timezone.localdate()
+        listed = queries.apply_filters(
+            queries.my_invoices(self.buyer), queries.InvoiceFilters(date_from=today, date_to=today)
+        )
+        self.assertEqual([i.pk for i in listed], [invoice.pk])
+
+        totals = queries.period_totals(self.buyer, queries.SCOPE_BUYER, year)
+        self.assertEqual(totals["months"][0]["month"], today.month)
+        self.assertEqual(totals["year_total"][0]["total"], Decimal("23.80"))
+
+    def test_list_view_shows_totals(self):
+        self._issued()
+        self.client.force_login(self.buyer)
+        response = self.client.get(reverse("invoices:my_invoices"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Total an")
+        self.assertEqual(len(response.context["invoices"]), 1)
@@ -1,26 +1,26 @@
 # invoices/views.py
 from __future__ import annotations
 
-import datetime
-from typing import Optional
-
-from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.template.loader import render_to_string
-from django.utils import timezone
 from django.views.decorators.http import require_POST
 
-from .models import Invoice
+from core.files import serve_file
 
-try:
-    from weasyprint import HTML
-except ImportError:
-    HTML = None
+from . import pdf as invoice_pdf
+from .models import Invoice
+from .queries import (
+    SCOPE_BUYER,
+    SCOPE_COMMISSION,
+    InvoiceFilters,
+    apply_filters,
+    commission_invoices,
+    my_invoices,
+    period_totals,
+)
 
 
 def _user_can_access_invoice(user, invoice: Invoice) -> bool:
@@ -40,58 +40,6 @@ def _user_can_manage_invoice(user, invoice: Invoice) -> bool:
     return bool(user.is_authenticated and user.is_staff)
 
 
-def _parse_date(value: str | None) -> Optional[datetime.date]:
-    if not value:
-        return None
-    value = value.strip()
-    try:
-        return datetime.date.fromisoformat(value)
-    except Exception:
-        return None
-
-
-def _apply_common_filters(request, qs):
-    """
-    Filtre standard pentru listări:
-      - q: search după invoice_number
-      - invoice_type
-      - document_type
-      - status
-      - date_from/date_to (pe issued_at sau created_at dacă issued_at e NULL)
-    """
-    q = (request.GET.get("q") or "").strip()
-    invoice_type = (request.GET.get("type") or "").strip()
-    document_type = (request.GET.get("doc") or "").strip()
-    status = (request.GET.get("status") or "").strip()
-    date_from = _parse_date(request.GET.get("from"))
-    date_to = _parse_date(request.GET.get("to"))
-
-    if q:
-        qs = qs.filter(invoice_number__icontains=q)
-
-    if invoice_type:
-        qs = qs.filter(invoice_type=invoice_type)
-
-    if document_type:
-        qs = qs.filter(document_type=document_type)
-
-    if status:
-        qs = qs.filter(status=status)
-
-    # range: prefer issued_at; fallback created_at (pentru DRAFT)
-    # - from: >= date_from 00:00
-    # - to: <= date_to 23:59:59
-    if date_from:
-        dt_from = datetime.datetime.combine(date_from, datetime.time.min).replace(tzinfo=timezone.get_current_timezone())
-        qs = qs.filter(Q(issued_at__gte=dt_from) | Q(issued_at__isnull=True, created_at__gte=dt_from))
-
-    if date_to:
-        dt_to = datetime.datetime.combine(date_to, datetime.time.max).replace(tzinfo=timezone.get_current_timezone())
-        qs = qs.filter(Q(issued_at__lte=dt_to) | Q(issued_at__isnull=True, created_at__lte=dt_to))
-
-    return qs
-
-
 def _paginate(request, qs, per_page: int = 20):
     paginator = Paginator(qs, per_page)
     page_number = request.GET.get("page") or 1
@@ -106,12 +54,8 @@ def invoice_list_my_view(request):
     - staff: vede toate (util pt debug/admin)
     - user normal: doar invoice.buyer = user
     """
-    qs = Invoice.objects.select_related("order", "buyer", "seller", "original_invoice")
-
-    if not request.user.is_staff:
-        qs = qs.filter(buyer=request.user)
-
-    qs = _apply_common_filters(request, qs).order_by("-issued_at", "-created_at", "-id")
+    filters = InvoiceFilters.from_request(request)
+    qs = apply_filters(my_invoices(request.user), filters)
 
     page_obj = _paginate(request, qs, per_page=20)
 
@@ -122,6 +66,7 @@ def invoice_list_my_view(request):
             "page_obj": page_obj,
             "invoices": page_obj.object_list,
             "account_section": "invoices",
+            "period_totals": period_totals(request.user, SCOPE_BUYER, filters.year),
             # pentru select-uri
             "TYPE_CHOICES": Invoice.Type.choices,
             "DOC_CHOICES": Invoice.Document.choices,
@@ -146,15 +91,9 @@ def invoice_list_commission_view(request):
     - staff: vede toate (comision)
     - seller: doar invoice_type=commission și seller = user
     """
-    qs = Invoice.objects.select_related("order", "buyer", "seller", "original_invoice").filter(
-        invoice_type=Invoice.Type.COMMISSION
-    )
-
-    if not request.user.is_staff:
-        qs = qs.filter(seller=request.user)
-
     # în această listă tipul e fix "commission", dar lăsăm restul filtrelor
-    qs = _apply_common_filters(request, qs).order_by("-issued_at", "-created_at", "-id")
+    filters = InvoiceFilters.from_request(request)
+    qs = apply_filters(commission_invoices(request.user), filters)
 
     page_obj = _paginate(request, qs, per_page=20)
 
@@ -165,6 +104,7 @@ def invoice_list_commission_view(request):
             "page_obj": page_obj,
             "invoices": page_obj.object_list,
             "account_section": "seller_invoices_commission",
+            "period_totals": period_totals(request.user, SCOPE_COMMISSION, filters.year),
             "TYPE_CHOICES": Invoice.Type.choices,
             "DOC_CHOICES": Invoice.Document.choices,
             "STATUS_CHOICES": Invoice.Status.choices,
@@ -214,30 +154,27 @@ def invoice_pdf_view(request, pk):
         messages.error(request, "Nu ai acces la această factură.")
         return redirect("dashboard:orders_list")
 
-    if HTML is None:
+    # emise/anulate: fișierul stocat (randat o singură dată, vezi invoices/pdf.py)
+    if invoice.status in invoice_pdf.CACHEABLE_STATUSES:
+        if not invoice_pdf.is_current(invoice) and invoice_pdf.HTML is not None:
+            # încă nerandat (job-ul din fundal n-a rulat sau a eșuat) -> inline, o dată
+            invoice_pdf.generate_invoice_pdf(invoice)
+        if invoice.pdf_file:
+            return serve_file(
+                request, invoice.pdf_file, filename=invoice_pdf.pdf_filename(invoice), content_type="application/pdf"
+            )
+
+    if invoice_pdf.HTML is None:
         return HttpResponse(
             "Generarea de PDF nu este configurată (weasyprint lipsește).",
             content_type="text/plain",
             status=501,
         )
 
-    html_string = render_to_string(
-        "invoices/invoice_pdf.html",
-        {
-            "invoice": invoice,
-            "order": invoice.order,
-            "lines": invoice.lines.all(),
-            "platform_name": "Snobistic",
-            "company_vat": getattr(settings, "SNOBISTIC_COMPANY_VAT", "RO00000000"),
-        },
-        request=request,
-    )
-
-    response = HttpResponse(content_type="application/pdf")
-    filename = f"Document-{invoice.invoice_number or invoice.pk}.pdf"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    HTML(string=html_string, base_url=request.build_absolute_uri("/")).write_pdf(response)
+    # DRAFT: previzualizare, nu se stochează
+    pdf = invoice_pdf.html_to_pdf(invoice_pdf.render_invoice_html(invoice), request.build_absolute_uri("/"))
+    response = HttpResponse(pdf, content_type="application/pdf")
+    response["Content-Disposition"] = f'attachment; filename="{invoice_pdf.pdf_filename(invoice)}"'
     return response
 
 
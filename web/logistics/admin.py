@@ -31,3 +31,4 @@ class ShipmentAdmin(admin.ModelAdmin):
     )
     list_filter = ("courier", "status")
     search_fields = ("tracking_number", "order__id", "seller__email")
+    readonly_fields = ("courier_status", "tracking_checked_at")
@@ -0,0 +1,97 @@
+# logistics/management/commands/bench_shipping_rates.py
+
+from __future__ import annotations
+
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from catalog.models import Product
+from logistics.models import Courier, ShippingRate
+from logistics.rates import courier_slug, get_rate_table, invalidate_rate_table
+
+
+def _legacy_rate_for_display():
+    # căutarea de dinainte de logistics.rates (Product.get_shipping_rate_for_display)
+    try:
+        curiera = Courier.objects.get(slug=courier_slug())
+        qs = ShippingRate.objects.filter(courier=curiera, is_active=True)
+    except Courier.DoesNotExist:
+        qs = ShippingRate.objects.filter(is_active=True)
+    return qs.order_by("base_price").first()
+
+
+def _legacy_quote(weight_kg: Decimal):
+    try:
+        curiera = Courier.objects.get(slug=courier_slug())
+        rates_qs = ShippingRate.objects.filter(courier=curiera, is_active=True)
+    except Courier.DoesNotExist:
+        rates_qs = ShippingRate.objects.filter(is_active=True)
+    if not rates_qs.exists():
+        return None
+    return (
+        rates_qs.filter(min_weight_kg__lte=weight_kg, max_weight_kg__gte=weight_kg).order_by("base_price").first()
+        or rates_qs.order_by("base_price").first()
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Măsoară estimarea transportului de pe pagina de produs și din coș: "
+        "căutarea veche (query-uri) vs tabela de tarife din memorie."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+        parser.add_argument("--product", type=int, help="pk-ul produsului (default: primul produs activ).")
+
+    def _run(self, label, fn, iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for i in range(iterations):
+                fn(i)
+            elapsed = time.perf_counter() - start
+        per_call_us = elapsed / iterations * 1_000_000
+        self.stdout.write(
+            f"{label:<34} {per_call_us:10.1f} µs/apel   {len(ctx.captured_queries) / iterations:5.2f} query-uri/apel"
+        )
+
+    def handle(self, *args, **options):
+        iterations = max(1, options["iterations"])
+        qs = Product.objects.all()
+        product = qs.filter(pk=options["product"]).first() if options["product"] else qs.filter(is_active=True).first()
+        product = product or Product()
+
+        table = get_rate_table()
+        self.stdout.write(f"{len(table.rates)} tarife, {len(table.bounds)} capete de bandă, {iterations} iterații")
+
+        weights = [Decimal(g) / Decimal("100") for g in range(50, 3050, 7)]
+
+        def detail_legacy(i):
+            # template-ul cere separat prețul și zilele -> două căutări
+            _legacy_rate_for_display()
+            _legacy_rate_for_display()
+
+        def detail_table(i):
+            product.get_shipping_price_estimate()
+            product.get_shipping_days_estimate()
+
+        def detail_cold(i):
+            invalidate_rate_table()
+            detail_table(i)
+
+        def cart_legacy(i):
+            _legacy_quote(weights[i % len(weights)])
+
+        def cart_table(i):
+            get_rate_table().quote_for_weight(weights[i % len(weights)])
+
+        self._run("produs: căutare veche", detail_legacy, iterations)
+        self._run("produs: tabelă (cald)", detail_table, iterations)
+        self._run("produs: tabelă (reîncărcată)", detail_cold, max(1, iterations // 10))
+        self._run("coș: căutare veche", cart_legacy, iterations)
+        self._run("coș: tabelă (bisect + memo)", cart_table, iterations)
+        self.stdout.write(self.style.SUCCESS("Benchmark terminat."))
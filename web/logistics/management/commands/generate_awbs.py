@@ -0,0 +1,55 @@
+# logistics/management/commands/generate_awbs.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from logistics.services.bulk_awb import generate_awbs
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = "Generează AWB-uri Curiera în masă pentru comenzile plătite (escrow blocat) fără expediție ale unui vânzător."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seller", type=int, required=True, help="ID-ul vânzătorului.")
+        parser.add_argument("--order", type=int, action="append", dest="order_ids",
+                            help="Doar comenzile date (repetabil).")
+        parser.add_argument("--service", default="Standard", help="Serviciul Curiera (default Standard).")
+        parser.add_argument("--workers", type=int, help="Cereri concurente (default SNOBISTIC_AWB_WORKERS).")
+
+    def handle(self, *args, **options):
+        seller_id = options["seller"]
+        order_ids = options["order_ids"]
+        if not order_ids:
+            order_ids = list(
+                Order.objects.filter(
+                    items__product__owner_id=seller_id,
+                    payment_status=Order.PAYMENT_PAID,
+                    escrow_status=Order.ESCROW_HELD,
+                    shipment__isnull=True,
+                )
+                .values_list("pk", flat=True)
+                .distinct()
+                .order_by("pk")
+            )
+        if not order_ids:
+            raise CommandError("Nicio comandă eligibilă pentru AWB.")
+
+        def progress(done, total):
+            if done % 10 == 0 or done == total:
+                self.stdout.write(f"  ... {done}/{total} cereri Curiera")
+
+        result = generate_awbs(
+            [(order_id, seller_id) for order_id in order_ids],
+            service_name=options["service"],
+            workers=options["workers"],
+            progress=progress,
+        )
+        for order_id, error in sorted(result.failed.items()):
+            self.stderr.write(f"#{order_id}: {error}")
+        for order_id, reason in sorted(result.skipped.items()):
+            self.stdout.write(f"#{order_id}: sărit — {reason}")
+        self.stdout.write(self.style.SUCCESS(
+            f"AWB-uri: {len(result.created)} generate, {len(result.failed)} eșuate, {len(result.skipped)} sărite."
+        ))
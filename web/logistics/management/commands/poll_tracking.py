@@ -0,0 +1,36 @@
+# logistics/management/commands/poll_tracking.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from logistics.services.tracking import poll_tracking
+
+
+class Command(BaseCommand):
+    help = (
+        "Interoghează Curiera pentru expedițiile deschise scadente, aplică tranzițiile de status "
+        "și, dacă SNOBISTIC_ESCROW_RELEASE_DAYS e setat, eliberează escrow-ul comenzilor livrate "
+        "eligibile. De rulat periodic (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="AWB-uri per cerere Curiera.")
+        parser.add_argument("--workers", type=int, help="Cereri concurente (default SNOBISTIC_AWB_WORKERS).")
+        parser.add_argument("--limit", type=int, help="Număr maxim de expediții verificate în această rulare.")
+        parser.add_argument("--no-escrow", action="store_true", help="Nu elibera escrow-ul comenzilor livrate.")
+
+    def handle(self, *args, **options):
+        result = poll_tracking(
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            limit=options["limit"],
+            release_escrow=not options["no_escrow"],
+        )
+        moved = ", ".join(f"{status}: {n}" for status, n in sorted(result.transitions.items())) or "—"
+        self.stdout.write(f"Tranziții: {moved}")
+        if result.errors:
+            self.stderr.write(f"{result.errors} expediții nu au putut fi verificate (reîncercare programată).")
+        self.stdout.write(self.style.SUCCESS(
+            f"Tracking: {result.polled} expediții verificate, escrow eliberat pentru {result.released} comenzi."
+        ))
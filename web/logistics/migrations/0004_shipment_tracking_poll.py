@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:32
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0003_shippingrate_delivery_days_max_and_more'),
+        ('orders', '0005_order_cancelled_at_order_completed_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='courier_status',
+            field=models.CharField(blank=True, help_text='Ultimul status brut primit de la curier.', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='next_tracking_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Când trebuie reinterogat curierul (interval după vechimea expediției).'),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='tracking_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(condition=models.Q(('status__in', ['label_generated', 'handed', 'in_transit'])), fields=['next_tracking_at', 'id'], name='shipment_tracking_due_idx'),
+        ),
+    ]
@@ -3,6 +3,7 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class Courier(models.Model):
@@ -217,10 +218,32 @@ class Shipment(models.Model):
         help_text="Ultima actualizare de status.",
     )
 
+    # Tracking automat (logistics.services.tracking)
+    courier_status = models.CharField(
+        max_length=50,
+        blank=True,
+        help_text="Ultimul status brut primit de la curier.",
+    )
+    tracking_checked_at = models.DateTimeField(null=True, blank=True)
+    next_tracking_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Când trebuie reinterogat curierul (interval după vechimea expediției).",
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    OPEN_STATUSES = (Status.LABEL_GENERATED, Status.HANDED_TO_COURIER, Status.IN_TRANSIT)
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # coada poller-ului: doar expedițiile încă deschise
+            models.Index(
+                fields=["next_tracking_at", "id"],
+                name="shipment_tracking_due_idx",
+                condition=models.Q(status__in=["label_generated", "handed", "in_transit"]),
+            ),
+        ]
 
     def __str__(self):
         return f"AWB {self.tracking_number} – Comanda #{self.order_id}"
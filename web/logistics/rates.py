@@ -0,0 +1,214 @@
+# logistics/rates.py
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+# =============================================================================
+# Tabela de tarife de transport, în memorie (per proces)
+# =============================================================================
+# - se încarcă o dată (2 query-uri: curierul + tarifele active) și se reține
+#   în proces; coș / pagina de produs nu mai ating DB-ul pentru tarife
+# - benzile de greutate [min, max] (inclusiv, se pot suprapune) sunt sparte în
+#   segmente elementare după capetele sortate; pe fiecare segment se precalculează
+#   tariful cel mai ieftin care îl acoperă -> lookup = un bisect, O(log n)
+# - fără bandă potrivită: tariful cel mai ieftin (ca înainte)
+# - invalidare: post_save / post_delete pe Courier / ShippingRate (logistics.signals)
+#   după commit: golește tabela locală + crește generația din cache-ul Django;
+#   celelalte procese compară generația cel mult o dată la CHECK_SECONDS
+# - quote_for_weight() memorează rezultatul per greutate (în tabelă); coșul
+#   reține în plus rezultatul pe instanță (logistics.services.shipping)
+#
+# Settings:
+#   SNOBISTIC_SHIPPING_COURIER_SLUG          curierul folosit (default "curiera")
+#   SNOBISTIC_SHIPPING_RATES_CHECK_SECONDS   cât de des se verifică generația (default 30)
+
+DEFAULT_COURIER_SLUG = "curiera"
+GENERATION_KEY = "logistics:shipping_rates:gen"
+MEMO_MAX = 512
+
+ZERO = Decimal("0.00")
+
+
+@dataclass(frozen=True)
+class Rate:
+    pk: int
+    name: str
+    min_weight_kg: Decimal
+    max_weight_kg: Decimal
+    base_price: Decimal
+    delivery_days_min: int
+    delivery_days_max: int
+    currency: str = "RON"
+
+
+@dataclass(frozen=True)
+class ShippingQuote:
+    cost: Decimal
+    days_min: int
+    days_max: int
+    rate: Optional[Rate] = None
+
+    def as_tuple(self) -> Tuple[Decimal, int, int]:
+        return self.cost, self.days_min, self.days_max
+
+
+NO_QUOTE = ShippingQuote(ZERO, 0, 0)
+
+
+def _cheapest(rates) -> Optional[Rate]:
+    return min(rates, key=lambda r: (r.base_price, r.pk), default=None)
+
+
+@dataclass
+class RateTable:
+    generation: int
+    rates: List[Rate] = field(default_factory=list)
+    # capete sortate + tariful pe fiecare capăt / pe intervalul deschis de după el
+    bounds: List[Decimal] = field(default_factory=list)
+    at_bound: List[Optional[Rate]] = field(default_factory=list)
+    after_bound: List[Optional[Rate]] = field(default_factory=list)
+    cheapest: Optional[Rate] = None
+    _memo: Dict[Decimal, ShippingQuote] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, rates: List[Rate], generation: int = 0) -> "RateTable":
+        bounds = sorted({r.min_weight_kg for r in rates} | {r.max_weight_kg for r in rates})
+        at_bound, after_bound = [], []
+        for i, b in enumerate(bounds):
+            at_bound.append(_cheapest(r for r in rates if r.min_weight_kg <= b <= r.max_weight_kg))
+            if i + 1 < len(bounds):
+                nxt = bounds[i + 1]
+                after_bound.append(_cheapest(r for r in rates if r.min_weight_kg <= b and nxt <= r.max_weight_kg))
+            else:
+                after_bound.append(None)
+        return cls(
+            generation=generation,
+            rates=rates,
+            bounds=bounds,
+            at_bound=at_bound,
+            after_bound=after_bound,
+            cheapest=_cheapest(rates),
+        )
+
+    def rate_for_weight(self, weight_kg: Decimal) -> Optional[Rate]:
+        """
+        Cel mai ieftin tarif a cărui bandă conține greutatea; altfel cel mai ieftin tarif.
+        """
+        i = bisect_left(self.bounds, weight_kg)
+        rate = None
+        if i < len(self.bounds) and self.bounds[i] == weight_kg:
+            rate = self.at_bound[i]
+        elif 0 < i < len(self.bounds):
+            rate = self.after_bound[i - 1]
+        return rate or self.cheapest
+
+    def quote_for_weight(self, weight_kg: Decimal) -> ShippingQuote:
+        quote = self._memo.get(weight_kg)
+        if quote is None:
+            rate = self.rate_for_weight(weight_kg)
+            if rate is None:
+                quote = NO_QUOTE
+            else:
+                quote = ShippingQuote(rate.base_price, rate.delivery_days_min, rate.delivery_days_max, rate)
+            if len(self._memo) >= MEMO_MAX:
+                self._memo.clear()
+            self._memo[weight_kg] = quote
+        return quote
+
+
+_lock = threading.Lock()
+_table: Optional[RateTable] = None
+_checked_at = 0.0
+
+
+def courier_slug() -> str:
+    return getattr(settings, "SNOBISTIC_SHIPPING_COURIER_SLUG", DEFAULT_COURIER_SLUG)
+
+
+def _check_seconds() -> float:
+    return float(getattr(settings, "SNOBISTIC_SHIPPING_RATES_CHECK_SECONDS", 30))
+
+
+def _shared_generation() -> int:
+    return int(cache.get(GENERATION_KEY) or 0)
+
+
+def _load_rates() -> List[Rate]:
+    from .models import Courier, ShippingRate
+
+    # aceeași selecție ca înainte: tarifele active ale curierului, dacă există,
+    # altfel toate tarifele active
+    qs = ShippingRate.objects.filter(is_active=True)
+    courier_id = Courier.objects.filter(slug=courier_slug()).values_list("pk", flat=True).first()
+    if courier_id is not None:
+        qs = qs.filter(courier_id=courier_id)
+    return [
+        Rate(
+            pk=row["pk"],
+            name=row["name"],
+            min_weight_kg=row["min_weight_kg"],
+            max_weight_kg=row["max_weight_kg"],
+            base_price=row["base_price"],
+            delivery_days_min=int(row["delivery_days_min"]),
+            delivery_days_max=int(row["delivery_days_max"]),
+            currency=row["currency"],
+        )
+        for row in qs.values(
+            "pk", "name", "min_weight_kg", "max_weight_kg", "base_price",
+            "delivery_days_min", "delivery_days_max", "currency",
+        )
+    ]
+
+
+def get_rate_table() -> RateTable:
+    """
+    Tabela curentă; reîncărcată doar dacă a fost invalidată (local sau în alt proces).
+    """
+    global _table, _checked_at
+    table = _table
+    now = time.monotonic()
+    if table is not None:
+        if now - _checked_at < _check_seconds():
+            return table
+        _checked_at = now
+        if _shared_generation() == table.generation:
+            return table
+    with _lock:
+        generation = _shared_generation()
+        if _table is None or _table.generation != generation:
+            _table = RateTable.build(_load_rates(), generation)
+        _checked_at = now
+        return _table
+
+
+def invalidate_rate_table() -> None:
+    """
+    Golește tabela din acest proces și marchează celelalte procese pentru reîncărcare.
+    """
+    global _table
+    with _lock:
+        _table = None
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+# -----------------------------------------------------------------------------
+# API pentru coș / produs
+# -----------------------------------------------------------------------------
+def quote_for_weight(weight_kg: Decimal) -> ShippingQuote:
+    return get_rate_table().quote_for_weight(weight_kg)
+
+
+def cheapest_rate() -> Optional[Rate]:
+    return get_rate_table().cheapest
+
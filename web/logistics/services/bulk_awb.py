@@ -0,0 +1,172 @@
+# logistics/services/bulk_awb.py
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Iterable, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import IntegerField, Sum, Value
+from django.db.models.functions import Coalesce
+
+from orders.models import Order, OrderItem
+
+from ..models import Courier, Shipment
+from .curiera import awb_workers, build_shipment_payload, post_shipment
+from .shipping import DEFAULT_ITEM_WEIGHT_G
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Generare AWB în masă
+# =============================================================================
+# - intrare: perechi (order_id, seller_id); se păstrează doar comenzile plătite,
+#   cu escrow HELD, fără Shipment, în care sellerul are articole (ca la
+#   generate_awb_view). MVP: 1 comandă = 1 shipment
+# - DB (în thread-ul apelantului): comenzi + selleri + greutăți (un GROUP BY),
+#   payload-urile se construiesc aici
+# - HTTP: ThreadPoolExecutor mărginit (SNOBISTIC_AWB_WORKERS) peste sesiunea
+#   comună din services.curiera (pool de conexiuni + retry); worker-ii nu ating DB-ul
+# - scriere: un singur bulk_create pentru AWB-urile reușite, într-o tranzacție
+
+Progress = Callable[[int, int], None]
+
+
+@dataclass
+class BulkAwbResult:
+    created: list = field(default_factory=list)
+    failed: dict = field(default_factory=dict)  # order_id -> mesaj
+    skipped: dict = field(default_factory=dict)  # order_id -> motiv
+
+
+def _weights_kg(order_ids, seller_ids) -> dict[tuple[int, int], Decimal]:
+    rows = (
+        OrderItem.objects.filter(order_id__in=order_ids, product__owner_id__in=seller_ids)
+        .values("order_id", "product__owner_id")
+        .annotate(
+            grams=Sum(Coalesce("product__weight_g", Value(DEFAULT_ITEM_WEIGHT_G), output_field=IntegerField()))
+        )
+    )
+    out = {}
+    for row in rows:
+        grams = max(row["grams"] or 0, DEFAULT_ITEM_WEIGHT_G)
+        out[(row["order_id"], row["product__owner_id"])] = (Decimal(grams) / Decimal("1000")).quantize(
+            Decimal("0.01")
+        )
+    return out
+
+
+def generate_awbs(
+    pairs: Iterable[tuple[int, int]],
+    *,
+    service_name: str = "Standard",
+    weight_kg: Optional[Decimal] = None,
+    workers: Optional[int] = None,
+    progress: Optional[Progress] = None,
+) -> BulkAwbResult:
+    """
+    Creează AWB-uri Curiera pentru perechile (order_id, seller_id) date.
+    weight_kg=None -> greutatea articolelor sellerului din comandă.
+    progress(terminate, total) e apelat pe măsură ce răspund cererile HTTP.
+    """
+    result = BulkAwbResult()
+    wanted: dict[int, int] = {}
+    for order_id, seller_id in pairs:
+        if order_id in wanted and wanted[order_id] != seller_id:
+            result.skipped[order_id] = "Comanda are deja o cerere de AWB în acest lot."
+            continue
+        wanted[order_id] = seller_id
+    if not wanted:
+        return result
+
+    sellers = get_user_model().objects.select_related("profile").in_bulk(set(wanted.values()))
+    weights = _weights_kg(list(wanted), list(sellers))
+    orders = (
+        Order.objects.filter(
+            pk__in=list(wanted),
+            payment_status=Order.PAYMENT_PAID,
+            escrow_status=Order.ESCROW_HELD,
+            shipment__isnull=True,
+        )
+        .select_related("buyer")
+        .in_bulk()
+    )
+
+    jobs = []
+    for order_id, seller_id in wanted.items():
+        order = orders.get(order_id)
+        seller = sellers.get(seller_id)
+        key = (order_id, seller_id)
+        if order is None:
+            result.skipped[order_id] = "Comanda nu e plătită cu escrow blocat sau are deja AWB."
+        elif seller is None or not getattr(getattr(seller, "profile", None), "role_seller", False):
+            result.skipped[order_id] = "Utilizatorul nu este seller."
+        elif key not in weights:
+            result.skipped[order_id] = "Sellerul nu are articole în această comandă."
+        else:
+            parcel_kg = weight_kg or weights[key]
+            payload = build_shipment_payload(
+                order, seller,
+                weight_kg=parcel_kg,
+                service_name=service_name,
+                cash_on_delivery=False,
+                cod_amount=Decimal("0.00"),
+            )
+            jobs.append((order, seller, parcel_kg, payload))
+    if not jobs:
+        return result
+
+    responses = []
+    max_workers = min(workers or awb_workers(), len(jobs))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="snobistic-awb") as pool:
+        for done, response in enumerate(pool.map(post_shipment, [job[3] for job in jobs]), start=1):
+            responses.append(response)
+            if progress:
+                progress(done, len(jobs))
+
+    courier, _ = Courier.objects.get_or_create(
+        slug="curiera",
+        defaults={
+            "name": "Curiera",
+            "tracking_url_template": "https://app.curiera.ro/track/{tracking_number}",
+        },
+    )
+    shipments = []
+    for (order, seller, parcel_kg, _payload), response in zip(jobs, responses):
+        if not response.success:
+            result.failed[order.pk] = response.error_message or "Eroare necunoscută."
+            continue
+        shipments.append(
+            Shipment(
+                order=order,
+                seller=seller,
+                courier=courier,
+                provider=Shipment.Provider.CURIERA,
+                tracking_number=response.tracking_number or "",
+                external_id=response.external_id or "",
+                tracking_url=response.tracking_url or "",
+                label_url=response.label_url or "",
+                weight_kg=parcel_kg,
+                service_name=service_name,
+                status=Shipment.Status.LABEL_GENERATED,
+                cash_on_delivery=False,
+                cod_amount=Decimal("0.00"),
+            )
+        )
+
+    with transaction.atomic():
+        # un AWB generat între timp din pagina comenzii câștigă
+        taken = set(
+            Shipment.objects.select_for_update()
+            .filter(order_id__in=[s.order_id for s in shipments])
+            .values_list("order_id", flat=True)
+        )
+        for s in shipments:
+            if s.order_id in taken:
+                logger.warning("AWB %s for order %s discarded: shipment already exists", s.tracking_number, s.order_id)
+                result.skipped[s.order_id] = "AWB generat între timp din pagina comenzii."
+        result.created = Shipment.objects.bulk_create([s for s in shipments if s.order_id not in taken])
+    return result
@@ -1,12 +1,37 @@
 # logistics/services/curiera.py
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from decimal import Decimal
 from typing import Optional
 
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# =============================================================================
+# Client API Curiera
+# =============================================================================
+# - o singură requests.Session per proces (keep-alive, pool de conexiuni
+#   dimensionat după SNOBISTIC_AWB_WORKERS), folosită și din thread-urile
+#   generării în masă (services.bulk_awb) și ale poller-ului (services.tracking)
+# - retry cu backoff pe erori de conexiune și 429/502/503/504 (inclusiv POST):
+#   fiecare cerere poartă Idempotency-Key = referința comenzii, deci o reluare
+#   nu creează un al doilea AWB
+#
+# Settings:
+#   CURIERA_API_BASE_URL, CURIERA_API_KEY
+#   CURIERA_API_TIMEOUT     secunde per cerere (default 15)
+#   CURIERA_API_RETRIES     reîncercări (default 3)
+#   SNOBISTIC_AWB_WORKERS   cereri concurente (AWB în masă, tracking) (default 8)
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class CurieraError(RuntimeError):
+    pass
 
 
 @dataclass
@@ -19,37 +44,81 @@ class CurieraShipmentResult:
     error_message: Optional[str] = None
 
 
-def create_shipment_for_order(order, seller, *, weight_kg: Decimal,
-                              service_name: str,
-                              cash_on_delivery: bool,
-                              cod_amount: Decimal) -> CurieraShipmentResult:
-    """
-    Creează o expediere în API-ul Curiera pentru comanda dată.
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def awb_workers() -> int:
+    return max(1, int(getattr(settings, "SNOBISTIC_AWB_WORKERS", 8)))
 
-    Aici VA TREBUI să mapezi structura reală de la Curiera (endpoint, payload, headers).
-    Eu pun doar un exemplu generic cu un endpoint imaginar /api/shipments.
-    """
-    base_url = getattr(settings, "CURIERA_API_BASE_URL", "")
-    api_key = getattr(settings, "CURIERA_API_KEY", "")
 
-    if not base_url or not api_key:
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=int(getattr(settings, "CURIERA_API_RETRIES", 3)),
+        backoff_factor=0.3,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=awb_workers(), max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def reset_session() -> None:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def _config_error() -> Optional[CurieraShipmentResult]:
+    if not getattr(settings, "CURIERA_API_BASE_URL", "") or not getattr(settings, "CURIERA_API_KEY", ""):
         return CurieraShipmentResult(
             success=False,
             error_message="Configurația Curiera lipsește (API base URL sau API KEY).",
         )
+    return None
 
+
+def _display_name(user) -> str:
+    # CustomUser are full_name (proprietate), nu get_full_name()
+    name = getattr(user, "full_name", "") or getattr(user, "get_full_name", lambda: "")()
+    return name or user.email
+
+
+def build_shipment_payload(order, seller, *, weight_kg: Decimal,
+                           service_name: str,
+                           cash_on_delivery: bool,
+                           cod_amount: Decimal) -> dict:
+    """
+    Payload-ul pentru /api/shipments. Citește order.buyer și seller.profile:
+    se construiește în thread-ul cererii (acces DB), nu în worker-ii HTTP.
+    """
     # presupunem că Order are câmpuri shipping_name, shipping_phone, shipping_city, etc.
-    payload = {
+    return {
         "reference": f"SNB-ORDER-{order.id}",
         "sender": {
-            "name": getattr(seller, "get_full_name", lambda: seller.email)(),
-            "phone": getattr(seller.profile, "phone", ""),
+            "name": _display_name(seller),
+            "phone": str(getattr(seller.profile, "phone", "") or ""),
             "city": getattr(seller.profile, "city", ""),
             "address": getattr(seller.profile, "address", ""),
         },
         "recipient": {
-            "name": getattr(order, "shipping_name", order.buyer.get_full_name())
-            or order.buyer.email,
+            "name": getattr(order, "shipping_name", "") or _display_name(order.buyer),
             "phone": getattr(order, "shipping_phone", ""),
             "city": getattr(order, "shipping_city", ""),
             "address": getattr(order, "shipping_address", ""),
@@ -67,15 +136,27 @@ def create_shipment_for_order(order, seller, *, weight_kg: Decimal,
         },
     }
 
+
+def post_shipment(payload: dict) -> CurieraShipmentResult:
+    """
+    Trimite un payload construit de build_shipment_payload. Fără acces la DB
+    (sigur de apelat din thread-uri).
+    """
+    error = _config_error()
+    if error is not None:
+        return error
+
+    base_url = settings.CURIERA_API_BASE_URL
     try:
-        response = requests.post(
+        response = get_session().post(
             f"{base_url.rstrip('/')}/api/shipments",
             json=payload,
             headers={
-                "Authorization": f"Bearer {api_key}",
+                "Authorization": f"Bearer {settings.CURIERA_API_KEY}",
                 "Content-Type": "application/json",
+                "Idempotency-Key": payload["reference"],
             },
-            timeout=15,
+            timeout=float(getattr(settings, "CURIERA_API_TIMEOUT", 15)),
         )
     except requests.RequestException as exc:
         return CurieraShipmentResult(
@@ -89,7 +170,10 @@ def create_shipment_for_order(order, seller, *, weight_kg: Decimal,
             error_message=f"Eroare Curiera ({response.status_code}): {response.text}",
         )
 
-    data = response.json()  # structurează după contractul real
+    try:
+        data = response.json()  # structurează după contractul real
+    except ValueError:
+        return CurieraShipmentResult(success=False, error_message="Răspuns Curiera invalid (nu e JSON).")
 
     # Exemplu generic – adaptezi key-urile după documentația lor reală
     return CurieraShipmentResult(
@@ -99,3 +183,59 @@ def create_shipment_for_order(order, seller, *, weight_kg: Decimal,
         tracking_url=data.get("tracking_url") or "",
         label_url=data.get("label_url") or "",
     )
+
+
+def create_shipment_for_order(order, seller, *, weight_kg: Decimal,
+                              service_name: str,
+                              cash_on_delivery: bool,
+                              cod_amount: Decimal) -> CurieraShipmentResult:
+    """
+    Creează o expediere în API-ul Curiera pentru comanda dată.
+
+    Aici VA TREBUI să mapezi structura reală de la Curiera (endpoint, payload, headers).
+    Eu pun doar un exemplu generic cu un endpoint imaginar /api/shipments.
+    """
+    error = _config_error()
+    if error is not None:
+        return error
+    payload = build_shipment_payload(
+        order, seller,
+        weight_kg=weight_kg,
+        service_name=service_name,
+        cash_on_delivery=cash_on_delivery,
+        cod_amount=cod_amount,
+    )
+    return post_shipment(payload)
+
+
+def fetch_tracking(awbs: list[str]) -> dict[str, str]:
+    """
+    {awb: status brut (lowercase)} pentru un lot de AWB-uri (un singur POST /api/tracking).
+    AWB-urile necunoscute lipsesc din rezultat. Ridică CurieraError la eșec.
+    Fără acces la DB (sigur de apelat din thread-uri).
+    """
+    error = _config_error()
+    if error is not None:
+        raise CurieraError(error.error_message)
+
+    try:
+        response = get_session().post(
+            f"{settings.CURIERA_API_BASE_URL.rstrip('/')}/api/tracking",
+            json={"awbs": list(awbs)},
+            headers={"Authorization": f"Bearer {settings.CURIERA_API_KEY}"},
+            timeout=float(getattr(settings, "CURIERA_API_TIMEOUT", 15)),
+        )
+    except requests.RequestException as exc:
+        raise CurieraError(f"Eroare de rețea către Curiera: {exc}") from exc
+    if response.status_code >= 400:
+        raise CurieraError(f"Eroare Curiera ({response.status_code}): {response.text}")
+    try:
+        rows = response.json().get("results") or []
+    except ValueError as exc:
+        raise CurieraError("Răspuns Curiera invalid (nu e JSON).") from exc
+
+    return {
+        str(row["awb"]): str(row.get("status") or "").lower()
+        for row in rows
+        if isinstance(row, dict) and row.get("awb")
+    }
@@ -0,0 +1,308 @@
+# logistics/services/tracking.py
+from __future__ import annotations
+
+import logging
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, CharField, F, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from orders.models import Order
+
+from ..models import Shipment
+from .curiera import CurieraError, awb_workers, fetch_tracking
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Poller tracking Curiera
+# =============================================================================
+# - coada: expedițiile deschise (AWB generat / predat / în tranzit) cu
+#   next_tracking_at <= acum, în ordinea indexului parțial shipment_tracking_due_idx
+# - loturi de AWB-uri interogate în paralel (ThreadPoolExecutor peste sesiunea
+#   comună din services.curiera); worker-ii nu ating DB-ul
+# - diff față de statusul stocat: doar tranziții înainte (AWB -> predat ->
+#   în tranzit -> livrat / returnat), aplicate set-wise: câte un UPDATE pe
+#   Shipment și pe Order per status țintă, cu aceleași reguli ca Order.mark_*
+# - reprogramare după vechimea expediției (SCHEDULE): cele noi se verifică des,
+#   cele vechi rar; un lot eșuat se reîncearcă după primul interval
+# - escrow (opt-in, doar cu SNOBISTIC_ESCROW_RELEASE_DAYS setat): comenzile livrate
+#   de cel puțin atâtea zile, candidate set-wise (Order.objects.escrow_releasable()),
+#   apoi release_escrow() per comandă pe rândul blocat, cu toate verificările
+#   (retur în așteptare, status livrare) reluate: un retur deschis între SELECT și
+#   lock oprește plata (pe SQLite select_for_update nu blochează, verificarea da)
+#
+# Settings:
+#   SNOBISTIC_TRACKING_SCHEDULE     ((vechime_max_zile, interval_minute), ...), ultimul cu None
+#   SNOBISTIC_ESCROW_RELEASE_DAYS   zile după livrare până la eliberarea automată a escrow-ului;
+#                                   default None = dezactivat (plățile către vânzători rămân manuale,
+#                                   din admin); ex. 3 pentru a porni eliberarea din poll_tracking
+
+DEFAULT_SCHEDULE = (
+    (1, 30),
+    (3, 60),
+    (7, 180),
+    (14, 360),
+    (None, 1440),
+)
+
+# status brut Curiera -> Shipment.Status
+STATUS_MAP = {
+    "picked_up": Shipment.Status.HANDED_TO_COURIER,
+    "handed": Shipment.Status.HANDED_TO_COURIER,
+    "in_transit": Shipment.Status.IN_TRANSIT,
+    "at_hub": Shipment.Status.IN_TRANSIT,
+    "out_for_delivery": Shipment.Status.IN_TRANSIT,
+    "delivered": Shipment.Status.DELIVERED,
+    "returned": Shipment.Status.RETURNED,
+    "returned_to_sender": Shipment.Status.RETURNED,
+}
+
+RANK = {
+    Shipment.Status.PENDING: 0,
+    Shipment.Status.LABEL_GENERATED: 0,
+    Shipment.Status.HANDED_TO_COURIER: 1,
+    Shipment.Status.IN_TRANSIT: 2,
+    Shipment.Status.DELIVERED: 3,
+    Shipment.Status.RETURNED: 3,
+}
+
+# Shipment.Status țintă -> (Order.shipping_status, Order.status, shipping_status-uri care nu se suprascriu)
+ORDER_TRANSITIONS = {
+    Shipment.Status.HANDED_TO_COURIER: (
+        Order.SHIPPING_SHIPPED,
+        Order.STATUS_SHIPPED,
+        (Order.SHIPPING_SHIPPED, Order.SHIPPING_IN_TRANSIT, Order.SHIPPING_DELIVERED, Order.SHIPPING_RETURNED),
+    ),
+    Shipment.Status.IN_TRANSIT: (
+        Order.SHIPPING_IN_TRANSIT,
+        Order.STATUS_IN_TRANSIT,
+        (Order.SHIPPING_IN_TRANSIT, Order.SHIPPING_DELIVERED, Order.SHIPPING_RETURNED),
+    ),
+    Shipment.Status.DELIVERED: (
+        Order.SHIPPING_DELIVERED,
+        Order.STATUS_DELIVERED,
+        (Order.SHIPPING_DELIVERED, Order.SHIPPING_RETURNED),
+    ),
+    Shipment.Status.RETURNED: (
+        Order.SHIPPING_RETURNED,
+        None,  # ca Order.mark_returned: statusul high-level rămâne
+        (Order.SHIPPING_RETURNED,),
+    ),
+}
+
+
+@dataclass
+class TrackingPollResult:
+    polled: int = 0
+    errors: int = 0
+    transitions: Counter = field(default_factory=Counter)  # status țintă -> nr. expediții
+    released: int = 0
+
+
+def _schedule():
+    return getattr(settings, "SNOBISTIC_TRACKING_SCHEDULE", None) or DEFAULT_SCHEDULE
+
+
+def poll_interval(age: timedelta) -> timedelta:
+    """
+    Intervalul până la următoarea verificare, după vechimea expediției.
+    """
+    days = age.total_seconds() / 86400
+    for max_days, minutes in _schedule():
+        if max_days is None or days < max_days:
+            return timedelta(minutes=minutes)
+    return timedelta(minutes=_schedule()[-1][1])
+
+
+def _due(now: datetime):
+    return (
+        Shipment.objects.filter(
+            status__in=Shipment.OPEN_STATUSES,
+            next_tracking_at__lte=now,
+            provider=Shipment.Provider.CURIERA,
+        )
+        .exclude(tracking_number="")
+        .order_by("next_tracking_at", "id")
+    )
+
+
+def _fetch(awbs: list[str]):
+    try:
+        return fetch_tracking(awbs), None
+    except CurieraError as exc:
+        return None, str(exc)
+
+
+def _apply_transitions(moves: dict[int, str], now: datetime) -> dict[str, list[int]]:
+    """
+    moves: {shipment_pk: status țintă}. Re-verifică sub lock și aplică doar
+    tranzițiile încă valide. Returnează {status țintă: [order_id, ...]}.
+    """
+    applied: dict[str, list[int]] = defaultdict(list)
+    with transaction.atomic():
+        by_target: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        for pk, status, order_id in (
+            Shipment.objects.select_for_update().filter(pk__in=list(moves)).values_list("pk", "status", "order_id")
+        ):
+            target = moves[pk]
+            if RANK[target] > RANK[status]:
+                by_target[target].append((pk, order_id))
+
+        for target, rows in by_target.items():
+            ship_ids = [pk for pk, _ in rows]
+            order_ids = [order_id for _, order_id in rows]
+            changes = {"status": target}
+            if target != Shipment.Status.RETURNED:
+                changes["shipped_at"] = Coalesce(F("shipped_at"), Value(now))
+            if target == Shipment.Status.DELIVERED:
+                changes["delivered_at"] = Coalesce(F("delivered_at"), Value(now))
+            Shipment.objects.filter(pk__in=ship_ids).update(**changes)
+
+            shipping_status, order_status, keep = ORDER_TRANSITIONS[target]
+            order_changes = {"shipping_status": shipping_status, "updated_at": now}
+            if order_status:
+                order_changes["status"] = Case(
+                    When(status__in=Order.TERMINAL_STATUSES, then=F("status")),
+                    default=Value(order_status),
+                    output_field=CharField(),
+                )
+            if target != Shipment.Status.RETURNED:
+                order_changes["shipped_at"] = Coalesce(F("shipped_at"), Value(now))
+            if target == Shipment.Status.DELIVERED:
+                order_changes["delivered_at"] = Coalesce(F("delivered_at"), Value(now))
+            Order.objects.filter(pk__in=order_ids).exclude(shipping_status__in=keep).update(**order_changes)
+            applied[target].extend(order_ids)
+    return applied
+
+
+def _reschedule(rows: list[dict], now: datetime, *, failed: bool = False) -> None:
+    by_next: dict[datetime, list[int]] = defaultdict(list)
+    for row in rows:
+        interval = poll_interval(timedelta(0) if failed else now - row["created_at"])
+        by_next[now + interval].append(row["pk"])
+    for next_at, ids in by_next.items():
+        changes = {"next_tracking_at": next_at}
+        if not failed:
+            changes["tracking_checked_at"] = now
+        Shipment.objects.filter(pk__in=ids).update(**changes)
+
+
+def _record_courier_status(rows: list[dict], statuses: dict[str, str]) -> None:
+    by_status: dict[str, list[int]] = defaultdict(list)
+    for row in rows:
+        raw = statuses.get(row["tracking_number"])
+        if raw is not None and raw != row["courier_status"]:
+            by_status[raw[:50]].append(row["pk"])
+    for raw, ids in by_status.items():
+        Shipment.objects.filter(pk__in=ids).update(courier_status=raw)
+
+
+def _on_shipped(order_ids: list[int], now: datetime) -> None:
+    # aceleași trust hooks ca la mark_handed_to_courier (idempotente)
+    try:
+        from orders.services.trust_hooks import on_order_shipped
+    except Exception:
+        return
+    for order_id in order_ids:
+        try:
+            on_order_shipped(order_id, shipped_at=now)
+        except Exception:
+            logger.exception("on_order_shipped failed for order %s", order_id)
+
+
+def _escrow_candidates(now: datetime, days: int) -> list[int]:
+    return list(
+        Order.objects.escrow_releasable()
+        .filter(shipping_status=Order.SHIPPING_DELIVERED, delivered_at__lte=now - timedelta(days=days))
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def release_due_escrow(now: Optional[datetime] = None) -> int:
+    """
+    Eliberează escrow-ul comenzilor livrate de cel puțin SNOBISTIC_ESCROW_RELEASE_DAYS zile
+    (nimic dacă setarea lipsește). Candidații vin dintr-un singur query; release_escrow
+    reverifică eligibilitatea per comandă, sub lock.
+    """
+    days = getattr(settings, "SNOBISTIC_ESCROW_RELEASE_DAYS", None)
+    if days is None:
+        return 0
+    now = now or timezone.now()
+    released = 0
+    for order_id in _escrow_candidates(now, int(days)):
+        with transaction.atomic():
+            order = Order.objects.select_for_update().filter(pk=order_id, escrow_status=Order.ESCROW_HELD).first()
+            if order is None:
+                continue
+            order.release_escrow()
+            if order.escrow_status == Order.ESCROW_RELEASED:
+                released += 1
+    return released
+
+
+def poll_tracking(
+    *,
+    now: Optional[datetime] = None,
+    batch_size: int = 100,
+    workers: Optional[int] = None,
+    limit: Optional[int] = None,
+    release_escrow: bool = True,
+) -> TrackingPollResult:
+    """
+    O trecere prin coada de tracking: interoghează curierul pentru expedițiile
+    scadente, aplică tranzițiile și reprogramează următoarea verificare.
+    """
+    now = now or timezone.now()
+    workers = workers or awb_workers()
+    result = TrackingPollResult()
+    fields = ("pk", "order_id", "status", "tracking_number", "courier_status", "created_at")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snobistic-tracking") as pool:
+        while limit is None or result.polled < limit:
+            size = batch_size * workers
+            if limit is not None:
+                size = min(size, limit - result.polled)
+            wave = list(_due(now).values(*fields)[:size])
+            if not wave:
+                break
+            batches = [wave[i:i + batch_size] for i in range(0, len(wave), batch_size)]
+            responses = pool.map(_fetch, [[row["tracking_number"] for row in batch] for batch in batches])
+
+            for batch, (statuses, error) in zip(batches, responses):
+                result.polled += len(batch)
+                if statuses is None:
+                    logger.warning("Curiera tracking batch failed: %s", error)
+                    result.errors += len(batch)
+                    _reschedule(batch, now, failed=True)
+                    continue
+
+                moves = {}
+                for row in batch:
+                    target = STATUS_MAP.get(statuses.get(row["tracking_number"], ""))
+                    if target and RANK[target] > RANK[row["status"]]:
+                        moves[row["pk"]] = target
+                _record_courier_status(batch, statuses)
+                applied = _apply_transitions(moves, now) if moves else {}
+                _reschedule(batch, now)
+
+                shipped = []
+                for target, order_ids in applied.items():
+                    result.transitions[target] += len(order_ids)
+                    if target != Shipment.Status.RETURNED:
+                        shipped.extend(order_ids)
+                # prima ieșire din "AWB generat" = predarea la curier
+                first_scan = {row["order_id"] for row in batch if row["status"] == Shipment.Status.LABEL_GENERATED}
+                _on_shipped([order_id for order_id in shipped if order_id in first_scan], now)
+
+    if release_escrow:
+        result.released = release_due_escrow(now)
+    return result
@@ -0,0 +1,16 @@
+# logistics/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Courier, ShippingRate
+from .rates import invalidate_rate_table
+
+
+@receiver(post_save, sender=Courier, dispatch_uid="logistics.rates.courier_saved")
+@receiver(post_delete, sender=Courier, dispatch_uid="logistics.rates.courier_deleted")
+@receiver(post_save, sender=ShippingRate, dispatch_uid="logistics.rates.rate_saved")
+@receiver(post_delete, sender=ShippingRate, dispatch_uid="logistics.rates.rate_deleted")
+def _rates_changed(sender, instance, **kwargs):
+    # după commit: altfel alt proces ar putea reîncărca tabela veche cu generația nouă
+    transaction.on_commit(invalidate_rate_table)
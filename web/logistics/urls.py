@@ -5,6 +5,7 @@ from . import views
 app_name = "logistics"
 
 urlpatterns = [
+    path("awb/bulk/", views.bulk_generate_awb_view, name="bulk_generate_awb"),
     path("awb/<int:order_id>/", views.generate_awb_view, name="generate_awb"),
     path("handed/<int:order_id>/", views.hand_to_courier_view, name="hand_to_courier"),
 ]
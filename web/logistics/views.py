@@ -2,12 +2,15 @@
 from decimal import Decimal
 
 from django.contrib import messages
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
 from orders.models import Order
 from .forms import ShipmentCreateForm
 from .models import Shipment, Courier
+from .services.bulk_awb import generate_awbs
 from .services.curiera import create_shipment_for_order
 from .services.status import mark_handed_to_courier
 
@@ -126,6 +129,46 @@ def generate_awb_view(request, order_id):
     )
 
 
+@login_required
+@require_POST
+def bulk_generate_awb_view(request):
+    """
+    AWB-uri pentru comenzile bifate în lista de vânzări (cereri Curiera în paralel).
+    """
+    user = request.user
+    if not _is_seller(user):
+        messages.error(request, "Nu ai permisiunea să generezi AWB-uri.")
+        return redirect("dashboard:sold_list")
+
+    order_ids = []
+    for raw in request.POST.getlist("order_ids"):
+        try:
+            order_ids.append(int(raw))
+        except (TypeError, ValueError):
+            continue
+    if not order_ids:
+        messages.info(request, "Selectează cel puțin o comandă.")
+        return redirect("dashboard:sold_list")
+
+    limit = int(getattr(settings, "SNOBISTIC_AWB_BULK_MAX", 100))
+    if len(order_ids) > limit:
+        messages.error(request, f"Poți genera cel mult {limit} AWB-uri o dată.")
+        return redirect("dashboard:sold_list")
+
+    result = generate_awbs(
+        [(order_id, user.pk) for order_id in order_ids],
+        service_name=(request.POST.get("service_name") or "Standard").strip()[:100],
+    )
+
+    if result.created:
+        messages.success(request, f"{len(result.created)} AWB-uri generate.")
+    for order_id, error in sorted(result.failed.items()):
+        messages.error(request, f"Comanda #{order_id}: {error}")
+    for order_id, reason in sorted(result.skipped.items()):
+        messages.warning(request, f"Comanda #{order_id}: {reason}")
+    return redirect("dashboard:sold_list")
+
+
 @login_required
 def hand_to_courier_view(request, order_id: int):
     """
@@ -1,7 +1,7 @@
 # messaging/admin.py
 from django.contrib import admin
 
-from .models import Conversation, Message, ConversationReadState, MessageAttachment
+from .models import Conversation, Message, ConversationReadState, InboxEntry, MessageAttachment
 
 
 @admin.register(Conversation)
@@ -81,3 +81,22 @@ class ConversationReadStateAdmin(admin.ModelAdmin):
     search_fields = ("user__email",)
     list_filter = ("is_archived", "is_muted", "last_read_at", "updated_at")
     autocomplete_fields = ("conversation", "user")
+
+
+@admin.register(InboxEntry)
+class InboxEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "user",
+        "conversation",
+        "kind",
+        "unread_count",
+        "last_message_at",
+        "is_archived",
+        "is_muted",
+        "sort_at",
+    )
+    search_fields = ("user__email",)
+    list_filter = ("kind", "is_archived", "is_muted")
+    autocomplete_fields = ("conversation", "user")
+    readonly_fields = ("last_message",)
@@ -0,0 +1,14 @@
+# messaging/context_processors.py
+from .unread import total_unread
+
+
+def unread_messages_badge(request):
+    """
+    Totalul de mesaje necitite pentru header (din cache; vezi messaging/unread.py).
+    """
+    try:
+        if getattr(request, "user", None) and request.user.is_authenticated:
+            return {"unread_messages_count": total_unread(request.user)}
+    except Exception:
+        pass
+    return {"unread_messages_count": 0}
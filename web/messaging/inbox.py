@@ -0,0 +1,274 @@
+# messaging/inbox.py
+from __future__ import annotations
+
+import logging
+from typing import Iterable, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, Count, F, PositiveIntegerField, Q, Value, When
+
+from .models import Conversation, ConversationReadState, InboxEntry, Message
+from .unread import invalidate_totals
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Inbox denormalizat: un rând per (user, conversation)
+# =============================================================================
+# - la mesaj nou: preview + sort_key pentru toți, unread +1 pentru ceilalți (un UPDATE)
+# - la citire / arhivare / mute: oglindă din ConversationReadState
+# - la participants.add/remove și allow_staff: rânduri create/șterse
+# - la is_staff / is_active schimbat pe user: rândurile lui din conversațiile
+#   allow_staff create/șterse (sync_staff_inbox)
+# - `rebuild_inbox` (comanda rebuild_inbox) recalculează totul din tabelele sursă
+# - orice schimbare de unread_count / rânduri invalidează totalul cache-uit al
+#   userilor atinși (messaging/unread.py)
+
+PREVIEW_CHARS = 255
+
+
+def _sender_name(user) -> str:
+    if user is None:
+        return ""
+    name = f"{user.first_name or ''} {user.last_name or ''}".strip()
+    return (name or user.email or "")[:255]
+
+
+def _preview_fields(msg: Optional[Message]) -> dict:
+    if msg is None:
+        return {
+            "last_message": None,
+            "last_message_text": "",
+            "last_message_sender_name": "",
+            "last_message_at": None,
+        }
+    return {
+        "last_message": msg,
+        "last_message_text": (msg.text or "")[:PREVIEW_CHARS],
+        "last_message_sender_name": _sender_name(msg.sender),
+        "last_message_at": msg.sent_at,
+    }
+
+
+def _last_message(conversation_id: int) -> Optional[Message]:
+    return (
+        Message.objects.filter(conversation_id=conversation_id)
+        .select_related("sender")
+        .order_by("-sent_at", "-pk")
+        .first()
+    )
+
+
+def sees_staff_inbox(user) -> bool:
+    return bool(user.is_staff and user.is_active)
+
+
+def staff_user_ids() -> list[int]:
+    User = get_user_model()
+    return list(User.objects.filter(is_staff=True, is_active=True).values_list("pk", flat=True))
+
+
+def inbox_user_ids(conv: Conversation) -> set[int]:
+    """
+    Cine vede conversația în inbox: participanții + staff-ul, dacă allow_staff.
+    """
+    ids = set(conv.participants.values_list("pk", flat=True))
+    if conv.allow_staff:
+        ids.update(staff_user_ids())
+    return ids
+
+
+def _unread_counts(conv: Conversation, read_at: dict[int, object]) -> dict[int, int]:
+    """
+    Necitite per user într-un singur aggregate (Count condiționat per user).
+    Fără read state => toate mesajele altora sunt necitite.
+    """
+    if not read_at:
+        return {}
+    aggregates = {}
+    for uid, last_read_at in read_at.items():
+        cond = ~Q(sender_id=uid)
+        if last_read_at is not None:
+            cond &= Q(sent_at__gt=last_read_at)
+        aggregates[f"u{uid}"] = Count("pk", filter=cond)
+    row = Message.objects.filter(conversation=conv).aggregate(**aggregates)
+    return {uid: int(row[f"u{uid}"] or 0) for uid in read_at}
+
+
+def build_entries(conv: Conversation, user_ids: Iterable[int]) -> list[InboxEntry]:
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+
+    states = {
+        st.user_id: st
+        for st in ConversationReadState.objects.filter(conversation=conv, user_id__in=user_ids)
+    }
+    unread = _unread_counts(
+        conv,
+        {uid: (states[uid].last_read_at if uid in states else None) for uid in user_ids},
+    )
+    preview = _preview_fields(_last_message(conv.pk))
+
+    entries = []
+    for uid in user_ids:
+        st = states.get(uid)
+        entries.append(
+            InboxEntry(
+                user_id=uid,
+                conversation=conv,
+                kind=conv.kind,
+                sort_at=conv.last_updated,
+                unread_count=unread.get(uid, 0),
+                is_archived=bool(st and st.is_archived),
+                is_muted=bool(st and st.is_muted),
+                muted_until=st.muted_until if st else None,
+                **preview,
+            )
+        )
+    return entries
+
+
+def ensure_inbox_entries(conv: Conversation, user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Creează rândurile lipsă (idempotent). Implicit pentru toți cei care văd conversația.
+    """
+    wanted = set(user_ids) if user_ids is not None else inbox_user_ids(conv)
+    if not wanted:
+        return 0
+    existing = set(
+        InboxEntry.objects.filter(conversation=conv, user_id__in=wanted).values_list("user_id", flat=True)
+    )
+    missing = wanted - existing
+    if not missing:
+        return 0
+    InboxEntry.objects.bulk_create(build_entries(conv, missing), ignore_conflicts=True)
+    invalidate_totals(missing)
+    return len(missing)
+
+
+def sync_conversation_inbox(conv: Conversation) -> None:
+    """
+    Aliniază setul de rânduri la participanți/allow_staff (după remove/clear sau escaladare).
+    """
+    wanted = inbox_user_ids(conv)
+    stale = InboxEntry.objects.filter(conversation=conv).exclude(user_id__in=wanted)
+    invalidate_totals(stale.values_list("user_id", flat=True))
+    stale.delete()
+    ensure_inbox_entries(conv, wanted)
+
+
+def prune_user_inbox(user) -> None:
+    """
+    După ce userul a fost scos din conversații (reverse participants.remove/clear).
+    """
+    stale = InboxEntry.objects.filter(user=user).exclude(conversation__participants=user)
+    if sees_staff_inbox(user):
+        stale = stale.exclude(conversation__allow_staff=True)
+    stale.delete()
+    invalidate_totals([user.pk])
+
+
+def sync_staff_inbox(user) -> None:
+    """
+    După crearea userului sau schimbarea is_staff / is_active: rândurile lui din
+    conversațiile allow_staff apar (staff activ) sau dispar (în rest, păstrând
+    conversațiile în care e participant).
+    """
+    if not sees_staff_inbox(user):
+        prune_user_inbox(user)
+        return
+    missing = (
+        Conversation.objects.filter(allow_staff=True)
+        .exclude(inbox_entries__user=user)
+        .order_by("pk")
+    )
+    for conv in missing.iterator(chunk_size=500):
+        InboxEntry.objects.bulk_create(build_entries(conv, [user.pk]), ignore_conflicts=True)
+    invalidate_totals([user.pk])
+
+
+# =============================================================================
+# Evenimente
+# =============================================================================
+def record_message(msg: Message) -> None:
+    """
+    Mesaj nou: un singur UPDATE pe rândurile conversației (+ user_id-urile pentru cache-ul de total).
+    """
+    invalidate_totals(
+        InboxEntry.objects.filter(conversation_id=msg.conversation_id)
+        .exclude(user_id=msg.sender_id)
+        .values_list("user_id", flat=True)
+    )
+    InboxEntry.objects.filter(conversation_id=msg.conversation_id).update(
+        unread_count=Case(
+            When(user_id=msg.sender_id, then=F("unread_count")),
+            default=F("unread_count") + 1,
+            output_field=PositiveIntegerField(),
+        ),
+        **_preview_fields(msg),
+    )
+
+
+def record_read_state(state: ConversationReadState) -> None:
+    """
+    Oglindește arhivare/mute și resetează unread dacă userul a citit până la ultimul mesaj.
+    """
+    InboxEntry.objects.filter(conversation_id=state.conversation_id, user_id=state.user_id).update(
+        is_archived=state.is_archived,
+        is_muted=state.is_muted,
+        muted_until=state.muted_until,
+        unread_count=Case(
+            When(
+                Q(last_message_at__isnull=True) | Q(last_message_at__lte=state.last_read_at),
+                then=Value(0),
+            ),
+            default=F("unread_count"),
+            output_field=PositiveIntegerField(),
+        ),
+    )
+    invalidate_totals([state.user_id])
+
+
+def record_conversation_touch(conv: Conversation) -> None:
+    InboxEntry.objects.filter(conversation=conv).update(sort_at=conv.last_updated)
+
+
+def refresh_last_message(conversation_id: int) -> None:
+    """
+    După ștergerea unui mesaj: doar UPDATE (nu creează rânduri; conversația poate fi și ea în curs de ștergere).
+    """
+    InboxEntry.objects.filter(conversation_id=conversation_id).update(
+        **_preview_fields(_last_message(conversation_id))
+    )
+
+
+# =============================================================================
+# Rebuild
+# =============================================================================
+def rebuild_conversation_inbox(conv: Conversation) -> int:
+    with transaction.atomic():
+        old = InboxEntry.objects.filter(conversation=conv)
+        invalidate_totals(old.values_list("user_id", flat=True))
+        old.delete()
+        entries = build_entries(conv, inbox_user_ids(conv))
+        InboxEntry.objects.bulk_create(entries)
+        invalidate_totals(e.user_id for e in entries)
+    return len(entries)
+
+
+def rebuild_inbox(*, conversation_ids: Optional[Iterable[int]] = None, chunk_size: int = 500) -> tuple[int, int]:
+    """
+    Reconstruiește rândurile din Conversation/Message/ConversationReadState.
+    Returnează (conversații, rânduri).
+    """
+    qs = Conversation.objects.order_by("pk")
+    if conversation_ids is not None:
+        qs = qs.filter(pk__in=list(conversation_ids))
+
+    convs = rows = 0
+    for conv in qs.iterator(chunk_size=chunk_size):
+        rows += rebuild_conversation_inbox(conv)
+        convs += 1
+    return convs, rows
@@ -0,0 +1,26 @@
+# messaging/management/commands/rebuild_inbox.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from messaging.inbox import rebuild_inbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruiește rândurile de inbox (InboxEntry) din conversații, mesaje și read state. "
+        "Rulează după deploy-ul tabelei sau dacă bănuiești derive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--conversation", type=int, action="append", dest="conversation_ids",
+                            help="Doar conversațiile date (repetabil).")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        convs, rows = rebuild_inbox(
+            conversation_ids=options["conversation_ids"],
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Inbox: {convs} conversații, {rows} rânduri."))
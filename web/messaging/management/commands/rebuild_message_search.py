@@ -0,0 +1,23 @@
+# messaging/management/commands/rebuild_message_search.py
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from messaging.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruiește indexul de căutare în mesaje (MessageSearchTerm) din Message.text."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--conversation", type=int, action="append", dest="conversation_ids",
+                            help="Doar conversațiile date (repetabil).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        messages, terms = rebuild_search_index(
+            conversation_ids=options["conversation_ids"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Index mesaje: {messages} mesaje, {terms} termeni."))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0006_remove_conversation_conv_kind_requires_correct_link_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ORDER', 'Order (buyer ↔ seller)'), ('SUPPORT', 'Support (user ↔ staff)')], max_length=12)),
+                ('sort_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_message_text', models.CharField(blank=True, max_length=255)),
+                ('last_message_sender_name', models.CharField(blank=True, max_length=255)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('is_archived', models.BooleanField(default=False)),
+                ('is_muted', models.BooleanField(default=False)),
+                ('muted_until', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='messaging.conversation')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='messaging.message')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'is_archived', 'sort_at'], name='inbox_user_arch_sort_idx'), models.Index(fields=['user', 'is_archived', 'kind', 'sort_at'], name='inbox_user_arch_kind_sort_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'conversation'), name='uniq_inbox_entry_per_user')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0007_inboxentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='messaging.conversation')),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='messaging.message')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'conversation'], name='msg_search_term_conv_idx')],
+                'constraints': [models.UniqueConstraint(fields=('term', 'message'), name='uniq_msg_search_term_per_message')],
+            },
+        ),
+    ]
@@ -329,3 +329,107 @@ class MessageAttachment(models.Model):
                 self.size_bytes = 0
 
         super().save(*args, **kwargs)
+
+
+class InboxEntry(models.Model):
+    """
+    Rând de inbox denormalizat per (user, conversation).
+
+    Ținut la zi de messaging/inbox.py (semnale pe Message / participants /
+    ConversationReadState / Conversation), ca lista de conversații să fie un
+    singur range scan pe (user, is_archived, sort_at) în loc de subquery-uri
+    corelate pe Message.
+
+    Rânduri există pentru participanți și, cât timp allow_staff=True, pentru staff.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="inbox_entries",
+    )
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name="inbox_entries",
+    )
+
+    # copie din Conversation (nu se schimbă) -> filtrul pe tip rămâne pe index
+    kind = models.CharField(max_length=12, choices=Conversation.KIND_CHOICES)
+
+    # sort key = Conversation.last_updated
+    sort_at = models.DateTimeField(default=timezone.now)
+
+    # preview ultimul mesaj
+    last_message = models.ForeignKey(
+        Message,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    last_message_text = models.CharField(max_length=255, blank=True)
+    last_message_sender_name = models.CharField(max_length=255, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
+    unread_count = models.PositiveIntegerField(default=0)
+
+    # oglindă din ConversationReadState
+    is_archived = models.BooleanField(default=False)
+    is_muted = models.BooleanField(default=False)
+    muted_until = models.DateTimeField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "conversation"],
+                name="uniq_inbox_entry_per_user",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "is_archived", "sort_at"], name="inbox_user_arch_sort_idx"),
+            models.Index(fields=["user", "is_archived", "kind", "sort_at"], name="inbox_user_arch_kind_sort_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Inbox(user={self.user_id}, conv={self.conversation_id}, unread={self.unread_count})"
+
+    @property
+    def is_muted_effective(self) -> bool:
+        if self.is_muted:
+            return True
+        return bool(self.muted_until and self.muted_until > timezone.now())
+
+
+class MessageSearchTerm(models.Model):
+    """
+    Index full-text (inversat) peste Message.text: un rând per (termen, mesaj),
+    cu conversația denormalizată ca căutarea să întoarcă direct id-uri de conversații.
+    Termenii sunt normalizați (lowercase, fără diacritice); vezi messaging/search.py.
+    """
+    term = models.CharField(max_length=64)
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    message = models.ForeignKey(
+        Message,
+        on_delete=models.CASCADE,
+        related_name="search_terms",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["term", "message"],
+                name="uniq_msg_search_term_per_message",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["term", "conversation"], name="msg_search_term_conv_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.term} -> conv {self.conversation_id}"
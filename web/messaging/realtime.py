@@ -0,0 +1,304 @@
+# messaging/realtime.py
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Livrare live (ASGI): un canal per conversație + canalul "staff"
+# =============================================================================
+# - publisher-ul (view-uri sync, semnale) NU așteaptă niciodată abonații:
+#   publish() pune evenimentul în coada fiecărui abonat și se întoarce
+# - fiecare abonat are o coadă limitată; dacă rămâne în urmă (coadă plină),
+#   coada e golită și primește un singur eveniment "resync" -> clientul reîncarcă
+#   pagina, iar stream-ul se închide (un client lent nu ține memorie la nesfârșit)
+# - conversațiile allow_staff publică și pe canalul "staff" (watchers)
+#
+# - totul e oprit (endpoint-uri 204, fără EventSource, fără publish) dacă nu
+#   rulăm sub ASGI: sub WSGI răspunsul de streaming e citit până la capăt
+#   înainte de trimitere, deci un stream SSE ar ține un worker pentru totdeauna
+#
+# Settings:
+#   SNOBISTIC_REALTIME_ENABLED     (default False; snobistic/asgi.py îl pornește)
+#   SNOBISTIC_REALTIME_BACKEND     (default "messaging.realtime.InMemoryBroker")
+#   SNOBISTIC_REALTIME_QUEUE_SIZE  (default 100 evenimente / abonat)
+#   SNOBISTIC_REALTIME_HEARTBEAT   (default 15 secunde)
+#   SNOBISTIC_REALTIME_REDIS_URL   (pentru RedisBroker, multi-proces)
+
+STAFF_CHANNEL = "staff"
+
+EVENT_MESSAGE = "message"
+EVENT_READ = "read"
+EVENT_TYPING = "typing"
+EVENT_RESYNC = "resync"
+
+
+def conversation_channel(conversation_id: int) -> str:
+    return f"conv:{conversation_id}"
+
+
+def enabled() -> bool:
+    return bool(getattr(settings, "SNOBISTIC_REALTIME_ENABLED", False))
+
+
+def queue_size() -> int:
+    return int(getattr(settings, "SNOBISTIC_REALTIME_QUEUE_SIZE", 100))
+
+
+def heartbeat_seconds() -> float:
+    return float(getattr(settings, "SNOBISTIC_REALTIME_HEARTBEAT", 15))
+
+
+class Subscription:
+    """
+    Abonament legat de event loop-ul request-ului ASGI care l-a creat.
+    offer() rulează mereu în acel loop (brokerii folosesc call_soon_threadsafe).
+    """
+
+    def __init__(self, channels: Iterable[str], maxsize: int):
+        self.channels = tuple(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+        self.closed = False
+
+    def offer(self, event: dict) -> None:
+        if self.closed or self.lagged:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": EVENT_RESYNC})
+
+    def offer_threadsafe(self, event: dict) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.offer, event)
+        except RuntimeError:
+            # loop-ul s-a închis (client deconectat); abonamentul va fi scos la cleanup
+            self.closed = True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class BaseBroker:
+    def publish(self, channel: str, event: dict) -> None:
+        raise NotImplementedError
+
+    async def subscribe(self, channels: Iterable[str]) -> Subscription:
+        raise NotImplementedError
+
+    async def unsubscribe(self, sub: Subscription) -> None:
+        raise NotImplementedError
+
+
+class InMemoryBroker(BaseBroker):
+    """
+    Un singur proces (dev, teste, deploy cu un worker ASGI).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: dict[str, set[Subscription]] = {}
+
+    def publish(self, channel: str, event: dict) -> None:
+        with self._lock:
+            subs = list(self._subs.get(channel, ()))
+        for sub in subs:
+            sub.offer_threadsafe(event)
+
+    async def subscribe(self, channels: Iterable[str]) -> Subscription:
+        sub = Subscription(channels, queue_size())
+        with self._lock:
+            for ch in sub.channels:
+                self._subs.setdefault(ch, set()).add(sub)
+        return sub
+
+    async def unsubscribe(self, sub: Subscription) -> None:
+        sub.closed = True
+        with self._lock:
+            for ch in sub.channels:
+                subs = self._subs.get(ch)
+                if subs is None:
+                    continue
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[ch]
+
+    def subscriber_count(self, channel: str) -> int:
+        with self._lock:
+            return len(self._subs.get(channel, ()))
+
+
+class RedisBroker(BaseBroker):
+    """
+    Multi-proces: pub/sub Redis. Fiecare abonament are propriul task de citire
+    care alimentează coada locală (aceeași politică de backpressure).
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        try:
+            import redis
+            import redis.asyncio as aioredis
+        except ImportError as exc:
+            raise ImproperlyConfigured("RedisBroker necesită pachetul 'redis'.") from exc
+
+        self.url = url or getattr(settings, "SNOBISTIC_REALTIME_REDIS_URL", "redis://localhost:6379/0")
+        self._client = redis.Redis.from_url(self.url)
+        self._aioredis = aioredis
+        self._readers: dict[Subscription, tuple] = {}
+
+    def publish(self, channel: str, event: dict) -> None:
+        try:
+            self._client.publish(f"snobistic:{channel}", json.dumps(event))
+        except Exception:
+            logger.exception("Realtime publish failed (channel=%s)", channel)
+
+    async def subscribe(self, channels: Iterable[str]) -> Subscription:
+        sub = Subscription(channels, queue_size())
+        conn = self._aioredis.Redis.from_url(self.url)
+        pubsub = conn.pubsub()
+        await pubsub.subscribe(*[f"snobistic:{ch}" for ch in sub.channels])
+
+        async def _reader():
+            async for item in pubsub.listen():
+                if item.get("type") != "message":
+                    continue
+                try:
+                    sub.offer(json.loads(item["data"]))
+                except ValueError:
+                    continue
+
+        task = asyncio.create_task(_reader())
+        self._readers[sub] = (conn, pubsub, task)
+        return sub
+
+    async def unsubscribe(self, sub: Subscription) -> None:
+        sub.closed = True
+        conn, pubsub, task = self._readers.pop(sub, (None, None, None))
+        if task is not None:
+            task.cancel()
+        if pubsub is not None:
+            await pubsub.aclose()
+        if conn is not None:
+            await conn.aclose()
+
+
+_broker: Optional[BaseBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> BaseBroker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "SNOBISTIC_REALTIME_BACKEND", "messaging.realtime.InMemoryBroker")
+                _broker = import_string(path)()
+    return _broker
+
+
+def reset_broker() -> None:
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(sender, setting, **kwargs):
+    if setting.startswith("SNOBISTIC_REALTIME_"):
+        reset_broker()
+
+
+# =============================================================================
+# Evenimente (apelate din cod sync, după commit)
+# =============================================================================
+def _publish(conv, event: dict) -> None:
+    if not enabled():
+        return
+    broker = get_broker()
+    broker.publish(conversation_channel(conv.pk), event)
+    if conv.allow_staff:
+        broker.publish(STAFF_CHANNEL, event)
+
+
+def publish_message(msg) -> None:
+    _publish(
+        msg.conversation,
+        {
+            "type": EVENT_MESSAGE,
+            "conversation": msg.conversation_id,
+            "message": msg.pk,
+            "sender": msg.sender_id,
+            "sent_at": msg.sent_at.isoformat(),
+        },
+    )
+
+
+def publish_read(conv, user, last_read_at) -> None:
+    _publish(
+        conv,
+        {
+            "type": EVENT_READ,
+            "conversation": conv.pk,
+            "user": user.pk,
+            "last_read_at": last_read_at.isoformat(),
+        },
+    )
+
+
+def publish_typing(conv, user) -> None:
+    _publish(
+        conv,
+        {
+            "type": EVENT_TYPING,
+            "conversation": conv.pk,
+            "user": user.pk,
+            "name": (getattr(user, "full_name", "") or user.email or "")[:80],
+        },
+    )
+
+
+def format_sse(event: dict) -> str:
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(channels: Iterable[str], *, user_id: Optional[int] = None):
+    """
+    Generator async pentru StreamingHttpResponse (text/event-stream).
+    Heartbeat periodic ca proxy-urile să nu închidă conexiunea; se oprește la "resync".
+    """
+    broker = get_broker()
+    sub = await broker.subscribe(channels)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            event = await sub.get(timeout=heartbeat_seconds())
+            if event is None:
+                yield ": ping\n\n"
+                continue
+            # propriile evenimente de typing nu se trimit înapoi
+            if event.get("type") == EVENT_TYPING and event.get("user") == user_id:
+                continue
+            yield format_sse(event)
+            if event.get("type") == EVENT_RESYNC:
+                return
+    finally:
+        await broker.unsubscribe(sub)
@@ -0,0 +1,115 @@
+# messaging/search.py
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+from .models import Message, MessageSearchTerm
+
+# =============================================================================
+# Căutare full-text în mesaje (index inversat, portabil SQLite/PostgreSQL)
+# =============================================================================
+# - la creare mesaj: termenii normalizați din text -> MessageSearchTerm (bulk insert)
+# - căutare: fiecare cuvânt din q trebuie să apară în conversație (AND); ultimul
+#   cuvânt e prefix ("coman" găsește "comanda"). Prefixul e un range scan pe
+#   index (term >= x AND term < x + U+FFFF), nu LIKE, deci merge pe orice backend.
+# - rezultatul sunt id-uri de conversații, aplicate apoi peste query-ul de inbox
+
+MIN_TERM_CHARS = 2
+MAX_TERM_CHARS = 64
+MAX_TERMS_PER_MESSAGE = 300
+MAX_QUERY_TERMS = 8
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    text = (text or "").lower()
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Termeni unici, în ordinea apariției.
+    """
+    seen: dict[str, None] = {}
+    for word in _WORD_RE.findall(normalize(text)):
+        if len(word) < MIN_TERM_CHARS:
+            continue
+        seen.setdefault(word[:MAX_TERM_CHARS], None)
+    return list(seen)
+
+
+def index_message(msg: Message, *, replace: bool = False) -> int:
+    terms = tokenize(msg.text)[:MAX_TERMS_PER_MESSAGE]
+    with transaction.atomic():
+        if replace:
+            MessageSearchTerm.objects.filter(message=msg).delete()
+        MessageSearchTerm.objects.bulk_create(
+            [MessageSearchTerm(term=t, conversation_id=msg.conversation_id, message=msg) for t in terms],
+            ignore_conflicts=True,
+        )
+    return len(terms)
+
+
+def _term_q(term: str, *, prefix: bool) -> dict:
+    if prefix:
+        return {"term__gte": term, "term__lt": term + "\uffff"}
+    return {"term": term}
+
+
+def matching_conversation_ids(q: str) -> Optional[QuerySet]:
+    """
+    Subquery cu id-urile conversațiilor care conțin toți termenii din q.
+    None dacă q nu are termeni indexabili.
+    """
+    terms = tokenize(q)[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+
+    ids = None
+    for i, term in enumerate(terms):
+        qs = MessageSearchTerm.objects.filter(**_term_q(term, prefix=(i == len(terms) - 1)))
+        if ids is not None:
+            qs = qs.filter(conversation_id__in=ids)
+        ids = qs.values("conversation_id")
+    return ids
+
+
+def rebuild_search_index(
+    *,
+    conversation_ids: Optional[Iterable[int]] = None,
+    batch_size: int = 1000,
+) -> tuple[int, int]:
+    """
+    Reindexează mesajele (keyset pe pk). Returnează (mesaje, termeni).
+    """
+    qs = Message.objects.order_by("pk").only("pk", "conversation_id", "text")
+    if conversation_ids is not None:
+        conversation_ids = list(conversation_ids)
+        qs = qs.filter(conversation_id__in=conversation_ids)
+        MessageSearchTerm.objects.filter(conversation_id__in=conversation_ids).delete()
+    else:
+        MessageSearchTerm.objects.all().delete()
+
+    messages = terms = 0
+    last_pk = 0
+    while True:
+        batch = list(qs.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        rows = [
+            MessageSearchTerm(term=t, conversation_id=m.conversation_id, message_id=m.pk)
+            for m in batch
+            for t in tokenize(m.text)[:MAX_TERMS_PER_MESSAGE]
+        ]
+        MessageSearchTerm.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+        messages += len(batch)
+        terms += len(rows)
+    return messages, terms
@@ -0,0 +1,89 @@
+# messaging/signals.py
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import inbox, realtime, search
+from .models import Conversation, ConversationReadState, Message
+
+
+@receiver(post_save, sender=Message)
+def inbox_on_message(sender, instance, created, **kwargs):
+    search.index_message(instance, replace=not created)
+    if created:
+        inbox.record_message(instance)
+        transaction.on_commit(lambda: realtime.publish_message(instance))
+
+
+@receiver(post_delete, sender=Message)
+def inbox_on_message_deleted(sender, instance, **kwargs):
+    inbox.refresh_last_message(instance.conversation_id)
+
+
+@receiver(post_save, sender=ConversationReadState)
+def inbox_on_read_state(sender, instance, **kwargs):
+    inbox.record_read_state(instance)
+
+
+# valorile încărcate din DB: un save() simplu nu resincronizează inbox-ul dacă
+# allow_staff / is_staff / is_active nu s-au schimbat (None = câmp amânat, necunoscut)
+@receiver(post_init, sender=Conversation)
+def inbox_remember_allow_staff(sender, instance, **kwargs):
+    instance._inbox_allow_staff = instance.__dict__.get("allow_staff")
+
+
+@receiver(post_save, sender=Conversation)
+def inbox_on_conversation(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        instance._inbox_allow_staff = instance.allow_staff
+        if instance.allow_staff:
+            inbox.ensure_inbox_entries(instance)
+        return
+    if update_fields is None or "allow_staff" in update_fields:
+        if instance.allow_staff != instance._inbox_allow_staff:
+            inbox.sync_conversation_inbox(instance)
+        instance._inbox_allow_staff = instance.allow_staff
+    if update_fields is None or "last_updated" in update_fields:
+        inbox.record_conversation_touch(instance)
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def inbox_on_participants(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in {"post_add", "post_remove", "post_clear"}:
+        return
+
+    if reverse:
+        # instance = user
+        if action == "post_add":
+            for conv in Conversation.objects.filter(pk__in=pk_set or ()):
+                inbox.ensure_inbox_entries(conv, [instance.pk])
+        else:
+            inbox.prune_user_inbox(instance)
+        return
+
+    # instance = conversation
+    if action == "post_add":
+        inbox.ensure_inbox_entries(instance, pk_set or ())
+    else:
+        inbox.sync_conversation_inbox(instance)
+
+
+@receiver(post_init, sender=get_user_model())
+def inbox_remember_staff_flags(sender, instance, **kwargs):
+    flags = instance.__dict__
+    if "is_staff" in flags and "is_active" in flags:
+        instance._inbox_sees_staff = inbox.sees_staff_inbox(instance)
+    else:
+        instance._inbox_sees_staff = None
+
+
+@receiver(post_save, sender=get_user_model())
+def inbox_on_user(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {"is_staff", "is_active"} & set(update_fields):
+        return
+    sees = inbox.sees_staff_inbox(instance)
+    changed = sees != instance._inbox_sees_staff
+    if (created and sees) or (changed and not created):
+        inbox.sync_staff_inbox(instance)
+    instance._inbox_sees_staff = sees
@@ -1,3 +1,325 @@
-from django.test import TestCase
+import asyncio
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUser
+
+from . import realtime, search, unread
+from .inbox import rebuild_inbox
+from .models import Conversation, ConversationReadState, InboxEntry, Message, MessageSearchTerm
+
+
+def _make_user(email, **extra):
+    return CustomUser.objects.create_user(email=email, password="x", first_name="Test", last_name="Inbox", is_active=True, **extra)
+
+
+class InboxEntryMaintenanceTests(TestCase):
+    def setUp(self):
+        self.user = _make_user("inbox-user@example.com")
+        self.staff = _make_user("inbox-staff@example.com", is_staff=True)
+        self.conv = Conversation.objects.create(
+            kind=Conversation.KIND_SUPPORT,
+            support_user=self.user,
+            allow_staff=True,
+        )
+        self.conv.participants.add(self.user)
+
+    def _entry(self, user):
+        return InboxEntry.objects.get(conversation=self.conv, user=user)
+
+    def test_rows_for_participants_and_staff_watchers(self):
+        self.assertEqual(
+            set(InboxEntry.objects.filter(conversation=self.conv).values_list("user_id", flat=True)),
+            {self.user.pk, self.staff.pk},
+        )
+
+    def test_message_updates_preview_and_unread_for_others_only(self):
+        Message.objects.create(conversation=self.conv, sender=self.user, text="Salut")
+
+        mine, staff = self._entry(self.user), self._entry(self.staff)
+        self.assertEqual(mine.unread_count, 0)
+        self.assertEqual(staff.unread_count, 1)
+        self.assertEqual(staff.last_message_text, "Salut")
+        self.assertEqual(staff.last_message_sender_name, "Test Inbox")
+
+    def test_read_state_resets_unread_and_mirrors_flags(self):
+        msg = Message.objects.create(conversation=self.conv, sender=self.staff, text="Răspuns")
+        ConversationReadState.objects.create(
+            conversation=self.conv,
+            user=self.user,
+            last_read_at=msg.sent_at,
+            is_archived=True,
+        )
+
+        entry = self._entry(self.user)
+        self.assertEqual(entry.unread_count, 0)
+        self.assertTrue(entry.is_archived)
+
+    def test_leaving_and_disabling_staff_removes_rows(self):
+        self.conv.participants.remove(self.user)
+        self.conv.allow_staff = False
+        self.conv.save(update_fields=["allow_staff"])
+
+        self.assertFalse(InboxEntry.objects.filter(conversation=self.conv).exists())
+
+    def test_staff_created_or_promoted_later_sees_existing_conversations(self):
+        Message.objects.create(conversation=self.conv, sender=self.user, text="Ajutor")
+        late = _make_user("late-staff@example.com", is_staff=True)
+        promoted = _make_user("promoted@example.com")
+        self.assertFalse(InboxEntry.objects.filter(user=promoted).exists())
+
+        promoted.is_staff = True
+        promoted.save()
+
+        for staff in (late, promoted):
+            entry = self._entry(staff)
+            self.assertEqual(entry.unread_count, 1)
+            self.assertEqual(entry.last_message_text, "Ajutor")
+
+    def test_demoted_or_deactivated_staff_loses_watcher_rows(self):
+        own = Conversation.objects.create(kind=Conversation.KIND_SUPPORT, support_user=self.staff, allow_staff=True)
+        own.participants.add(self.staff)
+
+        self.staff.is_active = False
+        self.staff.save(update_fields=["is_active"])
+
+        self.assertEqual(
+            list(InboxEntry.objects.filter(user=self.staff).values_list("conversation_id", flat=True)),
+            [own.pk],
+        )
+
+    def test_plain_save_does_not_resync(self):
+        conv = Conversation.objects.get(pk=self.conv.pk)
+        user = CustomUser.objects.get(pk=self.staff.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            conv.save()
+            user.save()
+        inbox_sql = [q["sql"] for q in ctx.captured_queries if "messaging_inboxentry" in q["sql"]]
+        # doar sort_at (last_updated); fără DELETE / SELECT staff / INSERT
+        self.assertEqual(len(inbox_sql), 1)
+        self.assertTrue(inbox_sql[0].startswith("UPDATE"))
+
+    def test_rebuild_matches_incremental_state(self):
+        now = timezone.now()
+        Message.objects.create(conversation=self.conv, sender=self.staff, text="a", sent_at=now - timedelta(minutes=2))
+        Message.objects.create(conversation=self.conv, sender=self.staff, text="b", sent_at=now - timedelta(minutes=1))
+        before = {e.user_id: (e.unread_count, e.last_message_text) for e in InboxEntry.objects.all()}
+
+        InboxEntry.objects.all().delete()
+        rebuild_inbox()
+
+        after = {e.user_id: (e.unread_count, e.last_message_text) for e in InboxEntry.objects.all()}
+        self.assertEqual(before, after)
+        self.assertEqual(after[self.user.pk], (2, "b"))
+
+    def test_list_view_renders_entries(self):
+        Message.objects.create(conversation=self.conv, sender=self.staff, text="Bună ziua")
+        self.client.force_login(self.user)
+
+        resp = self.client.get(reverse("messaging:conversation_list"), {"unread": "1"})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([e.conversation_id for e in resp.context["entries"]], [self.conv.pk])
+        self.assertContains(resp, "Bună ziua")
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.buyer = _make_user("unread-buyer@example.com")
+        self.seller = _make_user("unread-seller@example.com")
+        self.conv = Conversation.objects.create(kind=Conversation.KIND_SUPPORT, support_user=self.buyer)
+        self.conv.participants.add(self.buyer, self.seller)
+        past = timezone.now() - timedelta(hours=1)
+        for u in (self.buyer, self.seller):
+            ConversationReadState.objects.create(conversation=self.conv, user=u, last_read_at=past)
+
+    def _count(self, user):
+        return InboxEntry.objects.get(conversation=self.conv, user=user).unread_count
+
+    def test_message_increments_others_and_mark_read_resets(self):
+        Message.objects.create(conversation=self.conv, sender=self.seller, text="1")
+        Message.objects.create(conversation=self.conv, sender=self.seller, text="2")
+
+        self.assertEqual(self._count(self.buyer), 2)
+        self.assertEqual(self._count(self.seller), 0)
+        self.assertEqual(unread.total_unread(self.buyer), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            unread.mark_read(self.conv, self.buyer)
+
+        self.assertEqual(self._count(self.buyer), 0)
+        self.assertEqual(unread.total_unread(self.buyer), 0)
+
+    def test_total_is_served_from_cache_until_a_message_arrives(self):
+        Message.objects.create(conversation=self.conv, sender=self.seller, text="1")
+        self.assertEqual(unread.total_unread(self.buyer), 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(unread.total_unread(self.buyer), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.create(conversation=self.conv, sender=self.seller, text="2")
+        self.assertEqual(unread.total_unread(self.buyer), 2)
+
+    def test_message_updates_only_inbox_counters(self):
+        with CaptureQueriesContext(connection) as ctx:
+            Message.objects.create(conversation=self.conv, sender=self.seller, text="1")
+
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertFalse([sql for sql in updates if "messaging_conversationreadstate" in sql])
+        self.assertEqual(len([sql for sql in updates if "messaging_inboxentry" in sql]), 1)
+
+    def test_user_without_read_state_is_counted(self):
+        newcomer = _make_user("unread-newcomer@example.com")
+        self.conv.participants.add(newcomer)
+
+        Message.objects.create(conversation=self.conv, sender=self.seller, text="1")
+
+        self.assertFalse(ConversationReadState.objects.filter(user=newcomer).exists())
+        self.assertEqual(unread.total_unread(newcomer), 1)
+
+
+@override_settings(SNOBISTIC_REALTIME_BACKEND="messaging.realtime.InMemoryBroker")
+class RealtimeBrokerTests(TestCase):
+    async def test_fan_out_to_all_subscribers(self):
+        broker = realtime.get_broker()
+        a = await broker.subscribe(["conv:1"])
+        b = await broker.subscribe(["conv:1", realtime.STAFF_CHANNEL])
+
+        broker.publish("conv:1", {"type": "message", "message": 10})
+
+        self.assertEqual((await a.get(timeout=1))["message"], 10)
+        self.assertEqual((await b.get(timeout=1))["message"], 10)
+
+        await broker.unsubscribe(a)
+        await broker.unsubscribe(b)
+        self.assertEqual(broker.subscriber_count("conv:1"), 0)
+
+    @override_settings(SNOBISTIC_REALTIME_QUEUE_SIZE=2)
+    async def test_slow_subscriber_gets_resync_instead_of_unbounded_queue(self):
+        broker = realtime.get_broker()
+        sub = await broker.subscribe(["conv:2"])
+
+        for i in range(5):
+            broker.publish("conv:2", {"type": "message", "message": i})
+
+        self.assertEqual((await sub.get(timeout=1))["type"], realtime.EVENT_RESYNC)
+        self.assertIsNone(await sub.get(timeout=0.05))
+        await broker.unsubscribe(sub)
+
+
+@override_settings(
+    SNOBISTIC_REALTIME_BACKEND="messaging.realtime.InMemoryBroker",
+    SNOBISTIC_REALTIME_ENABLED=True,
+)
+class RealtimePublishTests(TestCase):
+    def setUp(self):
+        self.user = _make_user("live-user@example.com")
+        self.conv = Conversation.objects.create(
+            kind=Conversation.KIND_SUPPORT,
+            support_user=self.user,
+            allow_staff=True,
+        )
+        self.conv.participants.add(self.user)
+
+    def test_new_message_is_published_after_commit_to_conversation_and_staff(self):
+        published = []
+        broker = realtime.get_broker()
+        with mock.patch.object(broker, "publish", side_effect=lambda ch, ev: published.append((ch, ev))):
+            with self.captureOnCommitCallbacks(execute=True):
+                msg = Message.objects.create(conversation=self.conv, sender=self.user, text="live")
+
+        self.assertEqual(
+            [(ch, ev["message"]) for ch, ev in published],
+            [(realtime.conversation_channel(self.conv.pk), msg.pk), (realtime.STAFF_CHANNEL, msg.pk)],
+        )
+
+    def test_live_and_typing_endpoints_check_access(self):
+        other = _make_user("live-other@example.com")
+        self.client.force_login(other)
+
+        self.assertEqual(self.client.get(reverse("messaging:live", args=[self.conv.pk])).status_code, 404)
+        self.assertEqual(self.client.post(reverse("messaging:typing", args=[self.conv.pk])).status_code, 404)
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.post(reverse("messaging:typing", args=[self.conv.pk])).status_code, 204)
+
+    async def test_live_stream_delivers_published_message(self):
+        await self.async_client.aforce_login(self.user)
+        resp = await self.async_client.get(reverse("messaging:live", args=[self.conv.pk]))
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+
+        stream = aiter(resp.streaming_content)
+        # primul chunk abonează stream-ul la broker
+        self.assertEqual(await asyncio.wait_for(anext(stream), 1), b"retry: 3000\n\n")
+
+        msg = await Message.objects.acreate(conversation=self.conv, sender=self.user, text="live")
+        await sync_to_async(realtime.publish_message)(msg)
+
+        chunk = (await asyncio.wait_for(anext(stream), 1)).decode()
+        self.assertTrue(chunk.startswith("event: message\n"))
+        self.assertEqual(json.loads(chunk.split("data: ", 1)[1])["message"], msg.pk)
+        await stream.aclose()
+
+    @override_settings(SNOBISTIC_REALTIME_ENABLED=False)
+    def test_live_is_off_without_asgi(self):
+        self.client.force_login(self.user)
+
+        self.assertEqual(self.client.get(reverse("messaging:live", args=[self.conv.pk])).status_code, 204)
+        page = self.client.get(reverse("messaging:conversation_detail", args=[self.conv.pk]))
+        self.assertNotContains(page, "new EventSource")
+
+        published = []
+        broker = realtime.get_broker()
+        with mock.patch.object(broker, "publish", side_effect=lambda ch, ev: published.append(ch)):
+            with self.captureOnCommitCallbacks(execute=True):
+                Message.objects.create(conversation=self.conv, sender=self.user, text="offline")
+        self.assertEqual(published, [])
+
+
+class MessageSearchIndexTests(TestCase):
+    def setUp(self):
+        self.user = _make_user("search-user@example.com")
+        self.conv = Conversation.objects.create(kind=Conversation.KIND_SUPPORT, support_user=self.user)
+        self.conv.participants.add(self.user)
+        self.other = Conversation.objects.create(
+            kind=Conversation.KIND_SUPPORT,
+            support_user=_make_user("search-other@example.com"),
+        )
+
+    def _ids(self, q):
+        return {row["conversation_id"] for row in search.matching_conversation_ids(q)}
+
+    def test_terms_are_normalized_and_prefix_matched(self):
+        Message.objects.create(conversation=self.conv, sender=self.user, text="Coletul pentru Comanda a întârziat")
+        Message.objects.create(conversation=self.other, sender=self.user, text="Altceva")
+
+        self.assertEqual(self._ids("intarziat"), {self.conv.pk})
+        self.assertEqual(self._ids("comanda colet"), {self.conv.pk})
+        self.assertEqual(self._ids("comanda altceva"), set())
+
+    def test_rebuild_matches_incremental_index(self):
+        Message.objects.create(conversation=self.conv, sender=self.user, text="retur produs")
+        before = set(MessageSearchTerm.objects.values_list("term", "message_id"))
+
+        search.rebuild_search_index()
+
+        self.assertEqual(set(MessageSearchTerm.objects.values_list("term", "message_id")), before)
+
+    def test_inbox_search_uses_index(self):
+        Message.objects.create(conversation=self.conv, sender=self.user, text="factura lipsă")
+        self.client.force_login(self.user)
+
+        resp = self.client.get(reverse("messaging:conversation_list"), {"q": "factur"})
+
+        self.assertEqual([e.conversation_id for e in resp.context["entries"]], [self.conv.pk])
@@ -0,0 +1,59 @@
+# messaging/unread.py
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Conversation, ConversationReadState, InboxEntry
+
+# =============================================================================
+# Total necitite per user (badge) din InboxEntry.unread_count, în cache
+# =============================================================================
+# - contorul per conversație e unul singur: InboxEntry.unread_count, ținut la zi
+#   de messaging/inbox.py (+1 la mesaj, 0 la citire, calculat la creare/rebuild)
+# - total per user: SUM pe rândurile de inbox ale userului, ținut în cache; cheia
+#   se invalidează după commit de inbox.py la orice schimbare a rândurilor userului
+# - derive: comanda rebuild_inbox recalculează contoarele din Message
+
+TOTAL_CACHE_TTL = 60 * 60
+
+
+def _total_key(user_id: int) -> str:
+    return f"messaging:unread_total:{user_id}"
+
+
+def invalidate_totals(user_ids: Iterable[int]) -> None:
+    keys = [_total_key(uid) for uid in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def total_unread(user) -> int:
+    """
+    Badge-ul global "ai N mesaje necitite": din cache, altfel un SUM pe rândurile de inbox ale userului.
+    """
+    if not user or not getattr(user, "pk", None):
+        return 0
+    key = _total_key(user.pk)
+    total = cache.get(key)
+    if total is None:
+        total = InboxEntry.objects.filter(user=user).aggregate(total=Coalesce(Sum("unread_count"), 0))["total"]
+        cache.set(key, total, TOTAL_CACHE_TTL)
+    return int(total)
+
+
+def mark_read(conv: Conversation, user, ts=None) -> ConversationReadState:
+    """
+    Mută last_read_at; rândul de inbox (și totalul) se resetează din semnalul pe ConversationReadState.
+    """
+    state, _ = ConversationReadState.objects.update_or_create(
+        conversation=conv,
+        user=user,
+        defaults={"last_read_at": ts or timezone.now()},
+    )
+    return state
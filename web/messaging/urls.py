@@ -21,5 +21,11 @@ urlpatterns = [
     path("<int:pk>/close/", views.conversation_close_view, name="close"),
     path("<int:pk>/reopen/", views.conversation_reopen_view, name="reopen"),
 
+    # ✅ live (ASGI / Server-Sent Events)
+    path("live/staff/", views.staff_live_view, name="staff_live"),
+    path("<int:pk>/live/", views.conversation_live_view, name="live"),
+    path("<int:pk>/typing/", views.conversation_typing_view, name="typing"),
+    path("<int:pk>/mesaj/<int:message_id>/", views.message_fragment_view, name="message_fragment"),
+
     path("<int:pk>/", views.conversation_detail_view, name="conversation_detail"),
 ]
@@ -1,25 +1,28 @@
 # messaging/views.py
 from __future__ import annotations
 
-import datetime
+import os
 
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.core.paginator import Paginator
-from django.db import transaction, models
-from django.db.models import Q, Count, OuterRef, Subquery, Value
-from django.db.models.functions import Coalesce
-from django.http import Http404
-from django.http.response import FileResponse
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 
+from core import images
+from core.files import StoredFile, serve_file
 from orders.models import Order
 
+from . import realtime, search, unread
 from .forms import MessageForm
-from .models import Conversation, Message, ConversationReadState, MessageAttachment
+from .models import Conversation, Message, ConversationReadState, InboxEntry, MessageAttachment
 
 CONVERSATIONS_PER_PAGE = 20
 MESSAGES_PER_PAGE = 30
@@ -65,90 +68,21 @@ def _get_or_create_state(conv: Conversation, user) -> ConversationReadState:
 
 @login_required
 def conversation_list_view(request):
-    # base visibility
-    qs = Conversation.objects.filter(participants=request.user)
-
-    if request.user.is_staff:
-        staff_qs = Conversation.objects.filter(allow_staff=True)
-        qs = (qs | staff_qs)
-
-    qs = qs.distinct()
-
-    # ===== annotations: last_read, unread_count, last_message preview, user state (archived/muted) =====
-    epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
-
-    last_read_sq = ConversationReadState.objects.filter(
-        conversation=OuterRef("pk"),
-        user=request.user,
-    ).values("last_read_at")[:1]
-
-    last_read_expr = Coalesce(
-        Subquery(last_read_sq, output_field=models.DateTimeField()),
-        Value(epoch, output_field=models.DateTimeField()),
-    )
-
-    # user state subqueries
-    archived_sq = ConversationReadState.objects.filter(
-        conversation=OuterRef("pk"),
-        user=request.user,
-    ).values("is_archived")[:1]
-
-    muted_sq = ConversationReadState.objects.filter(
-        conversation=OuterRef("pk"),
-        user=request.user,
-    ).values("is_muted")[:1]
-
-    muted_until_sq = ConversationReadState.objects.filter(
-        conversation=OuterRef("pk"),
-        user=request.user,
-    ).values("muted_until")[:1]
-
-    # last message subqueries
-    last_msg = Message.objects.filter(conversation=OuterRef("pk")).order_by("-sent_at", "-pk")
-    last_msg_text_sq = last_msg.values("text")[:1]
-    last_msg_sent_sq = last_msg.values("sent_at")[:1]
-    last_msg_sender_email_sq = last_msg.values("sender__email")[:1]
-    last_msg_sender_fn_sq = last_msg.values("sender__first_name")[:1]
-    last_msg_sender_ln_sq = last_msg.values("sender__last_name")[:1]
-
-    qs = qs.annotate(
-        # preview
-        last_message_text=Subquery(last_msg_text_sq, output_field=models.TextField()),
-        last_message_sent_at=Subquery(last_msg_sent_sq, output_field=models.DateTimeField()),
-        last_message_sender_email=Subquery(last_msg_sender_email_sq, output_field=models.CharField()),
-        last_message_sender_first_name=Subquery(last_msg_sender_fn_sq, output_field=models.CharField()),
-        last_message_sender_last_name=Subquery(last_msg_sender_ln_sq, output_field=models.CharField()),
-
-        # state
-        is_archived=Coalesce(
-            Subquery(archived_sq, output_field=models.BooleanField()),
-            Value(False, output_field=models.BooleanField()),
-        ),
-        is_muted=Coalesce(
-            Subquery(muted_sq, output_field=models.BooleanField()),
-            Value(False, output_field=models.BooleanField()),
-        ),
-        muted_until=Subquery(muted_until_sq, output_field=models.DateTimeField()),
-
-        # unread
-        unread_count=Count(
-            "messages",
-            filter=Q(messages__sent_at__gt=last_read_expr) & ~Q(messages__sender=request.user),
-        ),
-    ).order_by("-last_updated", "-pk")
+    """
+    Inbox = rândurile InboxEntry ale userului (participant sau staff pe allow_staff),
+    ținute la zi de messaging/inbox.py. Un range scan pe (user, is_archived, [kind,] sort_at).
+    """
+    qs = InboxEntry.objects.filter(user=request.user).select_related("conversation")
 
     # ===== filters/search =====
+    show = (request.GET.get("show") or "").strip().lower()
+    # show=archived => only archived
+    qs = qs.filter(is_archived=(show == "archived"))
+
     kind = (request.GET.get("kind") or "").strip().upper()
     if kind in {Conversation.KIND_ORDER, Conversation.KIND_SUPPORT}:
         qs = qs.filter(kind=kind)
 
-    show = (request.GET.get("show") or "").strip().lower()
-    # show=archived => only archived
-    if show == "archived":
-        qs = qs.filter(is_archived=True)
-    else:
-        qs = qs.filter(is_archived=False)
-
     if (request.GET.get("unread") or "").strip() == "1":
         qs = qs.filter(unread_count__gt=0)
 
@@ -158,17 +92,25 @@ def conversation_list_view(request):
 
     q = (request.GET.get("q") or "").strip()
     if q:
-        qf = Q()
+        # id-uri de conversații din indexul de mesaje + participanți; inbox-ul se filtrează pe ele
+        user_field = Conversation.participants.field.m2m_reverse_field_name()
+        participant_match = Conversation.participants.through.objects.filter(
+            Q(**{f"{user_field}__email__icontains": q})
+            | Q(**{f"{user_field}__first_name__icontains": q})
+            | Q(**{f"{user_field}__last_name__icontains": q})
+        ).values("conversation_id")
+
+        qf = Q(conversation_id__in=participant_match)
+        text_match = search.matching_conversation_ids(q)
+        if text_match is not None:
+            qf |= Q(conversation_id__in=text_match)
         if q.isdigit():
-            qf |= Q(order_id=int(q))
-            qf |= Q(pk=int(q))
-        qf |= Q(participants__email__icontains=q)
-        qf |= Q(participants__first_name__icontains=q)
-        qf |= Q(participants__last_name__icontains=q)
-        qf |= Q(messages__text__icontains=q)
-        qs = qs.filter(qf).distinct()
-
-    # prefetch small page worth of participants
+            qf |= Q(conversation__order_id=int(q))
+            qf |= Q(conversation_id=int(q))
+        qs = qs.filter(qf)
+
+    qs = qs.order_by("-sort_at", "-conversation_id")
+
     paginator = Paginator(qs, CONVERSATIONS_PER_PAGE)
     page_number = request.GET.get("page") or "1"
     page_obj = paginator.get_page(page_number)
@@ -177,7 +119,7 @@ def conversation_list_view(request):
         request,
         "messaging/conversation_list.html",
         {
-            "conversations": page_obj.object_list,
+            "entries": page_obj.object_list,
             "page_obj": page_obj,
             "is_staff_inbox": bool(request.user.is_staff),
             "filters": {
@@ -288,20 +230,33 @@ def attachment_serve_view(request, pk: int):
 
     inline = request.GET.get("inline") == "1"
 
-    resp = FileResponse(
-        att.file.open("rb"),
-        as_attachment=not inline,
+    # ?variant=card|detail|zoom -> derivată redimensionată (doar pentru imagini)
+    variant = request.GET.get("variant")
+    if variant in images.VARIANTS and att.is_image:
+        fmt = "webp" if "image/webp" in request.headers.get("Accept", "") else "jpeg"
+        try:
+            name = images.ensure_derivative(att.file.name, variant, fmt)
+        except Exception:
+            name = None  # fișier corupt / format nesuportat -> servim originalul
+        if name:
+            resp = serve_file(
+                request,
+                StoredFile(name),
+                filename=f"{os.path.splitext(att.original_name or 'image')[0]}.{fmt}",
+                as_attachment=False,
+                content_type=images.FORMATS[fmt][1],
+            )
+            resp["Vary"] = "Accept"
+            return resp
+
+    return serve_file(
+        request,
+        att.file,
         filename=att.original_name or "attachment",
+        as_attachment=not inline,
+        content_type=att.content_type or None,
     )
 
-    if att.content_type:
-        resp["Content-Type"] = att.content_type
-
-    if inline:
-        resp["Content-Disposition"] = f'inline; filename="{att.original_name or "attachment"}"'
-
-    return resp
-
 
 @require_POST
 @login_required
@@ -407,12 +362,8 @@ def conversation_detail_view(request, pk: int):
         raise Http404()
 
     def mark_read(ts=None):
-        ts = ts or timezone.now()
-        ConversationReadState.objects.update_or_create(
-            conversation=conv,
-            user=request.user,
-            defaults={"last_read_at": ts},
-        )
+        st = unread.mark_read(conv, request.user, ts)
+        transaction.on_commit(lambda: realtime.publish_read(conv, request.user, st.last_read_at))
 
     # fetch state for UI toggles
     st = _get_or_create_state(conv, request.user)
@@ -509,5 +460,79 @@ def conversation_detail_view(request, pk: int):
             },
             "can_close": can_close,
             "can_reopen": can_reopen,
+            "realtime_enabled": realtime.enabled(),
         },
     )
+
+
+# =============================================================================
+# Live (ASGI): Server-Sent Events per conversație + canal staff
+# =============================================================================
+TYPING_THROTTLE_SECONDS = 3
+
+
+def _sse_response(channels, user) -> StreamingHttpResponse:
+    resp = StreamingHttpResponse(
+        realtime.event_stream(channels, user_id=user.pk),
+        content_type="text/event-stream",
+    )
+    resp["Cache-Control"] = "no-cache"
+    resp["X-Accel-Buffering"] = "no"  # nginx: fără buffering pe stream
+    return resp
+
+
+@login_required
+async def conversation_live_view(request, pk: int):
+    """
+    Stream de evenimente (message/read/typing) pentru o conversație.
+    Doar sub ASGI (SNOBISTIC_REALTIME_ENABLED); altfel 204, iar EventSource nu mai reconectează.
+    """
+    if not realtime.enabled():
+        return HttpResponse(status=204)
+    user = await request.auser()
+    conv = await Conversation.objects.filter(pk=pk).afirst()
+    if conv is None or not await sync_to_async(conv.can_view)(user):
+        raise Http404()
+    return _sse_response([realtime.conversation_channel(conv.pk)], user)
+
+
+@login_required
+async def staff_live_view(request):
+    """
+    Watchers staff: evenimentele din toate conversațiile allow_staff.
+    """
+    if not realtime.enabled():
+        return HttpResponse(status=204)
+    user = await request.auser()
+    if not user.is_staff:
+        raise Http404()
+    return _sse_response([realtime.STAFF_CHANNEL], user)
+
+
+@require_POST
+@login_required
+def conversation_typing_view(request, pk: int):
+    conv = get_object_or_404(Conversation, pk=pk)
+    if not conv.can_view(request.user):
+        raise Http404()
+
+    # max un eveniment typing / user / conversație la câteva secunde
+    if realtime.enabled() and cache.add(f"msg_typing:{conv.pk}:{request.user.pk}", 1, TYPING_THROTTLE_SECONDS):
+        realtime.publish_typing(conv, request.user)
+    return HttpResponse(status=204)
+
+
+@login_required
+def message_fragment_view(request, pk: int, message_id: int):
+    """
+    Bula unui mesaj, randată pentru userul curent (clientul o inserează la evenimentul "message").
+    """
+    conv = get_object_or_404(Conversation, pk=pk)
+    if not conv.can_view(request.user):
+        raise Http404()
+
+    msg = get_object_or_404(
+        conv.messages.select_related("sender").prefetch_related("attachments"),
+        pk=message_id,
+    )
+    return render(request, "messaging/partials/message_bubble.html", {"msg": msg})
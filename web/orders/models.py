@@ -12,7 +12,7 @@ from django.utils.functional import cached_property
 
 from accounts.models import Address
 from collections import defaultdict
-from wallet.models import Wallet, WalletTransaction
+from wallet.models import WalletTransaction
 
 def _pct(amount: Decimal, percent: Decimal) -> Decimal:
     """
@@ -26,6 +26,21 @@ def _pct(amount: Decimal, percent: Decimal) -> Decimal:
     )
 
 
+class OrderQuerySet(models.QuerySet):
+    def escrow_releasable(self):
+        """
+        Aceleași condiții ca Order.release_escrow(force=False), set-wise:
+        escrow HELD, predată curierului / în tranzit / livrată, fără retur în așteptare.
+        """
+        pending_return = ReturnRequest.objects.filter(
+            order=models.OuterRef("pk"), status=ReturnRequest.STATUS_PENDING
+        )
+        return self.filter(
+            escrow_status=Order.ESCROW_HELD,
+            shipping_status__in=Order.ESCROW_RELEASE_SHIPPING,
+        ).exclude(models.Exists(pending_return))
+
+
 class Order(models.Model):
     # -----------------------------
     # Order type
@@ -68,6 +83,14 @@ class Order(models.Model):
         (STATUS_CANCELLED_BY_ADMIN, "Anulată de Snobistic"),
     ]
 
+    TERMINAL_STATUSES = (
+        STATUS_COMPLETED,
+        STATUS_REFUNDED,
+        STATUS_CANCELLED_BY_BUYER,
+        STATUS_CANCELLED_BY_SELLER,
+        STATUS_CANCELLED_BY_ADMIN,
+    )
+
     # -----------------------------
     # Payment status (low-level)
     # -----------------------------
@@ -106,6 +129,9 @@ class Order(models.Model):
         (SHIPPING_CANCELLED, "Anulată"),
     ]
 
+    # minim pentru eliberarea escrow-ului (release_escrow / escrow_releasable)
+    ESCROW_RELEASE_SHIPPING = (SHIPPING_SHIPPED, SHIPPING_IN_TRANSIT, SHIPPING_DELIVERED)
+
     # -----------------------------
     # Escrow status
     # -----------------------------
@@ -229,6 +255,8 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
 
@@ -273,14 +301,7 @@ class Order(models.Model):
             self.status = self.STATUS_AWAITING_PAYMENT
 
     def _set_status_if_not_terminal(self, new_status: str):
-        terminal = {
-            self.STATUS_COMPLETED,
-            self.STATUS_REFUNDED,
-            self.STATUS_CANCELLED_BY_BUYER,
-            self.STATUS_CANCELLED_BY_SELLER,
-            self.STATUS_CANCELLED_BY_ADMIN,
-        }
-        if self.status in terminal:
+        if self.status in self.TERMINAL_STATUSES:
             return
         self.status = new_status
 
@@ -444,16 +465,16 @@ class Order(models.Model):
             if net <= 0:
                 continue
 
-            wallet, _ = Wallet.objects.get_or_create(user=seller)
-            wallet.balance += net
-            wallet.save(update_fields=["balance"])
+            # ledger-ul wallet (idempotent pe external_id: o eliberare reluată nu dublează plata)
+            from wallet.services import credit_wallet
 
-            WalletTransaction.objects.create(
+            credit_wallet(
                 user=seller,
-                transaction_type=WalletTransaction.SALE_PAYOUT,
                 amount=net,
+                tx_type=WalletTransaction.Type.SALE_PAYOUT,
                 method="escrow_release",
-                balance_after=wallet.balance,
+                external_id=f"order:{self.pk}:payout:{seller.pk}",
+                meta={"order_id": self.pk, "gross": str(gross), "commission": str(commission)},
             )
 
     def release_escrow(self, *, force: bool = False):
@@ -462,11 +483,7 @@ class Order(models.Model):
 
         if not force:
             # minim: trebuie să fie predată curierului / în tranzit / livrată
-            if self.shipping_status not in (
-                self.SHIPPING_SHIPPED,
-                self.SHIPPING_IN_TRANSIT,
-                self.SHIPPING_DELIVERED,
-            ):
+            if self.shipping_status not in self.ESCROW_RELEASE_SHIPPING:
                 return
             if self.has_pending_return:
                 return
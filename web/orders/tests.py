@@ -1,3 +1,66 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import Address, Profile
+from catalog.models import Category, Product
+from payments.models import Payment
+
+from .models import Order, OrderItem
+
+User = get_user_model()
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com", password="x", first_name="S", last_name="V", is_active=True
+        )
+        Profile.objects.filter(user=self.seller).update(role_seller=True)
+        self.buyers = [
+            User.objects.create_user(
+                email=f"buyer{i}@example.com", password="x", first_name=f"B{i}", last_name="C", is_active=True
+            )
+            for i in range(3)
+        ]
+        category = Category.objects.create(name="Rochii", slug="rochii")
+        for i, buyer in enumerate(self.buyers):
+            address = Address.objects.create(
+                user=buyer, street_address="Str. 1", city="Iași", region="Iași", postal_code="700000", country="RO"
+            )
+            product = Product.objects.create(
+                owner=self.seller, title=f"P{i}", description="d", price=Decimal("100.00"),
+                category=category, size="M",
+            )
+            order = Order.objects.create(buyer=buyer, address=address, shipping_method="curier")
+            # două linii pe aceeași comandă nu trebuie să dubleze rândul din export
+            OrderItem.objects.create(order=order, product=product, price=product.price)
+            OrderItem.objects.create(order=order, product=product, price=product.price)
+        Payment.objects.create(
+            order=order, user=buyer, amount=Decimal("200.00"), status=Payment.Status.SUCCEEDED
+        )
+        self.client.force_login(self.seller)
+
+    def _rows(self, response):
+        body = b"".join(response.streaming_content).decode("utf-8-sig")
+        return body.splitlines()
+
+    def test_csv_export_is_streamed_without_per_order_queries(self):
+        response = self.client.get(reverse("orders:order_export"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        # o singură interogare pentru rânduri, indiferent de numărul de comenzi
+        with self.assertNumQueries(1):
+            lines = self._rows(response)
+        self.assertEqual(len(lines), 1 + len(self.buyers))
+        self.assertEqual(lines[0].split(",")[:3], ["Order ID", "Data", "Buyer"])
+        self.assertIn("B2 C", lines[1])
+        self.assertIn("Reușit", lines[1])
 
-# Create your tests here.
+    def test_xlsx_export(self):
+        response = self.client.get(reverse("orders:order_export"), {"format": "xlsx"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="orders_export.xlsx"')
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"PK"))
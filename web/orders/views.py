@@ -1,18 +1,21 @@
 # orders/views.py
-import csv
 from decimal import Decimal as D
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.http import HttpResponse, Http404
+from django.db.models import OuterRef, Subquery
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
 from django.utils import timezone
 
-from .models import Order, ReturnRequest, _pct
+from .models import Order, OrderItem, ReturnRequest, _pct
 from .forms import ReturnRequestForm
 
+from core.exports import FORMAT_CSV, Column, iter_values, requested_format, stream_export
 from invoices.models import Invoice
+from invoices.queries import invalidate_totals_on_commit
+from payments.models import Payment
 
 
 def _is_seller(user):
@@ -80,35 +83,58 @@ def order_detail_view(request, pk):
     )
 
 
+_STATUS_LABELS = dict(Order.STATUS_CHOICES)
+_SHIPPING_LABELS = dict(Order.SHIPPING_STATUS_CHOICES)
+_ORDER_PAYMENT_LABELS = dict(Order.PAYMENT_STATUS_CHOICES)
+_PAYMENT_LABELS = dict(Payment.Status.choices)
+
+
+def _payment_label(latest_payment_status, payment_status) -> str:
+    # aceeași regulă ca Order.payment_status_label, fără query per comandă
+    if latest_payment_status:
+        return _PAYMENT_LABELS.get(latest_payment_status, latest_payment_status)
+    return _ORDER_PAYMENT_LABELS.get(payment_status, payment_status)
+
+
+ORDER_EXPORT_COLUMNS = [
+    Column("Order ID", "id"),
+    Column("Data", lambda r: timezone.localdate(r["created_at"]).isoformat()),
+    Column("Buyer", lambda r: f"{r['buyer__first_name']} {r['buyer__last_name']}".strip() or r["buyer__email"]),
+    Column("Total", lambda r: f"{r['total']} RON"),
+    Column("Status plată", lambda r: _payment_label(r["latest_payment_status"], r["payment_status"])),
+    Column("Status livrare", lambda r: _SHIPPING_LABELS.get(r["shipping_status"], r["shipping_status"])),
+    Column("Lifecycle", lambda r: _STATUS_LABELS.get(r["status"], r["status"])),
+]
+
+
 @login_required
 @user_passes_test(_is_seller)
 def order_export_view(request):
+    """
+    Export comenzi vânzător în streaming (?format=csv|xlsx). O singură interogare:
+    cumpărătorul e în proiecție, statusul ultimei plăți vine dintr-un subquery.
+    """
+    fmt = requested_format(request, "format") or FORMAT_CSV
+    latest_payment = Payment.objects.filter(order=OuterRef("pk")).order_by("-created_at").values("status")[:1]
     orders = (
-        Order.objects.filter(items__product__owner=request.user)
-        .distinct()
-        .prefetch_related("items")
+        Order.objects.filter(pk__in=OrderItem.objects.filter(product__owner=request.user).values("order_id"))
+        .annotate(latest_payment_status=Subquery(latest_payment))
+        .order_by("-created_at", "-pk")
     )
-
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="orders_export.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(["Order ID", "Data", "Buyer", "Total", "Status plată", "Status livrare", "Lifecycle"])
-
-    for o in orders:
-        buyer_name = getattr(o.buyer, "full_name", "").strip() or o.buyer.email
-        writer.writerow(
-            [
-                o.id,
-                o.created_at.strftime("%Y-%m-%d"),
-                buyer_name,
-                f"{o.total} RON",
-                o.payment_status_label,
-                o.get_shipping_status_display(),
-                o.get_status_display(),
-            ]
-        )
-    return response
+    rows = iter_values(
+        orders,
+        "id",
+        "created_at",
+        "buyer__first_name",
+        "buyer__last_name",
+        "buyer__email",
+        "total",
+        "payment_status",
+        "latest_payment_status",
+        "shipping_status",
+        "status",
+    )
+    return stream_export(rows, ORDER_EXPORT_COLUMNS, filename="orders_export", fmt=fmt, sheet_name="Comenzi")
 
 
 @login_required
@@ -247,6 +273,9 @@ def invoice_view(request, order_id, kind):
             "status": Invoice.Status.ISSUED,
         },
     )
+    if created:
+        # totalurile pe perioade din listări (cache) trebuie să includă factura nouă
+        invalidate_totals_on_commit([invoice])
 
     return render(
         request,
@@ -0,0 +1,65 @@
+# payments/management/commands/reconcile_stripe.py
+
+from __future__ import annotations
+
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payments.models import Payment
+from payments.reconciliation import payments_missing_intent_q, reconcile_stripe_export
+
+
+def _parse_day(value: str):
+    if not value:
+        return None
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Dată invalidă: {value} (format YYYY-MM-DD)")
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconciliază Payment/Refund/Order.payment_status cu un export Stripe "
+        "(balance transactions, CSV sau JSONL) și scrie un raport CSV de neconcordanțe."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("export_path", help="Fișierul exportat din Stripe (.csv / .jsonl).")
+        parser.add_argument("-o", "--output", default="stripe_reconciliation.csv", help="Raportul CSV.")
+        parser.add_argument("--from", dest="date_from", default="", help="Payment.created_at >= (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="date_to", default="", help="Payment.created_at < (YYYY-MM-DD).")
+        parser.add_argument("--partitions", type=int, default=16, help="Partiții (hash pe payment_intent).")
+        parser.add_argument("--workers", type=int, default=1, help="Procese paralele.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="PI-uri per query.")
+        parser.add_argument("--workdir", default=None, help="Director pentru fișierele temporare.")
+
+    def handle(self, *args, **options):
+        report = reconcile_stripe_export(
+            options["export_path"],
+            options["output"],
+            partitions=options["partitions"],
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+            created_from=_parse_day(options["date_from"]),
+            created_to=_parse_day(options["date_to"]),
+            workdir=options["workdir"],
+        )
+
+        self.stdout.write(self.style.WARNING("== Reconciliere Stripe =="))
+        self.stdout.write(
+            f"Rânduri export: {report.export_rows} (ignorate: {report.export_rows_skipped}) | "
+            f"PI-uri: {report.payment_intents} | Payment-uri DB: {report.db_payments}"
+        )
+        for kind, count in sorted(report.by_kind.items()):
+            self.stdout.write(f"  {kind}: {count}")
+
+        without_pi = Payment.objects.filter(payments_missing_intent_q()).count()
+        if without_pi:
+            self.stdout.write(self.style.WARNING(f"Payment-uri Stripe reușite fără payment_intent: {without_pi}"))
+
+        style = self.style.SUCCESS if not report.mismatches else self.style.ERROR
+        self.stdout.write(style(f"Neconcordanțe: {report.mismatches} -> {report.output_path}"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_remove_payment_wallet_remove_wallettransaction_user_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='stripe_payment_intent_id',
+            field=models.CharField(blank=True, db_index=True, help_text='Payment Intent ID din Stripe (dacă este disponibil).', max_length=255),
+        ),
+    ]
@@ -68,6 +68,7 @@ class Payment(models.Model):
     stripe_payment_intent_id = models.CharField(
         max_length=255,
         blank=True,
+        db_index=True,
         help_text="Payment Intent ID din Stripe (dacă este disponibil).",
     )
 
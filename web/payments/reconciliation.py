@@ -0,0 +1,421 @@
+# payments/reconciliation.py
+from __future__ import annotations
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import connections
+from django.db.models import Q, Sum
+
+from core.background import django_process_pool
+from orders.models import Order
+from .models import Payment, Refund
+
+# =============================================================================
+# Reconciliere Payment/Refund/Order.payment_status vs. export Stripe
+# =============================================================================
+# Pipeline (memorie limitată):
+#   1) exportul (CSV sau JSONL) este citit în flux și fiecare rând relevant e scris
+#      într-o partiție (hash pe payment_intent id) -> fișiere temporare
+#   2) PI-urile Payment-urilor Stripe din DB sunt scrise în aceleași partiții
+#   3) fiecare partiție e procesată independent (în paralel): agregăm exportul per PI,
+#      apoi join în bulk cu Payment / Refund / Order pe bucăți de PI-uri
+#   4) neconcordanțele sunt scrise într-un CSV (raportul final)
+#
+# Convenție sume: în JSONL (API) `amount`/`fee` întregi = unități minore (bani);
+# în CSV (export Dashboard) sumele sunt în unități majore ("49.99").
+
+CHARGE_TYPES = {"charge", "payment"}
+REFUND_TYPES = {"refund", "payment_refund"}
+
+MISSING_IN_DB = "missing_in_db"
+MISSING_IN_EXPORT = "missing_in_export"
+STATUS_MISMATCH = "status_mismatch"
+AMOUNT_MISMATCH = "amount_mismatch"
+CURRENCY_MISMATCH = "currency_mismatch"
+REFUND_MISMATCH = "refund_mismatch"
+ORDER_STATUS_MISMATCH = "order_status_mismatch"
+
+REPORT_FIELDS = [
+    "kind",
+    "payment_intent_id",
+    "payment_id",
+    "order_id",
+    "db_status",
+    "order_payment_status",
+    "db_amount",
+    "export_charged",
+    "db_refunded",
+    "export_refunded",
+    "currency",
+    "detail",
+]
+
+CENT = Decimal("0.01")
+
+
+@dataclass
+class ReconciliationReport:
+    export_rows: int = 0
+    export_rows_skipped: int = 0
+    payment_intents: int = 0
+    db_payments: int = 0
+    mismatches: int = 0
+    by_kind: Dict[str, int] = field(default_factory=dict)
+    output_path: str = ""
+
+    def merge(self, other: "ReconciliationReport") -> None:
+        self.payment_intents += other.payment_intents
+        self.db_payments += other.db_payments
+        self.mismatches += other.mismatches
+        for k, v in other.by_kind.items():
+            self.by_kind[k] = self.by_kind.get(k, 0) + v
+
+
+# -----------------------------------------------------------------------------
+# Parsing
+# -----------------------------------------------------------------------------
+def _amount(value, *, minor_units: bool) -> Decimal:
+    if value is None or value == "":
+        return Decimal("0.00")
+    try:
+        if isinstance(value, int) and minor_units:
+            return (Decimal(value) / Decimal("100")).quantize(CENT)
+        return Decimal(str(value).replace(",", "")).quantize(CENT)
+    except (InvalidOperation, ValueError):
+        return Decimal("0.00")
+
+
+def _payment_intent_of(row: dict) -> str:
+    for key in ("payment_intent_id", "payment_intent", "payment_intent.id"):
+        v = row.get(key)
+        if isinstance(v, str) and v:
+            return v.strip()
+    source = row.get("source")
+    if isinstance(source, dict):
+        v = source.get("payment_intent")
+        if isinstance(v, str) and v:
+            return v.strip()
+    meta = row.get("metadata")
+    if isinstance(meta, dict):
+        v = meta.get("payment_intent")
+        if isinstance(v, str) and v:
+            return v.strip()
+    return ""
+
+
+def _normalize(row: dict, *, minor_units: bool) -> Optional[Tuple[str, str, Decimal, Decimal, str]]:
+    """
+    -> (payment_intent_id, kind[charge|refund], amount>=0, fee, currency) sau None dacă rândul nu e relevant.
+    """
+    row = {str(k).strip().lower(): v for k, v in row.items()}
+    kind = str(row.get("type") or row.get("reporting_category") or "").strip().lower()
+    if kind in CHARGE_TYPES:
+        kind = "charge"
+    elif kind in REFUND_TYPES:
+        kind = "refund"
+    else:
+        return None
+
+    pi = _payment_intent_of(row)
+    if not pi:
+        return None
+
+    amount = abs(_amount(row.get("amount"), minor_units=minor_units))
+    fee = abs(_amount(row.get("fee"), minor_units=minor_units))
+    currency = str(row.get("currency") or "").strip().upper()
+    return pi, kind, amount, fee, currency
+
+
+def iter_export_rows(path: str) -> Iterator[dict]:
+    """
+    Citește exportul rând cu rând (.csv sau .jsonl/.ndjson), fără să-l încarce în memorie.
+    """
+    lower = path.lower()
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        if lower.endswith((".jsonl", ".ndjson", ".json")):
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except ValueError:
+                    yield {}
+                    continue
+                yield obj if isinstance(obj, dict) else {}
+        else:
+            yield from csv.DictReader(fh)
+
+
+# -----------------------------------------------------------------------------
+# Partitioning (spill to disk)
+# -----------------------------------------------------------------------------
+def _partition_of(payment_intent_id: str, partitions: int) -> int:
+    return zlib.crc32(payment_intent_id.encode("utf-8")) % partitions
+
+
+class _PartitionWriter:
+    def __init__(self, workdir: str, prefix: str, partitions: int):
+        self.paths = [os.path.join(workdir, f"{prefix}-{i:04d}.tsv") for i in range(partitions)]
+        self._files = [open(p, "w", encoding="utf-8", newline="") for p in self.paths]
+        self.partitions = partitions
+
+    def write(self, payment_intent_id: str, *cols) -> None:
+        fh = self._files[_partition_of(payment_intent_id, self.partitions)]
+        fh.write("\t".join([payment_intent_id, *map(str, cols)]) + "\n")
+
+    def close(self) -> None:
+        for fh in self._files:
+            fh.close()
+
+
+def _spill_export(path: str, writer: _PartitionWriter, report: ReconciliationReport) -> None:
+    minor_units = path.lower().endswith((".jsonl", ".ndjson", ".json"))
+    for row in iter_export_rows(path):
+        report.export_rows += 1
+        norm = _normalize(row, minor_units=minor_units)
+        if norm is None:
+            report.export_rows_skipped += 1
+            continue
+        pi, kind, amount, fee, currency = norm
+        writer.write(pi, kind, amount, fee, currency)
+
+
+def _spill_db_payment_intents(writer: _PartitionWriter, *, created_from=None, created_to=None) -> None:
+    qs = Payment.objects.filter(provider=Payment.Provider.STRIPE).exclude(stripe_payment_intent_id="")
+    if created_from:
+        qs = qs.filter(created_at__gte=created_from)
+    if created_to:
+        qs = qs.filter(created_at__lt=created_to)
+    for pi in qs.values_list("stripe_payment_intent_id", flat=True).iterator(chunk_size=5000):
+        writer.write(pi)
+
+
+# -----------------------------------------------------------------------------
+# Per-partition join
+# -----------------------------------------------------------------------------
+@dataclass
+class _ExportAgg:
+    charged: Decimal = Decimal("0.00")
+    refunded: Decimal = Decimal("0.00")
+    fees: Decimal = Decimal("0.00")
+    currency: str = ""
+
+
+def _load_export_partition(path: str) -> Dict[str, _ExportAgg]:
+    aggs: Dict[str, _ExportAgg] = defaultdict(_ExportAgg)
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            pi, kind, amount, fee, currency = line.rstrip("\n").split("\t")
+            agg = aggs[pi]
+            if kind == "charge":
+                agg.charged += Decimal(amount)
+            else:
+                agg.refunded += Decimal(amount)
+            agg.fees += Decimal(fee)
+            agg.currency = agg.currency or currency
+    return aggs
+
+
+def _load_db_partition(path: str) -> set:
+    with open(path, "r", encoding="utf-8") as fh:
+        return {line.rstrip("\n") for line in fh if line.strip()}
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _check_payment(pi: str, payment: Optional[dict], refunded_db: Decimal, agg: Optional[_ExportAgg]) -> List[dict]:
+    out: List[dict] = []
+
+    def row(kind: str, detail: str = "") -> dict:
+        return {
+            "kind": kind,
+            "payment_intent_id": pi,
+            "payment_id": payment["id"] if payment else "",
+            "order_id": payment["order_id"] if payment else "",
+            "db_status": payment["status"] if payment else "",
+            "order_payment_status": payment["order__payment_status"] if payment else "",
+            "db_amount": payment["amount"] if payment else "",
+            "export_charged": agg.charged if agg else "",
+            "db_refunded": refunded_db if payment else "",
+            "export_refunded": agg.refunded if agg else "",
+            "currency": (agg.currency if agg else "") or (payment["currency"] if payment else ""),
+            "detail": detail,
+        }
+
+    if payment is None:
+        if agg and agg.charged > 0:
+            out.append(row(MISSING_IN_DB, "charge în export fără Payment"))
+        return out
+
+    if agg is None or agg.charged <= 0:
+        if payment["status"] == Payment.Status.SUCCEEDED:
+            out.append(row(MISSING_IN_EXPORT, "Payment succeeded fără charge în export"))
+        return out
+
+    if payment["status"] != Payment.Status.SUCCEEDED:
+        out.append(row(STATUS_MISMATCH, "charge în export, Payment nu e succeeded"))
+
+    if Decimal(payment["amount"]).quantize(CENT) != agg.charged:
+        out.append(row(AMOUNT_MISMATCH))
+
+    if agg.currency and (payment["currency"] or "").upper() != agg.currency:
+        out.append(row(CURRENCY_MISMATCH))
+
+    if refunded_db != agg.refunded:
+        out.append(row(REFUND_MISMATCH))
+
+    net = agg.charged - agg.refunded
+    order_status = payment["order__payment_status"]
+    if net <= 0 and order_status != Order.PAYMENT_REFUNDED:
+        out.append(row(ORDER_STATUS_MISMATCH, "integral rambursat în export"))
+    elif net > 0 and order_status in (Order.PAYMENT_PENDING, Order.PAYMENT_FAILED, Order.PAYMENT_CANCELLED):
+        out.append(row(ORDER_STATUS_MISMATCH, "încasat în export, comanda neplătită"))
+    return out
+
+
+def reconcile_partition(
+    export_path: str,
+    db_path: str,
+    out_path: str,
+    *,
+    chunk_size: int = 1000,
+) -> ReconciliationReport:
+    """
+    Join pentru o singură partiție. Memoria e proporțională cu PI-urile din partiție.
+    Query-uri: 2 per bucată de `chunk_size` PI-uri (payments + refunds agregate).
+    """
+    report = ReconciliationReport(output_path=out_path)
+    aggs = _load_export_partition(export_path)
+    db_pis = _load_db_partition(db_path)
+    all_pis = sorted(set(aggs) | db_pis)
+    report.payment_intents = len(all_pis)
+
+    with open(out_path, "w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=REPORT_FIELDS)
+        for chunk in _chunks(all_pis, chunk_size):
+            payments: Dict[str, dict] = {}
+            for p in (
+                Payment.objects.filter(provider=Payment.Provider.STRIPE, stripe_payment_intent_id__in=chunk)
+                .order_by("stripe_payment_intent_id", "-created_at")
+                .values(
+                    "id",
+                    "stripe_payment_intent_id",
+                    "order_id",
+                    "status",
+                    "amount",
+                    "currency",
+                    "order__payment_status",
+                )
+            ):
+                # un PI = o încercare; dacă există duplicate păstrăm cel mai recent
+                payments.setdefault(p["stripe_payment_intent_id"], p)
+            report.db_payments += len(payments)
+
+            refunded = {
+                r["payment_id"]: (r["total"] or Decimal("0.00")).quantize(CENT)
+                for r in Refund.objects.filter(
+                    payment_id__in=[p["id"] for p in payments.values()],
+                    status=Refund.Status.SUCCEEDED,
+                )
+                .values("payment_id")
+                .annotate(total=Sum("amount"))
+            }
+
+            for pi in chunk:
+                payment = payments.get(pi)
+                refunded_db = refunded.get(payment["id"], Decimal("0.00")) if payment else Decimal("0.00")
+                for mismatch in _check_payment(pi, payment, refunded_db, aggs.get(pi)):
+                    writer.writerow(mismatch)
+                    report.mismatches += 1
+                    report.by_kind[mismatch["kind"]] = report.by_kind.get(mismatch["kind"], 0) + 1
+
+    return report
+
+
+def _reconcile_partition_job(args: Tuple[str, str, str, int]) -> ReconciliationReport:
+    export_path, db_path, out_path, chunk_size = args
+    try:
+        return reconcile_partition(export_path, db_path, out_path, chunk_size=chunk_size)
+    finally:
+        connections.close_all()
+
+
+# -----------------------------------------------------------------------------
+# Entry point
+# -----------------------------------------------------------------------------
+def reconcile_stripe_export(
+    export_path: str,
+    output_path: str,
+    *,
+    partitions: int = 16,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    created_from=None,
+    created_to=None,
+    workdir: Optional[str] = None,
+) -> ReconciliationReport:
+    """
+    Compară exportul Stripe (balance transactions) cu Payment/Refund/Order.payment_status.
+    Scrie neconcordanțele în `output_path` (CSV) și întoarce un sumar.
+
+    created_from/created_to limitează Payment-urile din DB verificate pentru `missing_in_export`
+    (folosește aceeași fereastră ca exportul).
+    """
+    partitions = max(1, int(partitions or 1))
+    report = ReconciliationReport(output_path=output_path)
+    tmp = tempfile.mkdtemp(prefix="stripe-recon-", dir=workdir)
+
+    try:
+        export_writer = _PartitionWriter(tmp, "export", partitions)
+        try:
+            _spill_export(export_path, export_writer, report)
+        finally:
+            export_writer.close()
+
+        db_writer = _PartitionWriter(tmp, "db", partitions)
+        try:
+            _spill_db_payment_intents(db_writer, created_from=created_from, created_to=created_to)
+        finally:
+            db_writer.close()
+
+        jobs = [
+            (export_writer.paths[i], db_writer.paths[i], os.path.join(tmp, f"out-{i:04d}.csv"), chunk_size)
+            for i in range(partitions)
+        ]
+
+        if workers <= 1:
+            parts = [_reconcile_partition_job(job) for job in jobs]
+        else:
+            with django_process_pool(workers) as pool:
+                parts = list(pool.map(_reconcile_partition_job, jobs))
+
+        with open(output_path, "w", encoding="utf-8", newline="") as out:
+            csv.DictWriter(out, fieldnames=REPORT_FIELDS).writeheader()
+            for part in parts:
+                report.merge(part)
+                with open(part.output_path, "r", encoding="utf-8", newline="") as fh:
+                    shutil.copyfileobj(fh, out)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return report
+
+
+def payments_missing_intent_q() -> Q:
+    """
+    Payment-uri Stripe reușite fără PI: nu pot fi reconciliate, merită listate separat.
+    """
+    return Q(provider=Payment.Provider.STRIPE, status=Payment.Status.SUCCEEDED, stripe_payment_intent_id="")
@@ -1,3 +1,171 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from accounts.models import Address, CustomUser
+from core.background import init_django_worker
+from orders.models import Order
+
+from . import reconciliation
+from .models import Payment, Refund
+from .reconciliation import (
+    AMOUNT_MISMATCH,
+    CURRENCY_MISMATCH,
+    MISSING_IN_DB,
+    MISSING_IN_EXPORT,
+    ORDER_STATUS_MISMATCH,
+    REFUND_MISMATCH,
+    STATUS_MISMATCH,
+    reconcile_stripe_export,
+)
+
+# (pi, tip, sumă, monedă) -> exportul Stripe, în ambele formate
+EXPORT = [
+    ("pi_ok", "charge", "49.99", "ron"),
+    ("pi_ok_refunded", "charge", "25.00", "ron"),
+    ("pi_ok_refunded", "refund", "-25.00", "ron"),
+    ("pi_missing_db", "charge", "10.00", "ron"),
+    ("pi_amount", "charge", "31.00", "ron"),
+    ("pi_status", "charge", "15.00", "ron"),
+    ("pi_refund", "charge", "40.00", "ron"),
+    ("pi_refund", "refund", "-40.00", "ron"),
+    ("pi_currency", "charge", "12.00", "eur"),
+    ("", "charge", "99.00", "ron"),  # fără payment_intent: ignorat
+    ("pi_payout", "payout", "-100.00", "ron"),  # tip irelevant: ignorat
+]
+
+EXPECTED = {
+    (MISSING_IN_DB, "pi_missing_db"),
+    (MISSING_IN_EXPORT, "pi_missing_export"),
+    (AMOUNT_MISMATCH, "pi_amount"),
+    (STATUS_MISMATCH, "pi_status"),
+    (ORDER_STATUS_MISMATCH, "pi_status"),
+    (REFUND_MISMATCH, "pi_refund"),
+    (ORDER_STATUS_MISMATCH, "pi_refund"),
+    (CURRENCY_MISMATCH, "pi_currency"),
+}
+
+
+# TransactionTestCase: worker-ii (thread-uri, conexiuni proprii) trebuie să vadă datele
+class StripeReconciliationTests(TransactionTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+        self.buyer = CustomUser.objects.create_user(
+            email="buyer@example.com", password="x", first_name="B", last_name="C", is_active=True
+        )
+        self.address = Address.objects.create(
+            user=self.buyer, street_address="Str. 1", city="Iași", region="Iași", postal_code="700000", country="RO"
+        )
+        self._payment("pi_ok", "49.99")
+        refunded = self._payment("pi_ok_refunded", "25.00", order_status=Order.PAYMENT_REFUNDED)
+        Refund.objects.create(
+            payment=refunded, order=refunded.order, user=self.buyer, amount=Decimal("25.00"),
+            status=Refund.Status.SUCCEEDED,
+        )
+        self._payment("pi_missing_export", "20.00")
+        self._payment("pi_amount", "30.00")
+        self._payment("pi_status", "15.00", status=Payment.Status.PENDING, order_status=Order.PAYMENT_PENDING)
+        self._payment("pi_refund", "40.00")
+        self._payment("pi_currency", "12.00", currency="RON")
+        self._payment("pi_failed_not_exported", "5.00", status=Payment.Status.FAILED)
+        self._payment("", "7.00")  # reușit fără PI
+
+    def _payment(self, pi, amount, *, status=Payment.Status.SUCCEEDED, order_status=Order.PAYMENT_PAID, currency="RON"):
+        order = Order.objects.create(
+            buyer=self.buyer, address=self.address, shipping_method="curier", payment_status=order_status,
+        )
+        return Payment.objects.create(
+            order=order, user=self.buyer, provider=Payment.Provider.STRIPE, amount=Decimal(amount),
+            currency=currency, status=status, stripe_payment_intent_id=pi,
+        )
+
+    def _export_csv(self):
+        path = os.path.join(self.tmp, "export.csv")
+        with open(path, "w", encoding="utf-8", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["id", "Type", "Amount", "Fee", "Currency", "payment_intent_id"])
+            for i, (pi, kind, amount, currency) in enumerate(EXPORT):
+                writer.writerow([f"txn_{i}", kind, amount, "0.50", currency, pi])
+        return path
+
+    def _export_jsonl(self):
+        path = os.path.join(self.tmp, "export.jsonl")
+        with open(path, "w", encoding="utf-8") as fh:
+            for i, (pi, kind, amount, currency) in enumerate(EXPORT):
+                # API: sume întregi în unități minore, PI în source
+                row = {"id": f"txn_{i}", "type": kind, "amount": int(Decimal(amount) * 100), "fee": 50,
+                       "currency": currency, "source": {"payment_intent": pi} if pi else None}
+                fh.write(json.dumps(row) + "\n")
+            fh.write("not json\n")
+        return path
+
+    def _run(self, export_path, **kwargs):
+        out = os.path.join(self.tmp, f"report-{len(os.listdir(self.tmp))}.csv")
+        report = reconcile_stripe_export(export_path, out, workdir=self.tmp, **kwargs)
+        with open(out, encoding="utf-8", newline="") as fh:
+            rows = sorted(tuple(sorted(r.items())) for r in csv.DictReader(fh))
+        return report, rows
+
+    def test_each_mismatch_kind_is_reported(self):
+        report, rows = self._run(self._export_csv(), partitions=1)
+
+        self.assertEqual({(dict(r)["kind"], dict(r)["payment_intent_id"]) for r in rows}, EXPECTED)
+        self.assertEqual(report.mismatches, len(EXPECTED))
+        self.assertEqual(report.export_rows, len(EXPORT))
+        self.assertEqual(report.export_rows_skipped, 2)
+        # 7 PI-uri din export + pi_missing_export + pi_failed_not_exported
+        self.assertEqual(report.payment_intents, 9)
+        self.assertEqual(report.db_payments, 8)
+
+        missing_db = next(dict(r) for r in rows if dict(r)["kind"] == MISSING_IN_DB)
+        self.assertEqual((missing_db["payment_id"], missing_db["export_charged"]), ("", "10.00"))
+        refund = next(dict(r) for r in rows if dict(r)["kind"] == REFUND_MISMATCH)
+        self.assertEqual((refund["db_refunded"], refund["export_refunded"]), ("0.00", "40.00"))
+
+    def test_partitioned_and_parallel_runs_match_single_process(self):
+        csv_path, jsonl_path = self._export_csv(), self._export_jsonl()
+        baseline_report, baseline_rows = self._run(csv_path, partitions=1, workers=1)
+
+        runs = [
+            (csv_path, {"partitions": 5, "workers": 1, "chunk_size": 2}),
+            (jsonl_path, {"partitions": 1, "workers": 1}),
+            (csv_path, {"partitions": 4, "workers": 3}),
+            (jsonl_path, {"partitions": 7, "workers": 2, "chunk_size": 1}),
+        ]
+        # exportul CSV/JSONL împărțit în fișiere-partiție după payment_intent trebuie să
+        # dea aceleași rânduri ca o singură trecere; partițiile cu workers>1 merg pe
+        # thread-uri (același initializer) ca să vadă DB-ul de test din memorie
+        thread_pool = lambda workers: ThreadPoolExecutor(workers, initializer=init_django_worker)  # noqa: E731
+        with mock.patch.object(reconciliation, "django_process_pool", thread_pool):
+            for path, kwargs in runs:
+                with self.subTest(path=os.path.basename(path), **kwargs):
+                    report, rows = self._run(path, **kwargs)
+                    self.assertEqual(rows, baseline_rows)
+                    self.assertEqual(report.by_kind, baseline_report.by_kind)
+                    self.assertEqual(report.payment_intents, baseline_report.payment_intents)
+                    self.assertEqual(report.db_payments, baseline_report.db_payments)
+
+        # rezultatele unui worker trec granița de proces
+        self.assertEqual(pickle.loads(pickle.dumps(baseline_report)).by_kind, baseline_report.by_kind)
+
+    def test_command_lists_payments_without_intent(self):
+        out = io.StringIO()
+        call_command(
+            "reconcile_stripe", self._export_csv(), "-o", os.path.join(self.tmp, "cmd.csv"),
+            "--partitions", "3", "--workdir", self.tmp, stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn("fără payment_intent: 1", output)
+        self.assertIn(f"Neconcordanțe: {len(EXPECTED)}", output)
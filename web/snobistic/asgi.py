@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'snobistic.settings')
+# stream-urile live (SSE) au nevoie de ASGI; sub WSGI rămân oprite
+os.environ.setdefault('SNOBISTIC_REALTIME_ENABLED', '1')
 
 application = get_asgi_application()
@@ -127,6 +127,7 @@ TEMPLATES = [
                 "accounts.context_processors.login_form_context",
                 "cart.context_processors.cart",
                 "catalog.context_processors.favorites_badge",
+                "messaging.context_processors.unread_messages_badge",
                 "catalog.context_processors.mega_menu_categories",
                 "core.context_processors.site_settings",
             ],
@@ -338,5 +339,9 @@ SNOBISTIC_TRUST_A_MIN = 85
 SNOBISTIC_TRUST_B_MIN = 70
 SNOBISTIC_TRUST_C_MIN = 50
 
+# Live (SSE) în messaging/support: doar sub ASGI (snobistic/asgi.py îl pornește).
+# Sub mod_wsgi un stream nesfârșit ar ține un thread al daemon-ului pentru totdeauna.
+SNOBISTIC_REALTIME_ENABLED = os.environ.get("SNOBISTIC_REALTIME_ENABLED", "0").strip() == "1"
+
 PUBLIC_DOMAIN = os.environ.get("PUBLIC_DOMAIN", "").strip()
 FORCE_HTTPS_LINKS = os.environ.get("FORCE_HTTPS_LINKS", "0").strip() == "1"
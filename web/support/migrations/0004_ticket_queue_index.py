@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:53
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+
+def backfill_priority_rank(apps, schema_editor):
+    Ticket = apps.get_model("support", "Ticket")
+    Ticket.objects.update(
+        priority_rank=Case(
+            When(priority="high", then=Value(0)),
+            When(priority="low", then=Value(2)),
+            default=Value(1),
+            output_field=models.PositiveSmallIntegerField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_order_cancelled_at_order_completed_at_and_more'),
+        ('support', '0003_alter_ticketmessage_options_alter_ticket_priority_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(backfill_priority_rank, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status__in', ('new', 'in_progress'))), fields=['priority_rank', 'created_at', 'id'], name='ticket_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status__in', ('new', 'in_progress'))), fields=['category', 'priority_rank', 'created_at', 'id'], name='ticket_queue_cat_idx'),
+        ),
+    ]
@@ -3,6 +3,12 @@ from __future__ import annotations
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
+
+# tichetele care așteaptă suportul (ocupă coada); AWAITING_USER nu intră
+QUEUE_STATUSES = ("new", "in_progress")
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
 
 
 class Ticket(models.Model):
@@ -68,6 +74,9 @@ class Ticket(models.Model):
         db_index=True,
     )
 
+    # derivat din priority (save()); cheia de ordonare a cozii = (priority_rank, created_at, id)
+    priority_rank = models.PositiveSmallIntegerField(default=PRIORITY_RANK["medium"], editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -75,6 +84,17 @@ class Ticket(models.Model):
         indexes = [
             models.Index(fields=["owner", "status", "updated_at"]),
             models.Index(fields=["status", "priority", "created_at"]),
+            # coada de suport: doar tichetele NEW/IN_PROGRESS, deja în ordinea de servire
+            models.Index(
+                fields=["priority_rank", "created_at", "id"],
+                condition=Q(status__in=QUEUE_STATUSES),
+                name="ticket_queue_idx",
+            ),
+            models.Index(
+                fields=["category", "priority_rank", "created_at", "id"],
+                condition=Q(status__in=QUEUE_STATUSES),
+                name="ticket_queue_cat_idx",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -83,6 +103,17 @@ class Ticket(models.Model):
             base += f" (Order #{self.order_id})"
         return base
 
+    def save(self, *args, **kwargs):
+        self.priority_rank = PRIORITY_RANK.get(self.priority, PRIORITY_RANK["medium"])
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "priority" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "priority_rank"}
+        super().save(*args, **kwargs)
+
+    @property
+    def is_in_queue(self) -> bool:
+        return self.status in QUEUE_STATUSES
+
     @property
     def is_closed(self) -> bool:
         return self.status in {self.Status.RESOLVED, self.Status.REJECTED}
@@ -6,10 +6,34 @@ from dataclasses import dataclass
 from typing import Optional
 
 from django.conf import settings
-from django.db.models import Case, IntegerField, Q, Value, When
 from django.contrib.auth import get_user_model
-
-from .models import Ticket
+from django.core.cache import cache
+from django.db.models import Max, Min, Q
+
+from .models import PRIORITY_RANK, QUEUE_STATUSES, Ticket
+
+# =============================================================================
+# Coada de suport
+# =============================================================================
+# - poziția = câte tichete NEW/IN_PROGRESS sunt înaintea tichetului după cheia
+#   (priority_rank, created_at, id); priority_rank e coloană întreținută în
+#   Ticket.save(), iar indexurile parțiale ticket_queue_idx / ticket_queue_cat_idx
+#   conțin doar tichetele din coadă, deja în ordinea de servire -> numărarea e un
+#   range scan pe index, fără CASE evaluat pe fiecare rând
+# - nr. de agenți e în cache, recalculat la login/logout staff (support/signals.py)
+# - ETA folosește media mobilă a timpilor reali de lucru (TicketMessage), cu
+#   fallback pe SUPPORT_AVG_HANDLE_MINUTES cât timp nu sunt destule tichete închise
+#
+# Settings:
+#   SUPPORT_AGENT_COUNT_TTL          default 600 s
+#   SUPPORT_HANDLE_TIME_SAMPLES      default 50 (ultimele tichete închise)
+#   SUPPORT_HANDLE_TIME_MIN_SAMPLES  default 5
+#   SUPPORT_HANDLE_TIME_TTL          default 600 s
+
+AGENT_COUNT_CACHE_KEY = "support:agent_count"
+HANDLE_TIME_CACHE_KEY = "support:handle_minutes:{category}"
+
+CLOSED_STATUSES = (Ticket.Status.RESOLVED, Ticket.Status.REJECTED)
 
 
 @dataclass(frozen=True)
@@ -22,22 +46,28 @@ class QueueInfo:
     note: str = ""  # mesaj contextual (ex: awaiting_user)
 
 
-def _priority_rank_case():
-    return Case(
-        When(priority=Ticket.Priority.HIGH, then=Value(0)),
-        When(priority=Ticket.Priority.MEDIUM, then=Value(1)),
-        When(priority=Ticket.Priority.LOW, then=Value(2)),
-        default=Value(1),
-        output_field=IntegerField(),
-    )
+def _setting_int(name: str, default: int) -> int:
+    try:
+        return int(getattr(settings, name, default))
+    except (TypeError, ValueError):
+        return default
 
 
-def get_agent_count() -> int:
+def refresh_agent_count() -> int:
     User = get_user_model()
-    return User.objects.filter(is_active=True, is_staff=True).count()
+    count = User.objects.filter(is_active=True, is_staff=True).count()
+    cache.set(AGENT_COUNT_CACHE_KEY, count, _setting_int("SUPPORT_AGENT_COUNT_TTL", 600))
+    return count
 
 
-def _avg_minutes(category: str | None) -> int:
+def get_agent_count() -> int:
+    count = cache.get(AGENT_COUNT_CACHE_KEY)
+    if count is None:
+        count = refresh_agent_count()
+    return count
+
+
+def _configured_avg_minutes(category: str | None) -> int:
     by_cat = getattr(settings, "SUPPORT_AVG_HANDLE_MINUTES_BY_CATEGORY", None)
     if isinstance(by_cat, dict) and category:
         val = by_cat.get(category)
@@ -52,6 +82,63 @@ def _avg_minutes(category: str | None) -> int:
     return max(default_val, 1)
 
 
+def measured_handle_minutes(category: str | None = None) -> Optional[float]:
+    """
+    Media timpului de lucru pe ultimele tichete închise: de la primul răspuns al
+    staff-ului până la ultimul mesaj din tichet (minim 1 minut / tichet).
+    None dacă nu sunt destule tichete închise cu răspuns de la staff.
+    """
+    qs = Ticket.objects.filter(status__in=CLOSED_STATUSES)
+    if category and category != "all":
+        qs = qs.filter(category=category)
+
+    spans = list(
+        qs.annotate(
+            first_staff_at=Min("messages__created_at", filter=Q(messages__author__is_staff=True)),
+            last_message_at=Max("messages__created_at"),
+        )
+        .filter(first_staff_at__isnull=False)
+        .order_by("-updated_at")
+        .values_list("first_staff_at", "last_message_at")[: _setting_int("SUPPORT_HANDLE_TIME_SAMPLES", 50)]
+    )
+    if len(spans) < _setting_int("SUPPORT_HANDLE_TIME_MIN_SAMPLES", 5):
+        return None
+
+    minutes = [max((last - first).total_seconds() / 60, 1.0) for first, last in spans]
+    return sum(minutes) / len(minutes)
+
+
+def _avg_minutes(category: str | None) -> int:
+    key = HANDLE_TIME_CACHE_KEY.format(category=category or "all")
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    measured = measured_handle_minutes(category)
+    value = int(math.ceil(measured)) if measured is not None else _configured_avg_minutes(category)
+    cache.set(key, value, _setting_int("SUPPORT_HANDLE_TIME_TTL", 600))
+    return value
+
+
+def queue_position(ticket: Ticket, *, category: str | None = None) -> int:
+    """
+    Poziția (1-based) a unui tichet din coadă; 0 dacă nu e în coadă.
+    """
+    if not ticket.is_in_queue:
+        return 0
+    base = Ticket.objects.filter(status__in=QUEUE_STATUSES)
+    if category and category != "all":
+        base = base.filter(category=category)
+
+    rank = PRIORITY_RANK.get(ticket.priority, PRIORITY_RANK["medium"])
+    ahead = base.filter(
+        Q(priority_rank__lt=rank)
+        | Q(priority_rank=rank, created_at__lt=ticket.created_at)
+        | Q(priority_rank=rank, created_at=ticket.created_at, id__lt=ticket.id)
+    ).count()
+    return ahead + 1
+
+
 def get_queue_ticket_for_user(user, *, category: str | None = None) -> Optional[Ticket]:
     """
     În coadă intră DOAR tichetele care necesită acțiune din partea suportului:
@@ -59,7 +146,7 @@ def get_queue_ticket_for_user(user, *, category: str | None = None) -> Optional[
       - IN_PROGRESS
     Ticket-urile AWAITING_USER NU ocupă coada (așteaptă user).
     """
-    qs = Ticket.objects.filter(owner=user, status__in=[Ticket.Status.NEW, Ticket.Status.IN_PROGRESS])
+    qs = Ticket.objects.filter(owner=user, status__in=QUEUE_STATUSES)
     if category and category != "all":
         qs = qs.filter(category=category)
     return qs.order_by("created_at", "id").first()
@@ -88,20 +175,7 @@ def compute_queue_info_for_user(user, *, category: str | None = None) -> QueueIn
     if not ticket:
         return QueueInfo(ticket=None, position=0, eta_minutes=0, agents=agents, avg_minutes_per_ticket=avg)
 
-    base = Ticket.objects.filter(status__in=[Ticket.Status.NEW, Ticket.Status.IN_PROGRESS])
-    if category and category != "all":
-        base = base.filter(category=category)
-
-    base = base.annotate(priority_rank=_priority_rank_case())
-    my_rank = {Ticket.Priority.HIGH: 0, Ticket.Priority.MEDIUM: 1, Ticket.Priority.LOW: 2}.get(ticket.priority, 1)
-
-    ahead = base.filter(
-        Q(priority_rank__lt=my_rank)
-        | Q(priority_rank=my_rank, created_at__lt=ticket.created_at)
-        | Q(priority_rank=my_rank, created_at=ticket.created_at, id__lt=ticket.id)
-    ).count()
-
-    position = ahead + 1
+    position = queue_position(ticket, category=category)
     effective_agents = max(agents, 1)
     eta = int(math.ceil(((position - 1) / effective_agents) * avg))
 
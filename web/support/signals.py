@@ -0,0 +1,13 @@
+# support/signals.py
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.dispatch import receiver
+
+from .services import refresh_agent_count
+
+
+@receiver(user_logged_in, dispatch_uid="support.agent_count.login")
+@receiver(user_logged_out, dispatch_uid="support.agent_count.logout")
+def refresh_agents_on_staff_session(sender, request, user, **kwargs):
+    # nr. de agenți din coadă (services.get_agent_count) e în cache; îl refacem doar la schimbări de staff
+    if user is not None and user.is_staff:
+        refresh_agent_count()
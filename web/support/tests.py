@@ -1,3 +1,87 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .models import Ticket, TicketMessage
+from .services import (
+    AGENT_COUNT_CACHE_KEY,
+    compute_queue_info_for_user,
+    get_agent_count,
+    measured_handle_minutes,
+    queue_position,
+)
+
+User = get_user_model()
+
+
+def _user(email, **extra):
+    return User.objects.create_user(
+        email=email, password="x", first_name="T", last_name="U", is_active=True, **extra
+    )
+
+
+class QueuePositionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [_user(f"u{i}@example.com") for i in range(4)]
+
+    def _ticket(self, owner, priority=Ticket.Priority.MEDIUM, **extra):
+        return Ticket.objects.create(owner=owner, subject="s", description="d", priority=priority, **extra)
+
+    def test_priority_then_arrival_order(self):
+        low = self._ticket(self.users[0], Ticket.Priority.LOW)
+        med = self._ticket(self.users[1])
+        high = self._ticket(self.users[2], Ticket.Priority.HIGH)
+        waiting = self._ticket(self.users[3], Ticket.Priority.HIGH, status=Ticket.Status.AWAITING_USER)
+
+        self.assertEqual(queue_position(high), 1)
+        self.assertEqual(queue_position(med), 2)
+        self.assertEqual(queue_position(low), 3)
+        self.assertEqual(queue_position(waiting), 0)
+
+        # schimbarea priorității/statusului se reflectă imediat în poziții
+        low.priority = Ticket.Priority.HIGH
+        low.save(update_fields=["priority", "updated_at"])
+        low.refresh_from_db()
+        self.assertEqual(low.priority_rank, 0)
+        self.assertEqual(queue_position(low), 1)
+        self.assertEqual(queue_position(high), 2)
+
+        low.status = Ticket.Status.RESOLVED
+        low.save(update_fields=["status", "updated_at"])
+        self.assertEqual(queue_position(high), 1)
+
+    def test_category_filter(self):
+        self._ticket(self.users[0], Ticket.Priority.HIGH, category=Ticket.Category.ORDER)
+        mine = self._ticket(self.users[1], category=Ticket.Category.RETURN)
+        self.assertEqual(queue_position(mine), 2)
+        self.assertEqual(queue_position(mine, category=Ticket.Category.RETURN), 1)
+
+    @override_settings(SUPPORT_HANDLE_TIME_MIN_SAMPLES=2, SUPPORT_AVG_HANDLE_MINUTES=6)
+    def test_eta_uses_measured_handle_time(self):
+        agent = _user("agent@example.com", is_staff=True)
+        for minutes in (10, 20):
+            t = self._ticket(self.users[0], status=Ticket.Status.RESOLVED)
+            first = TicketMessage.objects.create(ticket=t, author=agent, text="salut")
+            last = TicketMessage.objects.create(ticket=t, author=self.users[0], text="mulțumesc")
+            TicketMessage.objects.filter(pk=last.pk).update(created_at=first.created_at + timedelta(minutes=minutes))
+        self.assertAlmostEqual(measured_handle_minutes(), 15, places=0)
+
+        self._ticket(self.users[1])
+        self._ticket(self.users[2])
+        info = compute_queue_info_for_user(self.users[2])
+        self.assertEqual(info.position, 2)
+        self.assertEqual(info.avg_minutes_per_ticket, 15)
+        self.assertEqual(info.agents, 1)
+        self.assertEqual(info.eta_minutes, 15)
+
+    def test_agent_count_cached_and_refreshed_on_staff_login(self):
+        agent = _user("agent@example.com", is_staff=True)
+        self.assertEqual(get_agent_count(), 1)
+        _user("agent2@example.com", is_staff=True)
+        self.assertEqual(get_agent_count(), 1)  # din cache
+
+        self.client.force_login(agent)
+        self.assertEqual(cache.get(AGENT_COUNT_CACHE_KEY), 2)
@@ -4,6 +4,9 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.urls import reverse
 
+from messaging import realtime
+from messaging.models import Conversation
+
 from .models import Ticket
 from .forms import TicketForm, TicketMessageForm, TicketUpdateForm
 from .services import compute_queue_info_for_user
@@ -20,11 +23,18 @@ def chat_queue(request):
     Queue real:
     - user e în coadă dacă are tichet NEW/IN_PROGRESS
     - poziție derivată din: prioritate + created_at
-    - ETA derivat din: nr agenți (staff) + avg minutes / ticket (SLA)
+    - ETA derivat din: nr agenți (staff, din cache) + media reală de lucru / ticket
     """
     category = request.GET.get("category", "all")
     qinfo = compute_queue_info_for_user(request.user, category=category)
 
+    # conversația ticketului activ -> pagina ascultă live răspunsul agentului (fără reload; doar sub ASGI)
+    queue_conversation_id = None
+    if qinfo.ticket is not None and realtime.enabled():
+        queue_conversation_id = (
+            Conversation.objects.filter(support_ticket=qinfo.ticket).values_list("pk", flat=True).first()
+        )
+
     return render(
         request,
         "support/chat_queue.html",
@@ -36,6 +46,7 @@ def chat_queue(request):
             "avg_minutes": qinfo.avg_minutes_per_ticket,
             "category": category,
             "queue_note": getattr(qinfo, "note", ""),
+            "queue_conversation_id": queue_conversation_id,
         },
     )
 
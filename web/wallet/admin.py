@@ -1,7 +1,7 @@
 # wallet/admin.py
 from django.contrib import admin
 
-from .models import Wallet, WalletTransaction, WithdrawalRequest
+from .models import Wallet, WalletStatement, WalletTransaction, WithdrawalRequest
 
 
 @admin.register(Wallet)
@@ -25,3 +25,11 @@ class WithdrawalRequestAdmin(admin.ModelAdmin):
     list_filter = ("status", "created_at")
     search_fields = ("wallet__user__email", "iban")
     ordering = ("-created_at",)
+
+
+@admin.register(WalletStatement)
+class WalletStatementAdmin(admin.ModelAdmin):
+    list_display = ("id", "wallet", "date_from", "date_to", "fmt", "status", "tx_count", "created_at", "started_at", "finished_at")
+    list_filter = ("status", "fmt", "created_at")
+    search_fields = ("wallet__user__email",)
+    ordering = ("-created_at",)
@@ -3,7 +3,7 @@ from decimal import Decimal
 
 from django import forms
 
-from .models import WithdrawalRequest
+from .models import WalletStatement, WithdrawalRequest
 
 
 class TopUpForm(forms.Form):
@@ -36,3 +36,33 @@ class WithdrawForm(forms.ModelForm):
         if self.wallet.balance < amt:
             raise forms.ValidationError("Sold insuficient.")
         return amt
+
+
+class StatementForm(forms.Form):
+    date_from = forms.DateField(
+        required=False,
+        label="De la",
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+    date_to = forms.DateField(
+        required=False,
+        label="Până la",
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+    fmt = forms.ChoiceField(
+        choices=WalletStatement.Format.choices,
+        initial=WalletStatement.Format.CSV,
+        label="Format",
+    )
+    background = forms.BooleanField(
+        required=False,
+        label="Generează în fundal și anunță-mă pe email",
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        date_from = cleaned.get("date_from")
+        date_to = cleaned.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("Data de început trebuie să fie înaintea datei de sfârșit.")
+        return cleaned
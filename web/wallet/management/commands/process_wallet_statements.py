@@ -0,0 +1,57 @@
+# wallet/management/commands/process_wallet_statements.py
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from wallet.models import WalletStatement
+from wallet.statements import generate_statement
+
+
+class Command(BaseCommand):
+    help = "Generează extrasele de cont rămase PENDING (sau blocate în RUNNING) și anunță userii pe email."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100)
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=30,
+            help="Extrasele RUNNING preluate de mai mult de atât sunt reluate (proces oprit la jumătate).",
+        )
+        parser.add_argument("--retry-failed", action="store_true", help="Reia și extrasele FAILED.")
+
+    def handle(self, *args, **options):
+        stale_before = timezone.now() - timedelta(minutes=options["stale_minutes"])
+        # vechimea se măsoară de la preluare, nu de la cerere: un extras cerut de mult
+        # dar încă în lucru nu e luat a doua oară (started_at gol = rând dinainte de câmp)
+        WalletStatement.objects.filter(status=WalletStatement.Status.RUNNING).filter(
+            Q(started_at__lt=stale_before) | Q(started_at__isnull=True, created_at__lt=stale_before)
+        ).update(status=WalletStatement.Status.PENDING)
+
+        statuses = [WalletStatement.Status.PENDING]
+        if options["retry_failed"]:
+            statuses.append(WalletStatement.Status.FAILED)
+
+        ids = list(
+            WalletStatement.objects.filter(status__in=statuses)
+            .order_by("created_at")
+            .values_list("pk", flat=True)[: options["limit"]]
+        )
+
+        ready = failed = 0
+        for pk in ids:
+            statement = generate_statement(pk)
+            if statement is None:
+                continue
+            if statement.status == WalletStatement.Status.READY:
+                ready += 1
+            else:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f"  #{pk}: {statement.error}"))
+
+        self.stdout.write(self.style.SUCCESS(f"Extrase: {ready} gata, {failed} eșuate (din {len(ids)})."))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_from', models.DateField(blank=True, null=True)),
+                ('date_to', models.DateField(blank=True, help_text='Inclusiv.', null=True)),
+                ('fmt', models.CharField(choices=[('csv', 'CSV'), ('pdf', 'PDF')], default='csv', max_length=5)),
+                ('status', models.CharField(choices=[('PENDING', 'În așteptare'), ('RUNNING', 'În lucru'), ('READY', 'Gata'), ('FAILED', 'Eșuat')], db_index=True, default='PENDING', max_length=10)),
+                ('file', models.FileField(blank=True, max_length=255, upload_to='wallet/statements/')),
+                ('opening_balance', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('closing_balance', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('tx_count', models.PositiveIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, help_text='Ultima preluare de un worker (RUNNING).', null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statements', to='wallet.wallet')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['wallet', 'created_at'], name='wallet_wall_wallet__8eb5bc_idx')],
+            },
+        ),
+    ]
@@ -103,7 +103,7 @@ class WalletTransaction(models.Model):
             models.Index(fields=["tx_type", "created_at"]),
         ]
         constraints = [
-            # idempotency “best effort”: pentru același wallet + tx_type + external_id să nu duplicăm
+            # cheia de idempotency: wallet + tx_type + external_id (fast path + insert-or-ignore în services)
             models.UniqueConstraint(
                 fields=["wallet", "tx_type", "external_id"],
                 condition=~Q(external_id=""),
@@ -150,3 +150,47 @@ class WithdrawalRequest(models.Model):
 
     def __str__(self) -> str:
         return f"WithdrawalRequest({self.wallet_id}) {self.amount} {self.wallet.currency} {self.status}"
+
+
+class WalletStatement(models.Model):
+    """
+    Extras de cont generat în fundal (perioade mari) și salvat în media storage.
+    Exporturile mici se descarcă direct (streaming), fără rând aici.
+    """
+
+    class Format(models.TextChoices):
+        CSV = "csv", "CSV"
+        PDF = "pdf", "PDF"
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "În așteptare"
+        RUNNING = "RUNNING", "În lucru"
+        READY = "READY", "Gata"
+        FAILED = "FAILED", "Eșuat"
+
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name="statements")
+
+    date_from = models.DateField(null=True, blank=True)
+    date_to = models.DateField(null=True, blank=True, help_text="Inclusiv.")
+    fmt = models.CharField(max_length=5, choices=Format.choices, default=Format.CSV)
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING, db_index=True)
+    file = models.FileField(upload_to="wallet/statements/", blank=True, max_length=255)
+
+    opening_balance = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    closing_balance = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    tx_count = models.PositiveIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, help_text="Ultima preluare de un worker (RUNNING).")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["wallet", "created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"WalletStatement({self.wallet_id}) {self.date_from}..{self.date_to} {self.fmt} {self.status}"
@@ -4,7 +4,7 @@ from __future__ import annotations
 from decimal import Decimal
 
 from django.conf import settings
-from django.db import transaction
+from django.db import IntegrityError, transaction
 
 from .models import Wallet, WalletTransaction
 
@@ -45,49 +45,107 @@ def get_or_create_wallet_for_user(user) -> Wallet:
     return wallet
 
 
+def find_existing_transaction(*, user, tx_type: str, external_id: str) -> WalletTransaction | None:
+    """
+    Fast-path idempotency (fără lock pe wallet).
+    Folosește indexul unic (wallet, tx_type, external_id); wallet e rezolvat prin user (OneToOne).
+    """
+    if not external_id or not getattr(user, "pk", None):
+        return None
+    return (
+        WalletTransaction.objects.select_related("wallet")
+        .filter(wallet__user=user, tx_type=tx_type, external_id=external_id)
+        .first()
+    )
+
+
 @transaction.atomic
-def credit_wallet(
+def _apply_wallet_transaction(
     *,
     user,
     amount: Decimal,
     tx_type: str,
+    direction: str,
     method: str = "",
     external_id: str = "",
     note: str = "",
     meta: dict | None = None,
 ) -> WalletTransaction:
+    """
+    1) retry-uri (webhook/payout) -> fast path, wallet-ul nu e blocat deloc
+    2) lock pe wallet, INSERT în savepoint; dacă o livrare concurentă a câștigat cursa,
+       constrângerea unică respinge insert-ul și întoarcem tranzacția existentă (insert-or-ignore)
+    3) soldul e modificat DOAR după ce insert-ul a reușit
+    """
     if amount <= 0:
         raise ValueError("amount must be > 0")
 
+    external_id = external_id or ""
+    existing = find_existing_transaction(user=user, tx_type=tx_type, external_id=external_id)
+    if existing:
+        return existing
+
     wallet = get_or_create_wallet_for_user(user)
 
-    if external_id:
-        existing = WalletTransaction.objects.filter(
-            wallet=wallet,
-            tx_type=tx_type,
-            external_id=external_id,
-        ).first()
-        if existing:
-            return existing
+    if direction == WalletTransaction.Direction.DEBIT:
+        if wallet.balance < amount:
+            # livrare duplicată care a pierdut cursa: soldul e deja debitat de prima
+            if external_id:
+                dup = WalletTransaction.objects.filter(
+                    wallet=wallet, tx_type=tx_type, external_id=external_id
+                ).first()
+                if dup:
+                    return dup
+            raise InsufficientFunds("Insufficient funds")
+        new_balance = wallet.balance - amount
+    else:
+        new_balance = wallet.balance + amount
 
-    wallet.balance += amount
+    try:
+        with transaction.atomic():
+            tx = WalletTransaction.objects.create(
+                wallet=wallet,
+                tx_type=tx_type,
+                direction=direction,
+                amount=amount,
+                method=method or "",
+                external_id=external_id,
+                note=note or "",
+                meta=meta,
+                balance_after=new_balance,
+            )
+    except IntegrityError:
+        if not external_id:
+            raise
+        return WalletTransaction.objects.get(wallet=wallet, tx_type=tx_type, external_id=external_id)
+
+    wallet.balance = new_balance
     wallet.save(update_fields=["balance"])
+    return tx
+
 
-    tx = WalletTransaction.objects.create(
-        wallet=wallet,
+def credit_wallet(
+    *,
+    user,
+    amount: Decimal,
+    tx_type: str,
+    method: str = "",
+    external_id: str = "",
+    note: str = "",
+    meta: dict | None = None,
+) -> WalletTransaction:
+    return _apply_wallet_transaction(
+        user=user,
+        amount=amount,
         tx_type=tx_type,
         direction=WalletTransaction.Direction.CREDIT,
-        amount=amount,
-        method=method or "",
-        external_id=external_id or "",
-        note=note or "",
+        method=method,
+        external_id=external_id,
+        note=note,
         meta=meta,
-        balance_after=wallet.balance,
     )
-    return tx
 
 
-@transaction.atomic
 def debit_wallet(
     *,
     user,
@@ -98,38 +156,16 @@ def debit_wallet(
     note: str = "",
     meta: dict | None = None,
 ) -> WalletTransaction:
-    if amount <= 0:
-        raise ValueError("amount must be > 0")
-
-    wallet = get_or_create_wallet_for_user(user)
-
-    if external_id:
-        existing = WalletTransaction.objects.filter(
-            wallet=wallet,
-            tx_type=tx_type,
-            external_id=external_id,
-        ).first()
-        if existing:
-            return existing
-
-    if wallet.balance < amount:
-        raise InsufficientFunds("Insufficient funds")
-
-    wallet.balance -= amount
-    wallet.save(update_fields=["balance"])
-
-    tx = WalletTransaction.objects.create(
-        wallet=wallet,
+    return _apply_wallet_transaction(
+        user=user,
+        amount=amount,
         tx_type=tx_type,
         direction=WalletTransaction.Direction.DEBIT,
-        amount=amount,
-        method=method or "",
-        external_id=external_id or "",
-        note=note or "",
+        method=method,
+        external_id=external_id,
+        note=note,
         meta=meta,
-        balance_after=wallet.balance,
     )
-    return tx
 
 
 @transaction.atomic
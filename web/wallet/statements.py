@@ -0,0 +1,345 @@
+# wallet/statements.py
+from __future__ import annotations
+
+import csv
+import logging
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.mail import send_mail
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from core.background import submit_after_commit
+from .models import Wallet, WalletStatement, WalletTransaction
+
+logger = logging.getLogger(__name__)
+
+try:
+    from weasyprint import HTML
+except ImportError:
+    HTML = None
+
+# =============================================================================
+# Extras de cont: keyset pe (wallet, created_at, id), fără a încărca tot ledger-ul
+# =============================================================================
+PAGE_SIZE = 1000
+
+CSV_HEADER = ["Dată", "Tip", "Direcție", "Metodă", "Sumă", "Sold după", "External ID", "Notă"]
+
+# exportul din lista de tranzacții (?export=csv): layout-ul vechi, fără antet de extras
+# și fără "Notă", descrescător -> foile de calcul existente citesc la fel
+TRANSACTIONS_CSV_HEADER = CSV_HEADER[:7]
+
+TX_FIELDS = ("id", "created_at", "tx_type", "direction", "method", "amount", "balance_after", "external_id", "note")
+
+_TYPE_LABELS = dict(WalletTransaction.Type.choices)
+_DIRECTION_LABELS = dict(WalletTransaction.Direction.choices)
+
+
+@dataclass
+class StatementTotals:
+    opening_balance: Decimal = Decimal("0.00")
+    closing_balance: Decimal = Decimal("0.00")
+    total_credit: Decimal = Decimal("0.00")
+    total_debit: Decimal = Decimal("0.00")
+    tx_count: int = 0
+
+
+def period_bounds(date_from: Optional[date], date_to: Optional[date]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    [date_from 00:00, date_to+1 00:00) în timezone-ul curent.
+    """
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(date_from, time.min), tz) if date_from else None
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min), tz) if date_to else None
+    return start, end
+
+
+def opening_balance(wallet: Wallet, start: Optional[datetime]) -> Decimal:
+    """
+    Soldul de deschidere = balance_after al ultimei tranzacții dinaintea perioadei (un singur lookup pe index).
+    """
+    if start is None:
+        return Decimal("0.00")
+    last = (
+        WalletTransaction.objects.filter(wallet=wallet, created_at__lt=start)
+        .order_by("-created_at", "-id")
+        .values_list("balance_after", flat=True)
+        .first()
+    )
+    return Decimal(last) if last is not None else Decimal("0.00")
+
+
+def iter_transactions(
+    wallet: Wallet,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    *,
+    page_size: int = PAGE_SIZE,
+    newest_first: bool = False,
+) -> Iterator[dict]:
+    """
+    Tranzacțiile din perioadă, crescător (sau descrescător), pagină cu pagină (keyset pe created_at, id).
+    """
+    qs = WalletTransaction.objects.filter(wallet=wallet)
+    if start is not None:
+        qs = qs.filter(created_at__gte=start)
+    if end is not None:
+        qs = qs.filter(created_at__lt=end)
+    if newest_first:
+        qs = qs.order_by("-created_at", "-id").values(*TX_FIELDS)
+    else:
+        qs = qs.order_by("created_at", "id").values(*TX_FIELDS)
+
+    cursor: Optional[Tuple[datetime, int]] = None
+    while True:
+        page_qs = qs
+        if cursor is not None and newest_first:
+            page_qs = page_qs.filter(Q(created_at__lt=cursor[0]) | Q(created_at=cursor[0], id__lt=cursor[1]))
+        elif cursor is not None:
+            page_qs = page_qs.filter(Q(created_at__gt=cursor[0]) | Q(created_at=cursor[0], id__gt=cursor[1]))
+        page = list(page_qs[:page_size])
+        if not page:
+            return
+        yield from page
+        if len(page) < page_size:
+            return
+        cursor = (page[-1]["created_at"], page[-1]["id"])
+
+
+def iter_statement_rows(
+    wallet: Wallet,
+    date_from: Optional[date],
+    date_to: Optional[date],
+    totals: StatementTotals,
+) -> Iterator[dict]:
+    """
+    Rândurile extrasului; `totals` e completat pe parcurs (running balance din balance_after).
+    """
+    start, end = period_bounds(date_from, date_to)
+    totals.opening_balance = opening_balance(wallet, start)
+    totals.closing_balance = totals.opening_balance
+
+    for tx in iter_transactions(wallet, start, end):
+        totals.tx_count += 1
+        if tx["direction"] == WalletTransaction.Direction.CREDIT:
+            totals.total_credit += tx["amount"]
+        else:
+            totals.total_debit += tx["amount"]
+        totals.closing_balance = tx["balance_after"]
+        yield tx
+
+
+def _period_label(date_from: Optional[date], date_to: Optional[date]) -> str:
+    return f"{date_from.isoformat() if date_from else 'început'} – {date_to.isoformat() if date_to else 'prezent'}"
+
+
+def _csv_row(tx: dict) -> list:
+    return [
+        timezone.localtime(tx["created_at"]).strftime("%Y-%m-%d %H:%M"),
+        _TYPE_LABELS.get(tx["tx_type"], tx["tx_type"]),
+        _DIRECTION_LABELS.get(tx["direction"], tx["direction"]),
+        tx["method"],
+        tx["amount"],
+        tx["balance_after"],
+        tx["external_id"],
+        tx["note"],
+    ]
+
+
+class _Echo:
+    """Pseudo-buffer pentru csv.writer: întoarce linia în loc s-o scrie."""
+
+    def write(self, value):
+        return value
+
+
+def iter_statement_csv(
+    wallet: Wallet,
+    date_from: Optional[date],
+    date_to: Optional[date],
+    totals: Optional[StatementTotals] = None,
+) -> Iterator[str]:
+    """
+    Linii CSV gata de trimis (StreamingHttpResponse sau fișier).
+    Soldul de deschidere e în antet, soldul de închidere și totalurile în subsol.
+    """
+    writer = csv.writer(_Echo())
+    totals = totals if totals is not None else StatementTotals()
+    rows = iter_statement_rows(wallet, date_from, date_to, totals)
+
+    # generatorul calculează opening_balance la primul next(); îl forțăm înainte de antet
+    first = next(rows, None)
+
+    yield "\ufeff"  # BOM pentru Excel
+    yield writer.writerow(["Extras cont portofel", wallet.user.email, wallet.currency])
+    yield writer.writerow(["Perioada", _period_label(date_from, date_to)])
+    yield writer.writerow(["Sold inițial", totals.opening_balance])
+    yield writer.writerow([])
+    yield writer.writerow(CSV_HEADER)
+
+    if first is not None:
+        yield writer.writerow(_csv_row(first))
+        for tx in rows:
+            yield writer.writerow(_csv_row(tx))
+
+    yield writer.writerow([])
+    yield writer.writerow(["Total credit", totals.total_credit])
+    yield writer.writerow(["Total debit", totals.total_debit])
+    yield writer.writerow(["Sold final", totals.closing_balance])
+    yield writer.writerow(["Nr. tranzacții", totals.tx_count])
+
+
+def iter_transactions_csv(wallet: Wallet, date_from: Optional[date], date_to: Optional[date]) -> Iterator[str]:
+    """
+    Exportul din lista de tranzacții, în layout-ul vechi (TRANSACTIONS_CSV_HEADER), streaming.
+    """
+    writer = csv.writer(_Echo())
+    start, end = period_bounds(date_from, date_to)
+    yield writer.writerow(TRANSACTIONS_CSV_HEADER)
+    for tx in iter_transactions(wallet, start, end, newest_first=True):
+        yield writer.writerow(
+            [
+                tx["created_at"].strftime("%Y-%m-%d %H:%M"),
+                _TYPE_LABELS.get(tx["tx_type"], tx["tx_type"]),
+                _DIRECTION_LABELS.get(tx["direction"], tx["direction"]),
+                tx["method"],
+                tx["amount"],
+                tx["balance_after"],
+                tx["external_id"],
+            ]
+        )
+
+
+def statement_filename(wallet: Wallet, date_from: Optional[date], date_to: Optional[date], fmt: str) -> str:
+    start = date_from.isoformat() if date_from else "start"
+    end = date_to.isoformat() if date_to else timezone.localdate().isoformat()
+    return f"extras_portofel_{wallet.user_id}_{start}_{end}.{fmt}"
+
+
+# =============================================================================
+# Background mode
+# =============================================================================
+def request_statement(
+    wallet: Wallet,
+    *,
+    date_from: Optional[date],
+    date_to: Optional[date],
+    fmt: str = WalletStatement.Format.CSV,
+) -> WalletStatement:
+    statement = WalletStatement.objects.create(wallet=wallet, date_from=date_from, date_to=date_to, fmt=fmt)
+    submit_after_commit(generate_statement, statement.pk)
+    return statement
+
+
+def _write_csv(statement: WalletStatement) -> StatementTotals:
+    totals = StatementTotals()
+    with tempfile.TemporaryFile(mode="w+b") as fh:
+        for line in iter_statement_csv(statement.wallet, statement.date_from, statement.date_to, totals):
+            fh.write(line.encode("utf-8"))
+        fh.seek(0)
+        name = statement_filename(statement.wallet, statement.date_from, statement.date_to, "csv")
+        statement.file.save(name, File(fh), save=False)
+    return totals
+
+
+def _write_pdf(statement: WalletStatement) -> StatementTotals:
+    if HTML is None:
+        raise RuntimeError("Generarea de PDF nu este configurată (weasyprint lipsește).")
+
+    totals = StatementTotals()
+    rows = [
+        _csv_row(tx)
+        for tx in iter_statement_rows(statement.wallet, statement.date_from, statement.date_to, totals)
+    ]
+    html = render_to_string(
+        "wallet/statement_pdf.html",
+        {
+            "wallet": statement.wallet,
+            "period": _period_label(statement.date_from, statement.date_to),
+            "rows": rows,
+            "totals": totals,
+            "generated_at": timezone.now(),
+        },
+    )
+    pdf = HTML(string=html).write_pdf()
+    name = statement_filename(statement.wallet, statement.date_from, statement.date_to, "pdf")
+    statement.file.save(name, ContentFile(pdf), save=False)
+    return totals
+
+
+def generate_statement(statement_id: int) -> Optional[WalletStatement]:
+    """
+    Generează fișierul, marchează READY și anunță userul pe email. Idempotent pe status.
+    """
+    claimed = WalletStatement.objects.filter(
+        pk=statement_id,
+        status__in=[WalletStatement.Status.PENDING, WalletStatement.Status.FAILED],
+    ).update(status=WalletStatement.Status.RUNNING, error="", started_at=timezone.now())
+    if not claimed:
+        return None
+
+    statement = WalletStatement.objects.select_related("wallet__user").get(pk=statement_id)
+    try:
+        if statement.fmt == WalletStatement.Format.PDF:
+            totals = _write_pdf(statement)
+        else:
+            totals = _write_csv(statement)
+    except Exception as exc:
+        logger.exception("Wallet statement %s failed", statement_id)
+        statement.status = WalletStatement.Status.FAILED
+        statement.error = str(exc)[:255]
+        statement.finished_at = timezone.now()
+        statement.save(update_fields=["status", "error", "finished_at"])
+        return statement
+
+    statement.opening_balance = totals.opening_balance
+    statement.closing_balance = totals.closing_balance
+    statement.tx_count = totals.tx_count
+    statement.status = WalletStatement.Status.READY
+    statement.finished_at = timezone.now()
+    statement.save(
+        update_fields=["file", "opening_balance", "closing_balance", "tx_count", "status", "finished_at"]
+    )
+
+    notify_statement_ready(statement)
+    return statement
+
+
+def _absolute_url(path: str) -> str:
+    # fără request în fundal: domeniul vine din PUBLIC_DOMAIN (ca la linkurile din emailuri)
+    domain = (getattr(settings, "PUBLIC_DOMAIN", "") or "").strip()
+    if not domain:
+        return path
+    scheme = "https" if getattr(settings, "FORCE_HTTPS_LINKS", False) else "http"
+    return f"{scheme}://{domain}{path}"
+
+
+def notify_statement_ready(statement: WalletStatement) -> None:
+    user = statement.wallet.user
+    ctx = {
+        "user": user,
+        "statement": statement,
+        "period": _period_label(statement.date_from, statement.date_to),
+        "download_path": _absolute_url(reverse("wallet:statement_download", args=[statement.pk])),
+        "site_name": getattr(settings, "SITE_NAME", "Snobistic"),
+    }
+    try:
+        send_mail(
+            subject=render_to_string("wallet/emails/statement_ready_subject.txt", ctx).strip(),
+            message=render_to_string("wallet/emails/statement_ready.txt", ctx),
+            from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None),
+            recipient_list=[user.email],
+            fail_silently=True,
+        )
+    except Exception:
+        logger.exception("Wallet statement email failed (statement_id=%s)", statement.pk)
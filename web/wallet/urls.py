@@ -8,6 +8,8 @@ app_name = "wallet"
 urlpatterns = [
     path("", views.wallet_home, name="home"),
     path("tranzactii/", views.wallet_transactions, name="transactions"),
+    path("extras/", views.wallet_statement, name="statement"),
+    path("extras/<int:pk>/descarca/", views.wallet_statement_download, name="statement_download"),
 
     path("alimentare/", views.wallet_topup, name="topup"),
     path("alimentare/succes/", views.wallet_topup_success, name="topup_success"),
@@ -2,22 +2,24 @@
 from __future__ import annotations
 
 from decimal import Decimal
-import csv
 
 import stripe
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
-from django.http import HttpResponse, HttpResponseBadRequest
-from django.shortcuts import redirect, render
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
-from .forms import TopUpForm, WithdrawForm
-from .models import WalletTransaction, WithdrawalRequest
+from core.files import serve_file
+
+from .forms import StatementForm, TopUpForm, WithdrawForm
+from .models import WalletStatement, WalletTransaction, WithdrawalRequest
 from .services import credit_wallet, debit_wallet, get_or_create_wallet_for_user
+from .statements import iter_statement_csv, iter_transactions_csv, request_statement, statement_filename
 
 stripe.api_key = getattr(settings, "STRIPE_SECRET_KEY", "")
 
@@ -53,23 +55,9 @@ def wallet_transactions(request):
         qs = qs.filter(created_at__year=now.year)
 
     if request.GET.get("export") == "csv":
-        response = HttpResponse(content_type="text/csv")
+        date_from, date_to = _period_dates(period, now)
+        response = StreamingHttpResponse(iter_transactions_csv(wallet, date_from, date_to), content_type="text/csv")
         response["Content-Disposition"] = f'attachment; filename="wallet_{period}.csv"'
-        writer = csv.writer(response)
-        writer.writerow(["Dată", "Tip", "Direcție", "Metodă", "Sumă", "Sold după", "External ID"])
-
-        for tx in qs:
-            writer.writerow(
-                [
-                    tx.created_at.strftime("%Y-%m-%d %H:%M"),
-                    tx.get_tx_type_display() if hasattr(tx, "get_tx_type_display") else tx.tx_type,
-                    tx.get_direction_display() if hasattr(tx, "get_direction_display") else tx.direction,
-                    tx.method,
-                    tx.amount,
-                    tx.balance_after,
-                    tx.external_id,
-                ]
-            )
         return response
 
     # limit rezonabil în UI (poți crește / adăuga pagination mai târziu)
@@ -81,6 +69,70 @@ def wallet_transactions(request):
     )
 
 
+def _period_dates(period: str, now):
+    today = timezone.localtime(now).date()
+    if period == "daily":
+        return today, today
+    if period == "monthly":
+        return today.replace(day=1), today
+    if period == "yearly":
+        return today.replace(month=1, day=1), today
+    return None, None
+
+
+def _stream_statement_csv(wallet, date_from, date_to, *, filename: str) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(
+        iter_statement_csv(wallet, date_from, date_to),
+        content_type="text/csv; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+def wallet_statement(request):
+    """
+    Extras de cont:
+    - GET -> formular + extrasele generate (fără efecte)
+    - POST, CSV fără "background" -> streaming direct din DB
+    - POST, PDF sau background=1 -> fișier generat în fundal, userul primește email când e gata
+    """
+    wallet = get_or_create_wallet_for_user(request.user)
+    form = StatementForm(request.POST if request.method == "POST" else None)
+
+    if request.method == "POST" and form.is_valid():
+        date_from = form.cleaned_data["date_from"]
+        date_to = form.cleaned_data["date_to"]
+        fmt = form.cleaned_data["fmt"]
+
+        if fmt == WalletStatement.Format.CSV and not form.cleaned_data["background"]:
+            return _stream_statement_csv(
+                wallet,
+                date_from,
+                date_to,
+                filename=statement_filename(wallet, date_from, date_to, "csv"),
+            )
+
+        request_statement(wallet, date_from=date_from, date_to=date_to, fmt=fmt)
+        messages.success(request, "Extrasul se generează. Vei primi un email când este gata de descărcat.")
+        return redirect("wallet:statement")
+
+    statements = wallet.statements.all()[:20]
+    return render(
+        request,
+        "wallet/wallet_statements.html",
+        {"wallet": wallet, "form": form, "statements": statements},
+    )
+
+
+@login_required
+def wallet_statement_download(request, pk: int):
+    statement = get_object_or_404(WalletStatement, pk=pk, wallet__user=request.user)
+    if statement.status != WalletStatement.Status.READY or not statement.file:
+        raise Http404("Extrasul nu este încă disponibil.")
+    return serve_file(request, statement.file)
+
+
 @login_required
 def wallet_topup(request):
     wallet = get_or_create_wallet_for_user(request.user)